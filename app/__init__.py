@@ -2,8 +2,9 @@ import os
 
 from flask import Flask
 
-from app import cache, config, crypto, db, demo, hooks, scheduler, state
+from app import cache, compression, config, crypto, db, demo, health, hooks, scheduler, state
 from app.clients import plex
+from app.emails import fetchers
 from app.log import setup_logging
 
 def create_app():
@@ -28,6 +29,7 @@ def create_app():
 
     os.makedirs("database", exist_ok=True)
     os.makedirs(os.path.join("database", "hosted_images"), exist_ok=True)
+    os.makedirs(config.ART_CACHE_DIR, exist_ok=True)
 
     db.migrate_data_from_separate_dbs()
     db.migrate_musicseerr_to_droppedneedle()
@@ -47,10 +49,18 @@ def create_app():
     db.migrate_email_templates_for_custom_html()
     db.migrate_email_history_for_hosted_html()
 
+    # Demo mode re-seeds its cache on every start; nothing worth keeping.
+    if not config.DEMO_MODE:
+        cache.enable_persistent_cache()
+        cache.set_cache_refresher(fetchers.refresh_cache_segment, fetchers.REVALIDATED_SEGMENTS)
+
     state.plex_headers = plex.get_plex_headers()
 
     hooks.register(app)
     demo.install(app)
+    compression.install(app)
+    # probes are answered ahead of Flask, so they never wait on its hooks
+    app.wsgi_app = health.HealthMiddleware(app.wsgi_app)
 
     # Same worker gate as the old __main__ block: skip only in the werkzeug
     # reloader parent (WERKZEUG_RUN_MAIN unset while FLASK_DEBUG=1).
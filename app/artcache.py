@@ -0,0 +1,246 @@
+import hashlib, json, os, secrets, threading, time
+
+from email.utils import parsedate_to_datetime
+
+from flask import Response, send_file
+
+from app import config
+from app.security import safe_get
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Disk cache for the artwork proxies (/proxy-art, /proxy-jf-art, the Sonarr
+# and Radarr ones). Each image is one <key>.img file plus a <key>.json with its
+# content type and validators, under config.ART_CACHE_DIR; the key is a hash of
+# the image's upstream URL without credentials, so tokens never reach disk.
+#
+# - A miss streams the upstream body to the browser while writing it to a
+#   temp file, renamed into place once complete (an aborted download leaves
+#   nothing behind).
+# - A hit younger than config.ART_CACHE_FRESH_SECONDS never touches the media
+#   server. An older one is revalidated with If-None-Match/If-Modified-Since;
+#   a 304 just restamps it, and an unreachable server still gets the copy.
+# - Hits are served with send_file, so the browser's own If-None-Match,
+#   If-Modified-Since and Range requests are answered from disk.
+# - Derived variants (the blurred backdrop) are cached as their own files,
+#   tied to the version of the original they were made from.
+
+CHUNK_SIZE = 64 * 1024
+BROWSER_MAX_AGE = 86400
+# Eviction trims to this share of the budget, so it does not run on every write.
+EVICT_TO = 0.9
+
+_usage = {'bytes': None}
+_usage_lock = threading.Lock()
+_evict_lock = threading.Lock()
+
+def _key(identity):
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+def _paths(key):
+    base = os.path.join(config.ART_CACHE_DIR, key[:2], key)
+    return base + '.img', base + '.json'
+
+def _read_meta(key):
+    data_path, meta_path = _paths(key)
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if os.path.isfile(data_path) else None
+
+def _write_meta(key, meta):
+    _, meta_path = _paths(key)
+    tmp = f"{meta_path}.{secrets.token_hex(4)}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+
+def _commit(key, tmp, meta):
+    """Move a completed temp file into place and record its metadata."""
+    data_path, _ = _paths(key)
+    try:
+        previous = os.path.getsize(data_path)
+    except OSError:
+        previous = 0
+    size = os.path.getsize(tmp)
+    os.replace(tmp, data_path)
+    _write_meta(key, meta)
+    _account(size - previous)
+
+def _store(key, body, meta):
+    data_path, _ = _paths(key)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    tmp = f"{data_path}.{secrets.token_hex(4)}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(body)
+    _commit(key, tmp, meta)
+
+def _scan():
+    """[(mtime, size, data_path, meta_path)] of every cached image."""
+    entries = []
+    for root, _, files in os.walk(config.ART_CACHE_DIR):
+        for name in files:
+            if not name.endswith('.img'):
+                continue
+            data_path = os.path.join(root, name)
+            try:
+                stat = os.stat(data_path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, data_path, data_path[:-4] + '.json'))
+    return entries
+
+def _account(delta):
+    with _usage_lock:
+        if _usage['bytes'] is None:
+            _usage['bytes'] = sum(size for _, size, _, _ in _scan())
+        else:
+            _usage['bytes'] += delta
+        over = _usage['bytes'] > config.ART_CACHE_MAX_BYTES
+    if over:
+        evict()
+
+def evict():
+    """Remove least recently served images until the cache is back under
+    EVICT_TO of its budget. Hits touch their file's mtime, so that is the
+    recency order."""
+    with _evict_lock:
+        entries = sorted(_scan())
+        total = sum(size for _, size, _, _ in entries)
+        target = config.ART_CACHE_MAX_BYTES * EVICT_TO
+        for _, size, data_path, meta_path in entries:
+            if total <= target:
+                break
+            for path in (meta_path, data_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+        with _usage_lock:
+            _usage['bytes'] = total
+
+def _etag(key, meta):
+    return hashlib.sha1(f"{key}:{meta['version']}".encode('utf-8')).hexdigest()[:24]
+
+def _from_disk(key, meta):
+    data_path, _ = _paths(key)
+    try:
+        os.utime(data_path)
+    except OSError:
+        pass
+    return send_file(data_path, mimetype=meta['content_type'], conditional=True,
+                     etag=_etag(key, meta), last_modified=meta['last_modified'], max_age=BROWSER_MAX_AGE)
+
+def _serve_cached(key, meta, variant, transform):
+    if transform is None:
+        return _from_disk(key, meta)
+    variant_key = _key(f"{key}:{variant}")
+    variant_meta = _read_meta(variant_key)
+    if variant_meta is None or variant_meta['version'] != meta['version']:
+        data_path, _ = _paths(key)
+        with open(data_path, 'rb') as f:
+            body, content_type = transform(f.read(), meta['content_type'])
+        variant_meta = {**meta, 'content_type': content_type}
+        _store(variant_key, body, variant_meta)
+    return _from_disk(variant_key, variant_meta)
+
+def _last_modified(header, fallback):
+    try:
+        return parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return fallback
+
+def _stream(key, upstream, meta):
+    data_path, _ = _paths(key)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    tmp = f"{data_path}.{secrets.token_hex(4)}.tmp"
+
+    def generate():
+        complete = False
+        try:
+            with open(tmp, 'wb') as f:
+                for chunk in upstream.iter_content(CHUNK_SIZE):
+                    if chunk:
+                        f.write(chunk)
+                        yield chunk
+            complete = True
+        finally:
+            upstream.close()
+            if complete:
+                _commit(key, tmp, meta)
+            else:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+    response = Response(generate(), mimetype=meta['content_type'])
+    # requests undoes any transfer gzip, so the upstream length only holds without one
+    if upstream.headers.get('Content-Length') and not upstream.headers.get('Content-Encoding'):
+        response.headers['Content-Length'] = upstream.headers['Content-Length']
+    response.set_etag(_etag(key, meta))
+    response.last_modified = meta['last_modified']
+    response.cache_control.public = True
+    response.cache_control.max_age = BROWSER_MAX_AGE
+    return response
+
+def serve_art(identity, url, headers, *, label, variant=None, transform=None):
+    """Response for one artwork request through the disk cache. identity names
+    the image without credentials; url is what to fetch (it may carry them).
+    transform(raw, content_type) -> (body, content_type) derives the variant
+    named `variant` from the original. Raises when the image cannot be
+    fetched and nothing is cached."""
+    key = _key(identity)
+    meta = _read_meta(key)
+    if meta and time.time() - meta['fetched_at'] < config.ART_CACHE_FRESH_SECONDS:
+        return _serve_cached(key, meta, variant, transform)
+
+    upstream_headers = dict(headers)
+    if meta and meta.get('upstream_etag'):
+        upstream_headers['If-None-Match'] = meta['upstream_etag']
+    if meta and meta.get('upstream_last_modified'):
+        upstream_headers['If-Modified-Since'] = meta['upstream_last_modified']
+    upstream = None
+    try:
+        upstream = safe_get(url, stream=True, timeout=15, headers=upstream_headers)
+        if upstream.status_code == 304 and meta:
+            upstream.close()
+            meta['fetched_at'] = time.time()
+            _write_meta(key, meta)
+            return _serve_cached(key, meta, variant, transform)
+        upstream.raise_for_status()
+    except Exception as e:
+        # an error status still holds its pooled connection open
+        if upstream is not None:
+            upstream.close()
+        if meta is None:
+            raise
+        logger.warning(f"{label}: revalidation failed, serving the cached copy: {e}")
+        return _serve_cached(key, meta, variant, transform)
+
+    now = time.time()
+    upstream_etag = upstream.headers.get('ETag')
+    upstream_last_modified = upstream.headers.get('Last-Modified')
+    meta = {
+        'content_type': upstream.headers.get('Content-Type', 'image/jpeg'),
+        'upstream_etag': upstream_etag,
+        'upstream_last_modified': upstream_last_modified,
+        'last_modified': _last_modified(upstream_last_modified, now),
+        'fetched_at': now,
+        'version': upstream_etag or upstream_last_modified or repr(now),
+    }
+    logger.info(f"{label}: cache miss - Content-Type: {meta['content_type']}, Size: {upstream.headers.get('Content-Length', 'unknown')}")
+    if transform is not None:
+        # a variant needs the whole original first; nothing to stream
+        try:
+            body = upstream.content
+        finally:
+            upstream.close()
+        _store(key, body, meta)
+        return _serve_cached(key, meta, variant, transform)
+    return _stream(key, upstream, meta)
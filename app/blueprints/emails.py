@@ -13,7 +13,7 @@ from app.contacts_import import contacts_to_csv, is_email, match_contacts_to_use
 from app.clients.jellyfin import fetch_jellyfin_users
 from app.clients.mediaserver import get_media_server_type, is_jellyfin_like, media_user_scope
 from app.emails.send import SendRequest, send_standard_email_with_cids, send_recommendations_email_with_cids, resend_email_from_history
-from app.emails.preview import render_preview_email
+from app.emails.preview import BUSY, SUPERSEDED, render_latest, render_preview_email, render_preview_update
 from app.emails.pdf import render_html_to_pdf, render_history_email_to_pdf, pdf_filename
 
 import logging
@@ -29,8 +29,19 @@ def preview_email():
     data, err = json_body()
     if err:
         return err
+
+    def _render():
+        if data.get('known_fragments') is not None:
+            return render_preview_update(data)
+        return {"html": render_preview_email(data)}
+
     try:
-        return jsonify({"html": render_preview_email(data)})
+        result, skipped = render_latest(session.get('csrf_token') or '', str(data.get('preview_client') or ''), _render)
+        if skipped == SUPERSEDED:
+            return jsonify({"error": "Superseded by a newer preview", "superseded": True}), 409
+        if skipped == BUSY:
+            return jsonify({"error": "Too many previews in progress, try again"}), 503
+        return jsonify(result)
     except Exception as e:
         logger.exception("preview render failed")
         return jsonify({"error": f"Preview render failed: {e}"}), 500
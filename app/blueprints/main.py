@@ -1,3 +1,4 @@
+import hashlib
 import secrets
 import time
 
@@ -7,7 +8,7 @@ import re
 
 from app import config, state
 from app.db import db_connect
-from app.cache import is_cache_valid, get_cached_data, get_cache_info, clear_cache, get_global_cache_status
+from app.cache import is_cache_valid, get_cached_data, get_cache_info, clear_cache, get_global_cache_status, load_persisted_cache, get_cache_stats, get_cache_version
 from app.progress import progress_get
 from app.crypto import decrypt
 from app.net import is_safe_fetch_url, configured_media_hosts
@@ -17,7 +18,9 @@ from app.security import require_csrf_for_json, requires_auth, safe_get
 from app.clients.jellyfin import get_jellyfin_headers
 from app.store import get_saved_email_lists
 from app.theme import get_theme_settings
-from app.emails.images import blur_image_bytes
+from app.emails.fetchers import GRAPH_COMMANDS
+from app.emails.imaging import blur_image_bytes
+from app.artcache import serve_art
 
 import logging
 
@@ -25,6 +28,21 @@ logger = logging.getLogger(__name__)
 
 bp = Blueprint('main', __name__)
 
+# Datasets the builder page fetches from /datasets/<name> when their snap-in
+# card is opened, instead of having them serialized into the page: name ->
+# (cache segment, the id of the <script type="application/json"> tag the
+# page's scripts read it from).
+INDEX_DATASETS = {
+    'recommendations': ('recommendations_json', 'recommendations-json'),
+    'droppedneedle_wrapped': ('droppedneedle_wrapped_json', 'droppedneedle-wrapped-json'),
+    'droppedneedle_server': ('droppedneedle_server_json', 'droppedneedle-server-json'),
+    'yearly_wrapped': ('yearly_wrapped_json', 'yearly-wrapped-json'),
+    'sonarr_coming_soon': ('sonarr_coming_soon_json', 'sonarr-coming-soon-json'),
+    'radarr_coming_soon': ('radarr_coming_soon_json', 'radarr-coming-soon-json'),
+    'ombi_requests': ('ombi_requests_json', 'ombi-requests-json'),
+    'seerr_requests': ('seerr_requests_json', 'seerr-requests-json'),
+}
+
 def _redact_token(url):
     return re.sub(r'(X-Plex-Token=)[^&]*', r'\1REDACTED', url)
 
@@ -35,20 +53,7 @@ def index():
     users = None
     user_dict = {}
     users_full_data = None
-    graph_commands = [
-        { 'command' : 'get_concurrent_streams_by_stream_type', 'name' : 'Stream Type' },
-        { 'command' : 'get_plays_by_date', 'name' : 'Plays by Date' },
-        { 'command' : 'get_plays_by_dayofweek', 'name' : 'Plays by Day' },
-        { 'command' : 'get_plays_by_hourofday', 'name' : 'Plays by Hour' },
-        { 'command' : 'get_plays_by_source_resolution', 'name' : 'Plays by Source Res' },
-        { 'command' : 'get_plays_by_stream_resolution', 'name' : 'Plays by Stream Res' },
-        { 'command' : 'get_plays_by_stream_type', 'name' : 'Plays by Stream Type' },
-        { 'command' : 'get_plays_by_top_10_platforms', 'name' : 'Plays by Top Platforms' },
-        { 'command' : 'get_plays_by_top_10_users', 'name' : 'Plays by Top Users' },
-        { 'command' : 'get_plays_per_month', 'name' : 'Plays per Month' },
-        { 'command' : 'get_stream_type_by_top_10_platforms', 'name' : 'Stream Type by Top Platforms' },
-        { 'command' : 'get_stream_type_by_top_10_users', 'name' : 'Stream Type by Top Users' }
-    ]
+    graph_commands = GRAPH_COMMANDS
     graph_data = []
     recent_data = []
     most_watched_data = []
@@ -221,18 +226,59 @@ def index():
                            ombi_requests_json=ombi_requests_json,
                            seerr_requests_json=seerr_requests_json,
                            csrf_token=session["csrf_token"], username=username, service_flags=service_flags,
-                           personalization_default_name=personalization.DEFAULT_NAME
+                           personalization_default_name=personalization.DEFAULT_NAME,
+                           # the INDEX_DATASETS above only decide which cards show;
+                           # the page fetches their data from /datasets/<name>
+                           lazy_datasets=True
                         )
 
-def _maybe_blur(raw, content_type):
-    if request.args.get('blur') != '1':
-        return raw, content_type
+def _blur(raw, content_type):
     try:
         return blur_image_bytes(raw), 'image/jpeg'
     except Exception:
         logger.warning("proxy-art: blur pass failed, serving the source image", exc_info=True)
         return raw, content_type
 
+_ART_ACCEPT = {'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8'}
+
+# Largest box a caller may ask the transcoder for; past it the request is
+# served at the source size.
+_ART_MAX_BOX = 2000
+
+def _art_box():
+    """(w, h) asked for with ?w=&h=, or None. Both set means fill that box
+    (the caller crops to it); h alone means no taller than h."""
+    try:
+        w = int(request.args.get('w') or 0)
+        h = int(request.args.get('h') or 0)
+    except ValueError:
+        return None
+    if not 0 < h <= _ART_MAX_BOX or not 0 <= w <= _ART_MAX_BOX:
+        return None
+    return w, h
+
+def _plex_transcode_url(plex_url, path, token, box):
+    # Plex fetches the source itself, so the token rides inside `url` too
+    source = quote(f"{path}{'&' if '?' in path else '?'}X-Plex-Token={token}", safe='')
+    w, h = box
+    if w:
+        sizing = f"width={w}&height={h}&minSize=1&upscale=1"
+    else:
+        sizing = f"width={_ART_MAX_BOX}&height={h}&minSize=0&upscale=0"
+    return f"{plex_url}/photo/:/transcode?{sizing}&url={source}&X-Plex-Token={token}"
+
+def _jellyfin_sizing(box):
+    w, h = box
+    if w:
+        return [('fillWidth', w), ('fillHeight', h), ('quality', 85)]
+    return [('maxHeight', h), ('quality', 85)]
+
+def _cached_art(identity, url, headers, label):
+    # ?blur=1 is ours (the email backdrop), cached as its own variant
+    if request.args.get('blur') == '1':
+        return serve_art(identity, url, headers, label=label, variant='blur', transform=_blur)
+    return serve_art(identity, url, headers, label=label)
+
 @bp.route('/proxy-art/<path:art_path>')
 @requires_auth
 def proxy_art(art_path):
@@ -267,7 +313,15 @@ def proxy_art(art_path):
     plex_token = settings['plex_token']
     plex_url = settings['plex_url'].rstrip('/')
 
-    if '/composite/' in art_path:
+    # ?w=&h= has Plex's transcoder size the image, so a poster arrives at the
+    # box it is shown in instead of at full resolution
+    box = _art_box()
+    identity = f"plex:{plex_url}/{art_path}"
+
+    if box and '/composite/' not in art_path:
+        full_url = _plex_transcode_url(plex_url, f"/{art_path}", decrypt(plex_token), box)
+        identity += f"@{box[0]}x{box[1]}"
+    elif '/composite/' in art_path:
         logger.info(f"proxy-art: Detected composite image: {art_path}")
         
         composite_url = f"/{art_path}"
@@ -278,12 +332,14 @@ def proxy_art(art_path):
         
         encoded_composite_url = quote(composite_url, safe='')
         
+        width, height = box if box and box[0] else (360, 540)
         full_url = (
             f"{plex_url}/photo/:/transcode"
-            f"?width=360&height=540&minSize=1&upscale=1"
+            f"?width={width}&height={height}&minSize=1&upscale=1"
             f"&url={encoded_composite_url}"
             f"&X-Plex-Token={decrypt(plex_token)}"
         )
+        identity += f"@{width}x{height}"
     else:
         full_url = f"{plex_url}/{art_path}"
         if '?' in full_url:
@@ -291,23 +347,10 @@ def proxy_art(art_path):
         else:
             full_url += f"?X-Plex-Token={decrypt(plex_token)}"
     
-    logger.info(f"proxy-art: Fetching {_redact_token(full_url)}")
-    
-    try:
-        headers = {
-            'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8'
-        }
-        
-        r = safe_get(full_url, stream=True, timeout=15, headers=headers)
-        r.raise_for_status()
-        
-        content_type = r.headers.get('Content-Type', 'image/jpeg')
-        logger.info(f"proxy-art: Success - Content-Type: {content_type}, Size: {r.headers.get('Content-Length', 'unknown')}")
+    logger.debug(f"proxy-art: Fetching {_redact_token(full_url)}")
 
-        body, content_type = _maybe_blur(r.content, content_type)
-        return Response(body, content_type=content_type, headers={
-            'Cache-Control': 'public, max-age=86400'
-        })
+    try:
+        return _cached_art(identity, full_url, _ART_ACCEPT, 'proxy-art')
     except Exception as e:
         logger.error(f"proxy-art: Error fetching {_redact_token(full_url)}: {e}")
         return Response("Image not found", status=404)
@@ -330,24 +373,19 @@ def _fetch_jellyfin_art(art_path, s):
     full_url = f"{jellyfin_url}/{art_path.lstrip('/')}"
     # image sizing params (maxWidth etc.) arrive as our query string; pass
     # them through to Jellyfin untouched. blur is ours, not Jellyfin's, so it
-    # is applied here instead of forwarded.
-    query = urlencode([(k, v) for k, v in request.args.items(multi=True) if k != 'blur'])
+    # is applied here instead of forwarded, and ?w=&h= becomes Jellyfin's own
+    # fill/max sizing.
+    params = [(k, v) for k, v in request.args.items(multi=True) if k not in ('blur', 'w', 'h')]
+    box = _art_box()
+    if box:
+        params += _jellyfin_sizing(box)
+    query = urlencode(params)
     if query:
         full_url += ('&' if '?' in full_url else '?') + query
 
     try:
-        r = safe_get(
-            full_url,
-            stream=True,
-            timeout=15,
-            headers=get_jellyfin_headers(jellyfin_api_key, {'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8'}),
-        )
-        r.raise_for_status()
-        content_type = r.headers.get('Content-Type', 'image/jpeg')
-        body, content_type = _maybe_blur(r.content, content_type)
-        return Response(body, content_type=content_type, headers={
-            'Cache-Control': 'public, max-age=86400'
-        })
+        # the API key rides in a header, so the URL is the cache identity
+        return _cached_art(f"jellyfin:{full_url}", full_url, get_jellyfin_headers(jellyfin_api_key, _ART_ACCEPT), 'proxy-jf-art')
     except Exception as e:
         logger.error(f"proxy-jf-art: Error fetching {full_url}: {e}")
         return Response("Image not found", status=404)
@@ -361,15 +399,12 @@ def proxy_sonarr_art(art_path):
     if not sonarr_url or not sonarr_api_key:
         return Response("Sonarr is not configured.", status=400)
 
+    identity = f"sonarr:{sonarr_url}/{art_path}"
     full_url = f"{sonarr_url}/{art_path}"
     full_url += ('&' if '?' in full_url else '?') + f"apikey={sonarr_api_key}"
 
     try:
-        r = safe_get(full_url, stream=True, timeout=15, headers={'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8'})
-        r.raise_for_status()
-        return Response(r.content, content_type=r.headers.get('Content-Type', 'image/jpeg'), headers={
-            'Cache-Control': 'public, max-age=86400'
-        })
+        return serve_art(identity, full_url, _ART_ACCEPT, label='proxy-sonarr-art')
     except Exception as e:
         logger.error(f"proxy-sonarr-art: Error fetching {art_path}: {e}")
         return Response("Image not found", status=404)
@@ -383,15 +418,12 @@ def proxy_radarr_art(art_path):
     if not radarr_url or not radarr_api_key:
         return Response("Radarr is not configured.", status=400)
 
+    identity = f"radarr:{radarr_url}/{art_path}"
     full_url = f"{radarr_url}/{art_path}"
     full_url += ('&' if '?' in full_url else '?') + f"apikey={radarr_api_key}"
 
     try:
-        r = safe_get(full_url, stream=True, timeout=15, headers={'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8'})
-        r.raise_for_status()
-        return Response(r.content, content_type=r.headers.get('Content-Type', 'image/jpeg'), headers={
-            'Cache-Control': 'public, max-age=86400'
-        })
+        return serve_art(identity, full_url, _ART_ACCEPT, label='proxy-radarr-art')
     except Exception as e:
         logger.error(f"proxy-radarr-art: Error fetching {art_path}: {e}")
         return Response("Image not found", status=404)
@@ -427,8 +459,9 @@ def clear_cache_route():
 @bp.route('/cache_status', methods=['GET'])
 @requires_auth
 def cache_status():
+    load_persisted_cache()
     status = {}
-    for key in state.cache_storage:
+    for key in list(state.cache_storage):
         status[key] = {
             'has_data': state.cache_storage[key]['data'] is not None,
             'is_valid': is_cache_valid(key),
@@ -440,9 +473,51 @@ def cache_status():
         'title': badge.get('status', ''),
         'text': badge.get('age_display', 'none') if badge.get('has_data') else 'none',
         'has_data': bool(badge.get('has_data')),
+        'refreshing': bool(badge.get('refreshing')),
     }
+    status['hit_stats'] = get_cache_stats()
     return jsonify(status)
 
+@bp.route('/cache_stats', methods=['GET'])
+@requires_auth
+def cache_stats():
+    """Per-segment size, hit rate, fill latency, refresh source and entry
+    ages for the settings page cache panel."""
+    load_persisted_cache()
+    segments = get_cache_stats()
+    return jsonify({
+        'segments': segments,
+        'total_bytes': sum(segment['bytes'] for segment in segments.values()),
+        'max_bytes': config.CACHE_MAX_BYTES,
+        'soft_expiry_seconds': config.CACHE_DURATION,
+        'hard_expiry_seconds': config.CACHE_EXTENDED_DURATION,
+        'persistent': bool(state.cache_persist['enabled']),
+    })
+
+@bp.route('/datasets/<name>', methods=['GET'])
+@requires_auth
+def dataset(name):
+    """One cached dataset of the builder page as JSON. The ETag is built from
+    the cache entry's key and fill time, so a revalidation that finds the
+    same entry answers 304 without serializing anything."""
+    if name not in INDEX_DATASETS:
+        return jsonify({'error': f'Unknown dataset: {name}'}), 404
+    segment, _ = INDEX_DATASETS[name]
+    version = f"{name}:{get_cache_version(segment)}:{is_cache_valid(segment, strict=False)}"
+    etag = hashlib.sha1(version.encode('utf-8')).hexdigest()
+
+    # weak match: compression marks the tag weak on the way out
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        data = get_cached_data(segment, strict=True) or get_cached_data(segment, strict=False)
+        resp = jsonify({'name': name, 'data': data})
+    resp.set_etag(etag)
+    # private: per-login data; no-cache: the browser keeps the body but asks
+    # again (If-None-Match) on every use, so a pull is never hidden
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp
+
 @bp.route('/pull_progress', methods=['GET'])
 @requires_auth
 def pull_progress():
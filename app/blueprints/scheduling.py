@@ -7,13 +7,13 @@ from flask import Blueprint, jsonify, render_template, request, session
 from app import config, dates
 from app.db import db_connect
 from app.settings_store import get_settings
-from app.cache import can_use_cached_data_for_preview, get_cached_data
+from app.cache import can_use_cached_data_for_preview, get_cached_data, get_cached_variant
 from app.security import require_csrf_for_json, requires_auth, json_body
 from app.store import get_saved_email_lists, get_email_schedules, create_email_schedule, update_email_schedule, delete_email_schedule, toggle_schedule_status
 from app.theme import get_theme_settings
 from app.clients.tautulli import run_tautulli_command
 from app.clients.conjurr import run_conjurr_command
-from app.emails.fetchers import fetch_tautulli_data_for_email
+from app.emails.fetchers import GRAPH_COMMANDS, fetch_tautulli_data_for_email
 from app.emails.scheduled import SKIP_TRIGGER_LABELS, SKIP_TRIGGER_TYPES, send_scheduled_email
 
 import logging
@@ -323,7 +323,8 @@ def preview_schedule(schedule_id):
             items_count,
             stats_type=settings.get('stats_type', 'plays'),
             recently_added_mode=settings.get('recently_added_mode', 'items'),
-            recently_added_sort=settings.get('recently_added_sort', 'date')
+            recently_added_sort=settings.get('recently_added_sort', 'date'),
+            use_cache=True,
         ) if settings.get('tautulli_url') and settings.get('tautulli_api') else {
             'settings': settings,
             'stats': [],
@@ -495,9 +496,10 @@ def preview_schedule_page(schedule_id):
     
     if can_use_cache:
         logger.info(f"Preview page using cached data: {cache_reason}")
-        stats = get_cached_data('stats', strict=True) or get_cached_data('stats', strict=False) or []
-        graph_data = get_cached_data('graph_data', strict=True) or get_cached_data('graph_data', strict=False) or []
-        recent_data = get_cached_data('recent_data', strict=True) or get_cached_data('recent_data', strict=False) or []
+        # the matching range may be an older pull or another schedule's fetch
+        stats = get_cached_variant('stats', strict=False, time_range=date_range) or []
+        graph_data = get_cached_variant('graph_data', strict=False, time_range=date_range) or []
+        recent_data = get_cached_variant('recent_data', strict=False, time_range=date_range) or get_cached_data('recent_data', strict=False) or []
         recommendations = (get_cached_data('recommendations', strict=True) or get_cached_data('recommendations', strict=False) or {})
     else:
         logger.info(f"Preview page using cached data (fallback): {cache_reason}")
@@ -506,21 +508,6 @@ def preview_schedule_page(schedule_id):
         recent_data = get_cached_data('recent_data', strict=False) or []
         recommendations = get_cached_data('recommendations', strict=False) or {}
     
-    graph_commands = [
-        {'command': 'get_concurrent_streams_by_stream_type', 'name': 'Stream Type'},
-        {'command': 'get_plays_by_date', 'name': 'Plays by Date'},
-        {'command': 'get_plays_by_dayofweek', 'name': 'Plays by Day'},
-        {'command': 'get_plays_by_hourofday', 'name': 'Plays by Hour'},
-        {'command': 'get_plays_by_source_resolution', 'name': 'Plays by Source Res'},
-        {'command': 'get_plays_by_stream_resolution', 'name': 'Plays by Stream Res'},
-        {'command': 'get_plays_by_stream_type', 'name': 'Plays by Stream Type'},
-        {'command': 'get_plays_by_top_10_platforms', 'name': 'Plays by Top Platforms'},
-        {'command': 'get_plays_by_top_10_users', 'name': 'Plays by Top Users'},
-        {'command': 'get_plays_per_month', 'name': 'Plays per Month'},
-        {'command': 'get_stream_type_by_top_10_platforms', 'name': 'Stream Type by Top Platforms'},
-        {'command': 'get_stream_type_by_top_10_users', 'name': 'Stream Type by Top Users'}
-    ]
-
     theme_settings = get_theme_settings()
     
     return render_template(
@@ -528,7 +515,7 @@ def preview_schedule_page(schedule_id):
         stats=stats, 
         graph_data=graph_data, 
         recent_data=recent_data,
-        graph_commands=graph_commands,
+        graph_commands=GRAPH_COMMANDS,
         recommendations=recommendations,
         settings=settings,
         user_dict=user_dict,
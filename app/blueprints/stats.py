@@ -1,30 +1,16 @@
-import time
-
 import requests
-from flask import Blueprint, jsonify, render_template, request, session
+from flask import Blueprint, current_app, jsonify, render_template, request, session, url_for
 
 from app import state
 from app.settings_store import get_service_flags, get_settings
-from app.cache import set_cached_data, get_cache_info
+from app.cache import cache_fill
 from app.crypto import decrypt
 from app.security import require_csrf_for_json, requires_auth, safe_get, json_body
 from app.theme import get_theme_settings
-from app.clients.plex import get_plex_headers, get_plex_machine_id, build_plex_web_link, reset_plex_health, plex_call_failed, plex_missing_libraries, fetch_library_sections_with_genres, search_library_items
-from app.clients.jellyfin import reset_jellyfin_health, jellyfin_call_failed, fetch_recently_added_using_jellyfin, fetch_jellyfin_library_counts, get_jellyfin_server_id, build_jellyfin_web_link, fetch_jellyfin_users
-from app.clients.jellywatch import fetch_jellywatch_home_stats, fetch_jellywatch_most_watched
-from app.clients.playback_reporting import fetch_playback_reporting_graphs
+from app.clients.plex import get_plex_headers, get_plex_machine_id, build_plex_web_link, fetch_library_sections_with_genres, search_library_items
 from app.clients.mediaserver import get_media_server_type
-from app.clients.tautulli import run_tautulli_command, days_since_year_start
-from app.progress import progress_start, progress_step, progress_done
-from app.clients.conjurr import run_conjurr_command
-from app.clients.droppedneedle import run_droppedneedle_command, fetch_droppedneedle_server_stats
-from app.clients.sonarr import fetch_sonarr_calendar
-from app.clients.radarr import fetch_radarr_calendar
-from app.clients.ombi import fetch_ombi_movie_requests, fetch_ombi_tv_requests
-from app.clients.seerr import fetch_seerr_requests
-from app.emails.fetchers import fetch_recent_data_for_index, fetch_most_watched_data
-
-from datetime import datetime, timedelta
+from app.jobs import get_job, job_events, submit_job
+from app.pulls import JSON_PULLS, PULLS, page_cache_info
 
 import logging
 
@@ -32,372 +18,48 @@ logger = logging.getLogger(__name__)
 
 bp = Blueprint('stats', __name__)
 
-@bp.route('/pull_stats', methods=['POST'])
-@requires_auth
-def pull_stats():
+def pull_response(op, data, result, status):
+    """The HTTP answer to a pull's (result, status): JSON for the JSON pulls
+    and for any failure, otherwise the builder page re-rendered from the
+    page's own payload plus what was pulled; the page swaps in the parts it
+    needs (cache card, alerts, the pulled section)."""
+    if op in JSON_PULLS or status >= 400:
+        return jsonify(result), status
+    _s = get_settings(decrypt_secrets=False)
+    cache_info = page_cache_info()
+    if not cache_info['graph_data'] or 'params' not in cache_info['graph_data']:
+        if not cache_info['graph_data']:
+            cache_info['graph_data'] = {}
+        cache_info['graph_data']['params'] = {
+            'time_range': 30
+        }
+    return render_template('index.html', stats=data.get('stats'), user_dict=data.get('user_dict', {}),
+                            graph_data=data.get('graph_data'), cache_info=cache_info,
+                            graph_commands=data.get('graph_commands'), recent_data=data.get('recent_data'),
+                            libs=data.get('libs'), settings=data.get('settings', {}),
+                            theme_settings=get_theme_settings(), service_flags=get_service_flags(_s),
+                            csrf_token=session.get("csrf_token", ""), **result)
+
+def _run_pull(op):
     require_csrf_for_json()
-    data, err = json_body()
+    pull, _progress_op, required = PULLS[op]
+    data, err = json_body(required)
     if err:
         return err
-    time_range = str(data.get('time_range', 30))
-    count = str(data.get('count', 10))
-
-    _s = get_settings(decrypt_secrets=False)
-
-    _server_type = get_media_server_type(_s)
-    if _server_type in ('jellyfin', 'emby'):
-        return _pull_stats_jellyfin(_s, time_range, count)
-    if _server_type == 'none':
-        return jsonify({"error": "No media server is configured. Standalone mode has no stats to pull."}), 400
-
-    row = (_s.get("tautulli_url"), _s.get("tautulli_api"), _s.get("server_name"), _s.get("stats_type"), _s.get("recently_added_mode"), _s.get("recently_added_sort")) if "id" in _s else None
-
-    if not row or not row[0]:
-        return jsonify({"error": "Please enter tautulli info on settings page"}), 400
-
-    tautulli_base_url = row[0].rstrip('/')
-    tautulli_api_key = decrypt(row[1])
-    stats_type = row[3] or 'plays'
-    recently_added_mode = row[4] or 'items'
-    recently_added_sort = row[5] or 'date'
-
-    cache_params = {
-        'time_range': time_range,
-        'count': count,
-        'url': tautulli_base_url,
-        'timestamp': time.time()
-    }
-
-    # 20 units: home stats, library counts, wrapped, users, 12 graphs,
-    # library names, recently added (the per-library loop reports as one),
-    # most watched (all-time), most watched (pull range)
-    progress_start('pull_stats', 20, 'Pulling home stats...')
-
-    stats, error = run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_home_stats', 'Stats', None, time_range, stats_type=stats_type)
-    stats = stats or []
-
-    # Plex deep links are attached at pull time (like recs and recently added)
-    # so the email builder and previews never need a network call.
-    plex_configured = bool(_s.get("plex_url") and _s.get("plex_token"))
-    machine_id = get_plex_machine_id() if plex_configured else None
-    if machine_id:
-        plex_web_url = _s.get("plex_web_url")
-        for stat in stats:
-            for stat_row in stat.get('rows', []):
-                stat_rating_key = stat_row.get('grandparent_rating_key') or stat_row.get('rating_key')
-                if stat_rating_key:
-                    stat_row['plex_url'] = build_plex_web_link(stat_rating_key, machine_id, plex_web_url)
-
-    progress_step('pull_stats', 'Pulling library counts...')
-    libraries_with_counts, _ = run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_libraries', None, None)
-    if libraries_with_counts:
-        stats.append({
-            'stat_id': 'library_item_counts',
-            'stat_title': 'Library Item Counts',
-            'rows': [
-                {'section_name': lib.get('section_name', ''), 'count': lib.get('count', 0)}
-                for lib in libraries_with_counts
-            ]
-        })
-
-    set_cached_data('stats', stats, cache_params)
-
-    progress_step('pull_stats', 'Pulling year in plex stats...')
-    yearly_wrapped_data, _ = run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_home_stats', 'Stats', None, days_since_year_start(), stats_type=stats_type)
-    if yearly_wrapped_data:
-        set_cached_data('yearly_wrapped_json', yearly_wrapped_data, cache_params)
-
-    progress_step('pull_stats', 'Pulling users...')
-    users, error = run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_users', 'Users', error)
-    set_cached_data('users', users, cache_params)
-
-    graph_data = []
-    graph_commands = [
-        {'command': 'get_concurrent_streams_by_stream_type', 'name': 'Stream Type'},
-        {'command': 'get_plays_by_date', 'name': 'Plays by Date'},
-        {'command': 'get_plays_by_dayofweek', 'name': 'Plays by Day'},
-        {'command': 'get_plays_by_hourofday', 'name': 'Plays by Hour'},
-        {'command': 'get_plays_by_source_resolution', 'name': 'Plays by Source Res'},
-        {'command': 'get_plays_by_stream_resolution', 'name': 'Plays by Stream Res'},
-        {'command': 'get_plays_by_stream_type', 'name': 'Plays by Stream Type'},
-        {'command': 'get_plays_by_top_10_platforms', 'name': 'Plays by Top Platforms'},
-        {'command': 'get_plays_by_top_10_users', 'name': 'Plays by Top Users'},
-        {'command': 'get_plays_per_month', 'name': 'Plays per Month'},
-        {'command': 'get_stream_type_by_top_10_platforms', 'name': 'Stream Type by Top Platforms'},
-        {'command': 'get_stream_type_by_top_10_users', 'name': 'Stream Type by Top Users'}
-    ]
-    for graph_index, command in enumerate(graph_commands, 1):
-        progress_step('pull_stats', f'Pulling graphs ({graph_index}/{len(graph_commands)})...')
-        try:
-            gd, error = run_tautulli_command(tautulli_base_url, tautulli_api_key, command["command"], command["name"], error, time_range, y_axis=stats_type)
-            graph_data.append(gd if gd is not None else {})
-        except Exception as e:
-            graph_data.append({})
-            if error is None:
-                error = f"Graph Error: {str(e)}"
-            else:
-                error += f", Graph Error: {str(e)}"
-    set_cached_data('graph_data', graph_data, cache_params)
-
-    progress_step('pull_stats', 'Pulling library names...')
-    libraries, _ = run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_library_names', None, None, "10")
-    library_section_ids = {}
-    for library in (libraries or []):
-        if isinstance(library, dict) and 'section_id' in library:
-            library_section_ids[f"{library['section_id']}"] = library.get("section_name")
-
-    # Track whether Plex silently degraded to Tautulli/cached data during the
-    # recently-added pull, so the UI can warn instead of showing partial data.
-    progress_step('pull_stats', 'Pulling recently added...')
-    reset_plex_health()
-    recent_data = fetch_recent_data_for_index(tautulli_base_url, tautulli_api_key, count, recently_added_mode=recently_added_mode, recently_added_sort=recently_added_sort)
-    plex_unavailable = plex_configured and plex_call_failed()
-    missing_libraries = plex_missing_libraries() if plex_configured else []
-    set_cached_data('recent_data', recent_data, cache_params)
-
-    progress_step('pull_stats', 'Pulling most watched...')
-    most_watched_data = fetch_most_watched_data(tautulli_base_url, tautulli_api_key, metric=stats_type)
-    set_cached_data('most_watched_data', most_watched_data, cache_params)
-
-    progress_step('pull_stats', 'Pulling most watched (pull range)...')
-    most_watched_recent_data = fetch_most_watched_data(tautulli_base_url, tautulli_api_key, days=time_range, metric=stats_type)
-    set_cached_data('most_watched_recent_data', most_watched_recent_data, cache_params)
-
-    user_dict = {}
-    users_full_data = None
-    if users:
-        users_full_data = users
-        for user in users:
-            if user['email'] != None and user['is_active']:
-                user_dict[user['user_id']] = user['email']
-
-    progress_done('pull_stats')
-
-    return jsonify({
-        "success": True,
-        "alert": f"Fresh data loaded! Stats/graphs for {time_range} days, and recently added {'within last ' + count + ' days' if recently_added_mode == 'days' else count + ' items'}.",
-        "stats": stats or [],
-        "yearly_wrapped_json": yearly_wrapped_data or [],
-        "graph_data": graph_data,
-        "graph_commands": graph_commands,
-        "recent_data": recent_data,
-        "most_watched_data": most_watched_data,
-        "user_dict": user_dict,
-        "users_full_data": users_full_data,
-        "cache_info": {
-            "stats": get_cache_info('stats'),
-            "users": get_cache_info('users'),
-            "graph_data": get_cache_info('graph_data'),
-            "recent_data": get_cache_info('recent_data'),
-            "recommendations_json": get_cache_info('recommendations_json'),
-            "filtered_users": get_cache_info('filtered_users'),
-        },
-        "time_range": time_range,
-        "count": count,
-        "plex_unavailable": plex_unavailable,
-        "missing_libraries": missing_libraries,
-        "error": error
-    })
-
-def _pull_stats_jellyfin(_s, time_range, count):
-    """The /pull_stats flow when Jellyfin is the media server. Recently added
-    and library counts come from Jellyfin directly; home stats and graphs
-    come from Jellywatch when configured (empty otherwise, which every
-    consumer already handles). Response shape matches the Plex path exactly;
-    the plex_unavailable key doubles as the degraded-to-cache warning for
-    whichever server is active."""
-    if not (_s.get('jellyfin_url') and _s.get('jellyfin_api_key')):
-        return jsonify({"error": "Please enter Jellyfin info on settings page"}), 400
-
-    recently_added_mode = _s.get('recently_added_mode') or 'items'
-    recently_added_sort = _s.get('recently_added_sort') or 'date'
-    stats_type = _s.get('stats_type') or 'plays'
-
-    cache_params = {
-        'time_range': time_range,
-        'count': count,
-        'url': _s.get('jellyfin_url'),
-        'timestamp': time.time()
-    }
+    result, status = pull(data)
+    return pull_response(op, data, result, status)
 
-    progress_start('pull_stats', 3, 'Pulling library counts...')
-    reset_jellyfin_health()
-    error = None
-
-    include_user_info = (_s.get('include_user_info') or 'enabled') != 'disabled'
-
-    # Home stats come from Jellywatch when configured; each stat is offered
-    # only if it has rows (absence handled everywhere downstream).
-    stats = fetch_jellywatch_home_stats(days=time_range, include_user_info=include_user_info)
-
-    # Deep links attached at pull time (the Plex NEWS-5 pattern) so the email
-    # builder and previews never need a network call. Jellywatch item thumbs
-    # carry /Items/{id}/... paths; recover the id for the web link.
-    server_id = get_jellyfin_server_id()
-    if server_id:
-        jellyfin_web_url = _s.get('jellyfin_web_url')
-        jellyfin_url = _s.get('jellyfin_url')
-        for stat in stats:
-            for stat_row in stat.get('rows', []):
-                thumb = stat_row.get('thumb') or ''
-                if '/Items/' in thumb:
-                    item_id = thumb.split('/Items/', 1)[1].split('/', 1)[0]
-                    if item_id:
-                        stat_row['plex_url'] = build_jellyfin_web_link(item_id, server_id, jellyfin_web_url, jellyfin_url)
-
-    library_counts = fetch_jellyfin_library_counts()
-    if library_counts:
-        stats.append({
-            'stat_id': 'library_item_counts',
-            'stat_title': 'Library Item Counts',
-            'rows': library_counts
-        })
-    set_cached_data('stats', stats, cache_params)
-
-    progress_step('pull_stats', 'Pulling graphs...')
-    graph_data, graph_commands = fetch_playback_reporting_graphs(days=int(time_range or 30))
-    set_cached_data('graph_data', graph_data, cache_params)
-
-    # Year-in-review off the same Jellywatch stats over a full-year window;
-    # hides itself (empty) when Jellywatch cannot answer.
-    from app.clients.tautulli import days_since_year_start
-    yearly_wrapped_data = fetch_jellywatch_home_stats(days=days_since_year_start(), include_user_info=include_user_info)
-    if yearly_wrapped_data:
-        set_cached_data('yearly_wrapped_json', yearly_wrapped_data, cache_params)
-
-    progress_step('pull_stats', 'Pulling users...')
-    users = fetch_jellyfin_users() or None
-    set_cached_data('users', users, cache_params)
-
-    user_dict = {}
-    users_full_data = users
-    for user in (users or []):
-        if user.get('email') and user.get('is_active'):
-            user_dict[user['user_id']] = user['email']
-
-    progress_step('pull_stats', 'Pulling recently added...')
-    recent_data = fetch_recently_added_using_jellyfin(count, recently_added_mode=recently_added_mode, recently_added_sort=recently_added_sort)
-    set_cached_data('recent_data', recent_data, cache_params)
-
-    progress_step('pull_stats', 'Pulling most watched...')
-    most_watched_data = fetch_jellywatch_most_watched(metric=stats_type)
-    set_cached_data('most_watched_data', most_watched_data, cache_params)
-    set_cached_data('most_watched_recent_data', fetch_jellywatch_most_watched(days=time_range, metric=stats_type), cache_params)
-
-    jellyfin_unavailable = jellyfin_call_failed()
-    progress_done('pull_stats')
-
-    return jsonify({
-        "success": True,
-        "alert": f"Fresh data loaded! Recently added {'within last ' + count + ' days' if recently_added_mode == 'days' else count + ' items'} from Jellyfin.",
-        "stats": stats,
-        "yearly_wrapped_json": yearly_wrapped_data or [],
-        "graph_data": graph_data,
-        "graph_commands": graph_commands,
-        "recent_data": recent_data,
-        "most_watched_data": most_watched_data,
-        "user_dict": user_dict,
-        "users_full_data": users_full_data,
-        "cache_info": {
-            "stats": get_cache_info('stats'),
-            "users": get_cache_info('users'),
-            "graph_data": get_cache_info('graph_data'),
-            "recent_data": get_cache_info('recent_data'),
-            "recommendations_json": get_cache_info('recommendations_json'),
-            "filtered_users": get_cache_info('filtered_users'),
-        },
-        "time_range": time_range,
-        "count": count,
-        "plex_unavailable": jellyfin_unavailable,
-        "missing_libraries": [],
-        "error": error
-    })
+@bp.route('/pull_stats', methods=['POST'])
+@requires_auth
+@cache_fill('manual')
+def pull_stats():
+    return _run_pull('pull_stats')
 
 @bp.route('/pull_recommendations', methods=['POST'])
 @requires_auth
+@cache_fill('manual')
 def pull_recommendations():
-    require_csrf_for_json()
-    recommendations_json = {}
-    error = None
-    alert = None
-    
-    data, err = json_body(["to_emails"])
-    if err:
-        return err
-    stats = data.get('stats')
-    user_dict = data.get('user_dict', {})
-    graph_data = data.get('graph_data')
-    graph_commands = data.get('graph_commands')
-    recent_data = data.get('recent_data')
-    libs = data.get('libs')
-    settings = data.get('settings', {})
-    to_emails = data['to_emails']
-
-    _s = get_settings(decrypt_secrets=False)
-    row = (_s.get("conjurr_url"),) if "id" in _s else None
-
-    if row:
-        conjurr_settings = {
-            "conjurr_url": row[0]
-        }
-    else:
-        conjurr_settings = {
-            "conjurr_url": ""
-        }
-
-    selected_emails = {e.strip().lower() for e in to_emails.split(',') if e.strip()}
-    filtered_users = {
-        k: v for k, v in user_dict.items()
-        if v and str(v).strip().lower() in selected_emails
-    }
-
-    if request.method == 'POST':
-        if conjurr_settings['conjurr_url'] == "":
-            return render_template('index.html', error='Please enter conjurr info on settings page',
-                                    stats=stats, user_dict=user_dict, graph_data=graph_data,
-                                    graph_commands=graph_commands, recent_data=recent_data,
-                                    libs=libs, settings=settings, theme_settings=get_theme_settings(),
-                                    service_flags=get_service_flags(_s),
-                                    csrf_token=session.get("csrf_token", ""))
-        else:
-            conjurr_base_url = conjurr_settings['conjurr_url']
-            progress_start('pull_recommendations', max(len(filtered_users), 1), 'Pulling recommendations...')
-
-            def _recs_progress(user_id):
-                progress_step('pull_recommendations', f'Pulled recommendations for {filtered_users.get(user_id, user_id)}')
-
-            recommendations_json, error = run_conjurr_command(conjurr_base_url, filtered_users, error, progress_cb=_recs_progress)
-            progress_done('pull_recommendations')
-            if state.recommendations_cancel.is_set():
-                state.recommendations_cancel.clear()
-                alert = "Recommendations pull cancelled. Partial results kept."
-                error = None
-            elif error:
-                alert = None
-            else:
-                alert = "User recommendations pulled from conjurr!"
-
-            cache_params = {'timestamp': time.time()}
-
-            set_cached_data('filtered_users', filtered_users, cache_params)
-            set_cached_data('recommendations_json', recommendations_json, cache_params)
-
-    cache_info = {
-        'stats': get_cache_info('stats'),
-        'users': get_cache_info('users'), 
-        'graph_data': get_cache_info('graph_data'),
-        'recent_data': get_cache_info('recent_data'),
-        'recommendations_json': get_cache_info('recommendations_json'),
-        'filtered_users': get_cache_info('filtered_users')
-    }
-    
-    theme_settings = get_theme_settings()
-
-    return render_template('index.html', stats=stats, user_dict=user_dict, graph_data=graph_data, cache_info=cache_info,
-                            graph_commands=graph_commands, recent_data=recent_data, libs=libs, settings=settings,
-                            recommendations_json=recommendations_json, filtered_users=filtered_users, alert=alert,
-                            error=error, theme_settings=theme_settings, service_flags=get_service_flags(_s),
-                            csrf_token=session.get("csrf_token", ""))
+    return _run_pull('pull_recommendations')
 
 @bp.route('/pull_recommendations/cancel', methods=['POST'])
 @requires_auth
@@ -410,320 +72,72 @@ def pull_recommendations_cancel():
 
 @bp.route('/pull_droppedneedle_stats', methods=['POST'])
 @requires_auth
+@cache_fill('manual')
 def pull_droppedneedle_stats():
-    require_csrf_for_json()
-    droppedneedle_wrapped_json = {}
-    droppedneedle_server_json = None
-    error = None
-    alert = None
-
-    data, err = json_body(["to_emails"])
-    if err:
-        return err
-    stats = data.get('stats')
-    user_dict = data.get('user_dict', {})
-    graph_data = data.get('graph_data')
-    graph_commands = data.get('graph_commands')
-    recent_data = data.get('recent_data')
-    libs = data.get('libs')
-    settings = data.get('settings', {})
-    to_emails = data['to_emails']
-
-    _s = get_settings(decrypt_secrets=False)
-    row = (_s.get("droppedneedle_url"), _s.get("droppedneedle_api_key")) if "id" in _s else None
-
-    droppedneedle_url = (row[0] or "").strip() if row else ""
-    droppedneedle_api_key = decrypt(row[1]) if row and row[1] else ""
-
-    selected_emails = {e.strip().lower() for e in to_emails.split(',') if e.strip()}
-    filtered_users = {
-        k: v for k, v in user_dict.items()
-        if v and str(v).strip().lower() in selected_emails
-    }
-
-    if droppedneedle_url == "" or droppedneedle_api_key == "":
-        return render_template('index.html', error='Please enter DroppedNeedle URL and API key on settings page',
-                                stats=stats, user_dict=user_dict, graph_data=graph_data,
-                                graph_commands=graph_commands, recent_data=recent_data,
-                                libs=libs, settings=settings, theme_settings=get_theme_settings(),
-                                service_flags=get_service_flags(_s),
-                                csrf_token=session.get("csrf_token", ""))
-
-    droppedneedle_wrapped_json, error = run_droppedneedle_command(droppedneedle_url, droppedneedle_api_key, filtered_users, error)
-    droppedneedle_server_json, server_error = fetch_droppedneedle_server_stats(droppedneedle_url, droppedneedle_api_key)
-    if server_error:
-        error = (error + ", " if error else "") + server_error
-
-    if error:
-        alert = None
-    else:
-        alert = "DroppedNeedle stats pulled!"
-
-    cache_params = {'timestamp': time.time()}
-    set_cached_data('droppedneedle_filtered_users', filtered_users, cache_params)
-    set_cached_data('droppedneedle_wrapped_json', droppedneedle_wrapped_json, cache_params)
-    set_cached_data('droppedneedle_server_json', droppedneedle_server_json, cache_params)
-
-    cache_info = {
-        'stats': get_cache_info('stats'),
-        'users': get_cache_info('users'),
-        'graph_data': get_cache_info('graph_data'),
-        'recent_data': get_cache_info('recent_data'),
-        'recommendations_json': get_cache_info('recommendations_json'),
-        'filtered_users': get_cache_info('filtered_users')
-    }
-
-    theme_settings = get_theme_settings()
-
-    return render_template('index.html', stats=stats, user_dict=user_dict, graph_data=graph_data, cache_info=cache_info,
-                            graph_commands=graph_commands, recent_data=recent_data, libs=libs, settings=settings,
-                            droppedneedle_wrapped_json=droppedneedle_wrapped_json, droppedneedle_server_json=droppedneedle_server_json,
-                            alert=alert, error=error, theme_settings=theme_settings, service_flags=get_service_flags(_s),
-                            csrf_token=session.get("csrf_token", ""))
+    return _run_pull('pull_droppedneedle_stats')
 
 @bp.route('/pull_coming_soon', methods=['POST'])
 @requires_auth
+@cache_fill('manual')
 def pull_coming_soon():
-    require_csrf_for_json()
-    sonarr_coming_soon_json = None
-    radarr_coming_soon_json = None
-    error = None
-    alert = None
-
-    data, err = json_body()
-    if err:
-        return err
-    stats = data.get('stats')
-    user_dict = data.get('user_dict', {})
-    graph_data = data.get('graph_data')
-    graph_commands = data.get('graph_commands')
-    recent_data = data.get('recent_data')
-    libs = data.get('libs')
-    settings = data.get('settings', {})
-
-    _s = get_settings(decrypt_secrets=False)
-    row = (
-        _s.get("sonarr_url"), _s.get("sonarr_api_key"),
-        _s.get("radarr_url"), _s.get("radarr_api_key"),
-        _s.get("coming_soon_days_ahead"),
-    ) if "id" in _s else None
-
-    sonarr_url = (row[0] or "").strip() if row else ""
-    sonarr_api_key = decrypt(row[1]) if row and row[1] else ""
-    radarr_url = (row[2] or "").strip() if row else ""
-    radarr_api_key = decrypt(row[3]) if row and row[3] else ""
-    days_ahead = int(row[4] or 14) if row else 14
-
-    if not sonarr_url and not radarr_url:
-        return render_template('index.html', error='Please enter a Sonarr and/or Radarr URL and API key on settings page',
-                                stats=stats, user_dict=user_dict, graph_data=graph_data,
-                                graph_commands=graph_commands, recent_data=recent_data,
-                                libs=libs, settings=settings, theme_settings=get_theme_settings(),
-                                service_flags=get_service_flags(_s),
-                                csrf_token=session.get("csrf_token", ""))
-
-    start_date = datetime.now().strftime('%Y-%m-%d')
-    end_date = (datetime.now() + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
-
-    progress_start('coming_soon', 2, 'Pulling Sonarr calendar...')
-    if sonarr_url and sonarr_api_key:
-        sonarr_coming_soon_json, sonarr_error = fetch_sonarr_calendar(sonarr_url, sonarr_api_key, start_date, end_date)
-        if sonarr_error:
-            error = (error + ", " if error else "") + sonarr_error
-
-    progress_step('coming_soon', 'Pulling Radarr calendar...')
-    if radarr_url and radarr_api_key:
-        radarr_coming_soon_json, radarr_error = fetch_radarr_calendar(radarr_url, radarr_api_key, start_date, end_date)
-        if radarr_error:
-            error = (error + ", " if error else "") + radarr_error
-    progress_done('coming_soon')
-
-    if error:
-        alert = None
-    else:
-        alert = "Coming soon calendar pulled!"
-
-    cache_params = {'timestamp': time.time()}
-    set_cached_data('sonarr_coming_soon_json', sonarr_coming_soon_json, cache_params)
-    set_cached_data('radarr_coming_soon_json', radarr_coming_soon_json, cache_params)
-
-    cache_info = {
-        'stats': get_cache_info('stats'),
-        'users': get_cache_info('users'),
-        'graph_data': get_cache_info('graph_data'),
-        'recent_data': get_cache_info('recent_data'),
-        'recommendations_json': get_cache_info('recommendations_json'),
-        'filtered_users': get_cache_info('filtered_users')
-    }
-
-    if not cache_info['graph_data'] or 'params' not in cache_info['graph_data']:
-        if not cache_info['graph_data']:
-            cache_info['graph_data'] = {}
-        cache_info['graph_data']['params'] = {
-            'time_range': 30
-        }
-
-    theme_settings = get_theme_settings()
-
-    return render_template('index.html', stats=stats, user_dict=user_dict, graph_data=graph_data, cache_info=cache_info,
-                            graph_commands=graph_commands, recent_data=recent_data, libs=libs, settings=settings,
-                            sonarr_coming_soon_json=sonarr_coming_soon_json, radarr_coming_soon_json=radarr_coming_soon_json,
-                            alert=alert, error=error, theme_settings=theme_settings, service_flags=get_service_flags(_s),
-                            csrf_token=session.get("csrf_token", ""))
+    return _run_pull('pull_coming_soon')
 
 @bp.route('/pull_ombi_requests', methods=['POST'])
 @requires_auth
+@cache_fill('manual')
 def pull_ombi_requests():
-    require_csrf_for_json()
-    ombi_requests_json = None
-    error = None
-    alert = None
-
-    data, err = json_body()
-    if err:
-        return err
-    stats = data.get('stats')
-    user_dict = data.get('user_dict', {})
-    graph_data = data.get('graph_data')
-    graph_commands = data.get('graph_commands')
-    recent_data = data.get('recent_data')
-    libs = data.get('libs')
-    settings = data.get('settings', {})
-
-    _s = get_settings(decrypt_secrets=False)
-    row = (_s.get("ombi_url"), _s.get("ombi_api_key")) if "id" in _s else None
-
-    ombi_url = (row[0] or "").strip() if row else ""
-    ombi_api_key = decrypt(row[1]) if row and row[1] else ""
-
-    if not ombi_url or not ombi_api_key:
-        return render_template('index.html', error='Please enter an Ombi URL and API key on settings page',
-                                stats=stats, user_dict=user_dict, graph_data=graph_data,
-                                graph_commands=graph_commands, recent_data=recent_data,
-                                libs=libs, settings=settings, theme_settings=get_theme_settings(),
-                                service_flags=get_service_flags(_s),
-                                csrf_token=session.get("csrf_token", ""))
-
-    progress_start('ombi_requests', 2, 'Pulling movie requests...')
-    movies, movies_error = fetch_ombi_movie_requests(ombi_url, ombi_api_key)
-    if movies_error:
-        error = (error + ", " if error else "") + movies_error
-
-    progress_step('ombi_requests', 'Pulling TV requests...')
-    tv, tv_error = fetch_ombi_tv_requests(ombi_url, ombi_api_key)
-    if tv_error:
-        error = (error + ", " if error else "") + tv_error
-    progress_done('ombi_requests')
-
-    ombi_requests_json = {'movies': movies or [], 'tv': tv or []}
-
-    if error:
-        alert = None
-    else:
-        alert = "Ombi requests pulled!"
-
-    cache_params = {'timestamp': time.time()}
-    set_cached_data('ombi_requests_json', ombi_requests_json, cache_params)
-
-    cache_info = {
-        'stats': get_cache_info('stats'),
-        'users': get_cache_info('users'),
-        'graph_data': get_cache_info('graph_data'),
-        'recent_data': get_cache_info('recent_data'),
-        'recommendations_json': get_cache_info('recommendations_json'),
-        'filtered_users': get_cache_info('filtered_users')
-    }
-
-    if not cache_info['graph_data'] or 'params' not in cache_info['graph_data']:
-        if not cache_info['graph_data']:
-            cache_info['graph_data'] = {}
-        cache_info['graph_data']['params'] = {
-            'time_range': 30
-        }
-
-    theme_settings = get_theme_settings()
-
-    return render_template('index.html', stats=stats, user_dict=user_dict, graph_data=graph_data, cache_info=cache_info,
-                            graph_commands=graph_commands, recent_data=recent_data, libs=libs, settings=settings,
-                            ombi_requests_json=ombi_requests_json,
-                            alert=alert, error=error, theme_settings=theme_settings, service_flags=get_service_flags(_s),
-                            csrf_token=session.get("csrf_token", ""))
+    return _run_pull('pull_ombi_requests')
 
 @bp.route('/pull_seerr_requests', methods=['POST'])
 @requires_auth
+@cache_fill('manual')
 def pull_seerr_requests():
-    require_csrf_for_json()
-    seerr_requests_json = None
-    error = None
-    alert = None
+    return _run_pull('pull_seerr_requests')
 
-    data, err = json_body()
+@bp.route('/pull_jobs', methods=['POST'])
+@requires_auth
+def start_pull_job():
+    """Run a pull (?op=pull_stats, pull_coming_soon, ...) as a background job
+    with the posted payload; the page polls /pull_jobs/<id> for progress."""
+    require_csrf_for_json()
+    op = request.args.get('op', '')
+    if op not in PULLS:
+        return jsonify({"error": f"Unknown pull: {op}"}), 400
+    data, err = json_body(PULLS[op][2])
     if err:
         return err
-    stats = data.get('stats')
-    user_dict = data.get('user_dict', {})
-    graph_data = data.get('graph_data')
-    graph_commands = data.get('graph_commands')
-    recent_data = data.get('recent_data')
-    libs = data.get('libs')
-    settings = data.get('settings', {})
-
-    _s = get_settings(decrypt_secrets=False)
-    row = (_s.get("seerr_url"), _s.get("seerr_api_key")) if "id" in _s else None
-
-    seerr_url = (row[0] or "").strip() if row else ""
-    seerr_api_key = decrypt(row[1]) if row and row[1] else ""
-
-    if not seerr_url or not seerr_api_key:
-        return render_template('index.html', error='Please enter a Seerr URL and API key on settings page',
-                                stats=stats, user_dict=user_dict, graph_data=graph_data,
-                                graph_commands=graph_commands, recent_data=recent_data,
-                                libs=libs, settings=settings, theme_settings=get_theme_settings(),
-                                service_flags=get_service_flags(_s),
-                                csrf_token=session.get("csrf_token", ""))
-
-    progress_start('seerr_requests', 1, 'Pulling requests...')
-
-    def _seerr_progress(done, total):
-        if done == 0:
-            progress_start('seerr_requests', max(total, 1), 'Fetching request details...')
-        else:
-            progress_step('seerr_requests', f'Fetching request details ({done}/{total})...')
-
-    entries, error = fetch_seerr_requests(seerr_url, seerr_api_key, progress_cb=_seerr_progress)
-    progress_done('seerr_requests')
-
-    seerr_requests_json = {'requests': entries or []}
-
-    if not error:
-        alert = "Seerr requests pulled!"
-
-    cache_params = {'timestamp': time.time()}
-    set_cached_data('seerr_requests_json', seerr_requests_json, cache_params)
-
-    cache_info = {
-        'stats': get_cache_info('stats'),
-        'users': get_cache_info('users'),
-        'graph_data': get_cache_info('graph_data'),
-        'recent_data': get_cache_info('recent_data'),
-        'recommendations_json': get_cache_info('recommendations_json'),
-        'filtered_users': get_cache_info('filtered_users')
-    }
-
-    if not cache_info['graph_data'] or 'params' not in cache_info['graph_data']:
-        if not cache_info['graph_data']:
-            cache_info['graph_data'] = {}
-        cache_info['graph_data']['params'] = {
-            'time_range': 30
-        }
-
-    theme_settings = get_theme_settings()
+    job_id, joined = submit_job(current_app._get_current_object(), op, data)
+    return jsonify({
+        "job_id": job_id,
+        "deduplicated": joined,
+        "poll_url": url_for('stats.pull_job_status', job_id=job_id),
+        "result_url": url_for('stats.pull_job_result', job_id=job_id),
+    }), 202
 
-    return render_template('index.html', stats=stats, user_dict=user_dict, graph_data=graph_data, cache_info=cache_info,
-                            graph_commands=graph_commands, recent_data=recent_data, libs=libs, settings=settings,
-                            seerr_requests_json=seerr_requests_json,
-                            alert=alert, error=error, theme_settings=theme_settings, service_flags=get_service_flags(_s),
-                            csrf_token=session.get("csrf_token", ""))
+@bp.route('/pull_jobs/<job_id>', methods=['GET'])
+@requires_auth
+def pull_job_status(job_id):
+    """The job's events numbered above ?after=, answered at once; the page
+    polls with the last id it saw until a done event arrives."""
+    try:
+        after = max(0, int(request.args.get('after') or 0))
+    except ValueError:
+        after = 0
+    events = job_events(job_id, after)
+    if events is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify({"events": events, "done": any(event['event'] == 'done' for event in events)})
+
+@bp.route('/pull_jobs/<job_id>/result', methods=['GET'])
+@requires_auth
+def pull_job_result(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if job['result'] is None:
+        return jsonify({"status": "running"}), 202
+    result, status = job['result']
+    return pull_response(job['op'], job['payload'], result, status)
 
 @bp.route('/random_pick_options', methods=['GET'])
 @requires_auth
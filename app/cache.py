@@ -1,6 +1,10 @@
-import base64, os, time
+import atexit, base64, json, os, pickle, threading, time, zlib
+
+from contextlib import contextmanager
 
 from app import config, state
+from app.crypto import fernet
+from app.db import db_connect
 
 import logging
 
@@ -44,6 +48,20 @@ def get_global_cache_status():
                 'present': present
             }
 
+        with state._CACHE_LOCK:
+            refreshing = any(_resolve(key) in state.cache_refreshing for key in cache_keys)
+
+        if refreshing:
+            return {
+                'has_data': True,
+                'status': f"Refreshing in the background • Range {date_range_display}",
+                'age_display': 'refreshing',
+                'class': 'cache-badge-refreshing',
+                'refreshing': True,
+                'missing': missing,
+                'present': present
+            }
+
         if missing:
             freshness_class = 'cache-badge-missing'
             freshness_text = f"Missing: {', '.join(missing)}"
@@ -74,6 +92,16 @@ def get_global_cache_status():
 
 def can_use_cached_data_for_preview(required_days):
     try:
+        # Any cached variant counts, not just the last pull: previewing a
+        # 7-day schedule right after a 30-day pull still finds the 7-day data.
+        with state._CACHE_LOCK:
+            _, stats_entry = _find_variant('stats', {'time_range': required_days})
+            _, graph_entry = _find_variant('graph_data', {'time_range': required_days})
+        if stats_entry and graph_entry:
+            if _is_fresh(stats_entry, config.CACHE_EXTENDED_DURATION) and _is_fresh(graph_entry, config.CACHE_EXTENDED_DURATION):
+                return True, f"Using cached data ({required_days} days exact match)"
+            return False, "Cache data too old"
+
         stats_info = get_cache_info('stats')
         graph_info = get_cache_info('graph_data')
         
@@ -97,36 +125,482 @@ def can_use_cached_data_for_preview(required_days):
     except Exception as e:
         return False, f"Error checking cache: {str(e)}"
 
+# Write-behind persistent tier: sets and clears mark keys dirty, a daemon
+# thread batches them into the cache_entries table, and the first read after
+# startup loads the table back. Rows are JSON, never pickle, so a writable
+# database cannot run code here; tuples and dicts with non-string keys are
+# tagged (_to_json) so they load back unchanged. The cache holds emails,
+# watch history and recommendations, so each row is encrypted with the same
+# key as the settings' secret columns.
+PERSIST_FLUSH_DELAY = 2
+
+_JSON_TAGS = ('__tuple__', '__pairs__')
+
+def _to_json(value):
+    """value as plain JSON types. Raises TypeError for anything JSON cannot
+    carry, and the entry is then not persisted."""
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value) and not (len(value) == 1 and next(iter(value), None) in _JSON_TAGS):
+            return {key: _to_json(item) for key, item in value.items()}
+        return {'__pairs__': [[_to_json(key), _to_json(item)] for key, item in value.items()]}
+    if isinstance(value, tuple):
+        return {'__tuple__': [_to_json(item) for item in value]}
+    if isinstance(value, list):
+        return [_to_json(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"{type(value).__name__} is not persistable")
+
+def _from_json(value):
+    if isinstance(value, list):
+        return [_from_json(item) for item in value]
+    if isinstance(value, dict):
+        if len(value) == 1 and '__tuple__' in value:
+            return tuple(_from_json(item) for item in value['__tuple__'])
+        if len(value) == 1 and '__pairs__' in value:
+            return {_from_json(key): _from_json(item) for key, item in value['__pairs__']}
+        return {key: _from_json(item) for key, item in value.items()}
+    return value
+
+def _encode_row(data, params):
+    raw = json.dumps(_to_json([data, params]), separators=(',', ':')).encode('utf-8')
+    return fernet.encrypt(zlib.compress(raw))
+
+def _decode_row(payload):
+    """(data, params, decompressed size). Raises on a row this build did not
+    write, including pickled rows from before the JSON format."""
+    raw = zlib.decompress(fernet.decrypt(bytes(payload)))
+    data, params = _from_json(json.loads(raw))
+    return data, params, len(raw)
+
+_flush_wakeup = threading.Event()
+_writer = {'thread': None}
+
+def enable_persistent_cache():
+    """Called by the factory once init_db has created cache_entries. Until
+    then the cache is memory-only, so bare imports never touch a database."""
+    state.cache_persist['enabled'] = True
+    atexit.register(flush_persistent_cache)
+
+def load_persisted_cache():
+    """Merge persisted entries into state.cache_storage once per process.
+    An in-memory entry newer than its persisted row wins."""
+    if state.cache_persist['loaded'] or not state.cache_persist['enabled']:
+        return
+    with state._CACHE_LOAD_LOCK:
+        if state.cache_persist['loaded']:
+            return
+        try:
+            conn = db_connect()
+            try:
+                rows = conn.execute("SELECT cache_key, payload, timestamp FROM cache_entries").fetchall()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"Persistent cache unavailable, starting cold: {e}")
+            rows = []
+
+        loaded = {}
+        pointers = {}
+        unreadable = []
+        # oldest first, so the LRU order after a restart follows entry age
+        for cache_key, payload, timestamp in sorted(rows, key=lambda row: row[2]):
+            try:
+                data, params, size = _decode_row(payload)
+            except Exception:
+                logger.debug(f"suppressed exception; dropping unreadable cache row {cache_key}", exc_info=True)
+                unreadable.append(cache_key)
+                continue
+            if cache_key == CURRENT_POINTERS_KEY:
+                pointers = data or {}
+                continue
+            loaded[cache_key] = {'data': data, 'timestamp': timestamp, 'params': params, 'size': size}
+
+        with state._CACHE_LOCK:
+            for cache_key, entry in loaded.items():
+                current = state.cache_storage.get(cache_key)
+                if current is None or current['timestamp'] < entry['timestamp']:
+                    _put(cache_key, entry)
+            for segment, storage_key in pointers.items():
+                if storage_key in state.cache_storage:
+                    state.cache_current.setdefault(segment, storage_key)
+            # the next flush deletes them, so rows in an old format (or
+            # written under another key) do not linger in the database
+            if unreadable:
+                _mark_dirty([key for key in unreadable if key not in state.cache_storage])
+        state.cache_persist['loaded'] = True
+        if loaded:
+            logger.info(f"Loaded {len(loaded)} cache entries from the persistent tier")
+
+def _mark_dirty(cache_keys):
+    """Caller holds state._CACHE_LOCK."""
+    if not state.cache_persist['enabled']:
+        return
+    state.cache_dirty.update(cache_keys)
+    if _writer['thread'] is None:
+        _writer['thread'] = threading.Thread(target=_cache_writer, daemon=True, name="cache-writer")
+        _writer['thread'].start()
+    _flush_wakeup.set()
+
+def _cache_writer():
+    while True:
+        _flush_wakeup.wait()
+        # a pull sets a dozen keys back to back; batch them into one commit
+        time.sleep(PERSIST_FLUSH_DELAY)
+        _flush_wakeup.clear()
+        try:
+            flush_persistent_cache()
+        except Exception:
+            logger.exception("Persistent cache flush failed")
+
+def flush_persistent_cache():
+    """Write dirty keys to cache_entries (cleared keys are deleted). Keys
+    that fail to write stay dirty for the next flush."""
+    if not state.cache_persist['enabled']:
+        return
+    with state._CACHE_LOCK:
+        dirty = list(state.cache_dirty)
+        state.cache_dirty.clear()
+        entries = {key: state.cache_storage.get(key) for key in dirty}
+        if CURRENT_POINTERS_KEY in entries:
+            entries[CURRENT_POINTERS_KEY] = {'data': dict(state.cache_current), 'timestamp': time.time(), 'params': None}
+    if not entries:
+        return
+
+    upserts = []
+    deletes = []
+    for cache_key, entry in entries.items():
+        if not entry or entry['data'] is None:
+            deletes.append((cache_key,))
+            continue
+        try:
+            payload = _encode_row(entry['data'], entry.get('params'))
+        except Exception:
+            logger.debug(f"suppressed exception; cache key {cache_key} is not persistable", exc_info=True)
+            continue
+        upserts.append((cache_key, payload, entry['timestamp']))
+
+    try:
+        conn = db_connect()
+        try:
+            conn.executemany("INSERT OR REPLACE INTO cache_entries (cache_key, payload, timestamp) VALUES (?, ?, ?)", upserts)
+            conn.executemany("DELETE FROM cache_entries WHERE cache_key = ?", deletes)
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning(f"Persistent cache write failed, will retry: {e}")
+        with state._CACHE_LOCK:
+            state.cache_dirty.update(dirty)
+
+# Segments are keyed by their normalized params (cache_variant_key), so a
+# 7-day pull no longer overwrites the 30-day one. state.cache_current points
+# each segment at the variant set last, and get_cached_data(segment) reads
+# that one: callers that never pass params keep single-slot behaviour.
+CACHE_VARIANT_PARAMS = ('time_range', 'count', 'stats_type', 'mode', 'source')
+CURRENT_POINTERS_KEY = '__current__'
+
+def cache_variant_key(segment, params=None):
+    parts = [
+        f"{name}={params[name]}" for name in CACHE_VARIANT_PARAMS
+        if params and params.get(name) not in (None, '')
+    ]
+    return '|'.join([segment] + parts) if parts else segment
+
+def cache_segment(storage_key):
+    """The segment a storage key is counted against: the part before any
+    variant params or per-item suffix (featured_pick:<key>, <segment>:<user>)."""
+    return storage_key.split('|', 1)[0].split(':', 1)[0]
+
+def _size_of(data):
+    try:
+        return len(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+def _is_fresh(entry, duration):
+    return bool(entry) and entry['data'] is not None and time.time() - entry['timestamp'] < duration
+
+def _resolve(cache_key):
+    """Caller holds state._CACHE_LOCK."""
+    storage_key = state.cache_current.get(cache_key)
+    return storage_key if storage_key in state.cache_storage else cache_key
+
+def _find_variant(cache_key, match):
+    """(storage_key, entry) of the newest entry of a segment whose params
+    equal every field in match (compared as strings), or (None, None).
+    Caller holds state._CACHE_LOCK."""
+    best_key = None
+    best = None
+    for storage_key, entry in state.cache_storage.items():
+        if storage_key != cache_key and not storage_key.startswith(cache_key + '|'):
+            continue
+        params = entry.get('params') or {}
+        if entry['data'] is None or any(str(params.get(name)) != str(value) for name, value in match.items()):
+            continue
+        if best is None or entry['timestamp'] > best['timestamp']:
+            best_key, best = storage_key, entry
+    if best_key is not None:
+        state.cache_storage.move_to_end(best_key)
+    return best_key, best
+
+def _counters(segment):
+    """Caller holds state._CACHE_LOCK."""
+    return state.cache_stats.setdefault(segment, {
+        'hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0,
+        'fills': 0, 'fill_seconds_total': 0.0, 'last_fill_seconds': None, 'last_source': None,
+    })
+
+def _record_lookup(cache_key, entry, hit):
+    """A hit served past the soft expiry (CACHE_DURATION) counts as a stale
+    hit. Caller holds state._CACHE_LOCK."""
+    counters = _counters(cache_segment(cache_key))
+    if not hit:
+        counters['misses'] += 1
+    elif time.time() - entry['timestamp'] >= config.CACHE_DURATION:
+        counters['stale_hits'] += 1
+    else:
+        counters['hits'] += 1
+
+# Fill latency: cache_fill(source) scopes a pull on the current thread; each
+# set_cached_data inside it records the time since the previous mark as that
+# segment's fill time, and its source (manual, daily_auto, scheduled,
+# revalidate) unless params name one. Outside a fill nothing is recorded, so
+# a later write on a reused worker thread is not charged to an old pull.
+_fill = threading.local()
+
+@contextmanager
+def cache_fill(source):
+    """Also usable as a decorator on a route that pulls."""
+    _fill.source = source
+    _fill.mark = time.monotonic()
+    try:
+        yield
+    finally:
+        _fill.source = None
+        _fill.mark = None
+
+def set_fill_listener(fn):
+    """fn(segment) is called after each segment stored from this thread
+    (a background pull job streams them as partial results); None clears."""
+    _fill.listener = fn
+
+def _notify_fill(segment):
+    listener = getattr(_fill, 'listener', None)
+    if listener is not None:
+        listener(segment)
+
+def _record_fill(cache_key, params):
+    """Caller holds state._CACHE_LOCK."""
+    mark = getattr(_fill, 'mark', None)
+    source = (params or {}).get('refresh_type') or (getattr(_fill, 'source', None) if mark is not None else None)
+    counters = _counters(cache_segment(cache_key))
+    if source:
+        counters['last_source'] = source
+    if mark is None:
+        return
+    now = time.monotonic()
+    counters['fills'] += 1
+    counters['fill_seconds_total'] += now - mark
+    counters['last_fill_seconds'] = round(now - mark, 3)
+    _fill.mark = now
+
+def _put(storage_key, entry):
+    """Store an entry in place (its LRU position is unchanged when replacing),
+    keeping state.cache_bytes in step. Caller holds state._CACHE_LOCK."""
+    previous = state.cache_storage.get(storage_key)
+    state.cache_bytes['total'] += entry.get('size', 0) - (previous.get('size', 0) if previous else 0)
+    state.cache_storage[storage_key] = entry
+
+def _pop(storage_key):
+    """Caller holds state._CACHE_LOCK."""
+    entry = state.cache_storage.pop(storage_key)
+    state.cache_bytes['total'] -= entry.get('size', 0)
+    return entry
+
+def _evict_over_budget():
+    """Drop least recently used entries until the cache fits
+    config.CACHE_MAX_BYTES. Only superseded variants and per-item keys are
+    candidates; a segment's current entry is never evicted. Caller holds
+    state._CACHE_LOCK."""
+    if state.cache_bytes['total'] <= config.CACHE_MAX_BYTES:
+        return
+    pinned = set(state.cache_current.values())
+    evicted = []
+    for storage_key in list(state.cache_storage):
+        if state.cache_bytes['total'] <= config.CACHE_MAX_BYTES:
+            break
+        if storage_key in pinned or ('|' not in storage_key and ':' not in storage_key):
+            continue
+        _pop(storage_key)
+        _counters(cache_segment(storage_key))['evictions'] += 1
+        evicted.append(storage_key)
+    if evicted:
+        logger.debug(f"Cache over budget, evicted {len(evicted)} entries")
+        _mark_dirty(evicted)
+
+# Stale-while-revalidate: CACHE_DURATION is a segment's soft expiry and
+# CACHE_EXTENDED_DURATION its hard one. A read past the soft expiry still
+# returns the stale value (non-strict reads) and starts one background
+# refresh of just that entry through the refresher the factory registers.
+REVALIDATE_RETRY = 300
+
+_refresher = {'fn': None, 'segments': frozenset()}
+
+def set_cache_refresher(fn, segments):
+    """fn(segment, params) returns fresh data for one segment, or None when
+    it cannot refresh it. Only the listed segments are ever revalidated."""
+    _refresher['fn'] = fn
+    _refresher['segments'] = frozenset(segments)
+
+def _maybe_revalidate(cache_key, storage_key, entry):
+    """Caller holds state._CACHE_LOCK."""
+    if _refresher['fn'] is None or cache_key not in _refresher['segments']:
+        return
+    if not entry or entry['data'] is None:
+        return
+    now = time.time()
+    if now - entry['timestamp'] < config.CACHE_DURATION:
+        return
+    if storage_key in state.cache_refreshing or now - state.cache_refresh_attempted.get(storage_key, 0) < REVALIDATE_RETRY:
+        return
+    state.cache_refreshing.add(storage_key)
+    state.cache_refresh_attempted[storage_key] = now
+    make_current = state.cache_current.get(cache_key, cache_key) == storage_key
+    threading.Thread(
+        target=_revalidate,
+        args=(cache_key, storage_key, dict(entry.get('params') or {}), make_current),
+        daemon=True,
+        name=f"cache-revalidate-{cache_key}",
+    ).start()
+
+def _revalidate(cache_key, storage_key, params, make_current):
+    try:
+        with cache_fill('revalidate'):
+            data = _refresher['fn'](cache_key, params)
+            if data is None:
+                logger.debug(f"No refresh available for cache segment {cache_key}")
+                return
+            params.update({'timestamp': time.time(), 'refresh_type': 'revalidate'})
+            set_cached_data(cache_key, data, params, make_current=make_current)
+        logger.info(f"Cache segment {storage_key} revalidated in the background")
+    except Exception:
+        logger.exception(f"Background refresh of cache segment {storage_key} failed")
+    finally:
+        with state._CACHE_LOCK:
+            state.cache_refreshing.discard(storage_key)
+
+def is_cache_refreshing(cache_key):
+    with state._CACHE_LOCK:
+        return _resolve(cache_key) in state.cache_refreshing
+
 def is_cache_valid(cache_key, strict=True):
+    load_persisted_cache()
+    duration = config.CACHE_DURATION if strict else config.CACHE_EXTENDED_DURATION
     with state._CACHE_LOCK:
-        cache_entry = state.cache_storage.get(cache_key)
-        if cache_entry and cache_entry['data'] is not None:
-            age = time.time() - cache_entry['timestamp']
-            duration = config.CACHE_DURATION if strict else config.CACHE_EXTENDED_DURATION
-            return age < duration
-        return False
+        return _is_fresh(state.cache_storage.get(_resolve(cache_key)), duration)
 
 def get_cached_data(cache_key, strict=True):
+    load_persisted_cache()
+    duration = config.CACHE_DURATION if strict else config.CACHE_EXTENDED_DURATION
     with state._CACHE_LOCK:
-        cache_entry = state.cache_storage.get(cache_key)
-        if cache_entry and cache_entry['data'] is not None:
-            age = time.time() - cache_entry['timestamp']
-            duration = config.CACHE_DURATION if strict else config.CACHE_EXTENDED_DURATION
-            if age < duration:
-                return cache_entry['data']
+        storage_key = _resolve(cache_key)
+        cache_entry = state.cache_storage.get(storage_key)
+        hit = _is_fresh(cache_entry, duration)
+        _record_lookup(cache_key, cache_entry, hit)
+        _maybe_revalidate(cache_key, storage_key, cache_entry)
+        if hit:
+            state.cache_storage.move_to_end(storage_key)
+            return cache_entry['data']
     return None
 
-def set_cached_data(cache_key, data, params=None):
+def get_cached_variant(cache_key, strict=True, **match):
+    """Data of the newest cached variant of a segment whose params match,
+    whether or not it is the current one, e.g. a schedule preview asking
+    for get_cached_variant('stats', time_range=7)."""
+    load_persisted_cache()
+    duration = config.CACHE_DURATION if strict else config.CACHE_EXTENDED_DURATION
+    with state._CACHE_LOCK:
+        storage_key, cache_entry = _find_variant(cache_key, match)
+        hit = _is_fresh(cache_entry, duration)
+        _record_lookup(cache_key, cache_entry, hit)
+        _maybe_revalidate(cache_key, storage_key, cache_entry)
+        return cache_entry['data'] if hit else None
+
+def set_cached_data(cache_key, data, params=None, make_current=True):
+    """Store data under the segment's variant for params. make_current=False
+    adds the variant without changing what get_cached_data(segment) returns
+    (scheduled sends cache their own date range this way)."""
+    storage_key = cache_variant_key(cache_key, params)
+    size = _size_of(data)
     with state._CACHE_LOCK:
-        state.cache_storage[cache_key] = {
+        _put(storage_key, {
             'data': data,
             'timestamp': time.time(),
-            'params': params
-        }
+            'params': params,
+            'size': size,
+        })
+        state.cache_storage.move_to_end(storage_key)
+        _record_fill(cache_key, params)
+        dirty = [storage_key]
+        if make_current:
+            if storage_key != cache_key:
+                state.cache_current[cache_key] = storage_key
+                dirty.append(CURRENT_POINTERS_KEY)
+            elif state.cache_current.pop(cache_key, None):
+                dirty.append(CURRENT_POINTERS_KEY)
+        _mark_dirty(dirty)
+        _evict_over_budget()
+    _notify_fill(cache_key)
+
+def user_cache_key(segment, user_key):
+    return f"{segment}:{user_key}"
+
+def get_cached_user_data(segment, user_keys, max_age=None):
+    """Per-user slots of a segment, each with its own timestamp. Returns
+    (hits, missing): hits maps user key to cached data for users whose slot
+    is younger than max_age (config.USER_CACHE_DURATION by default), missing
+    lists the users that are absent or stale and need a fetch."""
+    max_age = config.USER_CACHE_DURATION if max_age is None else max_age
+    hits = {}
+    missing = []
+    load_persisted_cache()
+    with state._CACHE_LOCK:
+        for user_key in user_keys:
+            storage_key = user_cache_key(segment, user_key)
+            cache_entry = state.cache_storage.get(storage_key)
+            hit = _is_fresh(cache_entry, max_age)
+            _record_lookup(storage_key, cache_entry, hit)
+            if hit:
+                state.cache_storage.move_to_end(storage_key)
+                hits[user_key] = cache_entry['data']
+            else:
+                missing.append(user_key)
+    return hits, missing
+
+def set_cached_user_data(segment, per_user_data, params=None):
+    now = time.time()
+    sized = {user_key: (data, _size_of(data)) for user_key, data in per_user_data.items()}
+    with state._CACHE_LOCK:
+        for user_key, (data, size) in sized.items():
+            _put(user_cache_key(segment, user_key), {
+                'data': data,
+                'timestamp': now,
+                'params': params,
+                'size': size,
+            })
+            state.cache_storage.move_to_end(user_cache_key(segment, user_key))
+        if per_user_data:
+            _record_fill(segment, params)
+        _mark_dirty([user_cache_key(segment, user_key) for user_key in per_user_data])
+        _evict_over_budget()
+    if per_user_data:
+        _notify_fill(segment)
 
 def get_cache_info(cache_key):
+    load_persisted_cache()
     with state._CACHE_LOCK:
-        cache_entry = state.cache_storage.get(cache_key)
+        cache_entry = state.cache_storage.get(_resolve(cache_key))
         if cache_entry and cache_entry['data'] is not None:
             age = time.time() - cache_entry['timestamp']
             return {
@@ -138,13 +612,82 @@ def get_cache_info(cache_key):
             }
     return {'exists': False}
 
+def get_cache_version(cache_key):
+    """Identifies the data get_cached_data(cache_key) currently answers with
+    (its storage key and fill time), or None when there is none; cheap enough
+    to build an ETag from without touching the data."""
+    load_persisted_cache()
+    with state._CACHE_LOCK:
+        storage_key = _resolve(cache_key)
+        cache_entry = state.cache_storage.get(storage_key)
+        if cache_entry and cache_entry['data'] is not None:
+            return f"{storage_key}@{cache_entry['timestamp']!r}"
+    return None
+
+# Upper bounds (seconds) of the entry-age histogram in get_cache_stats;
+# anything older lands in 'older'.
+AGE_BUCKETS = ((3600, '1h'), (6 * 3600, '6h'), (86400, '1d'), (7 * 86400, '7d'))
+
+def _age_bucket(age):
+    for limit, label in AGE_BUCKETS:
+        if age < limit:
+            return label
+    return 'older'
+
+def get_cache_stats():
+    """Per-segment counters plus what each segment holds now: {segment:
+    {hits, stale_hits, misses, evictions, hit_rate, fills, avg_fill_seconds,
+    last_fill_seconds, last_source, entries, bytes, newest_age_seconds,
+    age_buckets}}. hit_rate counts stale hits as served."""
+    now = time.time()
+    with state._CACHE_LOCK:
+        stats = {segment: dict(counters) for segment, counters in state.cache_stats.items()}
+        ages = {}
+        for storage_key, entry in state.cache_storage.items():
+            if entry['data'] is None:
+                continue
+            segment = cache_segment(storage_key)
+            stats.setdefault(segment, {})
+            ages.setdefault(segment, []).append(now - entry['timestamp'])
+            stats[segment]['entries'] = stats[segment].get('entries', 0) + 1
+            stats[segment]['bytes'] = stats[segment].get('bytes', 0) + entry.get('size', 0)
+    for segment, counters in stats.items():
+        for name in ('hits', 'stale_hits', 'misses', 'evictions', 'fills', 'entries', 'bytes'):
+            counters.setdefault(name, 0)
+        counters.setdefault('last_fill_seconds', None)
+        counters.setdefault('last_source', None)
+        lookups = counters['hits'] + counters['stale_hits'] + counters['misses']
+        counters['hit_rate'] = round((counters['hits'] + counters['stale_hits']) / lookups, 3) if lookups else None
+        total = counters.pop('fill_seconds_total', 0.0)
+        counters['avg_fill_seconds'] = round(total / counters['fills'], 3) if counters['fills'] else None
+        segment_ages = ages.get(segment, [])
+        counters['newest_age_seconds'] = int(min(segment_ages)) if segment_ages else None
+        buckets = dict.fromkeys([label for _, label in AGE_BUCKETS] + ['older'], 0)
+        for age in segment_ages:
+            buckets[_age_bucket(age)] += 1
+        counters['age_buckets'] = buckets
+    return stats
+
 def clear_cache(cache_key=None):
+    # load first so a full clear also reaches keys only the persistent tier has
+    load_persisted_cache()
     with state._CACHE_LOCK:
         if cache_key:
-            state.cache_storage[cache_key] = {'data': None, 'timestamp': 0, 'params': None}
+            variants = [key for key in state.cache_storage if key.startswith(cache_key + '|')]
+            for key in variants:
+                _pop(key)
+            _put(cache_key, {'data': None, 'timestamp': 0, 'params': None})
+            state.cache_current.pop(cache_key, None)
+            _mark_dirty([cache_key, CURRENT_POINTERS_KEY] + variants)
         else:
-            for key in list(state.cache_storage):
-                state.cache_storage[key] = {'data': None, 'timestamp': 0, 'params': None}
+            keys = list(state.cache_storage)
+            for key in keys:
+                if '|' in key:
+                    _pop(key)
+                else:
+                    _put(key, {'data': None, 'timestamp': 0, 'params': None})
+            state.cache_current.clear()
+            _mark_dirty(keys + [CURRENT_POINTERS_KEY])
 
 def gkak():
     env_override = os.environ.get('KLIPY', '').strip()
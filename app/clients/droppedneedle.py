@@ -1,7 +1,20 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
 import requests
 
+from app import config
+from app.cache import get_cached_user_data, set_cached_user_data
 from app.security import safe_get
 
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-listener wrapped results, keyed "<droppedneedle_id>:<year>" so a new
+# year never serves last year's recap and one listener ages out on its own.
+WRAPPED_CACHE_SEGMENT = 'droppedneedle_wrapped_by_id'
+
 def fetch_droppedneedle_users(base_url, api_key):
     """Returns {email_lower: droppedneedle_user_id} for DroppedNeedle users with ListenBrainz linked."""
     try:
@@ -16,30 +29,81 @@ def fetch_droppedneedle_users(base_url, api_key):
         if u.get('email') and u.get('has_listenbrainz')
     }
 
-def run_droppedneedle_command(base_url, api_key, user_dict, error):
+def _fetch_wrapped_user(base_url, api_key, droppedneedle_id):
+    """Returns (data, error) for one listener; never raises."""
+    try:
+        response = safe_get(
+            f"{base_url}/api/v1/wrapped/user/{droppedneedle_id}",
+            headers={'X-Wrapped-Api-Key': api_key},
+        )
+        response.raise_for_status()
+        return response.json(), None
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return None, str(e)
+
+def _summarize_user_errors(user_errors):
+    """One error line for the whole pull: identical failures are grouped so
+    fifty timeouts read as one message with a user count, not fifty copies."""
+    by_message = {}
+    for user, message in user_errors.items():
+        by_message.setdefault(message, []).append(str(user))
+    parts = []
+    for message, users in by_message.items():
+        shown = ', '.join(users[:5]) + (f" and {len(users) - 5} more" if len(users) > 5 else "")
+        parts.append(f"DroppedNeedle Error: {message} ({len(users)} user{'s' if len(users) != 1 else ''}: {shown})")
+    return ", ".join(parts)
+
+def run_droppedneedle_command(base_url, api_key, user_dict, error, use_cache=True):
+    """Returns [wrapped_dict, error]. Listeners are fetched concurrently
+    (config.DROPPEDNEEDLE_WORKERS at a time) and each result is cached per
+    DroppedNeedle id and year, so repeat pulls only cost the listeners whose
+    slot is missing or stale; use_cache=False (a manual pull) skips the
+    read but still refreshes the slots. Per-user failures are collected and
+    reported as one grouped error line."""
     if not base_url:
         return [{}, (error + ", " if error else "") + "DroppedNeedle Error: No Base URL provided"]
     if not api_key:
         return [{}, (error + ", " if error else "") + "DroppedNeedle Error: No API key provided"]
 
     email_to_droppedneedle_id = fetch_droppedneedle_users(base_url, api_key)
-    wrapped_dict = {}
+    period = datetime.now().year
 
+    targets = {}
     for user, email in user_dict.items():
         droppedneedle_id = email_to_droppedneedle_id.get((email or '').strip().lower())
-        if not droppedneedle_id:
-            continue
-        try:
-            response = safe_get(
-                f"{base_url}/api/v1/wrapped/user/{droppedneedle_id}",
-                headers={'X-Wrapped-Api-Key': api_key},
-            )
-            response.raise_for_status()
-            data = response.json()
-            if data.get('has_data'):
-                wrapped_dict[user] = data
-        except requests.exceptions.RequestException as e:
-            error = (error + ", " if error else "") + f"DroppedNeedle Error: {e}"
+        if droppedneedle_id:
+            targets[user] = f"{droppedneedle_id}:{period}"
+
+    results = {}
+    to_fetch = dict(targets)
+    if use_cache and targets:
+        hits, _missing = get_cached_user_data(WRAPPED_CACHE_SEGMENT, list(set(targets.values())))
+        for user, slot in targets.items():
+            if slot in hits:
+                results[user] = hits[slot]
+                to_fetch.pop(user)
+
+    user_errors = {}
+    if to_fetch:
+        slots = sorted(set(to_fetch.values()))
+        with ThreadPoolExecutor(max_workers=min(config.DROPPEDNEEDLE_WORKERS, len(slots)), thread_name_prefix="droppedneedle") as pool:
+            fetched = dict(zip(slots, pool.map(lambda slot: _fetch_wrapped_user(base_url, api_key, slot.split(':', 1)[0]), slots)))
+
+        fresh = {}
+        for user, slot in to_fetch.items():
+            data, user_error = fetched[slot]
+            if user_error:
+                user_errors[user] = user_error
+                logger.warning(f"DroppedNeedle wrapped fetch failed for user {user}: {user_error}")
+                continue
+            results[user] = data
+            fresh[slot] = data
+        if fresh:
+            set_cached_user_data(WRAPPED_CACHE_SEGMENT, fresh, {'period': period})
+
+    wrapped_dict = {user: data for user, data in results.items() if data and data.get('has_data')}
+    if user_errors:
+        error = (error + ", " if error else "") + _summarize_user_errors(user_errors)
 
     return [wrapped_dict, error]
 
@@ -51,7 +51,7 @@ def _jellyfin_connection():
 def get_jellyfin_system_info(url, api_key):
     """Raw /System/Info dict (Id, ServerName, Version). Raises on failure so
     the connection test can report the real error."""
-    response = safe_get(f"{url.rstrip('/')}/System/Info", headers=get_jellyfin_headers(api_key), timeout=10)
+    response = safe_get(f"{url.rstrip('/')}/System/Info", headers=get_jellyfin_headers(api_key), timeout=10, coalesce='jellyfin')
     response.raise_for_status()
     return response.json()
 
@@ -102,7 +102,7 @@ def fetch_jellyfin_libraries():
         logger.debug("Jellyfin not configured")
         return []
     try:
-        response = safe_get(f"{url}/Library/MediaFolders", headers=get_jellyfin_headers(api_key), timeout=10)
+        response = safe_get(f"{url}/Library/MediaFolders", headers=get_jellyfin_headers(api_key), timeout=10, coalesce='jellyfin')
         response.raise_for_status()
         items = response.json().get('Items') or []
     except Exception as e:
@@ -154,7 +154,7 @@ def get_jellyfin_admin_user_id():
     if not url:
         return None
     try:
-        response = safe_get(f"{url}/Users", headers=get_jellyfin_headers(api_key), timeout=10)
+        response = safe_get(f"{url}/Users", headers=get_jellyfin_headers(api_key), timeout=10, coalesce='jellyfin')
         response.raise_for_status()
         users = response.json() or []
     except Exception as e:
@@ -173,7 +173,7 @@ def fetch_jellyfin_users():
     if not url:
         return []
     try:
-        response = safe_get(f"{url}/Users", headers=get_jellyfin_headers(api_key), timeout=10)
+        response = safe_get(f"{url}/Users", headers=get_jellyfin_headers(api_key), timeout=10, coalesce='jellyfin')
         response.raise_for_status()
         users = response.json() or []
     except Exception as e:
@@ -262,6 +262,7 @@ def fetch_jellyfin_latest_for_library(section_id, limit=10, days=None, server_id
             params=params,
             headers=get_jellyfin_headers(api_key),
             timeout=15,
+            coalesce='jellyfin',
         )
         response.raise_for_status()
         items = response.json() or []
@@ -324,6 +325,7 @@ def fetch_jellyfin_library_counts():
                 params={'ParentId': library['section_id'], 'Recursive': 'true', 'Limit': 0},
                 headers=get_jellyfin_headers(api_key),
                 timeout=10,
+                coalesce='jellyfin',
             )
             response.raise_for_status()
             total = response.json().get('TotalRecordCount', 0)
@@ -35,7 +35,7 @@ def _jellywatch_connection():
 
 def ping_jellywatch(url, api_key):
     """Raise-on-failure reachability check used by the connection test."""
-    response = safe_get(f"{url.rstrip('/')}{STATUS_PATH}", headers=get_jellywatch_headers(api_key), timeout=10)
+    response = safe_get(f"{url.rstrip('/')}{STATUS_PATH}", headers=get_jellywatch_headers(api_key), timeout=10, coalesce='jellywatch')
     return response
 
 def _first(item, *names, default=None):
@@ -88,7 +88,7 @@ def _fetch_watched(url, api_key, media_type, days):
     if days:
         params['days'] = days
     try:
-        response = safe_get(f"{url}{MOST_WATCHED_PATH}", params=params, headers=get_jellywatch_headers(api_key), timeout=15)
+        response = safe_get(f"{url}{MOST_WATCHED_PATH}", params=params, headers=get_jellywatch_headers(api_key), timeout=15, coalesce='jellywatch')
         response.raise_for_status()
         payload = response.json()
     except Exception as e:
@@ -102,7 +102,7 @@ def _fetch_watched(url, api_key, media_type, days):
 def _fetch_users(url, api_key, days):
     params = {'days': days} if days else {}
     try:
-        response = safe_get(f"{url}{USERS_PATH}", params=params, headers=get_jellywatch_headers(api_key), timeout=15)
+        response = safe_get(f"{url}{USERS_PATH}", params=params, headers=get_jellywatch_headers(api_key), timeout=15, coalesce='jellywatch')
         response.raise_for_status()
         payload = response.json()
     except Exception as e:
@@ -11,6 +11,7 @@ def fetch_ombi_movie_requests(base_url, api_key):
         response = safe_get(
             f"{base_url.rstrip('/')}/api/v1/Request/movie",
             headers={'ApiKey': api_key},
+            coalesce='ombi',
         )
         response.raise_for_status()
         return response.json(), None
@@ -27,6 +28,7 @@ def fetch_ombi_tv_requests(base_url, api_key):
         response = safe_get(
             f"{base_url.rstrip('/')}/api/v1/Request/tv",
             headers={'ApiKey': api_key},
+            coalesce='ombi',
         )
         response.raise_for_status()
         return response.json(), None
@@ -44,7 +44,7 @@ def _headers(api_key):
 
 def _get(url, path, api_key, params=None):
     try:
-        response = safe_get(f"{url}{path}", params=params or {}, headers=_headers(api_key), timeout=15)
+        response = safe_get(f"{url}{path}", params=params or {}, headers=_headers(api_key), timeout=15, coalesce='playback_reporting')
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -166,6 +166,6 @@ def fetch_playback_reporting_graphs(days=30):
 
 def ping_playback_reporting(url, api_key):
     response = safe_get(f"{url.rstrip('/')}{PLAY_ACTIVITY_PATH}", params={'days': 1},
-                        headers=_headers(api_key), timeout=10)
+                        headers=_headers(api_key), timeout=10, coalesce='playback_reporting')
     response.raise_for_status()
     return response
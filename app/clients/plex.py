@@ -1,7 +1,11 @@
+import itertools
 import random
 import threading
+import time
 import uuid
 
+from concurrent.futures import ThreadPoolExecutor
+
 from datetime import datetime, timedelta
 from urllib.parse import quote_plus
 
@@ -101,7 +105,7 @@ _machine_id_cache = {}
 
 def _fetch_plex_machine_id(plex_url, plex_token):
     headers = get_plex_headers({'X-Plex-Token': plex_token})
-    response = safe_get(f"{plex_url}/identity", headers=headers, timeout=10)
+    response = safe_get(f"{plex_url}/identity", headers=headers, timeout=10, coalesce='plex')
     response.raise_for_status()
     return response.json().get('MediaContainer', {}).get('machineIdentifier')
 
@@ -151,7 +155,7 @@ def search_plex_for_rating_key(title, year, media_type, plex_url, plex_token, tm
             
             headers = get_plex_headers()
             
-            response = safe_get(api_url, headers=headers, timeout=10)
+            response = safe_get(api_url, headers=headers, timeout=10, coalesce='plex')
             response.raise_for_status()
             data = response.json()
             
@@ -180,7 +184,7 @@ def search_plex_for_rating_key(title, year, media_type, plex_url, plex_token, tm
         
         headers = get_plex_headers()
         
-        response = safe_get(api_url, headers=headers, timeout=10)
+        response = safe_get(api_url, headers=headers, timeout=10, coalesce='plex')
         response.raise_for_status()
         data = response.json()
         
@@ -290,18 +294,66 @@ def group_recent_episodes_into_shows(metadata, cutoff_ts):
     result.sort(key=lambda s: s.pop('_latest'), reverse=True)
     return result
 
+# Recently-added paging. Items mode asks Plex for exactly the rows it will
+# show and only pages on when rows are filtered out (zero-duration entries);
+# days mode filters server-side with addedAt>>= and pages until a short page.
+PLEX_PAGE_SIZE = 200
+# Runaway guard: a days window that spans a whole library import stops here.
+PLEX_MAX_PAGES = 10
+# Rating sort ranks the best-rated of the most recent N*pool items, so it
+# needs a candidate pool wider than the rows it shows; date sort does not.
+RATING_SORT_POOL = 5
+
+def _page_section_items(plex_url, plex_token, section_id, query, limit=None, keep=None, page_size=None, max_pages=PLEX_MAX_PAGES):
+    """Metadata rows from /library/sections/{id}/all with query (type, sort,
+    filters) via Plex container paging. With limit, stops once limit rows
+    pass keep; without, reads until Plex returns a short page (max_pages=None
+    lifts the page cap for whole-library reads). Returns (library_name, rows)."""
+    headers = get_plex_headers()
+    page_size = limit or page_size or PLEX_PAGE_SIZE
+    start = 0
+    library_name = ''
+    rows = []
+    for _page in (range(max_pages) if max_pages else itertools.count()):
+        api_url = (
+            f"{plex_url}/library/sections/{section_id}/all"
+            f"?{query}"
+            f"&X-Plex-Container-Start={start}"
+            f"&X-Plex-Container-Size={page_size}"
+            f"&X-Plex-Token={plex_token}"
+        )
+        response = safe_get(api_url, headers=headers, timeout=10, coalesce='plex')
+        response.raise_for_status()
+        media_container = response.json().get('MediaContainer', {})
+        library_name = library_name or media_container.get('librarySectionTitle', '')
+        metadata = media_container.get('Metadata', []) or []
+        rows.extend(m for m in metadata if keep is None or keep(m))
+        if len(metadata) < page_size:
+            break
+        if limit:
+            if len(rows) >= limit:
+                break
+            page_size = limit - len(rows)
+        start += len(metadata)
+    return library_name, (rows[:limit] if limit else rows)
+
+def _has_duration(entry):
+    return int(entry.get('duration', 0) or 0) > 0
+
+def _plex_credentials():
+    _s = get_settings(decrypt_secrets=False)
+    plex_settings = (_s.get("plex_url"), _s.get("plex_token")) if "id" in _s else None
+    if not plex_settings or not plex_settings[0] or not plex_settings[1]:
+        return None
+    return plex_settings[0].rstrip('/'), decrypt(plex_settings[1]), _s.get("plex_web_url")
+
 def fetch_tv_shows_from_plex_sdk(section_id, limit=10, machine_id=None, days=None):
     try:
-        _s = get_settings(decrypt_secrets=False)
-        plex_settings = (_s.get("plex_url"), _s.get("plex_token")) if "id" in _s else None
-
-        if not plex_settings or not plex_settings[0] or not plex_settings[1]:
+        credentials = _plex_credentials()
+        if not credentials:
             logger.debug("Plex not configured")
             return []
-
-        plex_url = plex_settings[0].rstrip('/')
-        plex_token = decrypt(plex_settings[1])
-        plex_web_url = _s.get("plex_web_url")
+        plex_url, plex_token, plex_web_url = credentials
 
         if days:
             # Query episodes (type=4), not shows: a show's own addedAt only moves
@@ -309,37 +361,12 @@ def fetch_tv_shows_from_plex_sdk(section_id, limit=10, machine_id=None, days=Non
             # misses existing shows that just got a new episode. Grouping the
             # in-window episodes back up to their show (below) is what makes days
             # mode include a show whenever ANY episode landed in the window.
-            api_url = (
-                f"{plex_url}/library/sections/{section_id}/all"
-                f"?type=4"
-                f"&sort=addedAt:desc"
-                f"&addedAt%3E%3E=-{days}d"
-                f"&X-Plex-Container-Start=0"
-                f"&X-Plex-Container-Size=500"
-                f"&X-Plex-Token={plex_token}"
+            library_name, metadata = _page_section_items(
+                plex_url, plex_token, section_id,
+                f"type=4&sort=addedAt:desc&addedAt%3E%3E=-{days}d",
             )
-        else:
-            api_url = (
-                f"{plex_url}/library/sections/{section_id}/all"
-                f"?type=2"
-                f"&sort=episode.addedAt:desc"
-                f"&X-Plex-Container-Start=0"
-                f"&X-Plex-Container-Size={limit}"
-                f"&X-Plex-Token={plex_token}"
-            )
-
-        headers = get_plex_headers()
-
-        response = safe_get(api_url, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        media_container = data.get('MediaContainer', {})
-        library_name = media_container.get('librarySectionTitle', '')
-
-        if days:
             cutoff_ts = int((datetime.now() - timedelta(days=int(days))).timestamp())
-            shows = group_recent_episodes_into_shows(media_container.get('Metadata', []), cutoff_ts)
+            shows = group_recent_episodes_into_shows(metadata, cutoff_ts)
             for show in shows:
                 show['library_name'] = library_name
                 rating_key = show.get('rating_key')
@@ -348,15 +375,15 @@ def fetch_tv_shows_from_plex_sdk(section_id, limit=10, machine_id=None, days=Non
             logger.debug(f"Grouped {len(shows)} shows from recent episodes in '{library_name}' (last {days}d)")
             return shows
 
+        library_name, metadata = _page_section_items(
+            plex_url, plex_token, section_id,
+            "type=2&sort=episode.addedAt:desc",
+            limit=limit, keep=_has_duration,
+        )
+
         shows = []
-        for directory in media_container.get('Metadata', []):
+        for directory in metadata:
             rating_key = str(directory.get('ratingKey', ''))
-
-            duration = int(directory.get('duration', 0) or 0)
-            if duration == 0:
-                logger.debug(f"Skipping show '{directory.get('title')}' - zero duration")
-                continue
-
             show = {
                 'title': directory.get('title', 'Unknown'),
                 'rating_key': rating_key,
@@ -391,55 +418,28 @@ def fetch_tv_shows_from_plex_sdk(section_id, limit=10, machine_id=None, days=Non
 
 def fetch_movies_from_plex_sdk(section_id, limit=10, machine_id=None, days=None):
     try:
-        _s = get_settings(decrypt_secrets=False)
-        plex_settings = (_s.get("plex_url"), _s.get("plex_token")) if "id" in _s else None
-
-        if not plex_settings or not plex_settings[0] or not plex_settings[1]:
+        credentials = _plex_credentials()
+        if not credentials:
             logger.debug("Plex not configured")
             return []
-
-        plex_url = plex_settings[0].rstrip('/')
-        plex_token = decrypt(plex_settings[1])
-        plex_web_url = _s.get("plex_web_url")
+        plex_url, plex_token, plex_web_url = credentials
 
         if days:
-            api_url = (
-                f"{plex_url}/library/sections/{section_id}/all"
-                f"?type=1"
-                f"&sort=addedAt:desc"
-                f"&addedAt%3E%3E=-{days}d"
-                f"&X-Plex-Container-Start=0"
-                f"&X-Plex-Container-Size=500"
-                f"&X-Plex-Token={plex_token}"
+            library_name, metadata = _page_section_items(
+                plex_url, plex_token, section_id,
+                f"type=1&sort=addedAt:desc&addedAt%3E%3E=-{days}d",
+                keep=_has_duration,
             )
         else:
-            api_url = (
-                f"{plex_url}/library/sections/{section_id}/all"
-                f"?type=1"
-                f"&sort=addedAt:desc"
-                f"&X-Plex-Container-Start=0"
-                f"&X-Plex-Container-Size={limit}"
-                f"&X-Plex-Token={plex_token}"
+            library_name, metadata = _page_section_items(
+                plex_url, plex_token, section_id,
+                "type=1&sort=addedAt:desc",
+                limit=limit, keep=_has_duration,
             )
         
-        headers = get_plex_headers()
-        
-        response = safe_get(api_url, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
         movies = []
-        media_container = data.get('MediaContainer', {})
-        library_name = media_container.get('librarySectionTitle', '')
-        
-        for video in media_container.get('Metadata', []):
+        for video in metadata:
             rating_key = str(video.get('ratingKey', ''))
-
-            duration = int(video.get('duration', 0) or 0)
-            if duration == 0:
-                logger.debug(f"Skipping movie '{video.get('title')}' - zero duration")
-                continue
-            
             movie = {
                 'title': video.get('title', 'Unknown'),
                 'rating_key': rating_key,
@@ -475,48 +475,26 @@ def fetch_movies_from_plex_sdk(section_id, limit=10, machine_id=None, days=None)
 
 def fetch_albums_from_plex_sdk(section_id, limit=10, machine_id=None, days=None):
     try:
-        _s = get_settings(decrypt_secrets=False)
-        plex_settings = (_s.get("plex_url"), _s.get("plex_token")) if "id" in _s else None
-
-        if not plex_settings or not plex_settings[0] or not plex_settings[1]:
+        credentials = _plex_credentials()
+        if not credentials:
             logger.debug("Plex not configured")
             return []
-
-        plex_url = plex_settings[0].rstrip('/')
-        plex_token = decrypt(plex_settings[1])
-        plex_web_url = _s.get("plex_web_url")
+        plex_url, plex_token, plex_web_url = credentials
 
         if days:
-            api_url = (
-                f"{plex_url}/library/sections/{section_id}/all"
-                f"?type=9"
-                f"&sort=addedAt:desc"
-                f"&addedAt%3E%3E=-{days}d"
-                f"&X-Plex-Container-Start=0"
-                f"&X-Plex-Container-Size=500"
-                f"&X-Plex-Token={plex_token}"
+            library_name, metadata = _page_section_items(
+                plex_url, plex_token, section_id,
+                f"type=9&sort=addedAt:desc&addedAt%3E%3E=-{days}d",
             )
         else:
-            api_url = (
-                f"{plex_url}/library/sections/{section_id}/all"
-                f"?type=9"
-                f"&sort=addedAt:desc"
-                f"&X-Plex-Container-Start=0"
-                f"&X-Plex-Container-Size={limit}"
-                f"&X-Plex-Token={plex_token}"
+            library_name, metadata = _page_section_items(
+                plex_url, plex_token, section_id,
+                "type=9&sort=addedAt:desc",
+                limit=limit,
             )
         
-        headers = get_plex_headers()
-        
-        response = safe_get(api_url, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
         albums = []
-        media_container = data.get('MediaContainer', {})
-        library_name = media_container.get('librarySectionTitle', '')
-        
-        for album in media_container.get('Metadata', []):
+        for album in metadata:
             rating_key = str(album.get('ratingKey', ''))
 
             album_data = {
@@ -575,7 +553,7 @@ def fetch_library_sections_with_genres(include_genres=True):
         plex_token = decrypt(plex_settings[1])
         headers = get_plex_headers({'X-Plex-Token': plex_token})
 
-        response = safe_get(f"{plex_url}/library/sections", headers=headers, timeout=10)
+        response = safe_get(f"{plex_url}/library/sections", headers=headers, timeout=10, coalesce='plex')
         response.raise_for_status()
         sections_data = response.json()
 
@@ -589,7 +567,7 @@ def fetch_library_sections_with_genres(include_genres=True):
             genres = []
             if include_genres:
                 try:
-                    genre_response = safe_get(f"{plex_url}/library/sections/{section_id}/genre", headers=headers, timeout=10)
+                    genre_response = safe_get(f"{plex_url}/library/sections/{section_id}/genre", headers=headers, timeout=10, coalesce='plex')
                     if genre_response.status_code == 200:
                         for genre in genre_response.json().get('MediaContainer', {}).get('Directory', []):
                             if genre.get('key') is not None:
@@ -666,16 +644,7 @@ def fetch_random_library_item(section_id, genre=None, machine_id=None):
 
         # Size probe first: Container-Size=0 returns totalSize without items,
         # then a random offset fetches exactly one item.
-        probe_url = (
-            f"{plex_url}/library/sections/{section_id}/all"
-            f"?X-Plex-Container-Start=0"
-            f"&X-Plex-Container-Size=0"
-            f"{genre_param}"
-            f"&X-Plex-Token={plex_token}"
-        )
-        probe = safe_get(probe_url, headers=headers, timeout=10)
-        probe.raise_for_status()
-        total = int(probe.json().get('MediaContainer', {}).get('totalSize', 0) or 0)
+        total = _section_total_size(plex_url, plex_token, section_id, genre)
         if total <= 0:
             logger.debug(f"Random pick: section {section_id} has no items (genre={genre})")
             return None
@@ -688,7 +657,7 @@ def fetch_random_library_item(section_id, genre=None, machine_id=None):
             f"{genre_param}"
             f"&X-Plex-Token={plex_token}"
         )
-        response = safe_get(api_url, headers=headers, timeout=10)
+        response = safe_get(api_url, headers=headers, timeout=10, coalesce='plex')
         response.raise_for_status()
         data = response.json()
 
@@ -704,6 +673,196 @@ def fetch_random_library_item(section_id, genre=None, machine_id=None):
         mark_plex_failed()
         return None
 
+# Random Pick reservoir: every item of a section, normalized, plus the
+# rating keys of each genre drawn from it, held in memory so a render samples
+# locally instead of making two Plex calls per keystroke in the builder.
+# Stale entries keep serving while a background thread refreshes them;
+# sections refresh incrementally (rows updated since the last pass) with a
+# size probe to catch deletions and a periodic full rebuild.
+RESERVOIR_TTL = 900
+RESERVOIR_FULL_REBUILD = 86400
+RESERVOIR_RETRY = 120
+RESERVOIR_IDLE = 7 * 86400
+RESERVOIR_PAGE_SIZE = 500
+SECTION_TABLE_TTL = 900
+
+_reservoir_lock = threading.Lock()
+_reservoirs = {}
+_reservoir_running = set()
+_reservoir_attempted = {}
+_section_table = {'sections': None, 'timestamp': 0}
+
+def _section_total_size(plex_url, plex_token, section_id, genre=None):
+    genre_param = f"&genre={genre}" if genre else ""
+    probe = safe_get(
+        f"{plex_url}/library/sections/{section_id}/all"
+        f"?X-Plex-Container-Start=0&X-Plex-Container-Size=0{genre_param}"
+        f"&X-Plex-Token={plex_token}",
+        headers=get_plex_headers(), timeout=10,
+        coalesce='plex',
+    )
+    probe.raise_for_status()
+    return int(probe.json().get('MediaContainer', {}).get('totalSize', 0) or 0)
+
+def _refresh_section_reservoir(plex_url, plex_token, plex_web_url, machine_id, section_id):
+    now = time.time()
+    with _reservoir_lock:
+        current = _reservoirs.get((section_id, ''))
+
+    if current and now - current['built_at'] < RESERVOIR_FULL_REBUILD:
+        library_name, rows = _page_section_items(
+            plex_url, plex_token, section_id,
+            f"sort=updatedAt:desc&updatedAt%3E%3E={current['max_updated_at']}",
+            page_size=RESERVOIR_PAGE_SIZE, max_pages=None,
+        )
+        items = dict(current['items'])
+        container = {'librarySectionTitle': library_name or current['library_name']}
+        for row in rows:
+            item = normalize_plex_item(row, container, machine_id, plex_web_url)
+            items[item['rating_key']] = item
+        # Deletions never show up in an updatedAt query; a size mismatch
+        # means something left the section, so rebuild from scratch.
+        if len(items) == _section_total_size(plex_url, plex_token, section_id):
+            return {
+                'items': items,
+                'keys': list(items),
+                'library_name': container['librarySectionTitle'],
+                'max_updated_at': max([current['max_updated_at']] + [int(r.get('updatedAt', 0) or 0) for r in rows]),
+                'built_at': current['built_at'],
+                'refreshed_at': now,
+                'sampled_at': current.get('sampled_at', now),
+            }
+
+    library_name, rows = _page_section_items(
+        plex_url, plex_token, section_id, "sort=addedAt:desc",
+        page_size=RESERVOIR_PAGE_SIZE, max_pages=None,
+    )
+    container = {'librarySectionTitle': library_name}
+    items = {}
+    for row in rows:
+        item = normalize_plex_item(row, container, machine_id, plex_web_url)
+        items[item['rating_key']] = item
+    return {
+        'items': items,
+        'keys': list(items),
+        'library_name': library_name,
+        'max_updated_at': max([0] + [int(r.get('updatedAt', 0) or 0) for r in rows]),
+        'built_at': now,
+        'refreshed_at': now,
+        'sampled_at': (current or {}).get('sampled_at', now),
+    }
+
+def _refresh_genre_reservoir(plex_url, plex_token, section_id, genre):
+    _, rows = _page_section_items(
+        plex_url, plex_token, section_id, f"sort=addedAt:desc&genre={genre}",
+        page_size=RESERVOIR_PAGE_SIZE, max_pages=None,
+    )
+    with _reservoir_lock:
+        sampled_at = _reservoirs.get((section_id, genre), {}).get('sampled_at', time.time())
+    return {
+        'keys': [str(row.get('ratingKey', '')) for row in rows if row.get('ratingKey')],
+        'refreshed_at': time.time(),
+        'sampled_at': sampled_at,
+    }
+
+def refresh_random_pick_reservoir(key):
+    """Rebuild one reservoir entry, keyed (section_id, genre) with genre ''
+    for the whole section. Runs on a background thread; failures leave the
+    previous entry serving."""
+    section_id, genre = key
+    try:
+        credentials = _plex_credentials()
+        if not credentials:
+            return
+        plex_url, plex_token, plex_web_url = credentials
+        if genre:
+            entry = _refresh_genre_reservoir(plex_url, plex_token, section_id, genre)
+        else:
+            entry = _refresh_section_reservoir(plex_url, plex_token, plex_web_url, get_plex_machine_id(), section_id)
+        with _reservoir_lock:
+            _reservoirs[key] = entry
+        logger.debug(f"Random pick reservoir {key} refreshed: {len(entry['keys'])} items")
+    except Exception as e:
+        logger.warning(f"Random pick reservoir refresh failed for {key}: {e}")
+    finally:
+        with _reservoir_lock:
+            _reservoir_running.discard(key)
+
+def _refresh_reservoirs(keys):
+    for key in keys:
+        refresh_random_pick_reservoir(key)
+
+def _schedule_reservoir_refresh(keys):
+    now = time.time()
+    with _reservoir_lock:
+        due = []
+        for key in keys:
+            if key in due or key in _reservoir_running:
+                continue
+            if now - _reservoirs.get(key, {}).get('refreshed_at', 0) < RESERVOIR_TTL:
+                continue
+            if now - _reservoir_attempted.get(key, 0) < RESERVOIR_RETRY:
+                continue
+            _reservoir_running.add(key)
+            _reservoir_attempted[key] = now
+            due.append(key)
+    if due:
+        threading.Thread(target=_refresh_reservoirs, args=(due,), daemon=True, name="random-pick-reservoir").start()
+
+def refresh_random_pick_reservoirs():
+    """Scheduler sweep: drop reservoirs no render has sampled in
+    RESERVOIR_IDLE and refresh the rest once they pass RESERVOIR_TTL, so
+    scheduled sends find them warm."""
+    now = time.time()
+    with _reservoir_lock:
+        for key in [k for k, v in _reservoirs.items() if now - v.get('sampled_at', now) > RESERVOIR_IDLE]:
+            del _reservoirs[key]
+        keys = sorted(_reservoirs, key=lambda k: k[1])
+    _schedule_reservoir_refresh(keys)
+
+def pick_random_library_item(section_id, genre=None):
+    """Random Pick draw for renders: uniform over the section (or genre)
+    like fetch_random_library_item, sampled from the in-memory reservoir.
+    A cold reservoir falls back to the live draw while it fills."""
+    if config.DEMO_MODE:
+        return fetch_random_library_item(section_id, genre=genre)
+    section_key = (str(section_id), '')
+    pool_key = (str(section_id), str(genre or ''))
+    now = time.time()
+    with _reservoir_lock:
+        section = _reservoirs.get(section_key)
+        pool = _reservoirs.get(pool_key)
+        for entry in (section, pool):
+            if entry:
+                entry['sampled_at'] = now
+    _schedule_reservoir_refresh([section_key, pool_key])
+
+    if not section or not pool:
+        return fetch_random_library_item(section_id, genre=genre)
+    keys = pool['keys']
+    if not keys:
+        logger.debug(f"Random pick: section {section_id} has no items (genre={genre})")
+        return None
+    item = section['items'].get(keys[random.randrange(len(keys))])
+    if item is None:
+        # genre list is newer than the section copy; live lookup covers the gap
+        return fetch_random_library_item(section_id, genre=genre)
+    return dict(item)
+
+def get_library_sections_cached():
+    """Plex section table (no genres) for resolving a Random Pick library
+    name, reused for SECTION_TABLE_TTL. Failures are not cached."""
+    now = time.time()
+    with _reservoir_lock:
+        if _section_table['sections'] and now - _section_table['timestamp'] < SECTION_TABLE_TTL:
+            return _section_table['sections']
+    sections = fetch_library_sections_with_genres(include_genres=False)
+    if sections:
+        with _reservoir_lock:
+            _section_table['sections'] = sections
+            _section_table['timestamp'] = now
+    return sections
+
 def _plex_connection():
     """(url, token, web_url) or None when Plex is not configured."""
     _s = get_settings(decrypt_secrets=False)
@@ -733,7 +892,7 @@ def search_library_items(query, section_id=None, limit=20):
         else:
             api_url = f"{plex_url}/search?query={quote_plus(query)}&X-Plex-Token={plex_token}"
 
-        response = safe_get(api_url, headers=headers, timeout=10)
+        response = safe_get(api_url, headers=headers, timeout=10, coalesce='plex')
         response.raise_for_status()
         container = response.json().get('MediaContainer', {})
 
@@ -776,7 +935,7 @@ def fetch_library_item_by_rating_key(rating_key, machine_id=None):
             machine_id = get_plex_machine_id()
 
         api_url = f"{plex_url}/library/metadata/{quote_plus(rating_key)}?X-Plex-Token={plex_token}"
-        response = safe_get(api_url, headers=get_plex_headers(), timeout=10)
+        response = safe_get(api_url, headers=get_plex_headers(), timeout=10, coalesce='plex')
         response.raise_for_status()
         container = response.json().get('MediaContainer', {})
         metadata = container.get('Metadata', []) or []
@@ -789,7 +948,71 @@ def fetch_library_item_by_rating_key(rating_key, machine_id=None):
         mark_plex_failed()
         return None
 
+# Libraries fetched in parallel per recently-added pull.
+RECENTLY_ADDED_WORKERS = 4
+# Tautulli fallback page size in days mode (get_recently_added has no date
+# filter, so pages are read newest first until one crosses the cutoff).
+TAUTULLI_PAGE_SIZE = 50
+
+def _tautulli_recently_added(tautulli_base_url, tautulli_api_key, section_id, items_count, days_mode, want):
+    """Recently added rows for a library type Plex is not queried for. Pages
+    newest first and stops at want kept rows (items mode) or at the first
+    page that reaches past the cutoff (days mode)."""
+    cutoff = int((datetime.now() - timedelta(days=int(items_count))).timestamp()) if days_mode else None
+    page_size = TAUTULLI_PAGE_SIZE if days_mode else want
+    start = 0
+    items = []
+    for _page in range(PLEX_MAX_PAGES):
+        rd, _ = run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_recently_added', section_id, None, str(page_size), start)
+        rows = (rd or {}).get('recently_added') or []
+        crossed_cutoff = False
+        for item in rows:
+            if days_mode and int(item.get('added_at', 0) or 0) < cutoff:
+                crossed_cutoff = True
+                continue
+            if int(item.get('duration', 0) or 0) > 0:
+                items.append(item)
+        if len(rows) < page_size or crossed_cutoff:
+            break
+        if not days_mode:
+            if len(items) >= want:
+                break
+            page_size = want - len(items)
+        start += len(rows)
+    return items if days_mode else items[:want]
+
+def _fetch_library_recently_added(library, items_count, days_mode, want, machine_id, plex_web_url, tautulli_base_url, tautulli_api_key):
+    """One library's recently added rows, run on a pool thread. Plex health
+    is thread-local, so the worker resets its own copy and hands back what it
+    recorded for the calling thread to merge. Returns (items, failed, missing)."""
+    reset_plex_health()
+    section_id = library['section_id']
+    section_type = library['section_type']
+    library_name = library['section_name']
+    days_val = int(items_count) if days_mode else None
+
+    items = []
+    if section_type == 'show':
+        items = fetch_tv_shows_from_plex_sdk(section_id, want, machine_id, days=days_val)
+    elif section_type == 'movie':
+        items = fetch_movies_from_plex_sdk(section_id, want, machine_id, days=days_val)
+    elif section_type == 'artist':
+        items = fetch_albums_from_plex_sdk(section_id, want, machine_id, days=days_val)
+    else:
+        logger.debug(f"Using Tautulli fallback for library type: {section_type}")
+        items = _tautulli_recently_added(tautulli_base_url, tautulli_api_key, section_id, items_count, days_mode, want)
+        for item in items:
+            item['library_name'] = library_name
+            if 'rating_key' in item and machine_id:
+                item['plex_url'] = build_plex_web_link(item['rating_key'], machine_id, plex_web_url)
+
+    return items, plex_call_failed(), plex_missing_libraries()
+
 def fetch_recently_added_using_plex_sdk(tautulli_base_url, tautulli_api_key, items_count=10, recently_added_mode="items", recently_added_sort="date"):
+    """Recently added per library, newest first. Days mode filters on the
+    Plex side (addedAt>>=) and items mode requests exactly items_count rows,
+    widened to a RATING_SORT_POOL candidate pool only for rating sort.
+    Libraries are fetched concurrently; results keep Tautulli's order."""
     recent_data = []
     days_mode = recently_added_mode == "days"
 
@@ -813,6 +1036,9 @@ def fetch_recently_added_using_plex_sdk(tautulli_base_url, tautulli_api_key, ite
         for section in (fetch_library_sections_with_genres(include_genres=False) or [])
     }
 
+    want = items_count * RATING_SORT_POOL if recently_added_sort == "rating" else items_count
+
+    to_fetch = []
     for library in libraries:
         section_id = library['section_id']
         section_type = library['section_type']
@@ -826,32 +1052,25 @@ def fetch_recently_added_using_plex_sdk(tautulli_base_url, tautulli_api_key, ite
             logger.debug(f"Skipping '{library_name}' (section {section_id}): not on the Plex server")
             note_missing_library(section_id, library_name, section_type)
             continue
+        to_fetch.append(library)
 
-        items = []
-        days_val = int(items_count) if days_mode else None
-
-        if section_type == 'show':
-            items = fetch_tv_shows_from_plex_sdk(section_id, items_count * 5, machine_id, days=days_val)
-        elif section_type == 'movie':
-            items = fetch_movies_from_plex_sdk(section_id, items_count * 5, machine_id, days=days_val)
-        elif section_type == 'artist':
-            items = fetch_albums_from_plex_sdk(section_id, items_count, machine_id, days=days_val)
-        else:
-            logger.debug(f"Using Tautulli fallback for library type: {section_type}")
-            fetch_count = str(items_count * 5) if not days_mode else "500"
-            rd, _ = run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_recently_added', section_id, None, fetch_count, 0)
-            if rd and rd.get('recently_added'):
-                items = [item for item in rd['recently_added'] if int(item.get('duration', 0) or 0) > 0]
-                if days_mode:
-                    cutoff = int((datetime.now() - timedelta(days=int(items_count))).timestamp())
-                    items = [item for item in items if int(item.get('added_at', 0) or 0) >= cutoff]
-                for item in items:
-                    item['library_name'] = library_name
-                    if 'rating_key' in item and machine_id:
-                        item['plex_url'] = build_plex_web_link(item['rating_key'], machine_id, plex_web_url)
+    if not to_fetch:
+        return recent_data
+
+    with ThreadPoolExecutor(max_workers=min(RECENTLY_ADDED_WORKERS, len(to_fetch)), thread_name_prefix="plex-recent") as pool:
+        results = list(pool.map(
+            lambda library: _fetch_library_recently_added(library, items_count, days_mode, want, machine_id, plex_web_url, tautulli_base_url, tautulli_api_key),
+            to_fetch,
+        ))
+
+    for library, (items, failed, missing) in zip(to_fetch, results):
+        if failed:
+            mark_plex_failed()
+        for entry in missing:
+            note_missing_library(entry['section_id'], entry['name'], entry['type'])
 
         if items is None:
-            note_missing_library(section_id, library_name, section_type)
+            note_missing_library(library['section_id'], library['section_name'], library['section_type'])
             items = []
 
         if recently_added_sort == "rating":
@@ -882,7 +1101,7 @@ def get_collection_items_for_email(collection_key, settings):
         machine_id = get_plex_machine_id()
 
         logger.debug(f"Fetching collection items from: {collection_items_url}")
-        response = safe_get(collection_items_url, headers=headers, timeout=30)
+        response = safe_get(collection_items_url, headers=headers, timeout=30, coalesce='plex')
         
         if response.status_code != 200:
             logger.error(f"ERROR: Failed to fetch collection items. Status: {response.status_code}")
@@ -15,6 +15,7 @@ def fetch_radarr_calendar(base_url, api_key, start_date, end_date):
                 'end': end_date,
             },
             headers={'X-Api-Key': api_key},
+            coalesce='radarr',
         )
         response.raise_for_status()
         return response.json(), None
@@ -1,10 +1,15 @@
 # Seerr (the merged Overseerr/Jellyseerr project) and its predecessors all
 # expose the same /api/v1 surface. Unlike Ombi, the request list endpoint carries only TMDB ids (no
 # title/year/poster), so each kept request is enriched here via the seerr
-# movie/tv detail endpoints before caching.
+# movie/tv detail endpoints before caching. Detail lookups run on a small
+# thread pool and persist in the seerr_details table, so a pull only pays
+# for TMDB ids it has not seen recently.
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
 
 from app.security import safe_get
+from app.store import get_seerr_details, save_seerr_details
 
 import logging
 
@@ -13,6 +18,15 @@ logger = logging.getLogger(__name__)
 # Request list page size; also bounds the number of detail lookups per pull.
 REQUEST_TAKE = 40
 
+# Concurrent detail lookups per pull. Seerr proxies each one to TMDB, so keep
+# this modest rather than scaling it with REQUEST_TAKE.
+DETAIL_WORKERS = 8
+
+# Details for a TMDB id are effectively static; a failed lookup is retried
+# much sooner so a transient Seerr/TMDB error does not stick for a month.
+DETAIL_CACHE_TTL = 86400 * 30
+DETAIL_FAILURE_TTL = 3600
+
 # MediaRequestStatus: 1 pending approval, 2 approved, 3 declined, 4 failed.
 # MediaStatus (media.status): 1 unknown, 2 pending, 3 processing,
 # 4 partially available, 5 available.
@@ -23,6 +37,7 @@ def _fetch_details(base_url, api_key, media_type, tmdb_id):
         response = safe_get(
             f"{base_url}/api/v1/{endpoint}/{tmdb_id}",
             headers={'X-Api-Key': api_key},
+            coalesce='seerr',
         )
         response.raise_for_status()
         details = response.json()
@@ -41,13 +56,50 @@ def _fetch_details(base_url, api_key, media_type, tmdb_id):
         'posterPath': details.get('posterPath'),
     }
 
+def _resolve_details(base_url, api_key, keys, progress_cb=None):
+    """Details for a set of (media_type, tmdb_id) keys: persisted lookups
+    first, then the misses fetched DETAIL_WORKERS at a time and written back
+    (failures included, as negative entries). progress_cb gets
+    (processed, total) over the lookups that actually hit the network."""
+    try:
+        resolved = get_seerr_details(keys, DETAIL_CACHE_TTL, DETAIL_FAILURE_TTL)
+    except Exception:
+        logger.warning("Seerr detail cache unreadable; fetching every lookup", exc_info=True)
+        resolved = {}
+    missing = [key for key in keys if key not in resolved]
+    if not missing:
+        return resolved
+
+    def _report(done):
+        if progress_cb:
+            try:
+                progress_cb(done, len(missing))
+            except Exception:
+                logger.debug("suppressed progress callback error", exc_info=True)
+
+    _report(0)
+    fetched = {}
+    with ThreadPoolExecutor(max_workers=min(DETAIL_WORKERS, len(missing)), thread_name_prefix="seerr-details") as pool:
+        futures = {pool.submit(_fetch_details, base_url, api_key, media_type, tmdb_id): (media_type, tmdb_id) for media_type, tmdb_id in missing}
+        for done, future in enumerate(as_completed(futures), 1):
+            fetched[futures[future]] = future.result()
+            _report(done)
+
+    try:
+        save_seerr_details(fetched)
+    except Exception:
+        logger.warning("Could not persist Seerr detail lookups", exc_info=True)
+    resolved.update(fetched)
+    return resolved
+
 def fetch_seerr_requests(base_url, api_key, progress_cb=None):
     """Returns (entries, error). entries is a list of normalized seerr request
     dicts (title/year/poster already resolved via detail lookups), or [] on
     any failure. Declined/failed/fully-available requests are skipped before
-    enrichment so they never cost a detail lookup. progress_cb, when given,
-    is called with (processed, total) as the result list is walked; the
-    caller owns any progress state (clients stay agnostic)."""
+    enrichment so they never cost a detail lookup, and ids already in the
+    persistent detail cache cost nothing either. progress_cb, when given, is
+    called with (processed, total) over the detail lookups that go to the
+    network; the caller owns any progress state (clients stay agnostic)."""
     if not base_url or not api_key:
         return [], "Seerr Error: URL and API key are required"
     base_url = base_url.rstrip('/')
@@ -56,25 +108,15 @@ def fetch_seerr_requests(base_url, api_key, progress_cb=None):
             f"{base_url}/api/v1/request",
             params={'take': REQUEST_TAKE, 'skip': 0, 'sort': 'added', 'filter': 'all'},
             headers={'X-Api-Key': api_key},
+            coalesce='seerr',
         )
         response.raise_for_status()
         results = response.json().get('results') or []
     except (requests.exceptions.RequestException, ValueError) as e:
         return [], f"Seerr Error: {e}"
 
-    entries = []
-    details_cache = {}
-    if progress_cb and results:
-        try:
-            progress_cb(0, len(results))
-        except Exception:
-            logger.debug("suppressed progress callback error", exc_info=True)
-    for req_index, req in enumerate(results, 1):
-        if progress_cb:
-            try:
-                progress_cb(req_index, len(results))
-            except Exception:
-                logger.debug("suppressed progress callback error", exc_info=True)
+    kept = []
+    for req in results:
         media = req.get('media') or {}
         media_type = media.get('mediaType')
         tmdb_id = media.get('tmdbId')
@@ -84,13 +126,17 @@ def fetch_seerr_requests(base_url, api_key, progress_cb=None):
         # detail lookups for entries the builder would discard anyway.
         if req.get('status') not in (1, 2) or (media.get('status') or 0) >= 5:
             continue
-        key = (media_type, tmdb_id)
-        if key not in details_cache:
-            details_cache[key] = _fetch_details(base_url, api_key, media_type, tmdb_id)
-        details = details_cache[key] or {}
+        kept.append((req, (media_type, tmdb_id)))
+
+    details_cache = _resolve_details(base_url, api_key, {key for _req, key in kept}, progress_cb)
+
+    entries = []
+    for req, key in kept:
+        media = req.get('media') or {}
+        details = details_cache.get(key) or {}
         requester = req.get('requestedBy') or {}
         entries.append({
-            'mediaType': media_type,
+            'mediaType': key[0],
             'title': details.get('title') or 'Unknown',
             'releaseDate': details.get('releaseDate') or '',
             'posterPath': details.get('posterPath'),
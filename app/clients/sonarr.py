@@ -17,6 +17,7 @@ def fetch_sonarr_calendar(base_url, api_key, start_date, end_date):
                 'includeEpisodeImages': 'true',
             },
             headers={'X-Api-Key': api_key},
+            coalesce='sonarr',
         )
         response.raise_for_status()
         return response.json(), None
@@ -56,7 +56,7 @@ def run_tautulli_command(base_url, api_key, command, section_id, error, time_ran
             api_url = f"{base_url}/api/v2?apikey={decrypt(api_key)}&cmd={command}&time_range={time_range}{_y}"
 
     try:
-        response = safe_get(api_url)
+        response = safe_get(api_url, coalesce='tautulli')
         response.raise_for_status()
         data = response.json()
 
@@ -0,0 +1,180 @@
+import gzip, hashlib, mimetypes, os, threading
+
+from flask import Response, current_app, request, session
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional; gzip alone is used without it
+    brotli = None
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Response compression and static asset caching.
+#
+# - Dynamic responses of a text type (preview HTML, pull JSON, pages) are
+#   brotli or gzip encoded when they are big enough to be worth it and the
+#   client accepts it. Streamed responses and file passthroughs are left
+#   alone, and so is any page carrying the session's CSRF token: pages also
+#   reflect request input (?alert=), and compressing a secret next to
+#   attacker-chosen text leaks it through the compressed size (BREACH).
+# - Static files of a text type get brotli/gzip variants built once at startup
+#   on a background thread, at the highest levels since it is paid only once.
+#   A file changed on disk is recompressed on its next request.
+# - url_for('static', ...) appends ?v=<content hash>. A request carrying the
+#   current hash is served with Cache-Control: immutable, so the browser does
+#   not ask again until the file (and so its URL) changes.
+
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/xml', 'text/javascript',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+})
+STATIC_SUFFIXES = ('.js', '.css', '.svg', '.json', '.map', '.txt', '.html', '.ico')
+
+# Below this the encoding overhead outweighs the saving.
+COMPRESS_MIN_BYTES = 1024
+
+# Dynamic responses are compressed per request, so trade ratio for speed.
+DYNAMIC_GZIP_LEVEL = 6
+DYNAMIC_BROTLI_QUALITY = 5
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_lock = threading.Lock()
+# path -> (mtime_ns, size, hash)
+_fingerprints = {}
+# (path, encoding) -> (mtime_ns, size, compressed bytes)
+_variants = {}
+
+def _encodings():
+    """Encodings this process can produce, best first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def _compress(data, encoding, static=False):
+    if encoding == 'br':
+        return brotli.compress(data, quality=STATIC_BROTLI_QUALITY if static else DYNAMIC_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=STATIC_GZIP_LEVEL if static else DYNAMIC_GZIP_LEVEL, mtime=0)
+
+def _pick_encoding():
+    accepted = request.accept_encodings
+    for encoding in _encodings():
+        if accepted.quality(encoding) > 0:
+            return encoding
+    return None
+
+def static_fingerprint(path):
+    """Short content hash of a static file, recomputed only when its mtime or
+    size changes."""
+    stat = os.stat(path)
+    with _lock:
+        known = _fingerprints.get(path)
+        if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return known[2]
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    with _lock:
+        _fingerprints[path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+def _is_precompressible(path, size):
+    return path.endswith(STATIC_SUFFIXES) and size >= COMPRESS_MIN_BYTES
+
+def _static_variant(path, encoding):
+    """Compressed bytes of a static file, or None when it is not worth it."""
+    stat = os.stat(path)
+    if not _is_precompressible(path, stat.st_size):
+        return None
+    key = (path, encoding)
+    with _lock:
+        known = _variants.get(key)
+        if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return known[2]
+    with open(path, 'rb') as f:
+        data = _compress(f.read(), encoding, static=True)
+    with _lock:
+        _variants[key] = (stat.st_mtime_ns, stat.st_size, data)
+    return data
+
+def precompress_static(folder):
+    """Build the compressed variants of every eligible static file."""
+    count = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                for encoding in _encodings():
+                    if _static_variant(path, encoding) is not None:
+                        count += 1
+            except OSError:
+                logger.debug(f"precompress: skipped {path}", exc_info=True)
+    logger.info(f"Precompressed {count} static asset variants")
+
+def fingerprint_static_urls(endpoint, values):
+    if endpoint != 'static' or 'v' in values or not values.get('filename'):
+        return
+    path = safe_join(current_app.static_folder, values['filename'])
+    if path and os.path.isfile(path):
+        values['v'] = static_fingerprint(path)
+
+def serve_static(filename):
+    """Flask's static view, plus precompressed variants and immutable caching
+    for fingerprinted URLs."""
+    path = safe_join(current_app.static_folder, filename)
+    if not path or not os.path.isfile(path):
+        return current_app.send_static_file(filename)
+
+    fingerprint = static_fingerprint(path)
+    encoding = _pick_encoding()
+    variant = _static_variant(path, encoding) if encoding else None
+    if variant is None:
+        # send_file already answers conditional and range requests
+        response = current_app.send_static_file(filename)
+    else:
+        response = Response(variant, mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        response.headers['Content-Encoding'] = encoding
+        response.set_etag(f"{fingerprint}-{encoding}")
+        response.last_modified = os.path.getmtime(path)
+        response.cache_control.no_cache = True
+        response.make_conditional(request)
+    if _is_precompressible(path, os.path.getsize(path)):
+        response.vary.add('Accept-Encoding')
+    if request.args.get('v') == fingerprint:
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+def _carries_csrf_token(response, body):
+    if response.mimetype != 'text/html':
+        return False
+    token = session.get('csrf_token')
+    return bool(token) and token.encode('utf-8') in body
+
+def compress_response(response):
+    if (response.direct_passthrough or response.is_streamed
+            or not 200 <= response.status_code < 300 or response.status_code == 204
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES or _carries_csrf_token(response, body):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = _pick_encoding()
+    if encoding is None:
+        return response
+    response.set_data(_compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    # the bytes differ per encoding, so a strong validator no longer holds
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def install(app):
+    app.url_defaults(fingerprint_static_urls)
+    app.view_functions['static'] = serve_static
+    app.after_request(compress_response)
+    threading.Thread(target=precompress_static, args=(app.static_folder,), daemon=True, name="static-precompress").start()
@@ -74,6 +74,59 @@ DEFAULT_LANDING_PAGE = "builder"
 
 CACHE_DURATION = 86400
 CACHE_EXTENDED_DURATION = 86400 * 7
+# Per-user slots (recommendations, DroppedNeedle wrapped) age out on their
+# own clock, so one stale listener never forces a refetch for everyone.
+USER_CACHE_DURATION = 86400
+
+# Byte budget for the in-memory cache. Superseded parameter variants of a
+# segment and dynamically keyed entries (featured picks, collection items,
+# per-user slots) are evicted least recently used first past this total.
+try:
+    CACHE_MAX_BYTES = max(1, int(os.environ.get('CACHE_MAX_MB', 128))) * 1024 * 1024
+except ValueError:
+    CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# Concurrent /wrapped/user calls per DroppedNeedle pull. Year-end sends cover
+# every listener, so this is env-tunable for slow or rate-limited instances.
+try:
+    DROPPEDNEEDLE_WORKERS = max(1, int(os.environ.get('DROPPEDNEEDLE_WORKERS', 4)))
+except ValueError:
+    DROPPEDNEEDLE_WORKERS = 4
+
+# Identical upstream GETs (same service, endpoint and params) issued while
+# one is in flight share its response; a successful one is reused for this
+# many seconds after it lands, so a manual pull racing the daily refresh or
+# a scheduled send costs Tautulli one request, not three. 0 disables reuse.
+try:
+    UPSTREAM_SHARE_SECONDS = max(0.0, float(os.environ.get('UPSTREAM_SHARE_SECONDS', 5)))
+except ValueError:
+    UPSTREAM_SHARE_SECONDS = 5.0
+
+# On-disk artwork cache behind the /proxy-*-art routes. A poster younger
+# than ART_CACHE_FRESH_SECONDS is served without asking the media server; an
+# older one is revalidated upstream with a conditional request. Past the
+# byte budget the least recently used files are removed.
+ART_CACHE_DIR = os.path.join("database", "art_cache")
+ART_CACHE_FRESH_SECONDS = 86400
+try:
+    ART_CACHE_MAX_BYTES = max(1, int(os.environ.get('ART_CACHE_MAX_MB', 512))) * 1024 * 1024
+except ValueError:
+    ART_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Size every outgoing message should fit in, MIME encoding included. A
+# message over it has its inline images re-encoded in steps until it fits
+# (app/emails/optimize.py). 0 disables the pass.
+try:
+    EMAIL_SIZE_BUDGET_BYTES = int(max(0.0, float(os.environ.get('EMAIL_SIZE_BUDGET_MB', 10))) * 1024 * 1024)
+except ValueError:
+    EMAIL_SIZE_BUDGET_BYTES = 10 * 1024 * 1024
+
+# gthread worker threads gunicorn runs (--threads in the Dockerfile CMD);
+# /readyz reports unavailable once all but the probe's own are busy.
+try:
+    WORKER_THREADS = max(1, int(os.environ.get('WORKER_THREADS', 8)))
+except ValueError:
+    WORKER_THREADS = 8
 
 GITHUB_OWNER = "jma1ice"
 GITHUB_REPO = "newsletterr"
@@ -6,16 +6,17 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def db_connect(row_factory=None):
+def db_connect(row_factory=None, timeout=10):
     """Open a connection to the app database.
 
     WAL journaling plus a busy timeout let the scheduler thread and the
     gthread request workers write concurrently without "database is locked"
     errors. WAL is a persistent property of the file (set once, cheap to
-    re-assert); busy_timeout is per-connection. Callers own closing.
+    re-assert); busy_timeout is per-connection, `timeout` seconds. Callers
+    own closing.
     """
-    conn = sqlite3.connect(config.DB_PATH, timeout=10)
-    conn.execute("PRAGMA busy_timeout=10000")
+    conn = sqlite3.connect(config.DB_PATH, timeout=timeout)
+    conn.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
     conn.execute("PRAGMA journal_mode=WAL")
     if row_factory is not None:
         conn.row_factory = row_factory
@@ -171,6 +172,31 @@ def init_db(db_path):
         )
     """)
 
+    # TMDB detail lookups behind the Seerr request list. Titles, release
+    # dates and posters for a TMDB id almost never change, so they persist
+    # across pulls and restarts. details NULL records a failed lookup
+    # (negative cache, retried after a much shorter TTL).
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS seerr_details (
+            media_type TEXT NOT NULL,
+            tmdb_id INTEGER NOT NULL,
+            details TEXT,
+            fetched_at REAL NOT NULL,
+            PRIMARY KEY (media_type, tmdb_id)
+        )
+    """)
+
+    # Persistent tier of app/cache: one row per cache key, payload is the
+    # encrypted, zlib-compressed JSON of (data, params). timestamp is the original
+    # set time, so entries come back correctly aged after a restart.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            cache_key TEXT PRIMARY KEY,
+            payload BLOB NOT NULL,
+            timestamp REAL NOT NULL
+        )
+    """)
+
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS email_schedules (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -24,6 +24,7 @@ from flask import Response, abort, jsonify, redirect, request, send_from_directo
 
 from app import config
 from app.cache import get_cache_info, set_cached_data
+from app.emails.fetchers import GRAPH_COMMANDS
 
 import logging
 
@@ -931,20 +932,7 @@ def _demo_pull_stats():
         "stats": stats,
         "yearly_wrapped_json": stats,
         "graph_data": graph_data,
-        "graph_commands": [
-            {'command': 'get_concurrent_streams_by_stream_type', 'name': 'Stream Type'},
-            {'command': 'get_plays_by_date', 'name': 'Plays by Date'},
-            {'command': 'get_plays_by_dayofweek', 'name': 'Plays by Day'},
-            {'command': 'get_plays_by_hourofday', 'name': 'Plays by Hour'},
-            {'command': 'get_plays_by_source_resolution', 'name': 'Plays by Source Res'},
-            {'command': 'get_plays_by_stream_resolution', 'name': 'Plays by Stream Res'},
-            {'command': 'get_plays_by_stream_type', 'name': 'Plays by Stream Type'},
-            {'command': 'get_plays_by_top_10_platforms', 'name': 'Plays by Top Platforms'},
-            {'command': 'get_plays_by_top_10_users', 'name': 'Plays by Top Users'},
-            {'command': 'get_plays_per_month', 'name': 'Plays per Month'},
-            {'command': 'get_stream_type_by_top_10_platforms', 'name': 'Stream Type by Top Platforms'},
-            {'command': 'get_stream_type_by_top_10_users', 'name': 'Stream Type by Top Users'},
-        ],
+        "graph_commands": GRAPH_COMMANDS,
         "recent_data": recent_data,
         "most_watched_data": demo_most_watched(),
         "user_dict": demo_filtered_users(),
@@ -962,6 +950,14 @@ def _demo_pull_html():
     seed_demo_cache()
     return _index_response()
 
+def _demo_pull_job():
+    """A pull started as a background job is answered straight away from the
+    sample data, like the pull itself; the page takes any answer other than
+    202 as the pull's response."""
+    if request.args.get('op') == 'pull_stats':
+        return _demo_pull_stats()
+    return _demo_pull_html()
+
 def _demo_collection_items():
     data = request.get_json(silent=True) or {}
     return jsonify({
@@ -1101,6 +1097,7 @@ _DEMO_WRITE_HANDLERS = {
     'stats.pull_coming_soon': _demo_pull_html,
     'stats.pull_ombi_requests': _demo_pull_html,
     'stats.pull_seerr_requests': _demo_pull_html,
+    'stats.start_pull_job': _demo_pull_job,
     'stats.get_collection_items': _demo_collection_items,
     'main.clear_cache_route': _demo_clear_cache,
     'settings.settings': _demo_settings_save,
@@ -1,29 +1,25 @@
-import json, re
+import json
 
 from datetime import datetime
-from html.parser import HTMLParser
-import html as _html_stdlib
 
 from app import dates
 from app.cache import get_cache_info, get_cached_data, set_cached_data
-from app.emails.images import fetch_and_attach_image
+from app.emails.images import fetch_and_attach_image, is_preview
+from app.emails.postprocess import convert_html_to_plain_text, process_email_html  # noqa: F401 (re-exported)
 from app.emails.blocks import build_graph_html_with_frontend_image, build_text_block_html, build_separator_html, build_image_html_with_cid, build_emoji_html
 from app.emails.builders import build_stats_html_with_cid_background, build_recently_added_html_with_cids, build_recommendations_html_with_cids, build_droppedneedle_wrapped_html_with_cids, build_droppedneedle_server_stats_html_with_cids, build_collections_html_with_cids, build_yearly_wrapped_html_with_cids, build_sonarr_coming_soon_html_with_cids, build_radarr_coming_soon_html_with_cids, build_ombi_requests_html_with_cids, build_seerr_requests_html_with_cids
 from app.emails.builders import layouts, recently_released
 from app.emails.builders.card_grid import EMPTY_STATE_MARKER
 from app.emails.builders.recommendations import dn_options_from_settings
-from app.emails import density, headings
+from app.emails import density, fragments, headings
 from app.emails.builders.most_watched import build_most_watched_html_with_cids
 from app.emails.builders.random_pick import build_random_pick_html
 from app.emails.builders.top_viewer import build_top_viewer_html, find_top_viewer
 from app.emails.snapin_tokens import expand_snapin_tokens
-from app.clients.plex import fetch_random_library_item, fetch_library_item_by_rating_key, search_library_items, fetch_library_sections_with_genres
+from app.clients.plex import pick_random_library_item, fetch_library_item_by_rating_key, search_library_items, get_library_sections_cached
 from app.theme import get_email_theme_colors, get_email_chrome_settings, build_email_css_from_theme, is_dark_background
 from app.security import escape_html_output as esc
 
-_BLOCK_TAGS = {'p', 'div', 'tr', 'ul', 'ol', 'table', 'blockquote', 'section', 'article'}
-_HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
-
 WEBFONT_LINK = (
     '<!--[if !mso]><!-->'
     '<link rel="stylesheet" '
@@ -31,101 +27,6 @@ WEBFONT_LINK = (
     '<!--<![endif]-->'
 )
 
-def minify_email_html(html):
-    """Strip the source-formatting whitespace (indentation, blank lines) that
-    every builder's f-strings carry, without touching runs of whitespace
-    inside text content."""
-    html = re.sub(r'>[ \t\r\n]+<', '><', html)
-    html = re.sub(r'[ \t]*\r?\n[ \t]*', ' ', html)
-    html = re.sub(r' {2,}', ' ', html)
-    return html.strip()
-
-class _PlainTextExtractor(HTMLParser):
-    """Walk email HTML and emit a readable text/plain alternative: entities
-    are decoded (convert_charrefs), block elements and headings become line
-    breaks, list items get bullets, table cells are separated, link targets
-    are preserved as 'text (url)', and image alt text is surfaced."""
-    def __init__(self):
-        super().__init__(convert_charrefs=True)
-        self.parts = []
-        self._skip = 0            # depth inside <script>/<style>
-        self._in_link = False
-        self._href = None
-        self._link_text = []
-
-    def handle_starttag(self, tag, attrs):
-        if tag in ('script', 'style'):
-            self._skip += 1
-            return
-        if self._skip:
-            return
-        attrs = dict(attrs)
-        if tag == 'br':
-            self.parts.append('\n')
-        elif tag in _HEADING_TAGS:
-            self.parts.append('\n\n')
-        elif tag == 'li':
-            self.parts.append('\n- ')
-        elif tag in ('td', 'th'):
-            if self.parts and not self.parts[-1].endswith('\n'):
-                self.parts.append('  |  ')
-        elif tag in _BLOCK_TAGS:
-            self.parts.append('\n')
-        elif tag == 'a':
-            self._in_link = True
-            self._href = attrs.get('href')
-            self._link_text = []
-        elif tag == 'img':
-            alt = (attrs.get('alt') or '').strip()
-            if alt:
-                self.parts.append(f'[{alt}]')
-
-    def handle_endtag(self, tag):
-        if tag in ('script', 'style'):
-            if self._skip:
-                self._skip -= 1
-            return
-        if self._skip:
-            return
-        if tag == 'a':
-            text = ''.join(self._link_text).strip()
-            href = (self._href or '').strip()
-            if href and not href.startswith(('#', 'mailto:', 'cid:')) and text and href != text:
-                self.parts.append(f'{text} ({href})')
-            else:
-                self.parts.append(text)
-            self._in_link = False
-            self._href = None
-            self._link_text = []
-        elif tag in _BLOCK_TAGS or tag in _HEADING_TAGS:
-            # note: <li> intentionally omitted; the next item's "\n- " breaks
-            # the line, so closing it here would double-space list entries
-            self.parts.append('\n')
-
-    def handle_data(self, data):
-        if self._skip:
-            return
-        if self._in_link:
-            self._link_text.append(data)
-        else:
-            self.parts.append(data)
-
-def convert_html_to_plain_text(html_content):
-    if not html_content:
-        return ""
-    try:
-        parser = _PlainTextExtractor()
-        parser.feed(html_content)
-        parser.close()
-        text = ''.join(parser.parts)
-    except Exception:
-        # a parser hiccup must never block a send; fall back to a bare strip
-        text = _html_stdlib.unescape(re.sub(r'<[^>]+>', '', html_content))
-    # collapse intra-line whitespace and cap consecutive blank lines
-    lines = [re.sub(r'[ \t]+', ' ', ln).strip() for ln in text.splitlines()]
-    text = re.sub(r'\n{3,}', '\n\n', '\n'.join(lines))
-    return text.strip()
-
 def attach_logo_image(msg_root, logo_filename, custom_logo_filename, base_url="", hosted_images_enabled=False, hosted_base_url=""):
     if logo_filename == 'custom':
         logo_url = f"/static/uploads/logos/{custom_logo_filename}"
@@ -162,7 +63,7 @@ def item_rendered_content(item, html):
         return False
     return EMPTY_STATE_MARKER not in html
 
-def build_email_html_with_all_cids(template_data, tautulli_data, msg_root, display_preference, users_data, recommendations_data=None, user_dict=None, base_url="", target_user_key=None, is_scheduled=False, items_count=None, date_range="", expanded_collections=None, email_header_title=None, droppedneedle_wrapped_data=None, droppedneedle_server_data=None, yearly_wrapped_data=None, sonarr_coming_soon_data=None, radarr_coming_soon_data=None, ombi_requests_data=None, seerr_requests_data=None, unsubscribe_placeholder=None, hosted_base_url="", hosted_images_enabled=False, build_hosted_variant=False, hosted_enabled=False, links_base_url="", render_stats=None):
+def build_email_html_with_all_cids(template_data, tautulli_data, msg_root, display_preference, users_data, recommendations_data=None, user_dict=None, base_url="", target_user_key=None, is_scheduled=False, items_count=None, date_range="", expanded_collections=None, email_header_title=None, droppedneedle_wrapped_data=None, droppedneedle_server_data=None, yearly_wrapped_data=None, sonarr_coming_soon_data=None, radarr_coming_soon_data=None, ombi_requests_data=None, seerr_requests_data=None, unsubscribe_placeholder=None, hosted_base_url="", hosted_images_enabled=False, build_hosted_variant=False, hosted_enabled=False, links_base_url="", render_stats=None, fragment_version=None):
     custom_html = template_data.get('custom_html', '').strip()
     selected_items = json.loads(template_data.get('selected_items') or '[]') if not custom_html else []
     email_text = template_data.get('email_text', '')
@@ -205,13 +106,28 @@ def build_email_html_with_all_cids(template_data, tautulli_data, msg_root, displ
     )
     outer_theme_colors = theme_colors
 
+    # Previews pass fragment_version (fragments.data_version()) and get each
+    # section from the fragment cache when nothing it is rendered from changed.
+    fragment_context = None
+    if fragment_version is not None and is_preview(msg_root):
+        fragment_context = fragments.render_context(
+            fragment_version, settings=_s_all, theme=outer_theme_colors,
+            display_preference=display_preference, target_user_key=target_user_key,
+            items_count=items_count, date_range=date_range, base_url=base_url,
+            expanded_collections=expanded_collections, hosted_images_enabled=hosted_images_enabled,
+            hosted_base_url=hosted_base_url,
+        )
+
     _content_count = []
 
     def _render_item(item, group_index=0):
         """Single per-item dispatch shared by the selected-items loop and
         snap-in token expansion in custom HTML. Returns the item's
         section HTML ('' when the item has nothing to render)."""
-        content_html = _dispatch_item(item, group_index)
+        if fragment_context is not None:
+            content_html = fragments.cached_render(_dispatch_item, item, group_index, fragment_context)
+        else:
+            content_html = _dispatch_item(item, group_index)
         if item_rendered_content(item, content_html):
             _content_count.append(1)
         return content_html
@@ -355,20 +271,21 @@ def build_email_html_with_all_cids(template_data, tautulli_data, msg_root, displ
 
         elif item_type == 'random_pick':
             # The pick is drawn per render on purpose: previews and every send
-            # each feature a fresh random item (the builder UI says so).
+            # each feature a fresh random item (the builder UI says so). The
+            # draw samples the section's in-memory reservoir, not Plex.
             rp_section_id = item.get('sectionId') or item.get('section_id')
             rp_library = item.get('library') or ''
             if not rp_section_id and rp_library:
                 # Token form (NEWS-32) carries only the library name; resolve
-                # it against the live Plex section list.
-                for lib in fetch_library_sections_with_genres(include_genres=False):
+                # it against the cached Plex section table.
+                for lib in get_library_sections_cached():
                     if lib['title'].lower() == rp_library.lower():
                         rp_section_id = lib['section_id']
                         break
             if rp_section_id or rp_library:
                 # An unresolvable section renders the builder's empty state
                 # (pick=None) so token authors see the problem in the output.
-                pick = fetch_random_library_item(rp_section_id, genre=item.get('genre') or None) if rp_section_id else None
+                pick = pick_random_library_item(rp_section_id, genre=item.get('genre') or None) if rp_section_id else None
                 rp_genre_label = item.get('genreLabel') or ''
                 if use_layout:
                     content_html += layouts.render_random_pick(email_layout, pick, msg_root, theme_colors, base_url, library_label=rp_library, genre_label=rp_genre_label, hosted_images_enabled=hosted_images_enabled, hosted_base_url=hosted_base_url)
@@ -533,8 +450,11 @@ def build_email_html_with_all_cids(template_data, tautulli_data, msg_root, displ
         email_text_resolved = email_text.replace('__DEFAULT_INTRO__', _resolved_intro).replace('__DEFAULT_OUTRO__', _resolved_outro)
         content_html += build_text_block_html(email_text_resolved, 'textblock', theme_colors)
 
+    # an incremental preview (fragments.preview_update) marks each section
+    section_ids = fragments.fragment_ids(selected_items) if getattr(msg_root, 'mark_fragments', False) else None
     for group_index, item in enumerate(selected_items):
-        content_html += _render_item(item, group_index)
+        section_html = _render_item(item, group_index)
+        content_html += fragments.mark(section_ids[group_index], section_html) if section_ids else section_html
 
     if render_stats is not None:
         render_stats['content_items'] = len(_content_count)
@@ -770,7 +690,7 @@ def build_complete_email_html_with_cid_logo(content_html, server_name, subject,
     
     _color_scheme = "dark only" if is_dark_background(theme_colors.get('background')) else "light only"
 
-    return minify_email_html(f"""<!DOCTYPE html>
+    return process_email_html(f"""<!DOCTYPE html>
         <html lang="en" xmlns="http://www.w3.org/1999/xhtml" xmlns:v="urn:schemas-microsoft-com:vml" xmlns:o="urn:schemas-microsoft-com:office:office">
             <head>
                 <meta charset="UTF-8">
@@ -821,4 +741,4 @@ def build_complete_email_html_with_cid_logo(content_html, server_name, subject,
                 </tr>
                 </table>
             </body>
-        </html>""")
+        </html>""").html
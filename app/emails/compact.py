@@ -0,0 +1,195 @@
+import re
+
+from html import unescape
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Gmail clips an HTML body past ~102 KB behind a "[Message clipped] View
+# entire message" link, which also hides the footer's unsubscribe link. Big
+# Recently Added grids get there mostly on inline styles, since every card and
+# row repeats the same long style="..." attribute. Two passes run on the
+# assembled HTML:
+#
+# - always: inline styles are tightened (no spaces around ':' and ';', no
+#   exact duplicate declarations, no empty style/class attributes). Every
+#   client renders the result the same way.
+# - over GMAIL_CLIP_BYTES only: style values that repeat are moved into a
+#   <style> block in <head> as short classes (.s0, .s1, ...), most bytes
+#   saved first. Gmail, Apple Mail and Outlook apply head styles; clients that
+#   drop them (Gmail with non-Google accounts, some webmail) get plainer cards
+#   rather than a clipped message.
+#
+# Comments (Outlook's conditional blocks included) and <style>/<script>
+# contents are never touched. A style stays inline where a head rule could not
+# stand in for it; see _KEEP_INLINE.
+
+GMAIL_CLIP_BYTES = 102 * 1024
+
+# Gmail ignores a whole <style> block past this size, so interning stops
+# short of it (the theme CSS is a block of its own).
+STYLE_BLOCK_MAX = 8 * 1024
+
+# Gmail rewrites <body> and ignores rules aimed at it
+_INLINE_TAGS = {'html', 'body'}
+_KEEP_INLINE = re.compile(
+    # inline !important beats the theme CSS's media queries, a class would not;
+    # hidden preheaders must stay hidden where head CSS is stripped; url()
+    # (cid: backgrounds) and quotes are kept out of the CSS block
+    r'!important|display:\s*none|max-height:\s*0|mso-hide|url\(|["<>{}@\\]', re.I)
+
+_SKIP = re.compile(r'(<!--.*?-->|<(style|script)\b.*?</\2\s*>)', re.S | re.I)
+START_TAG = re.compile(r'<([a-zA-Z][^\s/>]*)((?:\s+[^\s=/>]+(?:\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s"\'>]+))?)*)(\s*/?)>')
+_STYLE = re.compile(r'\sstyle\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.I)
+_CLASS = re.compile(r'\sclass\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.I)
+
+def _declarations(value):
+    """value split on the ';' that end declarations, not the ones inside
+    parentheses or quotes (data: URIs, font names)."""
+    out, depth, quote, start = [], 0, None, 0
+    for i, ch in enumerate(value):
+        if quote:
+            quote = None if ch == quote else quote
+        elif ch in '\'"':
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth = max(0, depth - 1)
+        elif ch == ';' and not depth:
+            out.append(value[start:i])
+            start = i + 1
+    out.append(value[start:])
+    return out
+
+def _attr_escape(value):
+    return value.replace('&', '&amp;').replace('"', '&quot;').replace('<', '&lt;').replace('>', '&gt;')
+
+def tidy_style(value):
+    """A style attribute's value with no spacing around ':' and ';', no empty
+    declarations and no exact repeats (the last copy is kept, so the cascade
+    is unchanged; a property repeated with a different value is a fallback
+    and stays)."""
+    value = unescape(value)
+    # the character walk is only needed when a ';' could be quoted
+    pieces = _declarations(value) if any(c in value for c in '(\'"') else value.split(';')
+    decls = []
+    for decl in pieces:
+        prop, sep, val = decl.partition(':')
+        prop, val = prop.strip(), ' '.join(val.split())
+        if not sep or not prop or not val:
+            continue
+        decls.append(f'{prop}:{val}')
+    kept = [d for i, d in enumerate(decls) if d not in decls[i + 1:]]
+    return _attr_escape(';'.join(kept))
+
+def _outside_comments(html, fn):
+    """html with fn applied to every stretch outside comments and
+    <style>/<script> elements."""
+    parts = _SKIP.split(html)
+    # split() yields text, the skipped match, then the tag-name group
+    return ''.join(fn(part) if i % 3 == 0 else (part or '') for i, part in enumerate(parts) if i % 3 != 2)
+
+def _rewrite_tags(html, fn):
+    return _outside_comments(html, lambda text: START_TAG.sub(fn, text))
+
+def _style_of(attrs):
+    m = _STYLE.search(attrs)
+    return (m, m.group(1) if m.group(1) is not None else m.group(2)) if m else (None, None)
+
+def _tidy(match):
+    name, attrs, end = match.groups()
+    m, value = _style_of(attrs)
+    if m:
+        value = tidy_style(value)
+        attrs = attrs[:m.start()] + (f' style="{value}"' if value else '') + attrs[m.end():]
+    attrs = re.sub(r'\sclass\s*=\s*(?:""|\'\')', '', attrs)
+    return f'<{name}{attrs}{end}>'
+
+def _internable(name, value):
+    return name.lower() not in _INLINE_TAGS and not _KEEP_INLINE.search(unescape(value))
+
+def _classes(html):
+    """{style value: class name} for the repeated values worth a head rule."""
+    counts = {}
+    def _count(match):
+        _, value = _style_of(match.group(2))
+        if value and _internable(match.group(1), value):
+            counts[value] = counts.get(value, 0) + 1
+        return match.group(0)
+    _rewrite_tags(html, _count)
+
+    # an interned use costs ' class="sN"' (or ' sN' on an existing class) in
+    # place of ' style="..."'; the rule costs '.sN{...}' once
+    def _saved(item):
+        value, count = item
+        return count * (len(value) + 9 - 11) - (len(value) + 6)
+    ranked = sorted((item for item in counts.items() if item[1] > 1 and _saved(item) > 0), key=_saved, reverse=True)
+    classes, used = {}, 0
+    for value, _ in ranked:
+        name = f's{len(classes):x}'
+        rule = len(name) + len(value) + 3
+        if used + rule > STYLE_BLOCK_MAX:
+            break
+        classes[value] = name
+        used += rule
+    return classes
+
+def _intern(html, classes):
+    def _swap(match):
+        name, attrs, end = match.groups()
+        m, value = _style_of(attrs)
+        if not m or value not in classes or not _internable(name, value):
+            return match.group(0)
+        attrs = attrs[:m.start()] + attrs[m.end():]
+        c = _CLASS.search(attrs)
+        if c:
+            existing = c.group(1) if c.group(1) is not None else c.group(2)
+            attrs = attrs[:c.start()] + f' class="{existing} {classes[value]}"' + attrs[c.end():]
+        else:
+            attrs += f' class="{classes[value]}"'
+        return f'<{name}{attrs}{end}>'
+    rules = ''.join(f'.{name}{{{unescape(value)}}}' for value, name in classes.items())
+    # after the theme CSS: a tie on specificity then goes to the interned rule,
+    # as it went to the inline style
+    head_end = re.search(r'</head\s*>', html, re.I)
+    html = html[:head_end.start()] + f'<style>{rules}</style>' + html[head_end.start():]
+    return _rewrite_tags(html, _swap)
+
+def tidy_tag(tag):
+    """One start tag with its style tightened and empty style/class
+    attributes dropped."""
+    return START_TAG.sub(_tidy, tag)
+
+def intern_styles(html):
+    """html with its repeated inline styles moved into a head <style> block.
+    Documents without a </head> (fragments), and ones interned already, are
+    returned as they are."""
+    if not re.search(r'</head\s*>', html, re.I) or '<style>.s0{' in html:
+        return html
+    classes = _classes(html)
+    if not classes:
+        return html
+    before = len(html.encode('utf-8'))
+    html = _intern(html, classes)
+    logger.debug(f"Compacted email HTML: {len(classes)} repeated styles interned, "
+                 f"{before / 1024:.1f} KB -> {len(html.encode('utf-8')) / 1024:.1f} KB")
+    return html
+
+def compact_email_html(html, limit=GMAIL_CLIP_BYTES):
+    """html with its inline styles tightened, and past `limit` bytes with
+    repeated styles interned (see intern_styles)."""
+    html = _rewrite_tags(html, _tidy)
+    if len(html.encode('utf-8')) <= limit:
+        return html
+    return intern_styles(html)
+
+def clip_report(size, limit=GMAIL_CLIP_BYTES):
+    """Logs the HTML body's size in bytes against Gmail's clip limit; returns
+    {'bytes', 'limit', 'clipped'}."""
+    report = {'bytes': size, 'limit': limit, 'clipped': size > limit}
+    logger.info(f"Email HTML: {size / 1024:.1f} KB of Gmail's {limit / 1024:.0f} KB clip limit")
+    if report['clipped']:
+        logger.warning("Email HTML is over Gmail's clip limit; Gmail will show it clipped")
+    return report
@@ -1,13 +1,15 @@
-import time
+import copy, time
 
+from app import config
 from app.settings_store import get_settings
-from app.cache import get_cached_data, set_cached_data
+from app.cache import get_cached_data, get_cached_variant, set_cached_data, get_cached_user_data, set_cached_user_data
 from app.crypto import decrypt
 from app.clients.tautulli import run_tautulli_command, days_since_year_start
 from app.clients.plex import get_plex_machine_id, build_plex_web_link
 from app.clients.mediaserver import fetch_recently_added, get_media_server_type
-from app.clients.jellyfin import fetch_jellyfin_library_counts
-from app.clients.jellywatch import fetch_jellywatch_home_stats
+from app.clients.jellyfin import fetch_jellyfin_library_counts, fetch_jellyfin_users, get_jellyfin_server_id, build_jellyfin_web_link
+from app.clients.jellywatch import fetch_jellywatch_home_stats, fetch_jellywatch_most_watched
+from app.clients.playback_reporting import fetch_playback_reporting_graphs
 from app.clients.conjurr import run_conjurr_command
 from app.clients.droppedneedle import run_droppedneedle_command, fetch_droppedneedle_server_stats
 from app.clients.sonarr import fetch_sonarr_calendar
@@ -21,7 +23,63 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def fetch_tautulli_data_for_email(tautulli_base_url, tautulli_api_key, date_range, server_name, items_count=10, stats_type='plays', recently_added_mode='items', recently_added_sort='date'):
+GRAPH_COMMANDS = [
+    {'command': 'get_concurrent_streams_by_stream_type', 'name': 'Stream Type'},
+    {'command': 'get_plays_by_date', 'name': 'Plays by Date'},
+    {'command': 'get_plays_by_dayofweek', 'name': 'Plays by Day'},
+    {'command': 'get_plays_by_hourofday', 'name': 'Plays by Hour'},
+    {'command': 'get_plays_by_source_resolution', 'name': 'Plays by Source Res'},
+    {'command': 'get_plays_by_stream_resolution', 'name': 'Plays by Stream Res'},
+    {'command': 'get_plays_by_stream_type', 'name': 'Plays by Stream Type'},
+    {'command': 'get_plays_by_top_10_platforms', 'name': 'Plays by Top Platforms'},
+    {'command': 'get_plays_by_top_10_users', 'name': 'Plays by Top Users'},
+    {'command': 'get_plays_per_month', 'name': 'Plays per Month'},
+    {'command': 'get_stream_type_by_top_10_platforms', 'name': 'Stream Type by Top Platforms'},
+    {'command': 'get_stream_type_by_top_10_users', 'name': 'Stream Type by Top Users'}
+]
+
+# Segments a schedule fetch caches under its own date range (source
+# 'schedule'), without replacing what the builder shows from the last pull.
+SCHEDULE_CACHE_SEGMENTS = ('stats', 'graph_data', 'recent_data', 'most_watched_data', 'most_watched_recent_data')
+
+def _schedule_cache_params(date_range, items_count, stats_type, recently_added_mode):
+    return {
+        'time_range': str(date_range),
+        'count': str(items_count),
+        'stats_type': stats_type,
+        'mode': recently_added_mode,
+        'source': 'schedule',
+        'timestamp': time.time(),
+        'refresh_type': 'scheduled',
+    }
+
+def fetch_tautulli_data_for_email(tautulli_base_url, tautulli_api_key, date_range, server_name, items_count=10, stats_type='plays', recently_added_mode='items', recently_added_sort='date', use_cache=False):
+    """Media data for one schedule's date range. Every fetch is cached as
+    that range's variant; use_cache=True (previews) returns the cached
+    variant instead when all segments are fresh. Sends always fetch."""
+    if use_cache:
+        match = {'time_range': date_range, 'count': items_count, 'stats_type': stats_type, 'mode': recently_added_mode}
+        cached = {segment: get_cached_variant(segment, strict=True, **match) for segment in SCHEDULE_CACHE_SEGMENTS}
+        if all(value is not None for value in cached.values()):
+            logger.debug(f"Using cached {date_range}-day schedule data")
+            return _schedule_data_from_cache(cached, server_name, date_range)
+
+    data = _fetch_tautulli_data_for_email(tautulli_base_url, tautulli_api_key, date_range, server_name, items_count, stats_type, recently_added_mode, recently_added_sort)
+    # an all-empty result is an upstream failure, not worth a day of previews
+    if any(data.get(segment) for segment in SCHEDULE_CACHE_SEGMENTS):
+        cache_params = _schedule_cache_params(date_range, items_count, stats_type, recently_added_mode)
+        for segment in SCHEDULE_CACHE_SEGMENTS:
+            set_cached_data(segment, data.get(segment) or [], cache_params, make_current=False)
+    return data
+
+def _schedule_data_from_cache(cached, server_name, date_range):
+    # copies: preview rendering must never mutate the cached variant
+    data = {'settings': {'server_name': server_name}, **copy.deepcopy(cached)}
+    data['graph_commands'] = GRAPH_COMMANDS if cached['graph_data'] else []
+    data['most_watched_recent_days'] = date_range
+    return data
+
+def _fetch_tautulli_data_for_email(tautulli_base_url, tautulli_api_key, date_range, server_name, items_count, stats_type, recently_added_mode, recently_added_sort):
     data = {
         'settings': {'server_name': server_name},
         'stats': [],
@@ -32,20 +90,7 @@ def fetch_tautulli_data_for_email(tautulli_base_url, tautulli_api_key, date_rang
         'graph_commands': []
     }
     
-    graph_commands = [
-        {'command': 'get_concurrent_streams_by_stream_type', 'name': 'Stream Type'},
-        {'command': 'get_plays_by_date', 'name': 'Plays by Date'},
-        {'command': 'get_plays_by_dayofweek', 'name': 'Plays by Day'},
-        {'command': 'get_plays_by_hourofday', 'name': 'Plays by Hour'},
-        {'command': 'get_plays_by_source_resolution', 'name': 'Plays by Source Res'},
-        {'command': 'get_plays_by_stream_resolution', 'name': 'Plays by Stream Res'},
-        {'command': 'get_plays_by_stream_type', 'name': 'Plays by Stream Type'},
-        {'command': 'get_plays_by_top_10_platforms', 'name': 'Plays by Top Platforms'},
-        {'command': 'get_plays_by_top_10_users', 'name': 'Plays by Top Users'},
-        {'command': 'get_plays_per_month', 'name': 'Plays per Month'},
-        {'command': 'get_stream_type_by_top_10_platforms', 'name': 'Stream Type by Top Platforms'},
-        {'command': 'get_stream_type_by_top_10_users', 'name': 'Stream Type by Top Users'}
-    ]
+    graph_commands = GRAPH_COMMANDS
     
     server_type = get_media_server_type()
     if server_type == 'none':
@@ -111,8 +156,172 @@ def fetch_tautulli_data_for_email(tautulli_base_url, tautulli_api_key, date_rang
 
     return data
 
-def fetch_recent_data_for_index(tautulli_base_url, tautulli_api_key, count, recently_added_mode="items", recently_added_sort="date"):
-    return fetch_recently_added(tautulli_base_url, tautulli_api_key, int(count), recently_added_mode=recently_added_mode, recently_added_sort=recently_added_sort)
+def attach_plex_stat_links(stats, settings):
+    """Plex deep links on home-stat rows. Attached at pull time (like recs
+    and recently added) so the email builder and previews never need a
+    network call."""
+    if not (settings.get("plex_url") and settings.get("plex_token")):
+        return
+    machine_id = get_plex_machine_id()
+    if not machine_id:
+        return
+    plex_web_url = settings.get("plex_web_url")
+    for stat in stats:
+        for stat_row in stat.get('rows', []):
+            stat_rating_key = stat_row.get('grandparent_rating_key') or stat_row.get('rating_key')
+            if stat_rating_key:
+                stat_row['plex_url'] = build_plex_web_link(stat_rating_key, machine_id, plex_web_url)
+
+def attach_jellyfin_stat_links(stats, settings):
+    """Jellyfin deep links on Jellywatch home-stat rows, the same pull-time
+    pattern as attach_plex_stat_links. Jellywatch item thumbs carry
+    /Items/{id}/... paths; recover the id for the web link."""
+    server_id = get_jellyfin_server_id()
+    if not server_id:
+        return
+    jellyfin_web_url = settings.get('jellyfin_web_url')
+    jellyfin_url = settings.get('jellyfin_url')
+    for stat in stats:
+        for stat_row in stat.get('rows', []):
+            thumb = stat_row.get('thumb') or ''
+            if '/Items/' in thumb:
+                item_id = thumb.split('/Items/', 1)[1].split('/', 1)[0]
+                if item_id:
+                    stat_row['plex_url'] = build_jellyfin_web_link(item_id, server_id, jellyfin_web_url, jellyfin_url)
+
+# The segments a stats pull fills, in pull order. The manual pull
+# (app/pulls.py), the daily refresh (app/scheduler.py) and background
+# revalidation (refresh_cache_segment) all fetch each one through
+# fetch_pull_segment, so a segment comes back the same whoever asks.
+PULL_SEGMENTS = ('stats', 'yearly_wrapped_json', 'users', 'graph_data', 'recent_data', 'most_watched_data', 'most_watched_recent_data')
+
+# Segments app/cache.py may revalidate in the background once they pass
+# their soft expiry (see set_cache_refresher, wired in the factory).
+REVALIDATED_SEGMENTS = ('stats', 'users', 'graph_data', 'recent_data', 'most_watched_data', 'most_watched_recent_data')
+
+def pull_segment_params(settings, time_range, count):
+    """The cache params a stats pull stores its segments under, or None when
+    no media server is set up to pull from."""
+    server_type = get_media_server_type(settings)
+    if server_type in ('jellyfin', 'emby'):
+        url = settings.get('jellyfin_url')
+        if not (url and settings.get('jellyfin_api_key')):
+            return None
+    elif server_type == 'none' or not settings.get('tautulli_url'):
+        return None
+    else:
+        url = settings['tautulli_url'].rstrip('/')
+    return {
+        'time_range': str(time_range),
+        'count': str(count),
+        'stats_type': settings.get('stats_type') or 'plays',
+        'mode': settings.get('recently_added_mode') or 'items',
+        'url': url,
+        'timestamp': time.time(),
+    }
+
+def fetch_graphs(params, settings, error=None, progress_cb=None):
+    """The graph_data segment with the graph list it was drawn from:
+    (graph_data, graph_commands, error). Tautulli graphs keep one slot per
+    GRAPH_COMMANDS entry ({} for a failed one); Playback Reporting names its
+    own. progress_cb(label) is called before each upstream call."""
+    time_range = str(params.get('time_range') or 30)
+    if get_media_server_type(settings) in ('jellyfin', 'emby'):
+        if progress_cb:
+            progress_cb('Pulling graphs...')
+        graph_data, graph_commands = fetch_playback_reporting_graphs(days=int(time_range))
+        return graph_data, graph_commands, error
+
+    tautulli_base_url = settings['tautulli_url'].rstrip('/')
+    tautulli_api_key = decrypt(settings.get('tautulli_api'))
+    stats_type = params.get('stats_type') or settings.get('stats_type') or 'plays'
+    graph_data = []
+    for graph_index, command in enumerate(GRAPH_COMMANDS, 1):
+        if progress_cb:
+            progress_cb(f'Pulling graphs ({graph_index}/{len(GRAPH_COMMANDS)})...')
+        try:
+            gd, error = run_tautulli_command(tautulli_base_url, tautulli_api_key, command["command"], command["name"], error, time_range, y_axis=stats_type)
+            graph_data.append(gd if gd is not None else {})
+        except Exception as e:
+            graph_data.append({})
+            error = f"Graph Error: {str(e)}" if error is None else error + f", Graph Error: {str(e)}"
+    return graph_data, GRAPH_COMMANDS, error
+
+def fetch_pull_segment(segment, params, settings=None, error=None):
+    """Fresh data for one PULL_SEGMENTS segment, fetched with the params it
+    is cached under (time range, count, stats type, recently added mode).
+    Returns (data, error), error carried through like run_tautulli_command;
+    (None, error) when no media server is set up to pull from."""
+    settings = settings if settings is not None else get_settings(decrypt_secrets=False)
+    server_type = get_media_server_type(settings)
+    jellyfin = server_type in ('jellyfin', 'emby')
+    if server_type == 'none' or not (jellyfin or settings.get('tautulli_url')):
+        return None, error
+
+    time_range = str(params.get('time_range') or 30)
+    count = str(params.get('count') or 10)
+    stats_type = params.get('stats_type') or settings.get('stats_type') or 'plays'
+    recently_added_mode = params.get('mode') or settings.get('recently_added_mode') or 'items'
+    recently_added_sort = settings.get('recently_added_sort') or 'date'
+    include_user_info = (settings.get('include_user_info') or 'enabled') != 'disabled'
+    tautulli_base_url = (settings.get('tautulli_url') or '').rstrip('/')
+    tautulli_api_key = decrypt(settings.get('tautulli_api'))
+
+    if segment == 'graph_data':
+        graph_data, _commands, error = fetch_graphs(params, settings, error)
+        return graph_data, error
+    if segment == 'recent_data':
+        return fetch_recently_added(tautulli_base_url, tautulli_api_key, int(count), recently_added_mode=recently_added_mode, recently_added_sort=recently_added_sort, settings=settings), error
+
+    if jellyfin:
+        if segment == 'stats':
+            stats = fetch_jellywatch_home_stats(days=time_range, include_user_info=include_user_info)
+            attach_jellyfin_stat_links(stats, settings)
+            counts = fetch_jellyfin_library_counts()
+            if counts:
+                stats.append({'stat_id': 'library_item_counts', 'stat_title': 'Library Item Counts', 'rows': counts})
+            return stats, error
+        if segment == 'yearly_wrapped_json':
+            return fetch_jellywatch_home_stats(days=days_since_year_start(), include_user_info=include_user_info), error
+        if segment == 'users':
+            return fetch_jellyfin_users() or None, error
+        if segment == 'most_watched_data':
+            return fetch_jellywatch_most_watched(metric=stats_type), error
+        return fetch_jellywatch_most_watched(days=time_range, metric=stats_type), error
+
+    if segment == 'stats':
+        stats, error = run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_home_stats', 'Stats', error, time_range, stats_type=stats_type)
+        stats = stats or []
+        attach_plex_stat_links(stats, settings)
+        libraries, _ = run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_libraries', None, None)
+        if libraries:
+            stats.append({
+                'stat_id': 'library_item_counts',
+                'stat_title': 'Library Item Counts',
+                'rows': [{'section_name': lib.get('section_name', ''), 'count': lib.get('count', 0)} for lib in libraries]
+            })
+        return stats, error
+    if segment == 'yearly_wrapped_json':
+        # a missing year in review hides itself; not worth an error
+        yearly, _ = run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_home_stats', 'Stats', None, days_since_year_start(), stats_type=stats_type)
+        return yearly, error
+    if segment == 'users':
+        return run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_users', 'Users', error)
+    if segment == 'most_watched_data':
+        return fetch_most_watched_data(tautulli_base_url, tautulli_api_key, metric=stats_type), error
+    return fetch_most_watched_data(tautulli_base_url, tautulli_api_key, days=time_range, metric=stats_type), error
+
+def refresh_cache_segment(segment, params, settings=None):
+    """Fresh data for one pull segment that is worth replacing its cached
+    copy with, or None: a failed or empty fetch keeps the stale copy. The
+    background revalidation refresher, and what the daily refresh stores."""
+    if config.DEMO_MODE or segment not in PULL_SEGMENTS:
+        return None
+    data, error = fetch_pull_segment(segment, params, settings)
+    if segment == 'graph_data':
+        # every graph failing is the upstream being down; some still beat none
+        return data if data and any(data) else None
+    return None if error or not data else data
 
 def _row_seconds(row):
     for key in ('duration', 'play_duration'):
@@ -298,48 +507,62 @@ def get_current_tautulli_data_for_email(settings):
     
     return data
 
+def _split_cached_users(segment, filtered_users, use_cache):
+    """Partition filtered_users into per-user cache hits (keyed like
+    filtered_users) and the {key: email} subset that still needs a fetch,
+    i.e. users whose own slot is missing or older than its TTL."""
+    if not use_cache:
+        return {}, dict(filtered_users)
+    hits, missing = get_cached_user_data(segment, [str(k) for k in filtered_users])
+    missing = set(missing)
+    cached = {k: hits[str(k)] for k in filtered_users if str(k) in hits}
+    to_fetch = {k: v for k, v in filtered_users.items() if str(k) in missing}
+    return cached, to_fetch
+
+def _store_fetched_users(segment, users_segment, fetched, fetched_users):
+    """Write fresh per-user results into their own slots, then fold them into
+    the aggregate segments the builder and preview read. Merging (instead of
+    overwriting) keeps other users' cached results visible there."""
+    if not fetched:
+        return
+    cache_params = {'timestamp': time.time(), 'manual_fetch': True}
+    set_cached_user_data(segment, {str(k): v for k, v in fetched.items()}, cache_params)
+    merged = dict(get_cached_data(segment, strict=False) or {})
+    merged.update(fetched)
+    merged_users = dict(get_cached_data(users_segment, strict=False) or {})
+    merged_users.update({k: v for k, v in fetched_users.items() if k in fetched})
+    set_cached_data(segment, merged, cache_params)
+    set_cached_data(users_segment, merged_users, cache_params)
+
 def get_recommendations_for_users(user_keys, to_emails, user_dict, use_cache=True):
     try:
-        if use_cache:
-            cached_recommendations = get_cached_data('recommendations_json', strict=True) or get_cached_data('recommendations_json', strict=False)
-            cached_filtered_users = get_cached_data('filtered_users', strict=True) or get_cached_data('filtered_users', strict=False)
-            
-            if cached_recommendations and cached_filtered_users:
-                filtered_users = {k: v for k, v in user_dict.items() if k in user_keys and v in to_emails}
-                
-                cached_user_keys = set(str(k) for k in cached_filtered_users.keys())
-                required_user_keys = set(str(k) for k in filtered_users.keys())
-                
-                if required_user_keys.issubset(cached_user_keys):
-                    logger.info(f"Using cached recommendations for users: {list(required_user_keys)}")
-                    return {k: v for k, v in cached_recommendations.items() if str(k) in required_user_keys}
-                else:
-                    logger.info(f"Cache miss - need users {required_user_keys}, cache has {cached_user_keys}")
-            else:
-                logger.info("No cached recommendations available")
+        filtered_users = {k: v for k, v in user_dict.items() if k in user_keys and v in to_emails}
+        if not filtered_users:
+            return {}
+
+        cached, to_fetch = _split_cached_users('recommendations_json', filtered_users, use_cache)
+        if not to_fetch:
+            logger.info(f"Using cached recommendations for users: {list(cached)}")
+            return cached
+        if cached:
+            logger.info(f"Partial recommendations cache hit: {len(cached)} cached, fetching {list(to_fetch)}")
 
         _s = get_settings(decrypt_secrets=False)
         row = (_s.get("conjurr_url"),) if "id" in _s else None
-        
+
         if not row or not row[0]:
-            return {}
-            
+            return cached
+
         conjurr_url = row[0].strip()
-        
-        filtered_users = {k: v for k, v in user_dict.items() if k in user_keys and v in to_emails}
-        
-        if not filtered_users:
-            return {}
-            
-        recommendations_data, _ = run_conjurr_command(conjurr_url, filtered_users, None)
+
+        recommendations_data, _ = run_conjurr_command(conjurr_url, to_fetch, None)
+        recommendations_data = recommendations_data or {}
 
         if use_cache and recommendations_data:
-            cache_params = {'timestamp': time.time(), 'manual_fetch': True}
-            set_cached_data('recommendations_json', recommendations_data, cache_params)
-            set_cached_data('filtered_users', filtered_users, cache_params)
-            logger.info("Cached fresh recommendations data")
+            _store_fetched_users('recommendations_json', 'filtered_users', recommendations_data, to_fetch)
+            logger.info(f"Cached fresh recommendations for {len(recommendations_data)} users")
 
-        return recommendations_data or {}
+        return {**cached, **recommendations_data}
 
     except Exception as e:
         logger.error(f"Error getting recommendations: {e}")
@@ -347,47 +570,34 @@ def get_recommendations_for_users(user_keys, to_emails, user_dict, use_cache=Tru
 
 def get_droppedneedle_wrapped_for_users(user_keys, to_emails, user_dict, use_cache=True):
     try:
-        if use_cache:
-            cached_wrapped = get_cached_data('droppedneedle_wrapped_json', strict=True) or get_cached_data('droppedneedle_wrapped_json', strict=False)
-            cached_filtered_users = get_cached_data('droppedneedle_filtered_users', strict=True) or get_cached_data('droppedneedle_filtered_users', strict=False)
-
-            if cached_wrapped and cached_filtered_users:
-                filtered_users = {k: v for k, v in user_dict.items() if k in user_keys and v in to_emails}
-
-                cached_user_keys = set(str(k) for k in cached_filtered_users.keys())
-                required_user_keys = set(str(k) for k in filtered_users.keys())
+        filtered_users = {k: v for k, v in user_dict.items() if k in user_keys and v in to_emails}
+        if not filtered_users:
+            return {}
 
-                if required_user_keys.issubset(cached_user_keys):
-                    logger.info(f"Using cached DroppedNeedle wrapped data for users: {list(required_user_keys)}")
-                    return {k: v for k, v in cached_wrapped.items() if str(k) in required_user_keys}
-                else:
-                    logger.info(f"Cache miss - need users {required_user_keys}, cache has {cached_user_keys}")
-            else:
-                logger.info("No cached DroppedNeedle wrapped data available")
+        cached, to_fetch = _split_cached_users('droppedneedle_wrapped_json', filtered_users, use_cache)
+        if not to_fetch:
+            logger.info(f"Using cached DroppedNeedle wrapped data for users: {list(cached)}")
+            return cached
+        if cached:
+            logger.info(f"Partial DroppedNeedle wrapped cache hit: {len(cached)} cached, fetching {list(to_fetch)}")
 
         _s = get_settings(decrypt_secrets=False)
         row = (_s.get("droppedneedle_url"), _s.get("droppedneedle_api_key")) if "id" in _s else None
 
         if not row or not row[0] or not row[1]:
-            return {}
+            return cached
 
         droppedneedle_url = row[0].strip()
         droppedneedle_api_key = decrypt(row[1])
 
-        filtered_users = {k: v for k, v in user_dict.items() if k in user_keys and v in to_emails}
-
-        if not filtered_users:
-            return {}
-
-        wrapped_data, _ = run_droppedneedle_command(droppedneedle_url, droppedneedle_api_key, filtered_users, None)
+        wrapped_data, _ = run_droppedneedle_command(droppedneedle_url, droppedneedle_api_key, to_fetch, None)
+        wrapped_data = wrapped_data or {}
 
         if use_cache and wrapped_data:
-            cache_params = {'timestamp': time.time(), 'manual_fetch': True}
-            set_cached_data('droppedneedle_wrapped_json', wrapped_data, cache_params)
-            set_cached_data('droppedneedle_filtered_users', filtered_users, cache_params)
-            logger.info("Cached fresh DroppedNeedle wrapped data")
+            _store_fetched_users('droppedneedle_wrapped_json', 'droppedneedle_filtered_users', wrapped_data, to_fetch)
+            logger.info(f"Cached fresh DroppedNeedle wrapped data for {len(wrapped_data)} users")
 
-        return wrapped_data or {}
+        return {**cached, **wrapped_data}
 
     except Exception as e:
         logger.error(f"Error getting DroppedNeedle wrapped data: {e}")
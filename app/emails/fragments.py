@@ -0,0 +1,140 @@
+"""Rendered sections of the live preview, kept across renders.
+
+/preview_email re-renders the whole newsletter on every builder edit. Each
+selected item's section HTML is kept here under a key made of the item's own
+config and everything outside it the section is rendered from (settings,
+theme, layout, density, date formats, and the cache entries behind the data),
+so an edit to one section re-renders that section and the rest of the
+document is put back together from what was kept.
+
+The builder's preview also asks for just the sections that changed since
+what its frame shows (preview_update), and patches them in place.
+
+Only previews use this: a send's render attaches images to its message as it
+goes, so a section taken from here would arrive without its MIME parts.
+"""
+import hashlib, json, re, threading
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from app.cache import get_cache_version
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = 256
+
+# The cache segments a section can be rendered from. A pull or revalidation
+# that refills any of them changes data_version(), and with it every key.
+SOURCE_SEGMENTS = (
+    'stats', 'recent_data', 'most_watched_data', 'most_watched_recent_data', 'graph_data',
+    'recommendations_json', 'filtered_users', 'users',
+    'droppedneedle_wrapped_json', 'droppedneedle_server_json', 'yearly_wrapped_json',
+    'sonarr_coming_soon_json', 'radarr_coming_soon_json',
+    'ombi_requests_json', 'seerr_requests_json',
+)
+
+# A random pick is drawn again on every render on purpose (see
+# assemble._dispatch_item), so its section is never kept.
+UNCACHED_TYPES = frozenset({'random_pick'})
+
+_fragments = OrderedDict()
+_lock = threading.Lock()
+
+def _digest(value):
+    raw = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def data_version():
+    """Identifies the cache entries a preview's sections are rendered from,
+    without touching the data (cache.get_cache_version)."""
+    return '|'.join(str(get_cache_version(segment)) for segment in SOURCE_SEGMENTS)
+
+def render_context(version, **context):
+    """One digest of everything outside an item that its section depends on;
+    computed once per render and shared by every section's key. The day is
+    part of it: sections print relative dates ("in 3 days"), local or UTC."""
+    days = [datetime.now().date(), datetime.now(timezone.utc).date()]
+    return _digest([version, days, context])
+
+def cached_render(render, item, group_index, context):
+    """render(item, group_index), or the section kept from an earlier render
+    with the same item and context."""
+    item_type = item.get('type', '')
+    if item_type in UNCACHED_TYPES:
+        return render(item, group_index)
+    # only a collection group's markup depends on its position (its
+    # expanded-collection keys are numbered by it); everything else keeps
+    # its fragment when sections are reordered
+    position = group_index if item_type == 'collection_group' else None
+    key = _digest([context, item, position])
+    with _lock:
+        html = _fragments.get(key)
+        if html is not None:
+            _fragments.move_to_end(key)
+            return html
+    html = render(item, group_index)
+    with _lock:
+        _fragments[key] = html
+        while len(_fragments) > CACHE_SIZE:
+            _fragments.popitem(last=False)
+    return html
+
+def clear_fragments():
+    with _lock:
+        _fragments.clear()
+
+# Incremental preview: the builder sends the fragment versions its frame
+# already shows (known_fragments), and gets back the full document only when
+# the shell around the sections changed (layout, theme, density, header),
+# otherwise just the sections whose HTML differs. Sections are marked with
+# comments in the rendered document, so the versions are taken from the
+# final, post-processed HTML the frame actually holds.
+_UNSAFE_ID = re.compile(r'[^\w:.-]')
+_MARKED = re.compile(r'<!--fragment ([\w:.~-]+)-->(.*?)<!--/fragment-->', re.S)
+
+def fragment_ids(items):
+    """A stable id per item, unique within the document: its type and
+    builder id, made safe to sit inside an HTML comment."""
+    ids, seen = [], {}
+    for index, item in enumerate(items):
+        base = _UNSAFE_ID.sub('_', f"{item.get('type', '')}:{item.get('id') or index}")
+        seen[base] = seen.get(base, 0) + 1
+        ids.append(base if seen[base] == 1 else f"{base}~{seen[base]}")
+    return ids
+
+def mark(fragment_id, html):
+    return f'<!--fragment {fragment_id}-->{html}<!--/fragment-->'
+
+def _version(html):
+    return hashlib.sha256(html.encode('utf-8')).hexdigest()[:16]
+
+def split_marked(html):
+    """(shell, [(fragment id, section html)]) of a marked document; the shell
+    is the document with every marked section taken out."""
+    sections = [(match.group(1), match.group(2)) for match in _MARKED.finditer(html)]
+    return _MARKED.sub('', html), sections
+
+def preview_update(html, known):
+    """The /preview_email answer for a marked document, given the
+    {shell, versions} the page reported. order and versions describe every
+    section; html is the whole document when the page must reload, and
+    fragments holds only the sections it lacks otherwise."""
+    shell, sections = split_marked(html)
+    versions = {fragment_id: _version(section) for fragment_id, section in sections}
+    update = {
+        'shell': _version(shell),
+        'order': [fragment_id for fragment_id, _ in sections],
+        'versions': versions,
+    }
+    known_versions = (known or {}).get('versions') or {}
+    if sections and (known or {}).get('shell') == update['shell']:
+        update['fragments'] = {
+            fragment_id: section for fragment_id, section in sections
+            if known_versions.get(fragment_id) != versions[fragment_id]
+        }
+    else:
+        update['html'] = html
+    return update
@@ -1,12 +1,12 @@
-import io, mimetypes
+import hashlib, mimetypes
 
 import requests
 from email.mime.image import MIMEImage
 from email.utils import make_msgid
-from PIL import Image, ImageFilter, ImageEnhance
 from urllib.parse import parse_qs, urlencode, urljoin, urlparse
 
 from app import config
+from app.emails.imaging import blur_image_bytes, cover_bytes, fit_height_bytes, thumbnail_bytes
 from app.security import safe_get
 from app.store import save_hosted_image
 
@@ -14,24 +14,31 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def _center_crop_resize(img, target_w, target_h):
-    """Center-crop `img` to the target_w:target_h aspect ratio then resize to
-    exactly (target_w, target_h), so the delivered bytes match the display box
-    without relying on CSS object-fit (which most email clients ignore)."""
-    orig_w, orig_h = img.size
-    if orig_w <= 0 or orig_h <= 0:
-        return img
-    target_ratio = target_w / target_h
-    orig_ratio = orig_w / orig_h
-    if orig_ratio > target_ratio:
-        new_w = max(1, int(round(orig_h * target_ratio)))
-        left = (orig_w - new_w) // 2
-        img = img.crop((left, 0, left + new_w, orig_h))
-    elif orig_ratio < target_ratio:
-        new_h = max(1, int(round(orig_w / target_ratio)))
-        top = (orig_h - new_h) // 2
-        img = img.crop((0, top, orig_w, top + new_h))
-    return img.resize((target_w, target_h), Image.LANCZOS)
+def _target_box(target):
+    """(width, height) of an explicit target box, or None."""
+    if target and isinstance(target, (tuple, list)) and len(target) == 2:
+        try:
+            w, h = int(target[0]), int(target[1])
+        except (TypeError, ValueError):
+            return None
+        if w > 0 and h > 0:
+            return w, h
+    return None
+
+# The artwork proxies hand ?w=&h= to the media server's image transcoder
+# (Plex /photo/:/transcode, Jellyfin fillWidth/fillHeight/maxHeight), so
+# posters come back at the display box rather than at full resolution.
+_SIZED_PROXIES = ('/proxy-art/', '/proxy-jf-art/')
+
+def _sized_url(url, box, max_height):
+    """url asking its artwork proxy for `box` (or at most `max_height` tall);
+    anything not served by a proxy is returned unchanged."""
+    if not url or not (box or max_height):
+        return url
+    if not urlparse(url).path.startswith(_SIZED_PROXIES):
+        return url
+    sizing = {'w': box[0], 'h': box[1]} if box else {'h': max_height}
+    return f"{url}{'&' if '?' in url else '?'}{urlencode(sizing)}"
 
 # Preview mode (single-renderer previews): a msg_root carrying
 # preview_mode=True makes every attach helper return a browser-usable URL
@@ -52,9 +59,66 @@ def _preview_url(image_url):
 def is_preview(msg_root):
     return bool(getattr(msg_root, 'preview_mode', False))
 
+# Per-message image registry. The same poster often lands in several
+# sections of one email (Recently Added, Most Watched, a Featured Pick), and
+# some layouts use the logo twice. Each attach helper keys what it fetched
+# by (content hash, what it is sized to) and reuses the src of an earlier
+# identical image instead of resizing it again and adding another MIME part.
+# msg_root.image_dedup counts the parts and bytes that were not attached.
+def _image_key(raw, spec):
+    return hashlib.sha256(raw).hexdigest(), spec
+
+def _reuse(msg_root, key):
+    entry = getattr(msg_root, 'image_registry', {}).get(key)
+    if entry is None:
+        return None
+    src, size = entry
+    if src.startswith('cid:'):
+        msg_root.image_dedup['parts'] += 1
+        msg_root.image_dedup['bytes'] += size
+    return src
+
+def image_dedup_stats(msg_root):
+    """{'parts', 'bytes'} of image parts this message reused instead of attaching."""
+    return dict(getattr(msg_root, 'image_dedup', None) or {'parts': 0, 'bytes': 0})
+
+def _attach(msg_root, key, image_bytes, subtype, filename, hosted_images_enabled, hosted_base_url):
+    """src for image_bytes: a hosted URL when enabled, else a new inline
+    part. Recorded under key for later identical images."""
+    src = None
+    if hosted_images_enabled and hosted_base_url:
+        try:
+            token = save_hosted_image(image_bytes, f"image/{subtype}")
+            logger.debug(f"Successfully saved hosted image with token: {token}")
+            src = f"{hosted_base_url.rstrip('/')}/i/{token}"
+        except Exception:
+            # fall through to CID attach below, using the bytes already fetched, no re-fetch
+            logger.warning("hosted image write failed, falling back to CID attachment", exc_info=True)
+
+    if src is None:
+        cid = make_msgid(domain="newsletterr.local")[1:-1]
+        img_part = MIMEImage(image_bytes, _subtype=subtype)
+        img_part.add_header('Content-ID', f'<{cid}>')
+        img_part.add_header('Content-Disposition', 'inline', filename=filename)
+        msg_root.attach(img_part)
+        logger.debug(f"Successfully attached image with CID: {cid}")
+        src = f"cid:{cid}"
+
+    if not hasattr(msg_root, 'image_registry'):
+        msg_root.image_registry = {}
+        msg_root.image_dedup = {'parts': 0, 'bytes': 0}
+    msg_root.image_registry[key] = (src, len(image_bytes))
+    return src
+
 def fetch_and_attach_image(image_url, msg_root, cid_name, base_url="", max_height=None, hosted_images_enabled=False, hosted_base_url="", target=None):
+    # An explicit (width, height) target wins over max_height: the delivered
+    # bytes are cropped to exactly that box so grid posters share one aspect
+    # ratio regardless of column count.
+    box = _target_box(target)
+    if not (isinstance(max_height, int) and max_height > 0):
+        max_height = None
     if is_preview(msg_root):
-        return _preview_url(image_url)
+        return _sized_url(_preview_url(image_url), box, max_height)
     try:
         logger.debug(f"fetch_and_attach_image called with: {image_url}")
         
@@ -96,6 +160,7 @@ def fetch_and_attach_image(image_url, msg_root, cid_name, base_url="", max_heigh
             full_url = urljoin(base_url or "http://127.0.0.1:6397", image_url)
             logger.debug(f"Default case, fetching: {full_url}")
         
+        full_url = _sized_url(full_url, box, max_height)
         logger.debug(f"Final URL to fetch: {full_url}")
         
         headers = {
@@ -126,61 +191,30 @@ def fetch_and_attach_image(image_url, msg_root, cid_name, base_url="", max_heigh
             subtype = 'jpeg'
 
         image_bytes = response.content
-        # An explicit (width, height) target wins over max_height: crop the
-        # delivered bytes to exactly that box so grid posters share one aspect
-        # ratio regardless of column count.
-        _tw = _th = 0
-        if target and isinstance(target, (tuple, list)) and len(target) == 2:
-            try:
-                _tw, _th = int(target[0]), int(target[1])
-            except (TypeError, ValueError):
-                _tw = _th = 0
-        if _tw > 0 and _th > 0:
+        key = _image_key(image_bytes, (subtype, box or max_height))
+        src = _reuse(msg_root, key)
+        if src:
+            return src
+        # Proxied art normally arrives at the box already; Pillow only works
+        # on what the transcoder did not size (static files, external URLs,
+        # Sonarr/Radarr, a server that ignored the request).
+        save_fmt = 'JPEG' if subtype == 'jpeg' else 'PNG'
+        if box:
             try:
-                img = Image.open(io.BytesIO(image_bytes))
-                img = _center_crop_resize(img, _tw, _th)
-                out = io.BytesIO()
-                save_fmt = 'JPEG' if subtype == 'jpeg' else 'PNG'
-                if save_fmt == 'JPEG' and img.mode in ('RGBA', 'P', 'LA'):
-                    img = img.convert('RGB')
-                img.save(out, format=save_fmt, quality=85)
-                image_bytes = out.getvalue()
+                resized = cover_bytes(image_bytes, box, save_fmt)
+                if resized is not None:
+                    image_bytes = resized
             except Exception as _e:
                 logger.error(f"PIL target crop failed, using original: {_e}")
-        elif max_height and isinstance(max_height, int) and max_height > 0:
+        elif max_height:
             try:
-                img = Image.open(io.BytesIO(image_bytes))
-                orig_w, orig_h = img.size
-                if orig_h > max_height:
-                    target_w = max(1, int(orig_w * max_height / orig_h))
-                    img = img.resize((target_w, max_height), Image.LANCZOS)
-                    out = io.BytesIO()
-                    save_fmt = 'JPEG' if subtype == 'jpeg' else 'PNG'
-                    if save_fmt == 'JPEG' and img.mode in ('RGBA', 'P', 'LA'):
-                        img = img.convert('RGB')
-                    img.save(out, format=save_fmt, quality=85)
-                    image_bytes = out.getvalue()
+                resized = fit_height_bytes(image_bytes, max_height, save_fmt)
+                if resized is not None:
+                    image_bytes = resized
             except Exception as _e:
                 logger.error(f"PIL resize failed, using original: {_e}")
 
-        if hosted_images_enabled and hosted_base_url:
-            try:
-                token = save_hosted_image(image_bytes, f"image/{subtype}")
-                logger.debug(f"Successfully saved hosted image with token: {token}")
-                return f"{hosted_base_url.rstrip('/')}/i/{token}"
-            except Exception:
-                logger.warning("hosted image write failed, falling back to CID attachment", exc_info=True)
-                # fall through to CID attach below, using the bytes already fetched, no re-fetch
-
-        cid = make_msgid(domain="newsletterr.local")[1:-1]
-
-        img_part = MIMEImage(image_bytes, _subtype=subtype)
-        img_part.add_header('Content-ID', f'<{cid}>')
-        img_part.add_header('Content-Disposition', 'inline', filename=f'{cid_name}.{subtype}')
-        msg_root.attach(img_part)
-
-        logger.debug(f"Successfully attached image with CID: {cid}")
-        return f"cid:{cid}"
+        return _attach(msg_root, key, image_bytes, subtype, f'{cid_name}.{subtype}', hosted_images_enabled, hosted_base_url)
 
     except requests.exceptions.Timeout as e:
         logger.warning(f"Timeout fetching image {image_url}: {e}")
@@ -192,15 +226,6 @@ def fetch_and_attach_image(image_url, msg_root, cid_name, base_url="", max_heigh
         logger.exception(f"Error processing image {image_url}: {e}")
         return None
 
-def blur_image_bytes(raw):
-    image = Image.open(io.BytesIO(raw))
-    if image.mode in ('RGBA', 'LA', 'P'):
-        image = image.convert('RGB')
-    darkened = ImageEnhance.Brightness(image.filter(ImageFilter.GaussianBlur(radius=30))).enhance(0.7)
-    out = io.BytesIO()
-    darkened.save(out, format='JPEG', quality=85)
-    return out.getvalue()
-
 def fetch_and_attach_blurred_image(image_url, msg_root, cid_name, base_url="", hosted_images_enabled=False, hosted_base_url=""):
     if is_preview(msg_root):
         # Preview asks the proxy for the same blur/darken the send bakes in,
@@ -226,23 +251,11 @@ def fetch_and_attach_blurred_image(image_url, msg_root, cid_name, base_url="", h
         response = safe_get(full_url, timeout=10, headers=headers)
         response.raise_for_status()
         
-        img_bytes = io.BytesIO(blur_image_bytes(response.content))
-
-        if hosted_images_enabled and hosted_base_url:
-            try:
-                token = save_hosted_image(img_bytes.getvalue(), "image/jpeg")
-                return f"{hosted_base_url.rstrip('/')}/i/{token}"
-            except Exception:
-                logger.warning("hosted image write failed, falling back to CID attachment", exc_info=True)
-
-        cid = make_msgid(domain="newsletterr.local")[1:-1]
-
-        img_part = MIMEImage(img_bytes.getvalue(), _subtype='jpeg')
-        img_part.add_header('Content-ID', f'<{cid}>')
-        img_part.add_header('Content-Disposition', 'inline', filename=f'{cid_name}-blurred.jpg')
-        msg_root.attach(img_part)
-
-        return f"cid:{cid}"
+        key = _image_key(response.content, 'blur')
+        src = _reuse(msg_root, key)
+        if src:
+            return src
+        return _attach(msg_root, key, blur_image_bytes(response.content), 'jpeg', f'{cid_name}-blurred.jpg', hosted_images_enabled, hosted_base_url)
 
     except Exception as e:
         logger.error(f"Error processing blurred image {image_url}: {e}")
@@ -250,7 +263,7 @@ def fetch_and_attach_blurred_image(image_url, msg_root, cid_name, base_url="", h
 
 def fetch_and_attach_small_thumbnail(image_url, msg_root, cid_name, base_url="", height=40, hosted_images_enabled=False, hosted_base_url="", quiet=False):
     if is_preview(msg_root):
-        return _preview_url(image_url)
+        return _sized_url(_preview_url(image_url), None, height)
     try:
         if image_url.startswith('/'):
             full_url = urljoin(base_url or "http://127.0.0.1:6397", image_url)
@@ -258,6 +271,7 @@ def fetch_and_attach_small_thumbnail(image_url, msg_root, cid_name, base_url="",
             full_url = image_url
         else:
             full_url = urljoin(base_url or "http://127.0.0.1:6397", image_url)
+        full_url = _sized_url(full_url, None, height)
 
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
@@ -271,34 +285,14 @@ def fetch_and_attach_small_thumbnail(image_url, msg_root, cid_name, base_url="",
         if len(response.content) < 100:
             return None
 
-        image = Image.open(io.BytesIO(response.content))
-        if image.mode in ('RGBA', 'LA', 'P'):
-            image = image.convert('RGB')
-
-        orig_w, orig_h = image.size
-        if orig_h == 0:
+        key = _image_key(response.content, ('thumb', height))
+        src = _reuse(msg_root, key)
+        if src:
+            return src
+        thumb = thumbnail_bytes(response.content, height)
+        if thumb is None:
             return None
-        target_w = max(1, int(orig_w * height / orig_h))
-        resized = image.resize((target_w, height), Image.LANCZOS)
-
-        img_bytes = io.BytesIO()
-        resized.save(img_bytes, format='JPEG', quality=65)
-        img_bytes.seek(0)
-
-        if hosted_images_enabled and hosted_base_url:
-            try:
-                token = save_hosted_image(img_bytes.getvalue(), "image/jpeg")
-                return f"{hosted_base_url.rstrip('/')}/i/{token}"
-            except Exception:
-                logger.warning("hosted image write failed, falling back to CID attachment", exc_info=True)
-
-        cid = make_msgid(domain="newsletterr.local")[1:-1]
-        img_part = MIMEImage(img_bytes.getvalue(), _subtype='jpeg')
-        img_part.add_header('Content-ID', f'<{cid}>')
-        img_part.add_header('Content-Disposition', 'inline', filename=f'{cid_name}.jpg')
-        msg_root.attach(img_part)
-
-        return f"cid:{cid}"
+        return _attach(msg_root, key, thumb, 'jpeg', f'{cid_name}.jpg', hosted_images_enabled, hosted_base_url)
 
     except Exception as e:
         if quiet:
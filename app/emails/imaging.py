@@ -0,0 +1,112 @@
+import io
+
+from PIL import Image, ImageEnhance, ImageFilter
+
+# Pillow work for email artwork. Sources are usually far larger than the
+# 40-300 px boxes they end up in, so nothing decodes at full size:
+#
+# - a JPEG is opened in draft mode, which has libjpeg decode straight to
+#   1/2, 1/4 or 1/8 scale (DCT scaling) while staying no smaller than
+#   DRAFT_HEADROOM times the output;
+# - other formats are box-reduced by resize's reducing_gap (Image.reduce)
+#   before the LANCZOS pass;
+# - each image is converted to its output colorspace once, right after
+#   decoding, and the blur runs on a BLUR_WIDTH intermediate.
+
+# The reduced decode stays at least this many times the output size, so the
+# final LANCZOS pass still has detail to resample from.
+DRAFT_HEADROOM = 2
+REDUCING_GAP = 2.0
+
+# The blurred backdrop is drawn no wider than the 600 px email, and a blur
+# has no detail to lose by being smaller: it is made and delivered at this
+# width, with the radius scaled so it looks as blurred as BLUR_RADIUS on the
+# full-size source.
+BLUR_WIDTH = 640
+BLUR_RADIUS = 30
+BLUR_BRIGHTNESS = 0.7
+
+def _draft(img, size, headroom=DRAFT_HEADROOM):
+    """Ask a JPEG for a reduced decode no smaller than headroom x size."""
+    if img.format == 'JPEG':
+        img.draft(None, (size[0] * headroom, size[1] * headroom))
+    return img
+
+def _convert(img, fmt):
+    """img in a mode `fmt` stores directly: L/RGB for JPEG, plus alpha for
+    PNG. Palette and CMYK images are converted before resampling, since
+    resize cannot filter a palette."""
+    keep = ('L', 'RGB') if fmt == 'JPEG' else ('L', 'LA', 'RGB', 'RGBA')
+    if img.mode in keep:
+        return img
+    if fmt != 'JPEG' and ('A' in img.getbands() or 'transparency' in img.info):
+        return img.convert('RGBA')
+    return img.convert('RGB')
+
+def _encode(img, fmt, quality):
+    out = io.BytesIO()
+    img.save(out, format=fmt, quality=quality)
+    return out.getvalue()
+
+def cover_bytes(raw, box, fmt='JPEG', quality=85):
+    """raw center-cropped to the box's aspect ratio and resized to exactly
+    box, so the delivered bytes match the display box without relying on
+    CSS object-fit (which most email clients ignore). None when raw already
+    is that size."""
+    target_w, target_h = box
+    img = Image.open(io.BytesIO(raw))
+    if img.size == (target_w, target_h):
+        return None
+    img = _convert(_draft(img, box), fmt)
+    orig_w, orig_h = img.size
+    if orig_w <= 0 or orig_h <= 0:
+        return None
+    target_ratio = target_w / target_h
+    crop = (0, 0, orig_w, orig_h)
+    if orig_w / orig_h > target_ratio:
+        new_w = max(1, int(round(orig_h * target_ratio)))
+        left = (orig_w - new_w) // 2
+        crop = (left, 0, left + new_w, orig_h)
+    elif orig_w / orig_h < target_ratio:
+        new_h = max(1, int(round(orig_w / target_ratio)))
+        top = (orig_h - new_h) // 2
+        crop = (0, top, orig_w, top + new_h)
+    img = img.resize((target_w, target_h), Image.LANCZOS, box=crop, reducing_gap=REDUCING_GAP)
+    return _encode(img, fmt, quality)
+
+def fit_height_bytes(raw, max_height, fmt='JPEG', quality=85):
+    """raw scaled down to max_height tall, or None when it already fits."""
+    img = Image.open(io.BytesIO(raw))
+    orig_w, orig_h = img.size
+    if orig_h <= max_height:
+        return None
+    size = (max(1, int(orig_w * max_height / orig_h)), max_height)
+    img = _convert(_draft(img, size), fmt)
+    return _encode(img.resize(size, Image.LANCZOS, reducing_gap=REDUCING_GAP), fmt, quality)
+
+def thumbnail_bytes(raw, height, quality=65):
+    """raw as a JPEG exactly `height` tall. None for an empty image."""
+    img = Image.open(io.BytesIO(raw))
+    orig_w, orig_h = img.size
+    if orig_h == 0:
+        return None
+    size = (max(1, int(orig_w * height / orig_h)), height)
+    img = _convert(_draft(img, size), 'JPEG')
+    if img.size != size:
+        img = img.resize(size, Image.LANCZOS, reducing_gap=REDUCING_GAP)
+    return _encode(img, 'JPEG', quality)
+
+def blur_image_bytes(raw):
+    """raw blurred and darkened for a card backdrop, as a JPEG."""
+    img = Image.open(io.BytesIO(raw))
+    orig_w, orig_h = img.size
+    radius = BLUR_RADIUS
+    if orig_w > BLUR_WIDTH:
+        size = (BLUR_WIDTH, max(1, int(round(orig_h * BLUR_WIDTH / orig_w))))
+        # no headroom: the blur removes any detail it would keep
+        img = _convert(_draft(img, size, headroom=1), 'JPEG').resize(size, Image.BILINEAR, reducing_gap=REDUCING_GAP)
+        radius = BLUR_RADIUS * BLUR_WIDTH / orig_w
+    else:
+        img = _convert(img, 'JPEG')
+    darkened = ImageEnhance.Brightness(img.filter(ImageFilter.GaussianBlur(radius=radius))).enhance(BLUR_BRIGHTNESS)
+    return _encode(darkened, 'JPEG', 85)
@@ -0,0 +1,130 @@
+import io
+
+from email.mime.image import MIMEImage
+from PIL import Image
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Size budget for an assembled message. After assembly the MIME size is
+# measured (base64 included, which is what the SMTP server and the
+# recipient's quota see); a message over budget has its inline images
+# re-encoded one step at a time until it fits:
+#
+# - opaque PNGs (chart captures, some posters) become progressive JPEGs,
+#   images with transparency stay PNG;
+# - then JPEG quality drops, then the longest side is clamped.
+#
+# Every step starts from the image's original bytes, largest image first,
+# keeps a result only when it is smaller, and the pass stops as soon as the
+# message fits. Images are shown at a fixed width in the HTML, so a clamp
+# costs sharpness on high-DPI screens, not layout.
+
+# (JPEG quality, longest side in px or None), mildest first
+STEPS = (
+    (85, None),
+    (75, None),
+    (65, 1200),
+    (55, 900),
+    (45, 600),
+)
+
+def _encoded_len(n):
+    """Size of n bytes base64-encoded in 76 character lines."""
+    b64 = (n + 2) // 3 * 4
+    return b64 + b64 // 76 + 1
+
+def _image_parts(msg_root):
+    return [(i, part) for i, part in enumerate(msg_root.get_payload())
+            if part.get_content_maintype() == 'image']
+
+def _has_alpha(img):
+    return 'A' in img.getbands() or 'transparency' in img.info
+
+def _reencode(raw, quality, max_side):
+    """(bytes, subtype) of raw at this step, or None for an image this pass
+    leaves alone (animations)."""
+    img = Image.open(io.BytesIO(raw))
+    if getattr(img, 'is_animated', False):
+        return None
+    has_alpha = _has_alpha(img)
+    if img.mode not in ('L', 'RGB', 'RGBA'):
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+    if max_side and max(img.size) > max_side:
+        # draft-decodes a JPEG, so a clamp does not pay for the full size
+        img.thumbnail((max_side, max_side), Image.LANCZOS, reducing_gap=2.0)
+    out = io.BytesIO()
+    if has_alpha:
+        img.save(out, format='PNG', optimize=True)
+        return out.getvalue(), 'png'
+    img.save(out, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return out.getvalue(), 'jpeg'
+
+def _replace(msg_root, index, part, data, subtype):
+    new = MIMEImage(data, _subtype=subtype)
+    new.add_header('Content-ID', part['Content-ID'])
+    stem = (part.get_filename() or 'image').rsplit('.', 1)[0]
+    new.add_header('Content-Disposition', 'inline', filename=f'{stem}.{subtype}')
+    msg_root.get_payload()[index] = new
+
+def fit_to_budget(msg_root, budget, body_sizes):
+    """Re-encodes msg_root's inline images in STEPS until the message, with
+    bodies of body_sizes bytes (HTML and plain text), fits in `budget` bytes.
+
+    Returns {'budget', 'before', 'after', 'fits', 'changes'}, where each change
+    is {'filename', 'from', 'to', 'before', 'after', 'quality', 'max_side'}
+    with sizes as encoded in the message."""
+    text = sum(_encoded_len(size) for size in body_sizes)
+    parts = _image_parts(msg_root)
+    sizes = {index: len(part.get_payload()) for index, part in parts}
+    total = text + sum(sizes.values())
+    report = {'budget': budget, 'before': total, 'after': total, 'fits': not budget or total <= budget, 'changes': []}
+    if report['fits']:
+        return report
+
+    originals = {index: (part, part.get_payload(decode=True)) for index, part in parts}
+    # quality does not apply to a PNG kept for its transparency, so it only
+    # needs encoding again when the clamp changes
+    tried = set()
+    chosen = {}
+    for quality, max_side in STEPS:
+        for index in sorted(sizes, key=sizes.get, reverse=True):
+            part, raw = originals[index]
+            try:
+                attempt = (index, None if _has_alpha(Image.open(io.BytesIO(raw))) else quality, max_side)
+                if attempt in tried:
+                    continue
+                tried.add(attempt)
+                result = _reencode(raw, quality, max_side)
+            except Exception:
+                logger.debug(f"size budget: could not re-encode {part.get_filename()}", exc_info=True)
+                continue
+            if result is None or _encoded_len(len(result[0])) >= sizes[index]:
+                continue
+            size = _encoded_len(len(result[0]))
+            total -= sizes[index] - size
+            sizes[index] = size
+            chosen[index] = (*result, quality, max_side)
+            if total <= budget:
+                break
+        if total <= budget:
+            break
+
+    for index, (data, subtype, quality, max_side) in sorted(chosen.items()):
+        part, _ = originals[index]
+        report['changes'].append({
+            'filename': part.get_filename(), 'from': part.get_content_type(), 'to': f'image/{subtype}',
+            'before': len(part.get_payload()), 'after': sizes[index], 'quality': quality, 'max_side': max_side,
+        })
+        _replace(msg_root, index, part, data, subtype)
+    report.update(after=total, fits=total <= budget)
+
+    logger.info(f"Size budget: {report['before'] / 1048576:.2f} MB -> {total / 1048576:.2f} MB "
+                f"(budget {budget / 1048576:.2f} MB), {len(chosen)} images re-encoded")
+    for change in report['changes']:
+        logger.debug(f"Size budget: {change['filename']} {change['from']} -> {change['to']}, "
+                     f"{change['before']} -> {change['after']} bytes (quality {change['quality']}, max side {change['max_side']})")
+    if not report['fits']:
+        logger.warning("Size budget: still over budget after the last step")
+    return report
@@ -7,28 +7,69 @@ TOKEN_RE = re.compile(r'\{\{\s*(name|email|first_name)\s*\}\}', re.IGNORECASE)
 
 DEFAULT_NAME = 'there'
 
+# slot kind for the per-send unsubscribe placeholder (app/tokens.py)
+UNSUBSCRIBE = 'unsubscribe'
+
 def has_tokens(*texts):
     return any(TOKEN_RE.search(text or '') for text in texts)
 
 def _first_name(name):
     return (name or '').strip().split(' ')[0]
 
-def resolve(text, email, name=None, escape=True):
-    if not text:
-        return text
-
+def recipient_values(email, name=None):
+    """{token: value} for one recipient, unescaped."""
     name = (name or '').strip()
-    values = {
+    return {
         'name': name or DEFAULT_NAME,
         'first_name': _first_name(name) or DEFAULT_NAME,
         'email': (email or '').strip(),
     }
 
-    def _sub(match):
-        value = values.get(match.group(1).lower(), '')
-        return esc(value) if escape else value
+class Template:
+    """A body compiled once for a send to many recipients: the static text
+    between slots is split out up front, and render() only joins it with
+    one recipient's values, instead of scanning the whole body again for
+    each of them.
 
-    return TOKEN_RE.sub(_sub, text)
+    Slots are the personalization tokens and, when `placeholder` is given,
+    every copy of the unsubscribe placeholder. token_slots are the tokens'
+    (start, end, name) positions when already known (ProcessedEmail has
+    them); None finds them with TOKEN_RE, and () leaves tokens as written."""
+    def __init__(self, text, placeholder=None, token_slots=None, escape=True):
+        text = text or ''
+        spans = list(token_slots) if token_slots is not None else [
+            (m.start(), m.end(), m.group(1).lower()) for m in TOKEN_RE.finditer(text)]
+        if placeholder:
+            start = text.find(placeholder)
+            while start != -1:
+                spans.append((start, start + len(placeholder), UNSUBSCRIBE))
+                start = text.find(placeholder, start + len(placeholder))
+        self._parts, self._slots, pos = [], [], 0
+        for start, end, kind in sorted(spans):
+            self._parts.append(text[pos:start])
+            self._slots.append((len(self._parts), kind))
+            # the slot's own text stays in place for render() to fall back on
+            self._parts.append(text[start:end])
+            pos = end
+        self._parts.append(text[pos:])
+        self._escape = escape
+
+    def render(self, values, unsubscribe=None):
+        """The body for one recipient. values is recipient_values(); a slot
+        with no value (no values, or no unsubscribe token) keeps its text."""
+        if self._escape:
+            values = {kind: esc(value) for kind, value in values.items()}
+        if unsubscribe is not None:
+            values = {**values, UNSUBSCRIBE: unsubscribe}
+        parts = self._parts[:]
+        for index, kind in self._slots:
+            parts[index] = values.get(kind, parts[index])
+        return ''.join(parts)
+
+def resolve(text, email, name=None, escape=True):
+    if not text:
+        return text
+    return Template(text, escape=escape).render(recipient_values(email, name))
 
 def resolve_pair(html, plain, email, name=None):
     return (
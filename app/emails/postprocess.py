@@ -0,0 +1,280 @@
+import hashlib, re, threading
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from html.parser import HTMLParser
+import html as _html_stdlib
+
+from app.emails import compact
+from app.emails.personalization import TOKEN_RE
+
+# Post-processing of an assembled email document. One walk over its tokens
+# (tags, text, comments, <style>/<script> blocks) produces everything a send
+# needs from it:
+#
+# - the minified HTML (minify_email_html), with each start tag's inline
+#   style tightened as it goes past (compact.tidy_tag);
+# - the text/plain alternative, the extractor being fed from the same walk
+#   instead of a second HTMLParser pass;
+# - where the {{name}}-style personalization tokens sit in both bodies;
+# - the byte size of both bodies.
+#
+# The output is exactly what minify_email_html, compact_email_html and
+# convert_html_to_plain_text produce one after the other. Results are kept
+# per document content (sha256), for the last MEMO_SIZE documents, so a body
+# shared by several sends or looked up again by the send path
+# (processed_email) is processed once.
+
+MEMO_SIZE = 16
+
+_BLOCK_TAGS = {'p', 'div', 'tr', 'ul', 'ol', 'table', 'blockquote', 'section', 'article'}
+_HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+_TOKEN = re.compile(
+    r'(?P<skip><!--.*?-->|<(?P<raw>style|script)\b.*?</(?P=raw)\s*>)'
+    r'|(?P<start>' + compact.START_TAG.pattern + r')'
+    r'|</(?P<end>[a-zA-Z][^\s/>]*)[^>]*>'
+    r'|(?P<decl><[!?][^>]*>)'
+    r'|(?P<text>[^<]+|<)',
+    re.S | re.I)
+_START_NAME = re.compile(r'<([a-zA-Z][^\s/>]*)')
+_ATTR = re.compile(r'\s([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+)))?')
+# minify_email_html has something to do in a stretch only when one of these
+# is in it
+_SQUASHABLE = re.compile(r'[\t\r\n]| {2}|> <')
+_WS = ' \t\r\n'
+
+@dataclass(frozen=True)
+class ProcessedEmail:
+    """An assembled email after post-processing. The token slots are
+    (start, end, token name) for every personalization token, by position
+    in html and plain_text."""
+    html: str
+    plain_text: str
+    html_bytes: int
+    plain_bytes: int
+    token_slots: tuple
+    plain_token_slots: tuple
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+_BETWEEN_TAGS = re.compile(r'>[ \t\r\n]+<')
+_LINE_BREAK = re.compile(r'[ \t]*\r?\n[ \t]*')
+_SPACES = re.compile(r' {2,}')
+
+def _squash(text):
+    text = _BETWEEN_TAGS.sub('><', text)
+    text = _LINE_BREAK.sub(' ', text)
+    return _SPACES.sub(' ', text)
+
+def minify_email_html(html):
+    """Strip the source-formatting whitespace (indentation, blank lines) that
+    every builder's f-strings carry, without touching runs of whitespace
+    inside text content."""
+    return _squash(html).strip()
+
+class _PlainTextExtractor(HTMLParser):
+    """Walk email HTML and emit a readable text/plain alternative: entities
+    are decoded (convert_charrefs), block elements and headings become line
+    breaks, list items get bullets, table cells are separated, link targets
+    are preserved as 'text (url)', and image alt text is surfaced."""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0            # depth inside <script>/<style>
+        self._in_link = False
+        self._href = None
+        self._link_text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skip += 1
+            return
+        if self._skip:
+            return
+        attrs = dict(attrs)
+        if tag == 'br':
+            self.parts.append('\n')
+        elif tag in _HEADING_TAGS:
+            self.parts.append('\n\n')
+        elif tag == 'li':
+            self.parts.append('\n- ')
+        elif tag in ('td', 'th'):
+            if self.parts and not self.parts[-1].endswith('\n'):
+                self.parts.append('  |  ')
+        elif tag in _BLOCK_TAGS:
+            self.parts.append('\n')
+        elif tag == 'a':
+            self._in_link = True
+            self._href = attrs.get('href')
+            self._link_text = []
+        elif tag == 'img':
+            alt = (attrs.get('alt') or '').strip()
+            if alt:
+                self.parts.append(f'[{alt}]')
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            if self._skip:
+                self._skip -= 1
+            return
+        if self._skip:
+            return
+        if tag == 'a':
+            text = ''.join(self._link_text).strip()
+            href = (self._href or '').strip()
+            if href and not href.startswith(('#', 'mailto:', 'cid:')) and text and href != text:
+                self.parts.append(f'{text} ({href})')
+            else:
+                self.parts.append(text)
+            self._in_link = False
+            self._href = None
+            self._link_text = []
+        elif tag in _BLOCK_TAGS or tag in _HEADING_TAGS:
+            # note: <li> intentionally omitted; the next item's "\n- " breaks
+            # the line, so closing it here would double-space list entries
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self._in_link:
+            self._link_text.append(data)
+        else:
+            self.parts.append(data)
+
+def _finish_plain_text(text):
+    # collapse intra-line whitespace and cap consecutive blank lines
+    lines = [re.sub(r'[ \t]+', ' ', ln).strip() for ln in text.splitlines()]
+    text = re.sub(r'\n{3,}', '\n\n', '\n'.join(lines))
+    return text.strip()
+
+def convert_html_to_plain_text(html_content):
+    if not html_content:
+        return ""
+    try:
+        parser = _PlainTextExtractor()
+        parser.feed(html_content)
+        parser.close()
+        text = ''.join(parser.parts)
+    except Exception:
+        # a parser hiccup must never block a send; fall back to a bare strip
+        text = _html_stdlib.unescape(re.sub(r'<[^>]+>', '', html_content))
+    return _finish_plain_text(text)
+
+def _attrs(tag):
+    """(name, value) pairs of a start tag the way HTMLParser reports them:
+    lowercased names, unescaped values, None for a bare attribute."""
+    out = []
+    for m in _ATTR.finditer(tag, _START_NAME.match(tag).end()):
+        value = next((v for v in m.groups()[1:] if v is not None), None)
+        out.append((m.group(1).lower(), None if value is None else _html_stdlib.unescape(value)))
+    return out
+
+def _slots(text, offset=0):
+    return [(offset + m.start(), offset + m.end(), m.group(1).lower()) for m in TOKEN_RE.finditer(text)]
+
+def _process(document):
+    out, slots, pos = [], [], 0
+    extractor = _PlainTextExtractor()
+    # card grids repeat the same start tag many times over
+    tidied = {}
+    tokens = list(_TOKEN.finditer(document))
+    last = len(tokens) - 1
+    for i, m in enumerate(tokens):
+        piece, kind = m.group(0), m.lastgroup
+        if kind == 'text':
+            # minify_email_html's '>\s+<' rule reaches across tokens: the
+            # whitespace before a tag goes when a '>' comes before it
+            if i < last and piece[-1] in _WS:
+                if i and not piece.strip(_WS) and tokens[i - 1].group(0)[-1] == '>':
+                    continue
+                if piece.rstrip(_WS)[-1:] == '>':
+                    piece = piece.rstrip(_WS)
+            if _SQUASHABLE.search(piece):
+                piece = _squash(piece)
+            if piece:
+                extractor.handle_data(_html_stdlib.unescape(piece))
+        elif kind == 'start':
+            tag = tidied.get(piece)
+            if tag is None:
+                tag = tidied[piece] = compact.tidy_tag(_squash(piece) if _SQUASHABLE.search(piece) else piece)
+            piece = tag
+            name = _START_NAME.match(piece).group(1).lower()
+            extractor.handle_starttag(name, _attrs(piece) if name in ('a', 'img') else [])
+            if piece.endswith('/>'):
+                extractor.handle_endtag(name)
+        else:
+            if _SQUASHABLE.search(piece):
+                piece = _squash(piece)
+            if kind == 'end':
+                extractor.handle_endtag(m.group('end').lower())
+        if '{{' in piece:
+            slots += _slots(piece, pos)
+        out.append(piece)
+        pos += len(piece)
+
+    html = ''.join(out)
+    stripped = html.strip()
+    if len(stripped) != len(html):
+        lead = len(html) - len(html.lstrip())
+        html, slots = stripped, [(a - lead, b - lead, name) for a, b, name in slots]
+    html_bytes = len(html.encode('utf-8'))
+    if html_bytes > compact.GMAIL_CLIP_BYTES:
+        interned = compact.intern_styles(html)
+        if interned is not html:
+            html, slots = interned, _slots(interned)
+            html_bytes = len(html.encode('utf-8'))
+
+    plain_text = _finish_plain_text(''.join(extractor.parts))
+    return ProcessedEmail(
+        html=html, plain_text=plain_text,
+        html_bytes=html_bytes, plain_bytes=len(plain_text.encode('utf-8')),
+        token_slots=tuple(slots), plain_token_slots=tuple(_slots(plain_text)),
+    )
+
+def _remember(key, result):
+    with _memo_lock:
+        _memo[key] = result
+        _memo.move_to_end(key)
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+
+def _recall(key):
+    with _memo_lock:
+        result = _memo.get(key)
+        if result is not None:
+            _memo.move_to_end(key)
+        return result
+
+def _key(kind, text):
+    return kind, hashlib.sha256(text.encode('utf-8')).digest()
+
+def process_email_html(document):
+    """The ProcessedEmail for an assembled document."""
+    key = _key('document', document)
+    result = _recall(key)
+    if result is None:
+        result = _process(document)
+        _remember(key, result)
+        # processed_email(result.html), from the send path, is then a lookup
+        _remember(_key('html', result.html), result)
+    return result
+
+def processed_email(html):
+    """The ProcessedEmail for html as it is about to be sent: what
+    process_email_html made it from, or, for HTML that never went through
+    it (a custom HTML newsletter is sent as written), html itself with its
+    plain text alternative."""
+    key = _key('html', html)
+    result = _recall(key)
+    if result is None:
+        plain_text = convert_html_to_plain_text(html)
+        result = ProcessedEmail(
+            html=html, plain_text=plain_text,
+            html_bytes=len(html.encode('utf-8')), plain_bytes=len(plain_text.encode('utf-8')),
+            token_slots=tuple(_slots(html)), plain_token_slots=tuple(_slots(plain_text)),
+        )
+        _remember(key, result)
+    return result
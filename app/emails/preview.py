@@ -1,4 +1,4 @@
-import json
+import json, threading, time
 
 from email.mime.multipart import MIMEMultipart
 
@@ -6,6 +6,7 @@ from app import config
 from app.settings_store import get_settings
 from app.cache import get_cached_data
 from app.emails.assemble import build_email_html_with_all_cids
+from app.emails.fragments import data_version, preview_update
 from app.emails.fetchers import (
     get_current_tautulli_data_for_email,
     get_droppedneedle_server_stats_cached,
@@ -20,13 +21,75 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def render_preview_email(data):
+# Latest-wins previews. Typing in the builder fires a preview per debounce,
+# and each would hold a gthread worker for a full render that nobody sees
+# once a newer one lands. A session renders at most
+# PREVIEW_RENDERS_PER_SESSION previews at a time; the rest wait for a slot.
+# The builder numbers its previews by the preview_client id it sends, and a
+# waiting preview that a newer one from the same page has superseded gives
+# up without rendering, so heavy editing keeps one render and one waiter per
+# page, and the other workers stay free for sends and artwork.
+PREVIEW_RENDERS_PER_SESSION = 1
+# A preview waits this long for a slot before answering busy.
+PREVIEW_SLOT_WAIT = 30
+
+SUPERSEDED = 'superseded'
+BUSY = 'busy'
+
+_sessions = {}
+_lock = threading.Lock()
+_changed = threading.Condition(_lock)
+
+def render_latest(session_key, client, render):
+    """render() once one of the session's render slots is free. Returns
+    (result, None), or (None, SUPERSEDED) when a newer preview from the same
+    client arrived while this one waited, or (None, BUSY) when no slot came
+    free within PREVIEW_SLOT_WAIT. Previews without a client id are only
+    capped, never superseded."""
+    deadline = time.monotonic() + PREVIEW_SLOT_WAIT
+    with _lock:
+        entry = _sessions.setdefault(session_key, {'running': 0, 'waiting': 0, 'generations': {}})
+        generation = None
+        if client:
+            generation = entry['generations'][client] = entry['generations'].get(client, 0) + 1
+            # older waiters of this client wake to find they are superseded
+            _changed.notify_all()
+        entry['waiting'] += 1
+        try:
+            while True:
+                if generation is not None and entry['generations'][client] != generation:
+                    return None, SUPERSEDED
+                if entry['running'] < PREVIEW_RENDERS_PER_SESSION:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None, BUSY
+                _changed.wait(remaining)
+            entry['running'] += 1
+        finally:
+            entry['waiting'] -= 1
+            _release(session_key, entry)
+    try:
+        return render(), None
+    finally:
+        with _lock:
+            entry['running'] -= 1
+            _release(session_key, entry)
+            _changed.notify_all()
+
+def _release(session_key, entry):
+    """Forget an idle session. Caller holds _lock."""
+    if not entry['running'] and not entry['waiting'] and _sessions.get(session_key) is entry:
+        del _sessions[session_key]
+
+def render_preview_email(data, mark_fragments=False):
     """Full email HTML for the given builder state, produced by the exact
     pipeline a manual send uses, but with preview_mode set on msg_root so the
     image helpers return browser URLs and nothing attaches (see
     app/emails/images.py). This is the single renderer behind the index
     preview, the pop-out, and the schedule preview; WYSIWYG holds by
-    construction. Returns a plain string; the route wraps it in jsonify."""
+    construction. Returns a plain string; the route wraps it in jsonify.
+    mark_fragments marks each section for render_preview_update."""
     settings = get_settings(decrypt_secrets=False)
     tautulli_data = get_current_tautulli_data_for_email(settings)
     recommendations_data = get_cached_data('recommendations_json', strict=False)
@@ -43,6 +106,7 @@ def render_preview_email(data):
 
     msg_root = MIMEMultipart('related')
     msg_root.preview_mode = True
+    msg_root.mark_fragments = mark_fragments
 
     template_data = {
         'selected_items': json.dumps(data.get('selected_items') or []),
@@ -91,5 +155,14 @@ def render_preview_email(data):
         hosted_images_enabled=False,
         hosted_enabled=hosted_enabled,
         links_base_url=links_base_url,
+        # read after the fetches above, which can fill a segment on a miss
+        fragment_version=data_version(),
     )
     return email_html
+
+def render_preview_update(data):
+    """The builder's incremental preview: the payload carries the
+    known_fragments its frame shows, and the answer (fragments.preview_update)
+    holds only the sections that changed, or the whole document when the
+    shell around them did."""
+    return preview_update(render_preview_email(data, mark_fragments=True), data.get('known_fragments'))
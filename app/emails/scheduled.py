@@ -21,7 +21,10 @@ from app.clients.seerr import fetch_seerr_requests
 
 from datetime import datetime, timedelta
 from app.tokens import make_unsubscribe_placeholder
-from app.emails.assemble import convert_html_to_plain_text, build_email_html_with_all_cids
+from app.emails.assemble import build_email_html_with_all_cids
+from app.emails.compact import clip_report
+from app.emails.optimize import fit_to_budget
+from app.emails.postprocess import processed_email
 from app.emails.fetchers import (
     fetch_tautulli_data_for_email,
     get_ombi_requests_cached,
@@ -29,7 +32,7 @@ from app.emails.fetchers import (
     get_seerr_requests_cached,
     get_sonarr_coming_soon_cached,
 )
-from app.emails.send import NO_PERSONAL_DATA, group_recipients_by_user, per_recipient_reasons, send_personalized_per_recipient, filter_inactive, smtp_connect
+from app.emails.send import NO_PERSONAL_DATA, group_recipients_by_user, per_recipient_reasons, report_email_size, send_personalized_per_recipient, filter_inactive, smtp_connect
 
 import logging
 
@@ -648,11 +651,14 @@ def send_scheduled_user_email_with_cids(ctx, settings, recipients, user_key):
             )
             return False
 
-        plain_text = convert_html_to_plain_text(email_html)
+        processed = processed_email(email_html)
+        plain_text = processed.plain_text
         fan_out_reasons = per_recipient_reasons(None, settings, None, email_html, plain_text)
         if not use_personalized_send:
             msg_alternative.attach(MIMEText(plain_text, 'plain', 'utf-8'))
             msg_alternative.attach(MIMEText(email_html, 'html', 'utf-8'))
+        fit_to_budget(msg_root, config.EMAIL_SIZE_BUDGET_BYTES, (processed.html_bytes, processed.plain_bytes))
+        clip_report(processed.html_bytes)
 
         server = smtp_connect(smtp_server, smtp_port, smtp_protocol, smtp_username, from_email, password, settings)
 
@@ -671,11 +677,7 @@ def send_scheduled_user_email_with_cids(ctx, settings, recipients, user_key):
             server.sendmail(from_addr, [from_addr] + recipients, email_content)
             all_recipients = [from_addr] + recipients
 
-        content_size_kb = len((email_content or "").encode('utf-8')) / 1024
-        content_size_mb = content_size_kb / 1024
-        logger.info(f"Email size: {content_size_mb:.2f} MB")
-        if content_size_mb > 25:
-            logger.warning("WARNING: Email exceeds typical size limits")
+        content_size_kb, _ = report_email_size(msg_root, email_content)
 
         server.quit()
         logger.info(f"Email sent successfully!")
@@ -865,11 +867,14 @@ def send_scheduled_single_email_with_cids(ctx, settings, to_emails_list):
             )
             return True
 
-        plain_text = convert_html_to_plain_text(email_html)
+        processed = processed_email(email_html)
+        plain_text = processed.plain_text
         fan_out_reasons = per_recipient_reasons(ctx.selected_items, settings, None, email_html, plain_text)
         if not use_personalized_send:
             msg_alternative.attach(MIMEText(plain_text, 'plain', 'utf-8'))
             msg_alternative.attach(MIMEText(email_html, 'html', 'utf-8'))
+        fit_to_budget(msg_root, config.EMAIL_SIZE_BUDGET_BYTES, (processed.html_bytes, processed.plain_bytes))
+        clip_report(processed.html_bytes)
 
         server = smtp_connect(smtp_server, smtp_port, smtp_protocol, smtp_username, from_email, password, settings)
 
@@ -888,11 +893,7 @@ def send_scheduled_single_email_with_cids(ctx, settings, to_emails_list):
             server.sendmail(from_addr, [from_addr] + to_emails_list, email_content)
             all_recipients = [from_addr] + to_emails_list
 
-        content_size_kb = len((email_content or "").encode('utf-8')) / 1024
-        content_size_mb = content_size_kb / 1024
-        logger.info(f"Email size: {content_size_mb:.2f} MB")
-        if content_size_mb > 25:
-            logger.warning("WARNING: Email exceeds typical size limits")
+        content_size_kb, _ = report_email_size(msg_root, email_content)
 
         server.quit()
         logger.info(f"Email sent successfully!")
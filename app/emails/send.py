@@ -14,7 +14,11 @@ from app.db import db_connect
 from app.store import filter_suppressed, get_contact_names, record_email_history
 from app.tokens import make_unsubscribe_placeholder, sign_unsubscribe_token
 from app.emails import personalization
-from app.emails.assemble import convert_html_to_plain_text, build_email_html_with_all_cids
+from app.emails.assemble import build_email_html_with_all_cids
+from app.emails.images import image_dedup_stats
+from app.emails.compact import clip_report
+from app.emails.optimize import fit_to_budget
+from app.emails.postprocess import processed_email
 from app.emails.fetchers import get_current_tautulli_data_for_email, get_recommendations_for_users, get_droppedneedle_wrapped_for_users, get_droppedneedle_server_stats_cached, get_yearly_wrapped_cached, get_sonarr_coming_soon_cached, get_radarr_coming_soon_cached, get_ombi_requests_cached, get_seerr_requests_cached
 
 import logging
@@ -185,21 +189,23 @@ def send_personalized_per_recipient(server, msg_root, from_addr, recipients, ema
     email_html/plain_text at build time."""
     image_parts = msg_root.get_payload()[1:]
     last_content = None
-    contact_names = get_contact_names() if personalization.has_tokens(email_html, plain_text) else {}
+    processed = processed_email(email_html)
+    plain_slots = processed.plain_token_slots if processed.plain_text == plain_text else None
+    contact_names = get_contact_names() if processed.token_slots or personalization.has_tokens(plain_text) else {}
+
+    # compiled once: each recipient's bodies are then a join of the static
+    # text with their token and name values spliced in
+    html_template = personalization.Template(
+        email_html, unsub_placeholder, processed.token_slots if contact_names else (), escape=True)
+    plain_template = personalization.Template(
+        plain_text, unsub_placeholder, plain_slots if contact_names else (), escape=False)
 
     for recipient in recipients:
-        personalized_html, personalized_plain = email_html, plain_text
-        token = None
-        if unsub_placeholder:
-            token = sign_unsubscribe_token(recipient)
-            personalized_html = email_html.replace(unsub_placeholder, token)
-            personalized_plain = plain_text.replace(unsub_placeholder, token)
-
-        if contact_names:
-            personalized_html, personalized_plain = personalization.resolve_pair(
-                personalized_html, personalized_plain,
-                recipient, contact_names.get((recipient or '').strip().lower()),
-            )
+        token = sign_unsubscribe_token(recipient) if unsub_placeholder else None
+        values = personalization.recipient_values(
+            recipient, contact_names.get((recipient or '').strip().lower())) if contact_names else {}
+        personalized_html = html_template.render(values, token)
+        personalized_plain = plain_template.render(values, token)
 
         alt = MIMEMultipart('alternative')
         alt.attach(MIMEText(personalized_plain, 'plain', 'utf-8'))
@@ -220,6 +226,18 @@ def send_personalized_per_recipient(server, msg_root, from_addr, recipients, ema
         server.sendmail(from_addr, [recipient], last_content)
     return last_content
 
+def report_email_size(msg_root, email_content):
+    """Logs the sent message's size and the image bytes the per-message
+    registry kept out of it; returns (size in KB, dedup stats)."""
+    content_size_kb = len((email_content or "").encode('utf-8')) / 1024
+    content_size_mb = content_size_kb / 1024
+    dedup = image_dedup_stats(msg_root)
+    logger.info(f"Email size: {content_size_mb:.2f} MB "
+                f"({dedup['parts']} repeated images deduplicated, {dedup['bytes'] / 1024:.1f} KB saved)")
+    if content_size_mb > 25:
+        logger.warning("WARNING: Email exceeds typical size limits")
+    return content_size_kb, dedup
+
 @dataclass
 class SendRequest:
     """Per-request data for a manual send; settings travel separately."""
@@ -378,11 +396,14 @@ def send_standard_email_with_cids(req, settings, to_emails):
             links_base_url=links_base_url
         )
 
-        plain_text = convert_html_to_plain_text(email_html)
+        processed = processed_email(email_html)
+        plain_text = processed.plain_text
         fan_out_reasons = per_recipient_reasons(req.selected_items, settings, req.user_dict, email_html, plain_text)
         if not use_personalized_send:
             msg_alternative.attach(MIMEText(plain_text, 'plain', 'utf-8'))
             msg_alternative.attach(MIMEText(email_html, 'html', 'utf-8'))
+        size_report = fit_to_budget(msg_root, config.EMAIL_SIZE_BUDGET_BYTES, (processed.html_bytes, processed.plain_bytes))
+        html_report = clip_report(processed.html_bytes)
 
         server = smtp_connect(smtp_server, smtp_port, smtp_protocol, smtp_username, from_email, password, settings)
 
@@ -401,11 +422,7 @@ def send_standard_email_with_cids(req, settings, to_emails):
             server.sendmail(from_addr, [from_addr] + to_emails, email_content)
             all_recipients = [from_addr] + to_emails
 
-        content_size_kb = len((email_content or "").encode('utf-8')) / 1024
-        content_size_mb = content_size_kb / 1024
-        logger.info(f"Email size: {content_size_mb:.2f} MB")
-        if content_size_mb > 25:
-            logger.warning("WARNING: Email exceeds typical size limits")
+        content_size_kb, dedup = report_email_size(msg_root, email_content)
 
         logger.info(f"Email sent successfully!")
 
@@ -413,7 +430,9 @@ def send_standard_email_with_cids(req, settings, to_emails):
                              round(content_size_kb, 2), len(all_recipients), 'Manual', hosted_html=hosted_html)
 
         server.quit()
-        return {"success": True, "sent_to": ', '.join(all_recipients), "size": content_size_kb}, 200
+        return {"success": True, "sent_to": ', '.join(all_recipients), "size": content_size_kb,
+                "dedup_image_parts": dedup['parts'], "dedup_image_bytes": dedup['bytes'],
+                "size_budget": size_report, "html_size": html_report}, 200
     except smtplib.SMTPConnectError as e:
         logger.error(f"SMTP Connection Error: {e}")
         logger.warning("This often indicates wrong port/protocol combination")
@@ -624,11 +643,14 @@ def send_single_user_email_with_cids(req, settings, recipients, user_key, recomm
             links_base_url=links_base_url
         )
 
-        plain_text = convert_html_to_plain_text(email_html)
+        processed = processed_email(email_html)
+        plain_text = processed.plain_text
         fan_out_reasons = per_recipient_reasons(None, settings, None, email_html, plain_text)
         if not use_personalized_send:
             msg_alternative.attach(MIMEText(plain_text, 'plain', 'utf-8'))
             msg_alternative.attach(MIMEText(email_html, 'html', 'utf-8'))
+        fit_to_budget(msg_root, config.EMAIL_SIZE_BUDGET_BYTES, (processed.html_bytes, processed.plain_bytes))
+        clip_report(processed.html_bytes)
 
         server = smtp_connect(smtp_server, smtp_port, smtp_protocol, smtp_username, from_email, password, settings)
 
@@ -647,11 +669,7 @@ def send_single_user_email_with_cids(req, settings, recipients, user_key, recomm
             server.sendmail(from_addr, [from_addr] + recipients, email_content)
             all_recipients = [from_addr] + recipients
 
-        content_size_kb = len((email_content or "").encode('utf-8')) / 1024
-        content_size_mb = content_size_kb / 1024
-        logger.info(f"Email size: {content_size_mb:.2f} MB")
-        if content_size_mb > 25:
-            logger.warning("WARNING: Email exceeds typical size limits")
+        content_size_kb, _ = report_email_size(msg_root, email_content)
 
         server.quit()
         logger.info(f"Email sent successfully!")
@@ -0,0 +1,112 @@
+import json, sqlite3, threading, time
+
+from werkzeug.wsgi import ClosingIterator
+
+from app import config, state
+from app.db import db_connect
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Container probes, answered in front of Flask: no routing, no
+# before_request hooks (CSP nonce, demo guard), no auth, no cache lock.
+# /healthz only proves the process can answer; /readyz also checks the
+# scheduler heartbeat, that the database takes a write lock, and that a
+# gthread worker is free for real traffic.
+
+HEALTHZ_PATH = '/healthz'
+READYZ_PATH = '/readyz'
+
+# The scheduler stamps state.scheduler_heartbeat once per tick (60 s), but a
+# tick that sends a large scheduled newsletter can legitimately run long.
+SCHEDULER_HEARTBEAT_MAX_AGE = 900
+
+_inflight_lock = threading.Lock()
+
+def _track_start():
+    with _inflight_lock:
+        state.requests_in_flight += 1
+
+def _track_end():
+    with _inflight_lock:
+        state.requests_in_flight -= 1
+
+def _check_scheduler():
+    if not state._WORKERS_STARTED:
+        return True, "not started in this process"
+    age = time.time() - state.scheduler_heartbeat
+    if age > SCHEDULER_HEARTBEAT_MAX_AGE:
+        return False, f"no heartbeat for {int(age)}s"
+    return True, f"heartbeat {int(age)}s ago"
+
+def _check_database():
+    try:
+        # a short busy timeout: a probe must answer well inside its deadline
+        conn = db_connect(timeout=2)
+        try:
+            # takes (and drops) the write lock without writing anything
+            conn.execute("BEGIN IMMEDIATE")
+            conn.rollback()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        # /readyz answers unauthenticated; the error text (paths, file
+        # state) only goes to the log
+        logger.warning(f"Readiness check: database not writable: {e}")
+        return False, "not writable"
+    return True, "writable"
+
+def _check_workers():
+    # The probe is not counted, but it holds a thread while it runs: every
+    # other thread busy means it got the last one and real traffic queues.
+    busy = state.requests_in_flight
+    detail = f"{busy}/{config.WORKER_THREADS} worker threads busy"
+    return busy < max(config.WORKER_THREADS - 1, 1), detail
+
+def readiness():
+    checks = {
+        'scheduler': _check_scheduler(),
+        'database': _check_database(),
+        'workers': _check_workers(),
+    }
+    ready = all(ok for ok, _ in checks.values())
+    body = {
+        'status': 'ready' if ready else 'unavailable',
+        'checks': {name: {'ok': ok, 'detail': detail} for name, (ok, detail) in checks.items()},
+    }
+    return ready, body
+
+def _respond(start_response, status, body, content_type):
+    payload = body.encode('utf-8')
+    start_response(status, [
+        ('Content-Type', content_type),
+        ('Content-Length', str(len(payload))),
+        ('Cache-Control', 'no-store'),
+    ])
+    return [payload]
+
+class HealthMiddleware:
+    """WSGI wrapper that answers the probes itself and counts every other
+    request in flight for the worker check."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path == HEALTHZ_PATH:
+            return _respond(start_response, '200 OK', 'ok', 'text/plain; charset=utf-8')
+        if path == READYZ_PATH:
+            ready, body = readiness()
+            status = '200 OK' if ready else '503 Service Unavailable'
+            return _respond(start_response, status, json.dumps(body), 'application/json')
+
+        _track_start()
+        try:
+            response = self.wsgi_app(environ, start_response)
+        except BaseException:
+            _track_end()
+            raise
+        # decrement once the server has finished with the body (streamed or not)
+        return ClosingIterator(response, [_track_end])
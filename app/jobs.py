@@ -0,0 +1,100 @@
+import hashlib, json, secrets, threading, time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from app import state
+from app.cache import cache_fill, set_fill_listener
+from app.progress import set_progress_observer
+from app.pulls import PULLS
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Background pull jobs. POST /pull_jobs?op=<pull> runs the pull function
+# (app/pulls.py) with the posted payload on a small job pool instead of a
+# gthread request worker, and answers 202 with a job id. The job's progress
+# updates, each cache segment as it lands (partial results) and its
+# completion are recorded as numbered events; the page polls
+# GET /pull_jobs/<id>?after=<last id> for the new ones, and
+# GET /pull_jobs/<id>/result then answers the pull's result the way the
+# pull's own route does. A submit identical to a job still running joins it.
+
+JOB_WORKERS = 4
+# Finished jobs (and their result) are kept this long for the page to fetch.
+JOB_RETENTION = 600
+
+_pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="pull-job")
+_lock = threading.Lock()
+
+def _prune(now):
+    """Caller holds _lock."""
+    for job_id in [job_id for job_id, job in state.pull_jobs.items()
+                   if job['finished'] and now - job['finished'] > JOB_RETENTION]:
+        del state.pull_jobs[job_id]
+
+def _add_event(job, event, data):
+    with _lock:
+        job['events'].append({'id': len(job['events']) + 1, 'event': event, 'data': data})
+
+def _on_progress(op, snapshot):
+    with _lock:
+        jobs = [job for job in state.pull_jobs.values() if job['progress_op'] == op and not job['finished']]
+    for job in jobs:
+        _add_event(job, 'progress', snapshot)
+
+set_progress_observer(_on_progress)
+
+def submit_job(app, op, data):
+    """Start (or join) a background run of a pull. Returns (job_id, joined)."""
+    _pull, progress_op, _required = PULLS[op]
+    key = hashlib.sha256(op.encode() + b'\0' + json.dumps(data, sort_keys=True).encode()).hexdigest()
+    now = time.time()
+    with _lock:
+        _prune(now)
+        for job in state.pull_jobs.values():
+            if job['key'] == key and not job['finished']:
+                return job['id'], True
+        job = {
+            'id': secrets.token_urlsafe(12),
+            'op': op,
+            'key': key,
+            'progress_op': progress_op,
+            'payload': data,
+            'created': now,
+            'finished': None,
+            'events': [],
+            'result': None,
+        }
+        state.pull_jobs[job['id']] = job
+    _pool.submit(_run, app, job)
+    return job['id'], False
+
+def _run(app, job):
+    pull = PULLS[job['op']][0]
+    set_fill_listener(lambda segment: _add_event(job, 'partial', {'segment': segment}))
+    try:
+        with app.app_context(), cache_fill('manual'):
+            result = pull(job['payload'])
+    except Exception:
+        logger.exception(f"Background {job['op']} job failed")
+        result = ({"error": "Pull failed"}, 500)
+    finally:
+        set_fill_listener(None)
+    with _lock:
+        job['result'] = result
+        job['finished'] = time.time()
+    _add_event(job, 'done', {'status': result[1]})
+
+def get_job(job_id):
+    with _lock:
+        return state.pull_jobs.get(job_id)
+
+def job_events(job_id, after=0):
+    """Events of a job numbered above `after`, or None for an unknown job.
+    Answers at once; the page polls rather than holding a request open."""
+    with _lock:
+        job = state.pull_jobs.get(job_id)
+        if job is None:
+            return None
+        return list(job['events'][after:])
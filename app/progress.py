@@ -13,6 +13,19 @@ _LOCK = threading.Lock()
 # must not leave a spinner pinned at a frozen percentage forever.
 STALE_AFTER_SECONDS = 300
 
+# Background pull jobs (app/jobs.py) forward every update to their event
+# stream; fn(op, {step, total, label, active}) is called outside _LOCK.
+_observer = {'fn': None}
+
+
+def set_progress_observer(fn):
+    _observer['fn'] = fn
+
+
+def _notify(op, entry):
+    if entry is not None and _observer['fn'] is not None:
+        _observer['fn'](op, {k: entry[k] for k in ('step', 'total', 'label', 'active')})
+
 
 def progress_start(op, total, label=""):
     with _LOCK:
@@ -23,6 +36,8 @@ def progress_start(op, total, label=""):
             'active': True,
             'updated': time.time(),
         }
+        entry = dict(state.progress_registry[op])
+    _notify(op, entry)
 
 
 def progress_step(op, label=None, advance=1):
@@ -34,6 +49,8 @@ def progress_step(op, label=None, advance=1):
         if label is not None:
             entry['label'] = label
         entry['updated'] = time.time()
+        entry = dict(entry)
+    _notify(op, entry)
 
 
 def progress_done(op):
@@ -44,6 +61,8 @@ def progress_done(op):
         entry['step'] = entry['total']
         entry['active'] = False
         entry['updated'] = time.time()
+        entry = dict(entry)
+    _notify(op, entry)
 
 
 def progress_get(op):
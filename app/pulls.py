@@ -0,0 +1,338 @@
+import time
+
+from datetime import datetime, timedelta
+
+from app import state
+from app.settings_store import get_settings
+from app.cache import set_cached_data, set_cached_user_data, get_cache_info
+from app.crypto import decrypt
+from app.clients.plex import reset_plex_health, plex_call_failed, plex_missing_libraries
+from app.clients.jellyfin import reset_jellyfin_health, jellyfin_call_failed
+from app.clients.mediaserver import get_media_server_type
+from app.progress import progress_start, progress_step, progress_done
+from app.clients.conjurr import run_conjurr_command
+from app.clients.droppedneedle import run_droppedneedle_command, fetch_droppedneedle_server_stats
+from app.clients.sonarr import fetch_sonarr_calendar
+from app.clients.radarr import fetch_radarr_calendar
+from app.clients.ombi import fetch_ombi_movie_requests, fetch_ombi_tv_requests
+from app.clients.seerr import fetch_seerr_requests
+from app.emails.fetchers import GRAPH_COMMANDS, PULL_SEGMENTS, pull_segment_params, fetch_pull_segment, fetch_graphs
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The manual pulls. Each takes the page's parsed JSON payload and returns
+# (result, http_status) like the send functions: /pull_stats answers the
+# result as JSON, the others re-render the builder page with it (alert,
+# error and the data they pulled). The pull routes and the background jobs
+# (app/jobs.py) both call these, so neither needs a request to run a pull.
+
+def _filter_selected_users(user_dict, to_emails):
+    selected_emails = {e.strip().lower() for e in to_emails.split(',') if e.strip()}
+    return {
+        k: v for k, v in user_dict.items()
+        if v and str(v).strip().lower() in selected_emails
+    }
+
+def page_cache_info():
+    return {
+        "stats": get_cache_info('stats'),
+        "users": get_cache_info('users'),
+        "graph_data": get_cache_info('graph_data'),
+        "recent_data": get_cache_info('recent_data'),
+        "recommendations_json": get_cache_info('recommendations_json'),
+        "filtered_users": get_cache_info('filtered_users'),
+    }
+
+# What each stats pull step tells the progress bar before it starts.
+_SEGMENT_LABELS = {
+    'stats': 'Pulling home stats...',
+    'yearly_wrapped_json': 'Pulling year in review stats...',
+    'users': 'Pulling users...',
+    'recent_data': 'Pulling recently added...',
+    'most_watched_data': 'Pulling most watched...',
+    'most_watched_recent_data': 'Pulling most watched (pull range)...',
+}
+
+def pull_stats(data):
+    """Pulls every PULL_SEGMENTS segment through fetch_pull_segment, the
+    same per-segment fetch the daily refresh and revalidation use, and
+    caches each one. Result shape is the same for Plex and Jellyfin; the
+    plex_unavailable key doubles as the degraded-to-cache warning for
+    whichever server is active."""
+    time_range = str(data.get('time_range', 30))
+    count = str(data.get('count', 10))
+
+    _s = get_settings(decrypt_secrets=False)
+
+    _server_type = get_media_server_type(_s)
+    jellyfin = _server_type in ('jellyfin', 'emby')
+    if _server_type == 'none':
+        return {"error": "No media server is configured. Standalone mode has no stats to pull."}, 400
+
+    cache_params = pull_segment_params(_s, time_range, count)
+    if cache_params is None:
+        return {"error": "Please enter Jellyfin info on settings page" if jellyfin else "Please enter tautulli info on settings page"}, 400
+
+    plex_configured = not jellyfin and bool(_s.get("plex_url") and _s.get("plex_token"))
+    graph_steps = 1 if jellyfin else len(GRAPH_COMMANDS)
+    progress_start('pull_stats', len(PULL_SEGMENTS) - 1 + graph_steps, _SEGMENT_LABELS['stats'])
+    if jellyfin:
+        reset_jellyfin_health()
+    else:
+        reset_plex_health()
+
+    def _graph_step(label):
+        progress_step('pull_stats', label)
+
+    pulled = {}
+    graph_commands = GRAPH_COMMANDS
+    error = None
+    for index, segment in enumerate(PULL_SEGMENTS):
+        if segment == 'graph_data':
+            pulled[segment], graph_commands, error = fetch_graphs(cache_params, _s, error, progress_cb=_graph_step)
+        else:
+            if index:
+                progress_step('pull_stats', _SEGMENT_LABELS[segment])
+            pulled[segment], error = fetch_pull_segment(segment, cache_params, _s, error)
+        # a missing year in review hides itself; every other segment is
+        # cached even when empty so the page shows what the pull found
+        if segment != 'yearly_wrapped_json' or pulled[segment]:
+            set_cached_data(segment, pulled[segment], cache_params)
+
+    # Track whether the media server silently degraded to cached data during
+    # the pull, so the UI can warn instead of showing partial data.
+    if jellyfin:
+        server_unavailable = jellyfin_call_failed()
+        missing_libraries = []
+    else:
+        server_unavailable = plex_configured and plex_call_failed()
+        missing_libraries = plex_missing_libraries() if plex_configured else []
+
+    users = pulled['users']
+    user_dict = {}
+    for user in (users or []):
+        if user.get('email') and user.get('is_active'):
+            user_dict[user['user_id']] = user['email']
+
+    progress_done('pull_stats')
+
+    recently_added_mode = cache_params['mode']
+    recent_window = f"within last {count} days" if recently_added_mode == 'days' else f"{count} items"
+    return {
+        "success": True,
+        "alert": f"Fresh data loaded! Recently added {recent_window} from Jellyfin." if jellyfin else f"Fresh data loaded! Stats/graphs for {time_range} days, and recently added {recent_window}.",
+        "stats": pulled['stats'] or [],
+        "yearly_wrapped_json": pulled['yearly_wrapped_json'] or [],
+        "graph_data": pulled['graph_data'],
+        "graph_commands": graph_commands,
+        "recent_data": pulled['recent_data'],
+        "most_watched_data": pulled['most_watched_data'],
+        "user_dict": user_dict,
+        "users_full_data": users,
+        "cache_info": page_cache_info(),
+        "time_range": time_range,
+        "count": count,
+        "plex_unavailable": server_unavailable,
+        "missing_libraries": missing_libraries,
+        "error": error
+    }, 200
+
+def pull_recommendations(data):
+    _s = get_settings(decrypt_secrets=False)
+    conjurr_base_url = (_s.get("conjurr_url") or "") if "id" in _s else ""
+    filtered_users = _filter_selected_users(data.get('user_dict', {}), data['to_emails'])
+
+    if conjurr_base_url == "":
+        return {'error': 'Please enter conjurr info on settings page'}, 200
+
+    error = None
+    progress_start('pull_recommendations', max(len(filtered_users), 1), 'Pulling recommendations...')
+
+    def _recs_progress(user_id):
+        progress_step('pull_recommendations', f'Pulled recommendations for {filtered_users.get(user_id, user_id)}')
+
+    recommendations_json, error = run_conjurr_command(conjurr_base_url, filtered_users, error, progress_cb=_recs_progress)
+    progress_done('pull_recommendations')
+    if state.recommendations_cancel.is_set():
+        state.recommendations_cancel.clear()
+        alert = "Recommendations pull cancelled. Partial results kept."
+        error = None
+    elif error:
+        alert = None
+    else:
+        alert = "User recommendations pulled from conjurr!"
+
+    cache_params = {'timestamp': time.time()}
+
+    set_cached_data('filtered_users', filtered_users, cache_params)
+    set_cached_data('recommendations_json', recommendations_json, cache_params)
+    # per-user slots let a later send reuse these users individually
+    set_cached_user_data('recommendations_json', {str(k): v for k, v in (recommendations_json or {}).items()}, cache_params)
+
+    return {
+        'recommendations_json': recommendations_json,
+        'filtered_users': filtered_users,
+        'alert': alert,
+        'error': error,
+    }, 200
+
+def pull_droppedneedle_stats(data):
+    _s = get_settings(decrypt_secrets=False)
+    row = (_s.get("droppedneedle_url"), _s.get("droppedneedle_api_key")) if "id" in _s else None
+
+    droppedneedle_url = (row[0] or "").strip() if row else ""
+    droppedneedle_api_key = decrypt(row[1]) if row and row[1] else ""
+
+    filtered_users = _filter_selected_users(data.get('user_dict', {}), data['to_emails'])
+
+    if droppedneedle_url == "" or droppedneedle_api_key == "":
+        return {'error': 'Please enter DroppedNeedle URL and API key on settings page'}, 200
+
+    droppedneedle_wrapped_json, error = run_droppedneedle_command(droppedneedle_url, droppedneedle_api_key, filtered_users, None, use_cache=False)
+    droppedneedle_server_json, server_error = fetch_droppedneedle_server_stats(droppedneedle_url, droppedneedle_api_key)
+    if server_error:
+        error = (error + ", " if error else "") + server_error
+
+    alert = None if error else "DroppedNeedle stats pulled!"
+
+    cache_params = {'timestamp': time.time()}
+    set_cached_data('droppedneedle_filtered_users', filtered_users, cache_params)
+    set_cached_data('droppedneedle_wrapped_json', droppedneedle_wrapped_json, cache_params)
+    set_cached_user_data('droppedneedle_wrapped_json', {str(k): v for k, v in (droppedneedle_wrapped_json or {}).items()}, cache_params)
+    set_cached_data('droppedneedle_server_json', droppedneedle_server_json, cache_params)
+
+    return {
+        'droppedneedle_wrapped_json': droppedneedle_wrapped_json,
+        'droppedneedle_server_json': droppedneedle_server_json,
+        'alert': alert,
+        'error': error,
+    }, 200
+
+def pull_coming_soon(data):
+    sonarr_coming_soon_json = None
+    radarr_coming_soon_json = None
+    error = None
+
+    _s = get_settings(decrypt_secrets=False)
+    row = (
+        _s.get("sonarr_url"), _s.get("sonarr_api_key"),
+        _s.get("radarr_url"), _s.get("radarr_api_key"),
+        _s.get("coming_soon_days_ahead"),
+    ) if "id" in _s else None
+
+    sonarr_url = (row[0] or "").strip() if row else ""
+    sonarr_api_key = decrypt(row[1]) if row and row[1] else ""
+    radarr_url = (row[2] or "").strip() if row else ""
+    radarr_api_key = decrypt(row[3]) if row and row[3] else ""
+    days_ahead = int(row[4] or 14) if row else 14
+
+    if not sonarr_url and not radarr_url:
+        return {'error': 'Please enter a Sonarr and/or Radarr URL and API key on settings page'}, 200
+
+    start_date = datetime.now().strftime('%Y-%m-%d')
+    end_date = (datetime.now() + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
+
+    progress_start('coming_soon', 2, 'Pulling Sonarr calendar...')
+    if sonarr_url and sonarr_api_key:
+        sonarr_coming_soon_json, sonarr_error = fetch_sonarr_calendar(sonarr_url, sonarr_api_key, start_date, end_date)
+        if sonarr_error:
+            error = (error + ", " if error else "") + sonarr_error
+
+    progress_step('coming_soon', 'Pulling Radarr calendar...')
+    if radarr_url and radarr_api_key:
+        radarr_coming_soon_json, radarr_error = fetch_radarr_calendar(radarr_url, radarr_api_key, start_date, end_date)
+        if radarr_error:
+            error = (error + ", " if error else "") + radarr_error
+    progress_done('coming_soon')
+
+    cache_params = {'timestamp': time.time()}
+    set_cached_data('sonarr_coming_soon_json', sonarr_coming_soon_json, cache_params)
+    set_cached_data('radarr_coming_soon_json', radarr_coming_soon_json, cache_params)
+
+    return {
+        'sonarr_coming_soon_json': sonarr_coming_soon_json,
+        'radarr_coming_soon_json': radarr_coming_soon_json,
+        'alert': None if error else "Coming soon calendar pulled!",
+        'error': error,
+    }, 200
+
+def pull_ombi_requests(data):
+    error = None
+
+    _s = get_settings(decrypt_secrets=False)
+    row = (_s.get("ombi_url"), _s.get("ombi_api_key")) if "id" in _s else None
+
+    ombi_url = (row[0] or "").strip() if row else ""
+    ombi_api_key = decrypt(row[1]) if row and row[1] else ""
+
+    if not ombi_url or not ombi_api_key:
+        return {'error': 'Please enter an Ombi URL and API key on settings page'}, 200
+
+    progress_start('ombi_requests', 2, 'Pulling movie requests...')
+    movies, movies_error = fetch_ombi_movie_requests(ombi_url, ombi_api_key)
+    if movies_error:
+        error = (error + ", " if error else "") + movies_error
+
+    progress_step('ombi_requests', 'Pulling TV requests...')
+    tv, tv_error = fetch_ombi_tv_requests(ombi_url, ombi_api_key)
+    if tv_error:
+        error = (error + ", " if error else "") + tv_error
+    progress_done('ombi_requests')
+
+    ombi_requests_json = {'movies': movies or [], 'tv': tv or []}
+
+    cache_params = {'timestamp': time.time()}
+    set_cached_data('ombi_requests_json', ombi_requests_json, cache_params)
+
+    return {
+        'ombi_requests_json': ombi_requests_json,
+        'alert': None if error else "Ombi requests pulled!",
+        'error': error,
+    }, 200
+
+def pull_seerr_requests(data):
+    _s = get_settings(decrypt_secrets=False)
+    row = (_s.get("seerr_url"), _s.get("seerr_api_key")) if "id" in _s else None
+
+    seerr_url = (row[0] or "").strip() if row else ""
+    seerr_api_key = decrypt(row[1]) if row and row[1] else ""
+
+    if not seerr_url or not seerr_api_key:
+        return {'error': 'Please enter a Seerr URL and API key on settings page'}, 200
+
+    progress_start('seerr_requests', 1, 'Pulling requests...')
+
+    def _seerr_progress(done, total):
+        if done == 0:
+            progress_start('seerr_requests', max(total, 1), 'Fetching request details...')
+        else:
+            progress_step('seerr_requests', f'Fetching request details ({done}/{total})...')
+
+    entries, error = fetch_seerr_requests(seerr_url, seerr_api_key, progress_cb=_seerr_progress)
+    progress_done('seerr_requests')
+
+    seerr_requests_json = {'requests': entries or []}
+
+    cache_params = {'timestamp': time.time()}
+    set_cached_data('seerr_requests_json', seerr_requests_json, cache_params)
+
+    return {
+        'seerr_requests_json': seerr_requests_json,
+        'alert': None if error else "Seerr requests pulled!",
+        'error': error,
+    }, 200
+
+# op -> (pull, its app/progress.py operation name, required payload fields)
+PULLS = {
+    'pull_stats': (pull_stats, 'pull_stats', ()),
+    'pull_recommendations': (pull_recommendations, 'pull_recommendations', ('to_emails',)),
+    'pull_droppedneedle_stats': (pull_droppedneedle_stats, 'pull_droppedneedle_stats', ('to_emails',)),
+    'pull_coming_soon': (pull_coming_soon, 'coming_soon', ()),
+    'pull_ombi_requests': (pull_ombi_requests, 'ombi_requests', ()),
+    'pull_seerr_requests': (pull_seerr_requests, 'seerr_requests', ()),
+}
+
+# Pulls answered with JSON; the rest re-render the builder page.
+JSON_PULLS = frozenset({'pull_stats'})
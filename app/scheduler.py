@@ -5,11 +5,11 @@ from datetime import datetime
 from app import config, state
 from app.db import db_connect
 from app.settings_store import get_settings
-from app.cache import get_cache_info, set_cached_data
+from app.cache import cache_fill, get_cache_info, set_cached_data
 from app.store import update_schedule_last_sent, advance_schedule_next_send, cleanup_expired_hosted_images
-from app.clients.tautulli import run_tautulli_command
 from app.clients.github import _background_update_checker
-from app.emails.fetchers import fetch_recent_data_for_index
+from app.clients.plex import refresh_random_pick_reservoirs
+from app.emails.fetchers import PULL_SEGMENTS, pull_segment_params, refresh_cache_segment
 from app.emails.scheduled import send_scheduled_email
 
 import logging
@@ -31,6 +31,7 @@ def background_scheduler():
     last_hosted_cleanup = 0
 
     while True:
+        state.scheduler_heartbeat = time.time()
         try:
             now = datetime.now()
             current_time = time.time()
@@ -42,7 +43,9 @@ def background_scheduler():
                     last_cache_refresh = current_time
                 else:
                     logger.info(f"Daily cache refresh triggered at {now.isoformat()}")
-                    refresh_daily_cache()
+                    # A full pull takes minutes; keep the tick loop (and the
+                    # schedules it sends) running while it does.
+                    threading.Thread(target=refresh_daily_cache, daemon=True, name="cache-refresh").start()
                     last_cache_refresh = current_time
 
             if current_time - last_hosted_cleanup > config.CACHE_DURATION:
@@ -52,6 +55,11 @@ def background_scheduler():
                     logger.error(f"Error cleaning up expired hosted images: {e}")
                 last_hosted_cleanup = current_time
 
+            try:
+                refresh_random_pick_reservoirs()
+            except Exception as e:
+                logger.error(f"Error refreshing random pick reservoirs: {e}")
+
             conn = db_connect()
             cursor = conn.cursor()
             
@@ -115,120 +123,38 @@ def refresh_daily_cache():
         logger.info("Cache refresh already in progress, skipping.")
         return
     try:
-        _s = get_settings(decrypt_secrets=False)
-        row = (_s.get("server_name"), _s.get("tautulli_url"), _s.get("tautulli_api"), _s.get("stats_type"), _s.get("recently_added_mode"), _s.get("recently_added_sort")) if "id" in _s else None
-
-        if not row or not row[0]:
-            logger.info("No settings found for cache refresh")
-            return
-
-        settings = {
-            "server_name": row[0],
-            "tautulli_url": row[1],
-            "tautulli_api": row[2],
-            "stats_type": row[3] or 'plays',
-            "recently_added_mode": row[4] or 'items',
-            "recently_added_sort": row[5] or 'date'
-        }
-
-        tautulli_base_url = settings['tautulli_url'].rstrip('/')
-        tautulli_api_key = settings['tautulli_api']
-        stats_type = settings.get('stats_type', 'plays')
-        recently_added_mode = settings.get('recently_added_mode', 'items')
-        recently_added_sort = settings.get('recently_added_sort', 'date')
-        
-        time_range = "30"
-        count = "10"
-        
-        stats_info = get_cache_info('stats')
-        if stats_info['exists'] and stats_info['params']:
-            time_range = stats_info['params'].get('time_range', time_range)
-            count = stats_info['params'].get('count', count)
-        
-        logger.info(f"Refreshing cache with time_range: {time_range}, count: {count}")
-        
-        graph_commands = [
-            {'command': 'get_concurrent_streams_by_stream_type', 'name': 'Stream Type'},
-            {'command': 'get_plays_by_date', 'name': 'Plays by Date'},
-            {'command': 'get_plays_by_dayofweek', 'name': 'Plays by Day'},
-            {'command': 'get_plays_by_hourofday', 'name': 'Plays by Hour'},
-            {'command': 'get_plays_by_source_resolution', 'name': 'Plays by Source Res'},
-            {'command': 'get_plays_by_stream_resolution', 'name': 'Plays by Stream Res'},
-            {'command': 'get_plays_by_stream_type', 'name': 'Plays by Stream Type'},
-            {'command': 'get_plays_by_top_10_platforms', 'name': 'Plays by Top Platforms'},
-            {'command': 'get_plays_by_top_10_users', 'name': 'Plays by Top Users'},
-            {'command': 'get_plays_per_month', 'name': 'Plays per Month'},
-            {'command': 'get_stream_type_by_top_10_platforms', 'name': 'Stream Type by Top Platforms'},
-            {'command': 'get_stream_type_by_top_10_users', 'name': 'Stream Type by Top Users'}
-        ]
-        
-        cache_params = {
-            'time_range': time_range,
-            'count': count,
-            'url': tautulli_base_url,
-            'timestamp': time.time(),
-            'refresh_type': 'daily_auto'
-        }
-        
-        error = None
-        
-        stats, error = run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_home_stats', 'Stats', error, time_range, stats_type=stats_type)
-        stats = stats or []
-
-        libraries_with_counts, _ = run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_libraries', None, None)
-        if libraries_with_counts:
-            stats.append({
-                'stat_id': 'library_item_counts',
-                'stat_title': 'Library Item Counts',
-                'rows': [
-                    {'section_name': lib.get('section_name', ''), 'count': lib.get('count', 0)}
-                    for lib in libraries_with_counts
-                ]
-            })
-
-        if stats:
-            set_cached_data('stats', stats, cache_params)
-            logger.info("✓ Stats cache refreshed")
-
-        users, error = run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_users', 'Users', error)
-        user_list = []
-        if users:
-            user_list = [
-                u
-                for u in users
-                if u.get('email') != None and u.get('email') != '' and u.get('is_active')
-            ]
-        if user_list:
-            set_cached_data('users', user_list, cache_params)
-            logger.info("✓ Users cache refreshed")
-
-        graph_data = []
-        for command in graph_commands:
-            gd, error = run_tautulli_command(tautulli_base_url, tautulli_api_key, command["command"], command["name"], error, time_range, y_axis=stats_type)
-            if gd:
-                graph_data.append(gd)
-        
-        if graph_data:
-            set_cached_data('graph_data', graph_data, cache_params)
-            logger.info("✓ Graph data cache refreshed")
-        
-        libraries, _ = run_tautulli_command(tautulli_base_url, tautulli_api_key, 'get_library_names', None, None, "10")
-        if not libraries:
-            logger.info("No libraries found")
-            return
+        with cache_fill('daily_auto'):
+            _s = get_settings(decrypt_secrets=False)
+            if "id" not in _s or not _s.get("server_name"):
+                logger.info("No settings found for cache refresh")
+                return
+
+            # refresh with the window of the last pull, so the builder keeps
+            # showing what the user asked for
+            time_range, count = "30", "10"
+            stats_info = get_cache_info('stats')
+            if stats_info['exists'] and stats_info['params']:
+                time_range = stats_info['params'].get('time_range', time_range)
+                count = stats_info['params'].get('count', count)
+
+            cache_params = pull_segment_params(_s, time_range, count)
+            if cache_params is None:
+                logger.info("No media server configured for cache refresh")
+                return
+            cache_params['refresh_type'] = 'daily_auto'
+
+            logger.info(f"Refreshing cache with time_range: {time_range}, count: {count}")
+
+            # the same per-segment fetch as the manual pull; a segment whose
+            # fetch failed keeps its cached copy
+            for segment in PULL_SEGMENTS:
+                data = refresh_cache_segment(segment, cache_params, _s)
+                if data is not None:
+                    set_cached_data(segment, data, cache_params)
+                    logger.info(f"✓ {segment} cache refreshed")
+
+            logger.info("Daily cache refresh completed successfully")
 
-        library_section_ids = {}
-        for library in libraries:
-            library_section_ids[f"{library['section_id']}"] = library["section_name"]
-        
-        recent_data = fetch_recent_data_for_index(tautulli_base_url, tautulli_api_key, count, recently_added_mode=recently_added_mode, recently_added_sort=recently_added_sort)
-
-        if recent_data:
-            set_cached_data('recent_data', recent_data, cache_params)
-            logger.info("✓ Recent data cache refreshed")
-        
-        logger.info("Daily cache refresh completed successfully")
-        
     except Exception as e:
         logger.error(f"Error in daily cache refresh: {e}")
 
@@ -1,8 +1,9 @@
-import hmac, html, re, time
+import hmac, html, re, threading, time
 
 import requests
 from flask import abort, jsonify, redirect, request, session, url_for
 from functools import wraps
+from urllib.parse import parse_qsl, urlsplit
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from app import config
@@ -102,7 +103,14 @@ def check_credentials(username, password):
 
     return False
 
-def safe_get(url: str, *, timeout: int = 120, retries: int = 2, **kwargs):
+def safe_get(url: str, *, timeout: int = 120, retries: int = 2, coalesce: str = None, **kwargs):
+    """requests.get with retries. Clients pass coalesce=<service> to share
+    the response with concurrent identical calls (see _coalesced_get)."""
+    if coalesce and not kwargs.get('stream'):
+        return _coalesced_get(coalesce, url, timeout, retries, kwargs)
+    return _get_with_retries(url, timeout, retries, kwargs)
+
+def _get_with_retries(url, timeout, retries, kwargs):
     for attempt in range(retries + 1):
         try:
             return requests.get(url, timeout=timeout, **kwargs)
@@ -111,6 +119,66 @@ def safe_get(url: str, *, timeout: int = 120, retries: int = 2, **kwargs):
                 raise
             time.sleep(1.0 * (attempt + 1))
 
+# Single-flight for upstream GETs, keyed on (service, endpoint, normalized
+# params and headers). The first caller fetches; callers arriving while it
+# is in flight wait and get the same response (body already read, so
+# .json() is safe from any thread). Successful responses are then reused for
+# config.UPSTREAM_SHARE_SECONDS; errors and exceptions are never reused.
+_inflight = {}
+_shared = {}
+_inflight_lock = threading.Lock()
+
+class _Flight:
+    __slots__ = ('done', 'response', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+def _flight_key(service, url, kwargs):
+    parts = urlsplit(url)
+    query = sorted(parse_qsl(parts.query, keep_blank_values=True))
+    params = kwargs.get('params') or {}
+    params = sorted((str(k), str(v)) for k, v in (params.items() if hasattr(params, 'items') else params))
+    headers = sorted((str(k).lower(), str(v)) for k, v in (kwargs.get('headers') or {}).items())
+    endpoint = f"{parts.scheme}://{parts.netloc.lower()}{parts.path.rstrip('/')}"
+    return (service, endpoint, tuple(query + params), tuple(headers))
+
+def _coalesced_get(service, url, timeout, retries, kwargs):
+    key = _flight_key(service, url, kwargs)
+    now = time.monotonic()
+    with _inflight_lock:
+        for k in [k for k, (expires, _) in _shared.items() if expires <= now]:
+            del _shared[k]
+        if key in _shared:
+            return _shared[key][1]
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.response
+
+    try:
+        response = _get_with_retries(url, timeout, retries, kwargs)
+        response.content  # read the body once, before other threads share it
+        flight.response = response
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+            if flight.response is not None and flight.response.ok and config.UPSTREAM_SHARE_SECONDS > 0:
+                _shared[key] = (time.monotonic() + config.UPSTREAM_SHARE_SECONDS, flight.response)
+        flight.done.set()
+    return response
+
 _REDACT_KV_RE = re.compile(
     r'(?i)\b(api[_-]?key|apikey|token|password|passwd|secret|x-plex-token|x-wrapped-api-key)\b'
     r'\s*[=:]\s*("[^"]*"|\'[^\']*\'|[^\s&"\']+)'
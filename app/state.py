@@ -1,15 +1,29 @@
 import threading
 
+from collections import OrderedDict
+
 # Mutable runtime state shared across modules and background threads.
 # Always access as attributes (state.X), from-imports would copy the
 # binding and break cross-module mutation.
 
-cache_storage = {
+# Insertion order is LRU order (app/cache.py moves entries to the end on
+# use). cache_current maps a segment to the params variant set last.
+cache_storage = OrderedDict({
     'stats': {'data': None, 'timestamp': 0, 'params': None},
     'users': {'data': None, 'timestamp': 0, 'params': None},
     'graph_data': {'data': None, 'timestamp': 0, 'params': None},
     'recent_data': {'data': None, 'timestamp': 0, 'params': None}
-}
+})
+cache_current = {}
+# Running total of the entries' sizes, kept by app/cache.py's _put/_pop so
+# the byte budget check does not re-total the store on every set.
+cache_bytes = {'total': 0}
+# Per-segment lookup counters: {segment: {'hits', 'misses', 'evictions'}}.
+cache_stats = {}
+# Stale-while-revalidate: storage keys with a background refresh in flight,
+# and when each was last attempted (so a failing upstream is not hammered).
+cache_refreshing = set()
+cache_refresh_attempted = {}
 
 _update_cache = {
     "latest": None,
@@ -25,6 +39,17 @@ _WORKERS_LOCK = threading.Lock()
 _RENDER_LOCK = threading.Lock()
 _REFRESH_LOCK = threading.Lock()
 _CACHE_LOCK = threading.Lock()
+_CACHE_LOAD_LOCK = threading.Lock()
+
+# Persistent cache tier (app/cache.py). Keys set or cleared since the last
+# write-behind flush; guarded by _CACHE_LOCK.
+cache_persist = {'enabled': False, 'loaded': False}
+cache_dirty = set()
+
+# Liveness/readiness (app/health.py): requests currently being served, and
+# when the scheduler loop last ticked.
+requests_in_flight = 0
+scheduler_heartbeat = 0.0
 
 _hsts_enabled = False
 
@@ -38,3 +63,6 @@ recommendations_cancel = threading.Event()
 # Per-operation pull progress, managed exclusively through app/progress.py
 # and read by GET /pull_progress for the spinner progress bar.
 progress_registry = {}
+
+# Background pull jobs by id, managed by app/jobs.py.
+pull_jobs = {}
@@ -1,4 +1,4 @@
-import calendar, os, secrets, sqlite3
+import calendar, json, os, secrets, sqlite3, time
 from datetime import datetime, timedelta
 
 from app import config, dates
@@ -46,6 +46,47 @@ def cleanup_expired_hosted_images():
     conn.commit()
     conn.close()
 
+def get_seerr_details(keys, max_age, failure_max_age):
+    """Cached Seerr/TMDB detail lookups for (media_type, tmdb_id) keys.
+    Returns {key: details_or_None}; a None value is a cached failure still
+    inside failure_max_age. Keys absent from the result need a fetch."""
+    if not keys:
+        return {}
+    now = time.time()
+    found = {}
+    conn = db_connect()
+    try:
+        for media_type, tmdb_id in keys:
+            row = conn.execute(
+                "SELECT details, fetched_at FROM seerr_details WHERE media_type = ? AND tmdb_id = ?",
+                (media_type, tmdb_id),
+            ).fetchone()
+            if not row:
+                continue
+            details, fetched_at = row
+            ttl = max_age if details is not None else failure_max_age
+            if now - fetched_at < ttl:
+                found[(media_type, tmdb_id)] = json.loads(details) if details is not None else None
+    finally:
+        conn.close()
+    return found
+
+def save_seerr_details(results):
+    """Persist {(media_type, tmdb_id): details_or_None} lookups."""
+    if not results:
+        return
+    now = time.time()
+    conn = db_connect()
+    try:
+        conn.executemany(
+            "INSERT OR REPLACE INTO seerr_details (media_type, tmdb_id, details, fetched_at) VALUES (?, ?, ?, ?)",
+            [(media_type, tmdb_id, json.dumps(details) if details is not None else None, now)
+             for (media_type, tmdb_id), details in results.items()],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
 def get_saved_email_lists():
     if config.DEMO_MODE:
         from app.demo import demo_email_list_rows
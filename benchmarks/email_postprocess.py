@@ -0,0 +1,80 @@
+"""CPU spent post-processing an assembled email, before and after the single
+pass in app/emails/postprocess.py.
+
+Takes the HTML of every golden send under tests/goldens, puts back the
+source indentation the builders' f-strings carry, and runs what a send does
+with it after assembly:
+
+- minify and compact the document;
+- derive the plain text alternative;
+- measure both bodies.
+
+    python -m benchmarks.email_postprocess
+
+"before" is minify_email_html, compact_email_html and
+convert_html_to_plain_text one after the other, plus the encodes that sized
+the bodies. "after" is process_email_html on a fresh document. "send lookup"
+is the send path asking again for the document assembly just processed.
+"""
+
+import json
+import math
+import sys
+import time
+
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from app.emails import compact, postprocess  # noqa: E402
+
+ROUNDS = 20
+
+
+def _documents():
+    for path in sorted((REPO_ROOT / "tests" / "goldens").glob("*.json")):
+        html = json.loads(path.read_text()).get("html", "")
+        if "<!DOCTYPE" in html:
+            yield path.stem, html.replace("><", ">\n            <")
+
+
+def _before(document):
+    html = compact.compact_email_html(postprocess.minify_email_html(document))
+    plain = postprocess.convert_html_to_plain_text(html)
+    return html, plain, len(html.encode("utf-8")), len(plain.encode("utf-8"))
+
+
+def _after(document):
+    postprocess._memo.clear()
+    return postprocess.process_email_html(document)
+
+
+def _time(fn):
+    best = math.inf
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    print(f"best of {ROUNDS} runs per document")
+    print()
+    print(f"{'':34}{'KB':>7}{'before':>11}{'after':>11}{'speedup':>9}{'send lookup':>14}")
+    total_before = total_after = 0.0
+    for name, document in _documents():
+        t_before, t_after = _time(lambda: _before(document)), _time(lambda: _after(document))
+        html = postprocess.process_email_html(document).html
+        t_lookup = _time(lambda: postprocess.processed_email(html))
+        total_before += t_before
+        total_after += t_after
+        print(f"{name:34}{len(document) / 1024:>7.1f}{t_before * 1000:>9.2f}ms{t_after * 1000:>9.2f}ms"
+              f"{t_before / t_after:>8.1f}x{t_lookup * 1000:>12.3f}ms")
+    print()
+    print(f"{'total':41}{total_before * 1000:>9.2f}ms{total_after * 1000:>9.2f}ms{total_before / total_after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Bytes a browser transfers to load the builder page, before and after
+response compression and fingerprinted static URLs (app/compression.py).
+
+Runs the app in demo mode (sample data, no login) from a throwaway working
+directory and walks what the page loads: the HTML, every /static asset it
+references, and the snap-in datasets it fetches lazily.
+
+    python -m benchmarks.page_load_bytes
+
+"before" requests bare URLs without Accept-Encoding, the way every load
+worked until compression landed: a full download on the first visit and one
+revalidation per asset on each repeat visit. "after" sends the Accept-Encoding
+a browser sends and the fingerprinted URLs the page now carries, which a
+repeat visit does not request again at all.
+"""
+
+import os
+import re
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+from cryptography.fernet import Fernet
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+os.environ.setdefault("DATA_ENC_KEY", Fernet.generate_key().decode())
+os.environ.setdefault("NEWSLETTERR_SECRET_KEY", "benchmark-secret-key")
+os.environ["DEMO_MODE"] = "1"
+# keep the scheduler and update checker out of it
+os.environ["FLASK_DEBUG"] = "1"
+os.environ.pop("WERKZEUG_RUN_MAIN", None)
+
+ACCEPT_ENCODING = "gzip, deflate, br"
+ASSET_RE = re.compile(r'(?:src|href)="(/static/[^"]+)"')
+DATASET_RE = re.compile(r'data-dataset-url="([^"]+)"')
+
+
+def _load(client, encoding):
+    headers = {"Accept-Encoding": encoding} if encoding else {}
+    page = client.get("/", headers=headers)
+    html = page.get_data(as_text=True) if "Content-Encoding" not in page.headers else _decode(page)
+    urls = sorted(set(ASSET_RE.findall(html)))
+    if not encoding:
+        urls = sorted({url.split("?", 1)[0] for url in urls})
+    urls += DATASET_RE.findall(html)
+
+    responses = {"/": page}
+    for url in urls:
+        responses[url] = client.get(url, headers=headers)
+    return responses
+
+
+def _decode(resp):
+    import gzip
+    from app import compression
+    body = resp.get_data()
+    if resp.headers["Content-Encoding"] == "br":
+        return compression.brotli.decompress(body).decode()
+    return gzip.decompress(body).decode()
+
+
+def _repeat_requests(client, responses):
+    """Requests (and bytes) a repeat visit costs: immutable assets are not
+    asked for, everything else is revalidated with its ETag."""
+    count = 0
+    transferred = 0
+    for url, resp in responses.items():
+        if "immutable" in resp.headers.get("Cache-Control", ""):
+            continue
+        headers = {"Accept-Encoding": resp.request.headers.get("Accept-Encoding", "")}
+        if resp.headers.get("ETag"):
+            headers["If-None-Match"] = resp.headers["ETag"]
+        again = client.get(url, headers=headers)
+        count += 1
+        transferred += len(again.get_data())
+        again.close()
+    return count, transferred
+
+
+def _kib(n):
+    return f"{n / 1024:,.1f} KiB"
+
+
+def main():
+    os.chdir(tempfile.mkdtemp(prefix="nl-bench-"))
+    import threading
+    from app import create_app
+
+    started = time.perf_counter()
+    app = create_app()
+    for thread in threading.enumerate():
+        if thread.name == "static-precompress":
+            thread.join()
+    startup_seconds = time.perf_counter() - started
+    client = app.test_client()
+
+    before = _load(client, None)
+    after = _load(client, ACCEPT_ENCODING)
+    before_bytes = sum(len(resp.get_data()) for resp in before.values())
+    after_bytes = sum(len(resp.get_data()) for resp in after.values())
+    before_repeat = _repeat_requests(client, before)
+    after_repeat = _repeat_requests(client, after)
+
+    print(f"startup, including static precompression: {startup_seconds:.2f}s")
+    print(f"resources loaded by the builder page: {len(after)}")
+    print()
+    print(f"{'':28}{'before':>14}{'after':>14}")
+    print(f"{'first visit, transferred':28}{_kib(before_bytes):>14}{_kib(after_bytes):>14}")
+    print(f"{'repeat visit, requests':28}{before_repeat[0]:>14}{after_repeat[0]:>14}")
+    print(f"{'repeat visit, transferred':28}{_kib(before_repeat[1]):>14}{_kib(after_repeat[1]):>14}")
+    print()
+    largest = sorted(before, key=lambda url: len(before[url].get_data()), reverse=True)[:8]
+    for url in largest:
+        match = next((key for key in after if key.split("?", 1)[0] == url), url)
+        print(f"  {url:60}{_kib(len(before[url].get_data())):>12}{_kib(len(after[match].get_data())):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Pillow CPU per email image, before and after reduced-size decoding
+(app/emails/imaging.py).
+
+Builds a poster set shaped like what Plex, Jellyfin and TMDB serve: JPEG
+posters at 680x1000, 1000x1500 and 2000x3000, a PNG poster, and 1920x1080
+and 3840x2160 backdrops. It then runs each through the work a send does
+with them:
+
+- a grid poster cropped to 120x180, and a hero poster cropped to 150x225;
+- a 300 px max-height poster;
+- a 38 px stat thumbnail;
+- the blurred backdrop.
+
+    python -m benchmarks.poster_resize
+
+"before" is the full-resolution decode and resize this replaced, kept here
+verbatim. "PSNR" compares the two outputs; above ~35 dB the difference is
+not visible at these sizes.
+"""
+
+import io
+import math
+import sys
+import time
+
+from pathlib import Path
+
+from PIL import Image, ImageChops, ImageEnhance, ImageFilter, ImageStat
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from app.emails import imaging  # noqa: E402
+
+ROUNDS = 3
+POSTERS = [((680, 1000), "JPEG"), ((1000, 1500), "JPEG"), ((2000, 3000), "JPEG"), ((1000, 1500), "PNG")]
+BACKDROPS = [(1920, 1080), (3840, 2160)]
+
+
+def _artwork(size, fmt, seed):
+    """Gradient plus noise plus shapes: compresses like a real poster, not
+    like a flat fill."""
+    w, h = size
+    base = Image.merge("RGB", [
+        Image.linear_gradient("L").resize(size),
+        Image.radial_gradient("L").resize(size),
+        Image.effect_noise(size, 40 + seed % 20),
+    ])
+    shapes = Image.effect_mandelbrot(size, (-2.0 + seed * 0.1, -1.2, 1.0, 1.2), 60).convert("RGB")
+    img = Image.blend(base, shapes, 0.5)
+    out = io.BytesIO()
+    img.save(out, format=fmt, quality=90)
+    return out.getvalue()
+
+
+# --- before: decode at full size, LANCZOS from there
+
+def _before_cover(raw, box, fmt):
+    target_w, target_h = box
+    img = Image.open(io.BytesIO(raw))
+    orig_w, orig_h = img.size
+    target_ratio = target_w / target_h
+    if orig_w / orig_h > target_ratio:
+        new_w = max(1, int(round(orig_h * target_ratio)))
+        left = (orig_w - new_w) // 2
+        img = img.crop((left, 0, left + new_w, orig_h))
+    elif orig_w / orig_h < target_ratio:
+        new_h = max(1, int(round(orig_w / target_ratio)))
+        top = (orig_h - new_h) // 2
+        img = img.crop((0, top, orig_w, top + new_h))
+    img = img.resize(box, Image.LANCZOS)
+    if fmt == "JPEG" and img.mode in ("RGBA", "P", "LA"):
+        img = img.convert("RGB")
+    out = io.BytesIO()
+    img.save(out, format=fmt, quality=85)
+    return out.getvalue()
+
+
+def _before_fit_height(raw, max_height, fmt):
+    img = Image.open(io.BytesIO(raw))
+    orig_w, orig_h = img.size
+    img = img.resize((max(1, int(orig_w * max_height / orig_h)), max_height), Image.LANCZOS)
+    if fmt == "JPEG" and img.mode in ("RGBA", "P", "LA"):
+        img = img.convert("RGB")
+    out = io.BytesIO()
+    img.save(out, format=fmt, quality=85)
+    return out.getvalue()
+
+
+def _before_thumbnail(raw, height):
+    img = Image.open(io.BytesIO(raw))
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGB")
+    orig_w, orig_h = img.size
+    img = img.resize((max(1, int(orig_w * height / orig_h)), height), Image.LANCZOS)
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=65)
+    return out.getvalue()
+
+
+def _before_blur(raw):
+    img = Image.open(io.BytesIO(raw))
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGB")
+    darkened = ImageEnhance.Brightness(img.filter(ImageFilter.GaussianBlur(radius=30))).enhance(0.7)
+    out = io.BytesIO()
+    darkened.save(out, format="JPEG", quality=85)
+    return out.getvalue()
+
+
+def _jobs():
+    """(name, before, after) for every image operation a send runs."""
+    jobs = []
+    for i, (size, fmt) in enumerate(POSTERS):
+        raw = _artwork(size, fmt, i)
+        label = f"{fmt.lower()} {size[0]}x{size[1]}"
+        jobs += [
+            (f"{label} -> 120x180", lambda r=raw, f=fmt: _before_cover(r, (120, 180), f), lambda r=raw, f=fmt: imaging.cover_bytes(r, (120, 180), f)),
+            (f"{label} -> 150x225", lambda r=raw, f=fmt: _before_cover(r, (150, 225), f), lambda r=raw, f=fmt: imaging.cover_bytes(r, (150, 225), f)),
+            (f"{label} -> h300", lambda r=raw, f=fmt: _before_fit_height(r, 300, f), lambda r=raw, f=fmt: imaging.fit_height_bytes(r, 300, f)),
+            (f"{label} -> h38 thumb", lambda r=raw: _before_thumbnail(r, 38), lambda r=raw: imaging.thumbnail_bytes(r, 38)),
+        ]
+    for i, size in enumerate(BACKDROPS):
+        raw = _artwork(size, "JPEG", 10 + i)
+        jobs.append((f"jpeg {size[0]}x{size[1]} -> blur", lambda r=raw: _before_blur(r), lambda r=raw: imaging.blur_image_bytes(r)))
+    return jobs
+
+
+def _time(fn):
+    best = math.inf
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _psnr(before, after):
+    a = Image.open(io.BytesIO(before)).convert("RGB")
+    b = Image.open(io.BytesIO(after)).convert("RGB")
+    if a.size != b.size:
+        # the blur is delivered smaller; compare at the size it is drawn
+        a = a.resize(b.size, Image.LANCZOS)
+    mse = sum(v * v for v in ImageStat.Stat(ImageChops.difference(a, b)).rms) / 3
+    return math.inf if mse == 0 else 10 * math.log10(255 ** 2 / mse)
+
+
+def main():
+    print(f"best of {ROUNDS} runs per operation")
+    print()
+    print(f"{'':34}{'before':>11}{'after':>11}{'speedup':>9}{'PSNR':>9}{'bytes before':>14}{'bytes after':>13}")
+    total_before = total_after = 0.0
+    for name, before, after in _jobs():
+        t_before, t_after = _time(before), _time(after)
+        out_before, out_after = before(), after()
+        total_before += t_before
+        total_after += t_after
+        print(f"{name:34}{t_before * 1000:>9.1f}ms{t_after * 1000:>9.1f}ms{t_before / t_after:>8.1f}x"
+              f"{_psnr(out_before, out_after):>7.1f}dB{len(out_before):>14,}{len(out_after):>13,}")
+    print()
+    print(f"{'total':34}{total_before * 1000:>9.1f}ms{total_after * 1000:>9.1f}ms{total_before / total_after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
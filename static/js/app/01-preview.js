@@ -311,6 +311,9 @@ function resizePreviewFrame(frame) {
 // renderer (layouts included). Custom HTML also posts through it so snap-in
 // tokens (NEWS-32) expand live; an empty editor keeps the blank frame.
 let _previewSeq = 0;
+// Names this page's previews to the server, which drops a waiting render
+// once a newer one from the same page arrives (latest wins).
+const PREVIEW_CLIENT = Math.random().toString(36).slice(2);
 
 // Builder state -> /preview_email (and /export_pdf) payload. Returns null
 // when custom HTML mode is on with an empty editor (nothing to render).
@@ -347,6 +350,142 @@ async function buildPreviewPayload() {
 
 let _previewAbort = null;
 
+// Incremental preview: the frame's document marks each section with
+// <!--fragment id--> ... <!--/fragment--> comments, and every render reports
+// the section versions it shows (known_fragments). The server answers with
+// the whole document only when the shell around the sections changed
+// (layout, theme, density, header); otherwise with just the changed
+// sections, which are patched into the open document so every other
+// section, and every poster in it, stays as it is.
+let _previewFragments = null;
+let _previewHtml = '';
+
+const FRAGMENT_RE = /<!--fragment ([\w:.~-]+)-->([\s\S]*?)<!--\/fragment-->/g;
+
+// The HTML the frame currently shows: what exports and the pop-out copy,
+// since frame.srcdoc is not rewritten when sections are patched in.
+function currentPreviewHtml() {
+    const frame = document.getElementById('preview');
+    return _previewHtml || frame?.srcdoc || '';
+}
+
+// The document string with an update's sections spliced in, in its order,
+// or null when the sections it keeps are not all in html.
+function splicePreviewHtml(html, update) {
+    const sections = {};
+    let first = -1, last = -1, match;
+    FRAGMENT_RE.lastIndex = 0;
+    while ((match = FRAGMENT_RE.exec(html)) !== null) {
+        sections[match[1]] = match[0];
+        if (first < 0) first = match.index;
+        last = match.index + match[0].length;
+    }
+    if (first < 0) return null;
+    const run = [];
+    for (const id of update.order) {
+        if (Object.prototype.hasOwnProperty.call(update.fragments, id)) {
+            run.push(`<!--fragment ${id}-->${update.fragments[id]}<!--/fragment-->`);
+        } else if (sections[id] !== undefined) {
+            run.push(sections[id]);
+        } else {
+            return null;
+        }
+    }
+    return html.slice(0, first) + run.join('') + html.slice(last);
+}
+
+// {id: [start comment, ...section nodes, end comment]} of a document, in
+// document order, or null when a section does not sit in one parent.
+function previewSections(doc) {
+    const sections = new Map();
+    const walker = doc.createTreeWalker(doc.body || doc, NodeFilter.SHOW_COMMENT);
+    let node;
+    while ((node = walker.nextNode())) {
+        const match = /^fragment ([\w:.~-]+)$/.exec(node.data);
+        if (!match) continue;
+        const nodes = [node];
+        let sibling = node.nextSibling;
+        while (sibling && !(sibling.nodeType === Node.COMMENT_NODE && sibling.data === '/fragment')) {
+            nodes.push(sibling);
+            sibling = sibling.nextSibling;
+        }
+        if (!sibling) return null;
+        nodes.push(sibling);
+        sections.set(match[1], nodes);
+    }
+    return sections;
+}
+
+// Patch an update's sections into an open document: changed sections are
+// parsed in, kept ones are moved (not re-created, so their images are not
+// fetched again), removed ones dropped. Returns false, untouched, when the
+// document does not hold what the update builds on.
+function patchPreviewDocument(doc, update) {
+    const current = doc && doc.body ? previewSections(doc) : null;
+    if (!current || current.size === 0) return false;
+    const runs = Array.from(current.values());
+    const parent = runs[0][0].parentNode;
+    if (runs.some(nodes => nodes[0].parentNode !== parent)) return false;
+    if (update.order.some(id => !current.has(id) && !Object.prototype.hasOwnProperty.call(update.fragments, id))) return false;
+
+    const before = runs[runs.length - 1][runs[runs.length - 1].length - 1].nextSibling;
+    const replaced = new Set(Object.keys(update.fragments));
+    const run = doc.createDocumentFragment();
+    for (const id of update.order) {
+        if (replaced.has(id)) {
+            const template = doc.createElement('template');
+            template.innerHTML = `<!--fragment ${id}-->${update.fragments[id]}<!--/fragment-->`;
+            run.appendChild(template.content);
+        } else {
+            current.get(id).forEach(node => run.appendChild(node));
+        }
+    }
+    const kept = new Set(update.order.filter(id => !replaced.has(id)));
+    current.forEach((nodes, id) => {
+        if (!kept.has(id)) nodes.forEach(node => node.remove());
+    });
+    parent.insertBefore(run, before);
+    return true;
+}
+
+function writePopout(html) {
+    if (typeof popoutWindow === 'undefined' || !popoutWindow || popoutWindow.closed) return;
+    try {
+        popoutWindow.document.open();
+        popoutWindow.document.write(html);
+        popoutWindow.document.close();
+        popoutWindow.document.title = 'Email Preview';
+    } catch (e) {
+        popoutWindow = null;
+    }
+}
+
+// Apply a fragments-only answer to the frame (and the pop-out). False when
+// the frame is not showing the document it builds on; the caller then asks
+// for the whole document again.
+function applyPreviewFragments(frame, update) {
+    const html = splicePreviewHtml(_previewHtml, update);
+    let doc = null;
+    try {
+        doc = frame.contentDocument;
+    } catch (e) {
+        doc = null;
+    }
+    if (html === null || !patchPreviewDocument(doc, update)) return false;
+    _previewHtml = html;
+    if (typeof popoutWindow !== 'undefined' && popoutWindow && !popoutWindow.closed) {
+        let patched = false;
+        try {
+            patched = patchPreviewDocument(popoutWindow.document, update);
+        } catch (e) {
+            patched = false;
+        }
+        if (!patched) writePopout(html);
+    }
+    resizePreviewFrame(frame);
+    return true;
+}
+
 async function postPreview(payload, signal) {
     for (let attempt = 0; ; attempt++) {
         try {
@@ -373,28 +512,34 @@ async function updatePreview() {
         if (payload === null) {
             const frame = document.getElementById('preview');
             if (frame) frame.srcdoc = '';
+            _previewFragments = null;
+            _previewHtml = '';
             return;
         }
+        payload.known_fragments = _previewFragments || {};
+        payload.preview_client = PREVIEW_CLIENT;
 
         const resp = await postPreview(payload, controller.signal);
         const data = await resp.json();
-        if (seq !== _previewSeq) return; // a newer render is already in flight
+        if (seq !== _previewSeq || data.superseded) return; // a newer render is already in flight
         if (!resp.ok) throw new Error(data.error || resp.statusText);
 
         const frame = document.getElementById('preview');
         if (!frame) return;
-        frame.srcdoc = data.html;
-
-        if (typeof popoutWindow !== 'undefined' && popoutWindow && !popoutWindow.closed) {
-            try {
-                popoutWindow.document.open();
-                popoutWindow.document.write(data.html);
-                popoutWindow.document.close();
-                popoutWindow.document.title = 'Email Preview';
-            } catch (e) {
-                popoutWindow = null;
+        if (data.html === undefined) {
+            if (!applyPreviewFragments(frame, data)) {
+                // the frame does not show what the answer builds on
+                _previewFragments = null;
+                _previewHtml = '';
+                return updatePreview();
             }
+            _previewFragments = { shell: data.shell, versions: data.versions };
+            return;
         }
+        frame.srcdoc = data.html;
+        _previewHtml = data.html;
+        _previewFragments = data.shell ? { shell: data.shell, versions: data.versions } : null;
+        writePopout(data.html);
 
         frame.onload = function () {
             try {
@@ -410,6 +555,8 @@ async function updatePreview() {
         if (frame) {
             frame.srcdoc = `<html><body><p>Error updating preview: ${error.message}</p></body></html>`;
         }
+        _previewFragments = null;
+        _previewHtml = '';
     } finally {
         if (_previewAbort === controller) _previewAbort = null;
     }
@@ -11,6 +11,21 @@ function readJSONFromScript(id) {
     }
 }
 
+// A dataset tag the builder index left for 41-lazy-datasets.js to fetch
+// (data-dataset-url) is pending until fillDatasetScript() writes it; the row
+// builders skip it until then and leave the server-rendered card as it is.
+function datasetPending(id) {
+    const el = document.getElementById(id);
+    return !!el && el.hasAttribute('data-dataset-url');
+}
+
+function fillDatasetScript(id, data) {
+    const el = document.getElementById(id);
+    if (!el) return;
+    el.textContent = JSON.stringify(data);
+    el.removeAttribute('data-dataset-url');
+}
+
 let recsPayload = readJSONFromScript('recommendations-json');
 let droppedneedleWrappedPayload = readJSONFromScript('droppedneedle-wrapped-json');
 let droppedneedleServerPayload = readJSONFromScript('droppedneedle-server-json');
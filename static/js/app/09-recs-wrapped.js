@@ -168,6 +168,7 @@ function recsCountsForUser(data) {
 }
 
 function buildRecsUserRows() {
+    if (datasetPending('recommendations-json')) return;
     recsPayload = readJSONFromScript('recommendations-json');
     const host = document.getElementById('recs-user-list');
     if (!host) return;
@@ -203,6 +204,7 @@ function buildRecsUserRows() {
 buildRecsUserRows();
 
 function buildWrappedUserRows() {
+    if (datasetPending('droppedneedle-wrapped-json')) return;
     droppedneedleWrappedPayload = readJSONFromScript('droppedneedle-wrapped-json');
     const host = document.getElementById('droppedneedle-user-list');
     if (!host) return;
@@ -234,6 +236,7 @@ function buildWrappedUserRows() {
 buildWrappedUserRows();
 
 function buildDroppedNeedleServerRow() {
+    if (datasetPending('droppedneedle-server-json')) return;
     droppedneedleServerPayload = readJSONFromScript('droppedneedle-server-json');
     const host = document.getElementById('droppedneedle-server-list');
     if (!host) return;
@@ -258,6 +261,7 @@ function buildDroppedNeedleServerRow() {
 buildDroppedNeedleServerRow();
 
 function buildYearlyWrappedRow() {
+    if (datasetPending('yearly-wrapped-json')) return;
     yearlyWrappedPayload = readJSONFromScript('yearly-wrapped-json');
     const host = document.getElementById('yearly-wrapped-list');
     if (!host) return;
@@ -37,7 +37,7 @@ function removeRecsCancelButton() {
 
 window.pullRunners = window.pullRunners || {};
 window.pullRunners.recommendations = async function ({ chained = false } = {}) {
-    showSpinner('Pulling recommendations...', 'pull_recommendations');
+    showSpinner('Pulling recommendations...');
     showRecsCancelButton();
 
     function collectEmailsFromChips() {
@@ -73,7 +73,7 @@ window.pullRunners.recommendations = async function ({ chained = false } = {}) {
     };
 
     try {
-        const resp = await fetch('/pull_recommendations', {
+        const resp = await runPullJob('/pull_recommendations', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -34,7 +34,7 @@ window.pullRunners.droppedneedle = async function ({ chained = false } = {}) {
     };
 
     try {
-        const resp = await fetch('/pull_droppedneedle_stats', {
+        const resp = await runPullJob('/pull_droppedneedle_stats', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -31,13 +31,13 @@ function updateCacheBadge(cacheInfo, timeRange) {
 // can chain it; the standalone form submit below still drives it directly.
 window.pullRunners = window.pullRunners || {};
 window.pullRunners.stats = async function ({ chained = false } = {}) {
-    showSpinner('Getting stats and users...', 'pull_stats');
+    showSpinner('Getting stats and users...');
 
     const time_range = document.getElementById('days_to_pull').value;
     const count = document.getElementById('items_to_pull').value;
 
     try {
-        const resp = await fetch('/pull_stats', {
+        const resp = await runPullJob('/pull_stats', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -78,8 +78,7 @@ window.pullRunners.stats = async function ({ chained = false } = {}) {
             buildStatsRows();
         }
         if (data.yearly_wrapped_json) {
-            const yearlyWrappedScript = document.getElementById('yearly-wrapped-json');
-            if (yearlyWrappedScript) yearlyWrappedScript.textContent = JSON.stringify(data.yearly_wrapped_json);
+            fillDatasetScript('yearly-wrapped-json', data.yearly_wrapped_json);
             buildYearlyWrappedRow();
         }
         if (data.graph_data) {
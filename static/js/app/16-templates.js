@@ -438,8 +438,7 @@ async function blobToDataUri(blob) {
 }
 
 document.getElementById('export-html-btn').addEventListener('click', async () => {
-    const frame = document.getElementById('preview');
-    const html = frame?.srcdoc || '';
+    const html = currentPreviewHtml();
 
     if (!html.trim()) {
         alert('Nothing to export, add some snap-ins first.');
@@ -604,8 +603,8 @@ function showPopoutStatus(message) {
 }
 
 document.getElementById('popout-preview-btn').addEventListener('click', function() {
-    const frame = document.getElementById('preview');
-    if (!frame || !frame.srcdoc) {
+    const html = currentPreviewHtml();
+    if (!html) {
         alert('No preview content available');
         return;
     }
@@ -622,7 +621,7 @@ document.getElementById('popout-preview-btn').addEventListener('click', function
     if (popoutWindow) {
         showPopoutStatus('');
         popoutWindow.document.open();
-        popoutWindow.document.write(frame.srcdoc);
+        popoutWindow.document.write(html);
         popoutWindow.document.close();
         popoutWindow.document.title = 'Email Preview';
         popoutWindow.focus();
@@ -1,4 +1,5 @@
 function buildSonarrComingSoonRow() {
+    if (datasetPending('sonarr-coming-soon-json')) return;
     sonarrComingSoonPayload = readJSONFromScript('sonarr-coming-soon-json');
     const host = document.getElementById('sonarr-coming-soon-list');
     const block = document.getElementById('sonarr-coming-soon-block');
@@ -28,6 +29,7 @@ function buildSonarrComingSoonRow() {
 buildSonarrComingSoonRow();
 
 function buildRadarrComingSoonRow() {
+    if (datasetPending('radarr-coming-soon-json')) return;
     radarrComingSoonPayload = readJSONFromScript('radarr-coming-soon-json');
     const host = document.getElementById('radarr-coming-soon-list');
     const block = document.getElementById('radarr-coming-soon-block');
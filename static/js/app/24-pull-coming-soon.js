@@ -1,6 +1,6 @@
 window.pullRunners = window.pullRunners || {};
 window.pullRunners.coming_soon = async function ({ chained = false } = {}) {
-    showSpinner('Pulling coming soon calendar...', 'coming_soon');
+    showSpinner('Pulling coming soon calendar...');
 
     const payload = {
         stats: statsList,
@@ -13,7 +13,7 @@ window.pullRunners.coming_soon = async function ({ chained = false } = {}) {
     };
 
     try {
-        const resp = await fetch('/pull_coming_soon', {
+        const resp = await runPullJob('/pull_coming_soon', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
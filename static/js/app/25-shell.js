@@ -18,7 +18,9 @@
     });
 
     var badgeClasses = ['cache-badge-muted', 'cache-badge-missing', 'cache-badge-fresh',
-                        'cache-badge-warn', 'cache-badge-old', 'cache-badge-stale'];
+                        'cache-badge-warn', 'cache-badge-old', 'cache-badge-stale',
+                        'cache-badge-refreshing'];
+    var badgeRepoll = null;
 
     window.refreshCacheBadge = async function () {
         var wrap = document.getElementById('cache-badge-wrap');
@@ -33,6 +35,9 @@
             wrap.classList.add(badge.class);
             wrap.title = badge.title || '';
             label.textContent = 'Cache: ' + (badge.text || 'none');
+            // A background revalidation is running; look again until it lands.
+            clearTimeout(badgeRepoll);
+            if (badge.refreshing) badgeRepoll = setTimeout(window.refreshCacheBadge, 5000);
         } catch (e) {
             /* a failed poll just leaves the badge as-is */
         }
@@ -1,4 +1,5 @@
 function buildOmbiRequestsRow() {
+    if (datasetPending('ombi-requests-json')) return;
     ombiRequestsPayload = readJSONFromScript('ombi-requests-json');
     const host = document.getElementById('ombi-requests-list');
     if (!host) return;
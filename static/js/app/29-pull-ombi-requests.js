@@ -1,6 +1,6 @@
 window.pullRunners = window.pullRunners || {};
 window.pullRunners.ombi = async function ({ chained = false } = {}) {
-    showSpinner('Pulling Ombi requests...', 'ombi_requests');
+    showSpinner('Pulling Ombi requests...');
 
     const payload = {
         stats: statsList,
@@ -13,7 +13,7 @@ window.pullRunners.ombi = async function ({ chained = false } = {}) {
     };
 
     try {
-        const resp = await fetch('/pull_ombi_requests', {
+        const resp = await runPullJob('/pull_ombi_requests', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
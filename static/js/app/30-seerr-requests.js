@@ -1,4 +1,5 @@
 function buildSeerrRequestsRow() {
+    if (datasetPending('seerr-requests-json')) return;
     seerrRequestsPayload = readJSONFromScript('seerr-requests-json');
     const host = document.getElementById('seerr-requests-list');
     if (!host) return;
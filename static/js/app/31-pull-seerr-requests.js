@@ -1,6 +1,6 @@
 window.pullRunners = window.pullRunners || {};
 window.pullRunners.seerr = async function ({ chained = false } = {}) {
-    showSpinner('Pulling Seerr requests...', 'seerr_requests');
+    showSpinner('Pulling Seerr requests...');
 
     const payload = {
         stats: statsList,
@@ -13,7 +13,7 @@ window.pullRunners.seerr = async function ({ chained = false } = {}) {
     };
 
     try {
-        const resp = await fetch('/pull_seerr_requests', {
+        const resp = await runPullJob('/pull_seerr_requests', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
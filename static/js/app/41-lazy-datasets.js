@@ -0,0 +1,68 @@
+// Lazy snap-in datasets: the builder index no longer inlines recommendations,
+// wrapped, coming soon and request data. Each of those <script> tags renders
+// empty with a data-dataset-url, and its card's data is fetched the first time
+// the card is open: right after load for cards open by default, on the
+// chevron click for collapsed ones (the default on phones).
+//
+// The endpoint answers with an ETag and Cache-Control: no-cache, so the
+// browser revalidates each fetch and a 304 reuses the body it already has.
+// A pull that lands first replaces the tag (no longer pending), and a late
+// fetch then leaves it alone.
+(function () {
+    // script tag id -> the list it feeds and the builder that fills it
+    const LAZY_DATASETS = [
+        { id: 'recommendations-json', host: 'recs-user-list', build: () => buildRecsUserRows() },
+        { id: 'droppedneedle-wrapped-json', host: 'droppedneedle-user-list', build: () => buildWrappedUserRows() },
+        { id: 'droppedneedle-server-json', host: 'droppedneedle-server-list', build: () => buildDroppedNeedleServerRow() },
+        { id: 'yearly-wrapped-json', host: 'yearly-wrapped-list', build: () => buildYearlyWrappedRow() },
+        { id: 'sonarr-coming-soon-json', host: 'sonarr-coming-soon-list', build: () => buildSonarrComingSoonRow() },
+        { id: 'radarr-coming-soon-json', host: 'radarr-coming-soon-list', build: () => buildRadarrComingSoonRow() },
+        { id: 'ombi-requests-json', host: 'ombi-requests-list', build: () => buildOmbiRequestsRow() },
+        { id: 'seerr-requests-json', host: 'seerr-requests-list', build: () => buildSeerrRequestsRow() },
+    ];
+
+    const inflight = {};
+
+    function load(dataset) {
+        if (inflight[dataset.id] || !datasetPending(dataset.id)) return;
+        const url = document.getElementById(dataset.id).getAttribute('data-dataset-url');
+        inflight[dataset.id] = fetch(url, { credentials: 'same-origin' })
+            .then((resp) => {
+                if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+                return resp.json();
+            })
+            .then((body) => {
+                if (!datasetPending(dataset.id)) return;
+                fillDatasetScript(dataset.id, body.data);
+                dataset.build();
+            })
+            .catch((err) => console.error(`Could not load ${url}`, err))
+            .finally(() => { delete inflight[dataset.id]; });
+    }
+
+    function isOpen(host) {
+        const card = host.closest('.snapin-card');
+        if (!card || window.getComputedStyle(card).display === 'none') return false;
+        const header = card.querySelector('.snapin-card-header');
+        return !header || !header.classList.contains('is-collapsed');
+    }
+
+    function loadOpenCards() {
+        LAZY_DATASETS.forEach((dataset) => {
+            const host = document.getElementById(dataset.host);
+            if (host && isOpen(host)) load(dataset);
+        });
+    }
+
+    // 27-snapin-layout.js flips is-collapsed on the same click (registered
+    // first, so it has run by the time this does)
+    document.addEventListener('click', (e) => {
+        if (e.target.closest && e.target.closest('.snapin-collapse-toggle')) loadOpenCards();
+    });
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', loadOpenCards);
+    } else {
+        loadOpenCards();
+    }
+})();
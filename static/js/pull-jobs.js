@@ -0,0 +1,57 @@
+/* runPullJob(url, init): drop-in for fetch(url, init) on a pull route. The pull
+   runs as a background job (POST /pull_jobs?op=<pull>) instead of holding a
+   server worker thread, its progress is polled onto the spinner's bar, and
+   the pull's own response is fetched once the job is done, so callers keep
+   reading resp.ok / resp.json() / resp.text() as before.
+
+   - A second identical pull (e.g. a double click, or Get All racing a manual
+     pull) joins the running job instead of starting another.
+   - Each cache segment that lands mid-pull is a `partial` event; the sidebar
+     cache badge is refreshed on those so it tracks the pull as it goes.
+   - Each poll asks for the events after the last id it saw and is answered
+     at once, so no request sits on a server thread while the pull runs. */
+(function () {
+    const POLL_MS = 1000;
+
+    function sleep(ms) {
+        return new Promise((resolve) => setTimeout(resolve, ms));
+    }
+
+    async function waitForJob(job) {
+        let after = 0;
+        for (;;) {
+            let body;
+            try {
+                const resp = await fetch(`${job.poll_url}?after=${after}`, { credentials: 'same-origin' });
+                // job gone or auth lost: go read whatever result is left
+                if (!resp.ok) return;
+                body = await resp.json();
+            } catch (_) {
+                // a transient drop; try again on the next tick
+                await sleep(POLL_MS);
+                continue;
+            }
+            for (const event of body.events) {
+                after = event.id;
+                if (event.event === 'progress') {
+                    try { window.setSpinnerProgress && window.setSpinnerProgress(event.data); } catch (_) {}
+                } else if (event.event === 'partial') {
+                    if (window.refreshCacheBadge) window.refreshCacheBadge();
+                }
+            }
+            if (body.done) return;
+            await sleep(POLL_MS);
+        }
+    }
+
+    window.runPullJob = async function (url, init) {
+        const op = url.replace(/^\//, '');
+        const start = await fetch(`/pull_jobs?op=${encodeURIComponent(op)}`, init);
+        // anything but "accepted" (demo notice, auth redirect, CSRF failure)
+        // is the answer itself
+        if (start.status !== 202) return start;
+        const job = await start.json();
+        await waitForJob(job);
+        return fetch(job.result_url, { credentials: 'same-origin' });
+    };
+})();
@@ -9,7 +9,8 @@
    - When opName is passed, /pull_progress?op=<name> is polled while visible and
      #loading-progress fills as the backend reports steps; the reported label
      replaces the pinned text. Without opName (or on pages without the bar, like
-     setup.html) behavior is unchanged. */
+     setup.html) behavior is unchanged. Pulls run as background jobs skip the
+     polling and push their streamed progress through setSpinnerProgress. */
 (function () {
     const NORMAL_GIFS = ['Asset_45752', 'Asset_75200', 'Asset_79466'];
     const PRIDE_GIFS = ['Asset_10465', 'Asset_24165', 'Asset_37112', 'Asset_87388', 'Asset_90828'];
@@ -72,14 +73,22 @@
             } catch (_) {
                 return;
             }
-            if (!p || !p.total) return;
-            bar.style.display = 'block';
-            fill.style.width = `${Math.min(100, Math.round((p.step / p.total) * 100))}%`;
-            const textEl = document.getElementById('loading-text');
-            if (textEl && p.label) textEl.textContent = p.label;
+            window.setSpinnerProgress(p);
         }, 500);
     }
 
+    // Paint one progress report ({step, total, label}) on the bar. Polling
+    // above uses it, and so do background pull jobs as their events arrive.
+    window.setSpinnerProgress = function (p) {
+        const bar = document.getElementById('loading-progress');
+        const fill = document.getElementById('loading-progress-fill');
+        if (!bar || !fill || !p || !p.total) return;
+        bar.style.display = 'block';
+        fill.style.width = `${Math.min(100, Math.round((p.step / p.total) * 100))}%`;
+        const textEl = document.getElementById('loading-text');
+        if (textEl && p.label) textEl.textContent = p.label;
+    };
+
     function pickIndex(len, exclude) {
         if (len <= 1) return 0;
         let i;
@@ -23,8 +23,13 @@ def app(tmp_path_factory):
     # config.DB_PATH is CWD-relative by design; chdir into a sandbox so
     # create_app()'s makedirs/init_db/migrations land in a throwaway DB.
     os.chdir(tmp_path_factory.mktemp("apphome"))
-    from app import create_app
-    return create_app()
+    from app import cache, create_app, state
+    flask_app = create_app()
+    # tests age entries on purpose; they must not kick off real upstream pulls
+    cache.set_cache_refresher(None, ())
+    yield flask_app
+    # the sandbox DB is gone by the time atexit runs the last cache flush
+    state.cache_persist["enabled"] = False
 
 def _db():
     from app import config
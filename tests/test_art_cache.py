@@ -0,0 +1,218 @@
+"""/proxy-art through the disk cache (app/artcache.py): one upstream fetch per
+poster, conditional requests both ways, a separate blurred variant."""
+
+import json
+import os
+import sqlite3
+
+import pytest
+
+from app import artcache, config
+from app.crypto import encrypt
+
+POSTER = b"\x89PNG" + b"poster-bytes" * 2000
+
+
+class FakeUpstream:
+    def __init__(self, status=200, body=POSTER, headers=None):
+        self.status_code = status
+        self.content = body
+        self.headers = {"Content-Type": "image/png", "Content-Length": str(len(body)), **(headers or {})}
+        self.closed = False
+
+    def iter_content(self, size):
+        for i in range(0, len(self.content), size):
+            yield self.content[i:i + size]
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture()
+def plex(client, tmp_path, monkeypatch):
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.execute("UPDATE settings SET media_server_type = 'plex', plex_url = 'http://plex:32400', plex_token = ? WHERE id = 1", (encrypt("tok"),))
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(config, "ART_CACHE_DIR", str(tmp_path / "art"))
+    monkeypatch.setitem(artcache._usage, "bytes", None)
+
+    calls = []
+    replies = []
+
+    def _get(url, **kwargs):
+        calls.append((url, kwargs.get("headers") or {}))
+        return replies.pop(0) if replies else FakeUpstream(headers={"ETag": '"v1"'})
+
+    monkeypatch.setattr(artcache, "safe_get", _get)
+    yield client, calls, replies
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.execute("UPDATE settings SET plex_url = NULL, plex_token = NULL WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+
+def _fetch(client, path="/proxy-art/library/metadata/1/thumb"):
+    """GET and read the body, as a browser would; a miss is cached as it streams."""
+    resp = client.get(path)
+    resp.get_data()
+    return resp
+
+
+def _age(seconds):
+    for root, _, files in os.walk(config.ART_CACHE_DIR):
+        for name in files:
+            if name.endswith(".json"):
+                path = os.path.join(root, name)
+                with open(path) as f:
+                    meta = json.load(f)
+                meta["fetched_at"] -= seconds
+                with open(path, "w") as f:
+                    json.dump(meta, f)
+
+
+def test_a_poster_is_fetched_once_and_then_served_from_disk(plex):
+    client, calls, _ = plex
+    first = client.get("/proxy-art/library/metadata/1/thumb")
+    assert first.status_code == 200
+    assert first.get_data() == POSTER
+    assert len(calls) == 1
+    # the token stays in the upstream URL, never in the cache
+    assert "X-Plex-Token=tok" in calls[0][0]
+    assert not any("tok" in name for _, _, files in os.walk(config.ART_CACHE_DIR) for name in files)
+
+    second = client.get("/proxy-art/library/metadata/1/thumb")
+    assert second.get_data() == POSTER
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert len(calls) == 1
+    second.close()
+
+
+def test_the_browser_revalidates_and_ranges_from_disk(plex):
+    client, calls, _ = plex
+    etag = _fetch(client).headers["ETag"]
+    assert client.get("/proxy-art/library/metadata/1/thumb", headers={"If-None-Match": etag}).status_code == 304
+    part = client.get("/proxy-art/library/metadata/1/thumb", headers={"Range": "bytes=0-3"})
+    assert part.status_code == 206
+    assert part.get_data() == b"\x89PNG"
+    part.close()
+    assert len(calls) == 1
+
+
+def test_a_stale_poster_is_revalidated_upstream(plex):
+    client, calls, replies = plex
+    etag = _fetch(client).headers["ETag"]
+    _age(config.ART_CACHE_FRESH_SECONDS + 1)
+
+    replies.append(FakeUpstream(status=304, body=b""))
+    resp = client.get("/proxy-art/library/metadata/1/thumb")
+    assert calls[1][1]["If-None-Match"] == '"v1"'
+    assert resp.get_data() == POSTER
+    assert resp.headers["ETag"] == etag
+    resp.close()
+    # the 304 restamped it
+    client.get("/proxy-art/library/metadata/1/thumb").close()
+    assert len(calls) == 2
+
+
+def test_an_unreachable_server_still_gets_the_cached_copy(plex):
+    client, calls, replies = plex
+    _fetch(client)
+    _age(config.ART_CACHE_FRESH_SECONDS + 1)
+    failed = FakeUpstream(status=503, body=b"")
+    replies.append(failed)
+    resp = client.get("/proxy-art/library/metadata/1/thumb")
+    assert resp.status_code == 200
+    assert resp.get_data() == POSTER
+    resp.close()
+    # the error response is released, not left holding its connection
+    assert failed.closed
+
+    missing = FakeUpstream(status=404, body=b"")
+    replies.append(missing)
+    assert client.get("/proxy-art/library/metadata/2/thumb").status_code == 404
+    assert missing.closed
+
+
+def test_blurred_variant_is_cached_separately(plex, monkeypatch):
+    from app.blueprints import main
+    blurs = []
+    monkeypatch.setattr(main, "blur_image_bytes", lambda raw: blurs.append(raw) or b"blurred")
+    client, calls, _ = plex
+
+    assert client.get("/proxy-art/library/metadata/1/art?blur=1").get_data() == b"blurred"
+    plain = client.get("/proxy-art/library/metadata/1/art")
+    assert plain.get_data() == POSTER
+    plain.close()
+    again = client.get("/proxy-art/library/metadata/1/art?blur=1")
+    assert again.get_data() == b"blurred"
+    again.close()
+    assert len(calls) == 1
+    assert len(blurs) == 1
+
+
+def test_an_aborted_download_leaves_nothing_behind(plex):
+    client, calls, _ = plex
+    resp = client.get("/proxy-art/library/metadata/1/thumb", buffered=False)
+    next(iter(resp.response))
+    resp.close()
+    assert artcache._read_meta(artcache._key("plex:http://plex:32400/library/metadata/1/thumb")) is None
+    assert not any(name.endswith(".tmp") for _, _, files in os.walk(config.ART_CACHE_DIR) for name in files)
+
+
+def test_least_recently_served_art_is_evicted_past_the_budget(plex, monkeypatch):
+    client, calls, _ = plex
+    monkeypatch.setattr(config, "ART_CACHE_MAX_BYTES", int(len(POSTER) * 2.5))
+    for item in (1, 2):
+        _fetch(client, f"/proxy-art/library/metadata/{item}/thumb")
+    # serving 1 again would touch it; backdate 2 instead
+    os.utime(artcache._paths(artcache._key("plex:http://plex:32400/library/metadata/2/thumb"))[0], (1, 1))
+    _fetch(client, "/proxy-art/library/metadata/3/thumb")
+
+    def cached(item):
+        return artcache._read_meta(artcache._key(f"plex:http://plex:32400/library/metadata/{item}/thumb")) is not None
+    assert cached(1) and cached(3)
+    assert not cached(2)
+
+
+def test_a_sized_poster_comes_from_the_plex_transcoder(plex):
+    client, calls, _ = plex
+    _fetch(client, "/proxy-art/library/metadata/1/thumb?w=120&h=180")
+    url = calls[0][0]
+    assert url.startswith("http://plex:32400/photo/:/transcode?width=120&height=180&minSize=1&upscale=1&url=")
+    assert "url=%2Flibrary%2Fmetadata%2F1%2Fthumb%3FX-Plex-Token%3Dtok" in url
+
+    # each box is its own cache entry, apart from the full-size poster
+    _fetch(client, "/proxy-art/library/metadata/1/thumb?w=120&h=180")
+    _fetch(client, "/proxy-art/library/metadata/1/thumb")
+    _fetch(client, "/proxy-art/library/metadata/1/thumb?h=60")
+    assert len(calls) == 3
+    assert calls[1][0].startswith("http://plex:32400/library/metadata/1/thumb?")
+    assert "height=60&minSize=0&upscale=0" in calls[2][0]
+
+
+def test_a_nonsense_box_fetches_the_source_image(plex):
+    client, calls, _ = plex
+    _fetch(client, "/proxy-art/library/metadata/1/thumb?w=abc&h=180")
+    _fetch(client, "/proxy-art/library/metadata/2/thumb?w=120&h=99999")
+    assert all("/photo/:/transcode" not in url for url, _ in calls)
+
+
+def test_a_sized_jellyfin_image_uses_its_fill_params(plex):
+    client, calls, _ = plex
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.execute("UPDATE settings SET media_server_type = 'jellyfin', jellyfin_url = 'http://jf:8096', jellyfin_api_key = ? WHERE id = 1", (encrypt("k"),))
+    conn.commit()
+    try:
+        _fetch(client, "/proxy-art/Items/abc/Images/Primary?w=120&h=180")
+        _fetch(client, "/proxy-art/Items/abc/Images/Primary?h=60")
+    finally:
+        conn.execute("UPDATE settings SET media_server_type = 'plex', jellyfin_url = NULL, jellyfin_api_key = NULL WHERE id = 1")
+        conn.commit()
+        conn.close()
+    assert calls[0][0] == "http://jf:8096/Items/abc/Images/Primary?fillWidth=120&fillHeight=180&quality=85"
+    assert calls[1][0] == "http://jf:8096/Items/abc/Images/Primary?maxHeight=60&quality=85"
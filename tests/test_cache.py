@@ -1,5 +1,7 @@
 import threading
 
+import pytest
+
 from app.cache import clear_cache, set_cached_data, get_cached_data
 
 def test_clear_cache_does_not_race_when_keys_are_added(app):
@@ -91,3 +93,422 @@ def test_badge_thresholds_are_not_duplicated_in_the_frontend():
     source = shell.read_text(encoding="utf-8")
     for marker in ("age_hours", "oldest_age", "< 24", "168"):
         assert marker not in source
+
+
+# --- per-user slots (recommendations / DroppedNeedle wrapped)
+
+def test_user_slots_age_out_individually(app):
+    import time as _time
+    from app import state
+    from app.cache import get_cached_user_data, set_cached_user_data, user_cache_key
+    clear_cache()
+    set_cached_user_data("recommendations_json", {"1": {"a": 1}, "2": {"b": 2}})
+    with state._CACHE_LOCK:
+        state.cache_storage[user_cache_key("recommendations_json", "2")]["timestamp"] = _time.time() - 10 ** 6
+
+    hits, missing = get_cached_user_data("recommendations_json", ["1", "2", "3"])
+    assert hits == {"1": {"a": 1}}
+    assert missing == ["2", "3"]
+
+
+def test_send_fetches_only_missing_users_and_merges(app, seeded_settings, monkeypatch):
+    from app.emails import fetchers
+    clear_cache()
+    fetchers.set_cached_user_data("recommendations_json", {"1": {"cached": True}})
+    monkeypatch.setattr(fetchers, "get_settings", lambda **k: {"id": 1, "conjurr_url": "http://conjurr"})
+    asked = []
+
+    def fake_conjurr(url, users, error, progress_cb=None):
+        asked.append(dict(users))
+        return [{k: {"fresh": True} for k in users}, None]
+
+    monkeypatch.setattr(fetchers, "run_conjurr_command", fake_conjurr)
+    user_dict = {"1": "a@x.io", "2": "b@x.io"}
+    out = fetchers.get_recommendations_for_users({"1", "2"}, ["a@x.io", "b@x.io"], user_dict)
+
+    assert asked == [{"2": "b@x.io"}]
+    assert out == {"1": {"cached": True}, "2": {"fresh": True}}
+    # the aggregate the builder reads gains user 2 without losing anyone
+    assert get_cached_data("recommendations_json", strict=False)["2"] == {"fresh": True}
+    assert get_cached_data("filtered_users", strict=False)["2"] == "b@x.io"
+
+    # a second send is served entirely from the per-user slots
+    asked.clear()
+    assert fetchers.get_recommendations_for_users({"1", "2"}, ["a@x.io", "b@x.io"], user_dict) == out
+    assert asked == []
+
+# Persistent tier: a restart (simulated by emptying memory and resetting the
+# loaded flag) brings entries back from cache_entries with their original age.
+
+def _restart():
+    from app import state
+    with state._CACHE_LOCK:
+        state.cache_storage.clear()
+        state.cache_bytes["total"] = 0
+    state.cache_persist["loaded"] = False
+
+def test_persisted_entries_survive_a_restart_with_their_age(app):
+    import time as _time
+    from app import config, state
+    from app.cache import flush_persistent_cache, get_cache_info
+    set_cached_data("recent_data", {1: ("a", "b")}, {"time_range": "30"})
+    from app.cache import cache_variant_key
+    age = config.CACHE_DURATION + 3600
+    storage_key = cache_variant_key("recent_data", {"time_range": "30"})
+    with state._CACHE_LOCK:
+        state.cache_storage[storage_key]["timestamp"] = _time.time() - age
+        state.cache_dirty.add(storage_key)
+    flush_persistent_cache()
+    _restart()
+
+    # int keys and tuples round-trip unchanged
+    assert get_cached_data("recent_data", strict=False) == {1: ("a", "b")}
+    info = get_cache_info("recent_data")
+    assert info["params"] == {"time_range": "30"}
+    assert abs(info["age_hours"] - age / 3600) < 0.1
+    assert info["is_fresh"] is False and info["is_usable"] is True
+    assert get_cached_data("recent_data", strict=True) is None
+
+def test_cleared_keys_are_deleted_from_the_persistent_tier(app):
+    from app.cache import flush_persistent_cache
+    set_cached_data("graph_data", {"x": 1})
+    flush_persistent_cache()
+    clear_cache("graph_data")
+    flush_persistent_cache()
+    _restart()
+    assert get_cached_data("graph_data", strict=False) is None
+
+def test_newer_memory_entry_wins_over_the_persisted_row(app):
+    from app import state
+    from app.cache import flush_persistent_cache, load_persisted_cache
+    set_cached_data("users", ["old"])
+    flush_persistent_cache()
+    state.cache_persist["loaded"] = False
+    set_cached_data("users", ["new"])
+    load_persisted_cache()
+    assert get_cached_data("users") == ["new"]
+
+def test_unreadable_rows_are_skipped(app):
+    import sqlite3
+    import time as _time
+    from app import config
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.execute("INSERT OR REPLACE INTO cache_entries VALUES ('broken', ?, ?)", (b"not zlib", _time.time()))
+    conn.commit()
+    conn.close()
+    _restart()
+    assert get_cached_data("broken", strict=False) is None
+
+def _persisted_rows():
+    import sqlite3
+    from app import config
+    conn = sqlite3.connect(config.DB_PATH)
+    try:
+        return dict(conn.execute("SELECT cache_key, payload FROM cache_entries").fetchall())
+    finally:
+        conn.close()
+
+def test_a_pickled_row_is_never_unpickled_and_is_deleted(app):
+    import pickle
+    import sqlite3
+    import time as _time
+    import zlib
+    from app import config
+    from app.cache import flush_persistent_cache
+
+    class _Boom:
+        def __reduce__(self):
+            return (exec, ("raise SystemExit('unpickled')",))
+
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.execute("INSERT OR REPLACE INTO cache_entries VALUES ('legacy', ?, ?)",
+                 (zlib.compress(pickle.dumps((_Boom(), None))), _time.time()))
+    conn.commit()
+    conn.close()
+    _restart()
+    assert get_cached_data("legacy", strict=False) is None
+    flush_persistent_cache()
+    assert "legacy" not in _persisted_rows()
+
+def test_persisted_rows_are_encrypted(app):
+    from app.cache import flush_persistent_cache
+    set_cached_data("users", [{"email": "reader@example.com", "username": "reader"}])
+    flush_persistent_cache()
+    payload = bytes(_persisted_rows()["users"])
+    assert b"reader@example.com" not in payload and b"reader" not in payload
+    _restart()
+    assert get_cached_data("users") == [{"email": "reader@example.com", "username": "reader"}]
+
+def test_json_tags_round_trip_without_colliding_with_real_keys(app):
+    from app.cache import _from_json, _to_json
+    import json
+    for value in ({"__tuple__": [1]}, {(1, "a"): [("x",)], 2: None}, [(), {}, {"k": (1, 2)}]):
+        assert _from_json(json.loads(json.dumps(_to_json(value)))) == value
+
+# Parameter-keyed variants: each pull range keeps its own entry and the
+# segment reads whichever was set last.
+
+def test_pulls_with_different_ranges_keep_separate_variants(app):
+    from app.cache import can_use_cached_data_for_preview, get_cache_info, get_cached_variant
+    for days in ("30", "7"):
+        set_cached_data("stats", [f"stats-{days}"], {"time_range": days, "count": "10"})
+        set_cached_data("graph_data", [f"graphs-{days}"], {"time_range": days, "count": "10"})
+    assert get_cached_data("stats") == ["stats-7"]
+    assert get_cache_info("stats")["params"]["time_range"] == "7"
+    assert get_cached_variant("stats", time_range=30) == ["stats-30"]
+    assert can_use_cached_data_for_preview(30)[0] is True
+    assert can_use_cached_data_for_preview(14)[0] is False
+
+def test_non_current_variant_does_not_replace_the_builder_view(app):
+    from app.cache import get_cached_variant
+    set_cached_data("recent_data", ["pulled"], {"time_range": "30"})
+    set_cached_data("recent_data", ["scheduled"], {"time_range": "7", "source": "schedule"}, make_current=False)
+    assert get_cached_data("recent_data") == ["pulled"]
+    assert get_cached_variant("recent_data", time_range="7") == ["scheduled"]
+
+def test_clearing_a_segment_drops_all_its_variants(app):
+    from app.cache import get_cached_variant
+    set_cached_data("graph_data", ["a"], {"time_range": "30"})
+    set_cached_data("graph_data", ["b"], {"time_range": "7"})
+    clear_cache("graph_data")
+    assert get_cached_data("graph_data", strict=False) is None
+    assert get_cached_variant("graph_data", strict=False, time_range="30") is None
+
+def test_budget_evicts_old_variants_and_dynamic_keys_first(app, monkeypatch):
+    from app import config, state
+    from app.cache import get_cached_variant
+    clear_cache()
+    monkeypatch.setattr(config, "CACHE_MAX_BYTES", 20000)
+    set_cached_data("stats", "x" * 6000, {"time_range": "30"})
+    set_cached_data("featured_pick:1:a", "y" * 6000)
+    set_cached_data("stats", "z" * 6000, {"time_range": "7"})
+    # touching the 30-day variant makes the featured pick the LRU candidate
+    assert get_cached_variant("stats", time_range="30") is not None
+    set_cached_data("users", "u" * 6000)
+    assert get_cached_data("featured_pick:1:a") is None
+    assert get_cached_variant("stats", time_range="30") is not None
+    assert get_cached_data("stats") == "z" * 6000
+    assert get_cached_data("users") == "u" * 6000
+    assert state.cache_stats["featured_pick"]["evictions"] == 1
+
+def test_the_running_byte_total_follows_every_change(app, monkeypatch):
+    from app import config, state
+    from app.cache import set_cached_user_data
+
+    def _summed():
+        return sum(entry.get("size", 0) for entry in state.cache_storage.values())
+
+    clear_cache()
+    state.cache_stats.clear()
+    assert state.cache_bytes["total"] == _summed()
+    monkeypatch.setattr(config, "CACHE_MAX_BYTES", 20000)
+    set_cached_data("stats", "x" * 6000, {"time_range": "30"})
+    set_cached_data("stats", "x" * 3000, {"time_range": "30"})
+    set_cached_user_data("recommendations_json", {"1": "r" * 6000, "2": "r" * 6000})
+    set_cached_data("featured_pick:1:a", "y" * 9000)
+    assert state.cache_stats["recommendations_json"]["evictions"] == 1
+    assert state.cache_bytes["total"] == _summed() <= config.CACHE_MAX_BYTES
+    clear_cache("stats")
+    assert state.cache_bytes["total"] == _summed()
+    clear_cache()
+    assert state.cache_bytes["total"] == _summed() == 0
+
+def test_hit_and_miss_counters_per_segment(app):
+    from app import state
+    from app.cache import get_cache_stats
+    clear_cache()
+    state.cache_stats.clear()
+    set_cached_data("collection_items:9", [1, 2])
+    get_cached_data("collection_items:9")
+    get_cached_data("collection_items:10")
+    counters = get_cache_stats()["collection_items"]
+    assert (counters["hits"], counters["misses"]) == (1, 1)
+    assert counters["entries"] == 1 and counters["bytes"] > 0
+
+def test_variants_and_current_pointer_survive_a_restart(app):
+    from app.cache import flush_persistent_cache, get_cached_variant
+    set_cached_data("most_watched_data", ["thirty"], {"time_range": "30"})
+    set_cached_data("most_watched_data", ["seven"], {"time_range": "7"})
+    set_cached_data("most_watched_data", ["fourteen"], {"time_range": "14"}, make_current=False)
+    flush_persistent_cache()
+    _restart()
+    from app import state
+    state.cache_current.clear()
+    assert get_cached_data("most_watched_data") == ["seven"]
+    assert get_cached_variant("most_watched_data", time_range="30") == ["thirty"]
+
+
+# --- stale-while-revalidate
+
+def _join_revalidations():
+    for t in threading.enumerate():
+        if t.name.startswith("cache-revalidate-"):
+            t.join(timeout=5)
+
+def _age(key, seconds):
+    from app import state
+    with state._CACHE_LOCK:
+        state.cache_storage[state.cache_current.get(key, key)]["timestamp"] -= seconds
+
+def test_stale_read_returns_old_data_and_refreshes_once(app):
+    from app import config, state
+    from app.cache import set_cache_refresher
+    calls = []
+
+    def refresher(segment, params):
+        calls.append((segment, params.get("time_range")))
+        return ["new"]
+
+    clear_cache()
+    state.cache_refresh_attempted.clear()
+    set_cached_data("users", ["old"], {"time_range": "30"})
+    _age("users", config.CACHE_DURATION + 60)
+    set_cache_refresher(refresher, ("users",))
+    try:
+        assert get_cached_data("users", strict=False) == ["old"]
+        get_cached_data("users", strict=False)
+        _join_revalidations()
+        assert calls == [("users", "30")]
+        assert get_cached_data("users") == ["new"]
+    finally:
+        set_cache_refresher(None, ())
+
+def test_fresh_reads_and_unlisted_segments_never_refresh(app):
+    from app import config, state
+    from app.cache import set_cache_refresher
+    calls = []
+    clear_cache()
+    state.cache_refresh_attempted.clear()
+    set_cached_data("users", ["fresh"])
+    set_cached_data("featured_pick", ["old"])
+    _age("featured_pick", config.CACHE_DURATION + 60)
+    set_cache_refresher(lambda s, p: calls.append(s), ("users",))
+    try:
+        get_cached_data("users")
+        get_cached_data("featured_pick", strict=False)
+        _join_revalidations()
+        assert calls == []
+    finally:
+        set_cache_refresher(None, ())
+
+def test_badge_shows_refreshing_while_a_segment_revalidates(client, seeded_settings):
+    from app import config, state
+    from app.cache import is_cache_refreshing, set_cache_refresher
+    release = threading.Event()
+
+    def refresher(segment, params):
+        release.wait(5)
+        return [{"x": 2}]
+
+    clear_cache()
+    state.cache_refresh_attempted.clear()
+    for key in ("stats", "users", "graph_data", "recent_data"):
+        set_cached_data(key, [{"x": 1}], {"time_range": "30", "count": "10"})
+    _age("stats", config.CACHE_DURATION + 60)
+    set_cache_refresher(refresher, ("stats",))
+    try:
+        get_cached_data("stats", strict=False)
+        assert is_cache_refreshing("stats")
+        badge = _badge(client)
+        assert badge["class"] == "cache-badge-refreshing"
+        assert badge["refreshing"] is True
+        release.set()
+        _join_revalidations()
+        assert not is_cache_refreshing("stats")
+        assert _badge(client)["class"] == "cache-badge-fresh"
+    finally:
+        release.set()
+        set_cache_refresher(None, ())
+
+def test_failed_refresh_keeps_stale_data_and_backs_off(app):
+    from app import config, state
+    from app.cache import set_cache_refresher
+    calls = []
+
+    def refresher(segment, params):
+        calls.append(segment)
+        raise RuntimeError("upstream down")
+
+    clear_cache()
+    state.cache_refresh_attempted.clear()
+    set_cached_data("graph_data", ["old"])
+    _age("graph_data", config.CACHE_DURATION + 60)
+    set_cache_refresher(refresher, ("graph_data",))
+    try:
+        get_cached_data("graph_data", strict=False)
+        _join_revalidations()
+        assert get_cached_data("graph_data", strict=False) == ["old"]
+        _join_revalidations()
+        assert calls == ["graph_data"]
+    finally:
+        set_cache_refresher(None, ())
+
+
+# --- observability
+
+def test_stats_split_fresh_and_stale_hits(app):
+    from app import config, state
+    from app.cache import get_cache_stats
+    clear_cache()
+    state.cache_stats.clear()
+    set_cached_data("most_watched_data", ["x"])
+    get_cached_data("most_watched_data")
+    _age("most_watched_data", config.CACHE_DURATION + 60)
+    get_cached_data("most_watched_data", strict=False)
+    get_cached_data("most_watched_data")
+    counters = get_cache_stats()["most_watched_data"]
+    assert (counters["hits"], counters["stale_hits"], counters["misses"]) == (1, 1, 1)
+    assert counters["hit_rate"] == round(2 / 3, 3)
+    assert counters["age_buckets"]["1d"] == 0 and counters["age_buckets"]["7d"] == 1
+
+def test_fill_latency_and_source_follow_the_pull(app):
+    import time as _time
+    from app import cache, state
+    from app.cache import cache_fill, get_cache_stats
+    state.cache_stats.clear()
+    with cache_fill("manual"):
+        cache._fill.mark = _time.monotonic() - 2.5
+        set_cached_data("sonarr_coming_soon_json", [1])
+        set_cached_data("radarr_coming_soon_json", [2])
+    stats = get_cache_stats()
+    assert 2.5 <= stats["sonarr_coming_soon_json"]["last_fill_seconds"] < 3.5
+    assert stats["radarr_coming_soon_json"]["avg_fill_seconds"] < 1
+    assert stats["sonarr_coming_soon_json"]["last_source"] == "manual"
+
+def test_a_write_after_the_fill_ended_is_not_charged_to_it(app):
+    """Worker threads are reused, so a later write on the same thread (a
+    featured pick during a preview) must not count as part of an old pull."""
+    import time as _time
+    from app import cache, state
+    from app.cache import cache_fill, get_cache_stats
+    state.cache_stats.clear()
+    with cache_fill("manual"):
+        cache._fill.mark = _time.monotonic() - 3600
+    set_cached_data("featured_pick:abc", {"title": "x"})
+    counters = get_cache_stats()["featured_pick"]
+    assert counters["fills"] == 0 and counters["last_fill_seconds"] is None
+    assert counters["avg_fill_seconds"] is None and counters["last_source"] is None
+
+def test_the_fill_scope_ends_when_the_pull_raises(app):
+    from app import cache
+    from app.cache import cache_fill
+    with pytest.raises(RuntimeError):
+        with cache_fill("manual"):
+            raise RuntimeError("upstream down")
+    assert cache._fill.mark is None and cache._fill.source is None
+
+def test_params_name_the_refresh_source(app):
+    from app import state
+    from app.cache import get_cache_stats
+    state.cache_stats.clear()
+    set_cached_data("yearly_wrapped_json", {"a": 1}, {"refresh_type": "daily_auto"})
+    assert get_cache_stats()["yearly_wrapped_json"]["last_source"] == "daily_auto"
+
+def test_cache_stats_endpoint(client, seeded_settings):
+    clear_cache()
+    set_cached_data("recommendations_json", {"u": [1, 2, 3]})
+    body = client.get("/cache_stats").get_json()
+    assert body["max_bytes"] > 0
+    segment = body["segments"]["recommendations_json"]
+    assert segment["entries"] == 1 and segment["bytes"] > 0
+    assert body["total_bytes"] >= segment["bytes"]
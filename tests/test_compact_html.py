@@ -0,0 +1,81 @@
+"""The HTML compactor (app/emails/compact.py): inline styles are always
+tightened, and past Gmail's clip limit repeated ones move to a head <style>
+block as short classes."""
+
+import re
+
+from app.emails import compact
+
+
+def _doc(body):
+    return f'<!DOCTYPE html><html><head><style>.card{{color:red!important}}</style></head><body style="margin: 0;">{body}</body></html>'
+
+
+CARD = '<td style="padding: 8px; font-size: 11px; color: #62a1a4; font-family: Arial, sans-serif;">x</td>'
+
+
+def test_styles_are_tightened_without_dropping_fallbacks():
+    assert compact.tidy_style(" color : red ;; width: 100%; width: calc(100% - 2px); color: red; ") == \
+        "width:100%;width:calc(100% - 2px);color:red"
+    # ';' inside a data: URI or a quoted font name does not end a declaration
+    assert compact.tidy_style("background: url('data:image/png;base64,AA'); font-family: &quot;A;B&quot;") == \
+        "background:url('data:image/png;base64,AA');font-family:&quot;A;B&quot;"
+
+
+def test_empty_attributes_are_stripped():
+    html = compact.compact_email_html('<div style=" ; " class="">x</div><p class="a" style="">y</p>')
+    assert html == '<div>x</div><p class="a">y</p>'
+
+
+def test_a_message_under_the_limit_keeps_its_styles_inline():
+    html = compact.compact_email_html(_doc(CARD * 20))
+    assert html.count('<style>') == 1
+    assert html.count('style="padding:8px;font-size:11px;color:#62a1a4;font-family:Arial, sans-serif"') == 20
+
+
+def test_past_the_limit_repeated_styles_become_classes():
+    html = compact.compact_email_html(_doc(CARD * 20 + '<p style="color: blue">once</p>'), limit=100)
+    rules = dict((v, k) for k, v in re.findall(r'\.(s\w+)\{([^}]*)\}', html))
+    name = rules["padding:8px;font-size:11px;color:#62a1a4;font-family:Arial, sans-serif"]
+    assert html.count(f'<td class="{name}">x</td>') == 20
+    # the interned rules come after the theme CSS, so they win its ties
+    assert html.index(".card{") < html.index(f".{name}{{")
+    # a style used once, and the body's, stay inline
+    assert '<p style="color:blue">once</p>' in html
+    assert '<body style="margin:0">' in html
+
+
+def test_styles_a_head_rule_cannot_stand_in_for_stay_inline():
+    hidden = '<div style="display: none; max-height: 0;">preheader</div>'
+    important = '<td style="width: 120px !important;">a</td>'
+    backdrop = '<td style="background-image: url(cid:bg);">b</td>'
+    html = compact.compact_email_html(_doc((hidden + important + backdrop) * 5), limit=100)
+    assert html.count('style="display:none;max-height:0"') == 5
+    assert html.count('style="width:120px !important"') == 5
+    assert html.count('style="background-image:url(cid:bg)"') == 5
+
+
+def test_an_existing_class_is_kept_and_comments_are_untouched():
+    outlook = '<!--[if mso]><table style="width: 600px;"><tr><td><![endif]-->'
+    html = compact.compact_email_html(_doc(outlook + '<img class="card-poster-img" style="width: 120px; border: 0;">' * 4), limit=100)
+    assert outlook in html
+    assert html.count('<img class="card-poster-img s0">') == 4
+
+
+def test_the_interned_block_stays_under_gmails_style_limit(monkeypatch):
+    monkeypatch.setattr(compact, "STYLE_BLOCK_MAX", 200)
+    cells = "".join(f'<td style="padding: {i}px; font-family: Arial, sans-serif;">x</td>' * 3 for i in range(40))
+    html = compact.compact_email_html(_doc(cells), limit=100)
+    block = re.search(r"<style>(\.s0.*?)</style>", html).group(1)
+    assert len(block) <= 200
+    assert 'style="padding:39px;font-family:Arial, sans-serif"' in html
+
+
+def test_interning_twice_changes_nothing():
+    once = compact.compact_email_html(_doc(CARD * 20), limit=100)
+    assert compact.compact_email_html(once, limit=100) == once
+
+
+def test_the_clip_report_compares_against_the_limit():
+    assert compact.clip_report(200, limit=150) == {"bytes": 200, "limit": 150, "clipped": True}
+    assert not compact.clip_report(150, limit=150)["clipped"]
@@ -0,0 +1,115 @@
+"""Response compression, precompressed static variants and fingerprinted
+static URLs (app/compression.py)."""
+
+import gzip
+import json
+import re
+
+import pytest
+
+from app import compression
+from app.cache import clear_cache, set_cached_data
+
+needs_brotli = pytest.mark.skipif(compression.brotli is None, reason="brotli is not installed")
+
+
+@pytest.fixture()
+def static_dir(app, tmp_path, monkeypatch):
+    (tmp_path / "big.js").write_text("console.log('newsletterr');\n" * 200)
+    (tmp_path / "tiny.css").write_text("a{color:red}")
+    monkeypatch.setattr(app, "static_folder", str(tmp_path))
+    return tmp_path
+
+
+def test_static_urls_carry_a_content_hash(app, static_dir):
+    with app.test_request_context():
+        from flask import url_for
+        url = url_for("static", filename="big.js")
+    assert re.fullmatch(r"/static/big\.js\?v=[0-9a-f]{12}", url)
+
+    (static_dir / "big.js").write_text("console.log('changed');\n" * 200)
+    with app.test_request_context():
+        from flask import url_for
+        assert url_for("static", filename="big.js") != url
+
+
+def test_fingerprinted_requests_are_immutable(client, app, static_dir):
+    with app.test_request_context():
+        from flask import url_for
+        url = url_for("static", filename="big.js")
+    assert client.get(url).headers["Cache-Control"] == compression.IMMUTABLE_CACHE_CONTROL
+    # a bare or outdated URL still revalidates
+    assert "immutable" not in client.get("/static/big.js").headers.get("Cache-Control", "")
+    assert "immutable" not in client.get("/static/big.js?v=000000000000").headers.get("Cache-Control", "")
+
+
+@pytest.mark.parametrize("accept, encoding, decode", [
+    pytest.param("br, gzip", "br", lambda data: compression.brotli.decompress(data), marks=needs_brotli),
+    ("gzip", "gzip", gzip.decompress),
+])
+def test_static_text_is_served_precompressed(client, static_dir, accept, encoding, decode):
+    resp = client.get("/static/big.js", headers={"Accept-Encoding": accept})
+    assert resp.headers["Content-Encoding"] == encoding
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert decode(resp.get_data()) == (static_dir / "big.js").read_bytes()
+    assert len(resp.get_data()) < (static_dir / "big.js").stat().st_size
+
+    again = client.get("/static/big.js", headers={"Accept-Encoding": accept, "If-None-Match": resp.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_static_stays_plain_when_small_or_not_accepted(client, static_dir):
+    plain = client.get("/static/big.js")
+    assert "Content-Encoding" not in plain.headers
+    assert plain.get_data() == (static_dir / "big.js").read_bytes()
+    plain.close()
+    tiny = client.get("/static/tiny.css", headers={"Accept-Encoding": "br, gzip"})
+    assert "Content-Encoding" not in tiny.headers
+    tiny.close()
+
+
+def test_precompress_static_builds_variants_up_front(static_dir):
+    compression.precompress_static(str(static_dir))
+    key = (str(static_dir / "big.js"), "gzip")
+    assert key in compression._variants
+    assert (str(static_dir / "tiny.css"), "gzip") not in compression._variants
+
+
+def test_large_dynamic_responses_are_compressed(client):
+    rows = [{"title": f"Request {i}", "type": "movie"} for i in range(200)]
+    set_cached_data("ombi_requests_json", rows)
+    try:
+        resp = client.get("/datasets/ombi_requests", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(resp.get_data()))["data"] == rows
+        # one tag for every encoding of the same data, so revalidation still hits
+        etag = resp.headers["ETag"]
+        assert etag.startswith('W/"')
+        again = client.get("/datasets/ombi_requests", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert again.status_code == 304
+
+        assert "Content-Encoding" not in client.get("/datasets/ombi_requests").headers
+    finally:
+        clear_cache()
+
+
+def test_a_page_carrying_the_csrf_token_is_never_compressed(csrf_client):
+    client, token = csrf_client
+    resp = client.get("/settings", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200 and resp.mimetype == "text/html"
+    assert token.encode() in resp.get_data()
+    assert "Content-Encoding" not in resp.headers
+
+
+def test_large_html_without_the_token_is_still_compressed(app):
+    from flask import Response, session
+
+    with app.test_request_context("/preview", headers={"Accept-Encoding": "gzip"}):
+        session["csrf_token"] = "the-session-token"
+        resp = compression.compress_response(Response("<p>preview</p>" * 200, mimetype="text/html"))
+        assert resp.headers["Content-Encoding"] == "gzip"
+
+
+def test_small_dynamic_responses_are_left_alone(client):
+    resp = client.get("/pull_progress?op=pull_stats", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in resp.headers
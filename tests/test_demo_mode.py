@@ -122,6 +122,17 @@ def test_pull_stats_returns_sample_data(demo_csrf):
     assert body["stats"] and body["recent_data"] and len(body["graph_data"]) == 12
 
 
+def test_a_pull_job_is_answered_from_sample_data(demo_csrf):
+    """The job launcher does not run real pulls in demo; the page takes any
+    answer other than 202 as the pull's own."""
+    client, token = demo_csrf
+    resp = client.post('/pull_jobs?op=pull_stats', json={'time_range': 30, 'count': 10},
+                       headers={'X-CSRF-Token': token})
+    assert resp.status_code == 200 and resp.get_json()["demo"] is True
+    resp = client.post('/pull_jobs?op=pull_ombi_requests', json={}, headers={'X-CSRF-Token': token})
+    assert resp.status_code == 200 and resp.mimetype == 'text/html'
+
+
 def test_send_is_blocked_with_a_notice(demo_client):
     resp = demo_client.post('/send_email', json={'to_emails': 'a@b.c'})
     assert resp.status_code == 200
@@ -0,0 +1,69 @@
+"""DroppedNeedle wrapped pulls: concurrent per-listener fetches, a per-id
+and per-year result cache, and grouped per-user errors."""
+import requests
+
+from app.cache import clear_cache
+from app.clients import droppedneedle
+
+
+class _Resp:
+    def __init__(self, payload=None, status=200):
+        self._payload = payload
+        self.status_code = status
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Server Error")
+
+    def json(self):
+        return self._payload
+
+
+def _fake_dn(monkeypatch, listeners, failing=()):
+    calls = []
+
+    def fake_get(url, headers=None, **kwargs):
+        calls.append(url)
+        if url.endswith("/wrapped/users"):
+            return _Resp({"users": [{"id": dn_id, "email": email, "has_listenbrainz": True} for email, dn_id in listeners.items()]})
+        dn_id = url.rsplit("/", 1)[1]
+        if dn_id in failing:
+            return _Resp(status=502)
+        return _Resp({"has_data": dn_id != "quiet", "listen_count": len(dn_id)})
+
+    monkeypatch.setattr(droppedneedle, "safe_get", fake_get)
+    return calls
+
+
+def test_repeat_pull_only_fetches_uncached_listeners(app, monkeypatch):
+    clear_cache()
+    calls = _fake_dn(monkeypatch, {"a@x.io": "da", "b@x.io": "db", "q@x.io": "quiet"})
+    users = {"1": "a@x.io", "2": "b@x.io", "3": "q@x.io", "4": "nobody@x.io"}
+
+    wrapped, error = droppedneedle.run_droppedneedle_command("http://dn", "k", users, None)
+    assert error is None
+    assert sorted(wrapped) == ["1", "2"]  # no data and unknown listeners drop out
+    assert len([c for c in calls if "/wrapped/user/" in c]) == 3
+
+    calls.clear()
+    again, _ = droppedneedle.run_droppedneedle_command("http://dn", "k", users, None)
+    assert again == wrapped
+    assert [c for c in calls if "/wrapped/user/" in c] == []
+
+    # a manual pull skips the cached read
+    calls.clear()
+    droppedneedle.run_droppedneedle_command("http://dn", "k", users, None, use_cache=False)
+    assert len([c for c in calls if "/wrapped/user/" in c]) == 3
+
+
+def test_per_user_errors_are_grouped_not_concatenated(app, monkeypatch):
+    clear_cache()
+    listeners = {f"u{i}@x.io": f"d{i}" for i in range(8)}
+    _fake_dn(monkeypatch, listeners, failing={f"d{i}" for i in range(7)})
+    users = {str(i): f"u{i}@x.io" for i in range(8)}
+
+    wrapped, error = droppedneedle.run_droppedneedle_command("http://dn", "k", users, "Earlier")
+    assert list(wrapped) == ["7"]
+    assert error.startswith("Earlier, DroppedNeedle Error: 502 Server Error (7 users:")
+    assert error.count("DroppedNeedle Error") == 1
+    assert "and 2 more" in error
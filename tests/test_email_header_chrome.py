@@ -81,8 +81,8 @@ def test_editorial_and_digest_headers_use_the_chosen_color_over_card_bg(chrome_e
     for layout in ("editorial", "digest"):
         default_html = chrome_env(layout)
         custom_html = chrome_env(layout, header_bg="#123456")
-        assert "background-color: #2d2d2d" in default_html
-        assert "background-color: #123456" in custom_html
+        assert "background-color:#2d2d2d" in default_html
+        assert "background-color:#123456" in custom_html
 
 
 @pytest.mark.parametrize("bad", ["red; } body { background: url(x)", "#zzzzzz", "#12345", "rgb(1,2,3)"])
@@ -87,3 +87,88 @@ def test_wrapped_renders_nothing_extra_without_thumbnails():
     # no stray <img> and no empty gap where one would have been
     posters = [t for t in re.findall(r"<img\b[^>]*>", html) if "email-icons" not in t]
     assert posters == []
+
+
+class _Image:
+    def __init__(self, size):
+        import io
+        from PIL import Image
+        out = io.BytesIO()
+        Image.new("RGB", size, "#336699").save(out, format="JPEG")
+        self.content = out.getvalue()
+        self.headers = {"Content-Type": "image/jpeg"}
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+
+def _attach(monkeypatch, size, image_url, **kwargs):
+    """fetch_and_attach_image against an upstream answering with a `size`
+    image; returns (requested url, delivered image size)."""
+    import io
+    from email.mime.multipart import MIMEMultipart
+    from PIL import Image
+    from app.emails import images
+
+    requested = []
+    monkeypatch.setattr(images, "safe_get", lambda url, **k: requested.append(url) or _Image(size))
+    root = MIMEMultipart('related')
+    assert images.fetch_and_attach_image(image_url, root, "poster", "http://nl", **kwargs).startswith("cid:")
+    part = root.get_payload()[-1]
+    return requested[0], Image.open(io.BytesIO(part.get_payload(decode=True))).size
+
+
+def test_proxied_art_is_asked_for_at_its_box(monkeypatch):
+    url, size = _attach(monkeypatch, (120, 180), "/library/metadata/1/thumb", target=(120, 180))
+    assert url == "http://nl/proxy-art/library/metadata/1/thumb?w=120&h=180"
+    assert size == (120, 180)
+    url, _ = _attach(monkeypatch, (40, 60), "/proxy-art/library/metadata/1/thumb", max_height=60)
+    assert url == "http://nl/proxy-art/library/metadata/1/thumb?h=60"
+
+
+def test_the_transcoder_box_skips_local_resampling(monkeypatch):
+    from app.emails import imaging
+    monkeypatch.setattr(imaging.Image.Image, "resize", lambda *a, **k: pytest.fail("resampled a pre-sized image"))
+    _attach(monkeypatch, (120, 180), "/library/metadata/1/thumb", target=(120, 180))
+
+
+def test_pillow_still_sizes_what_the_transcoder_did_not(monkeypatch):
+    # Plex fills the box (minSize=1), so one side may overhang
+    _, size = _attach(monkeypatch, (120, 200), "/library/metadata/1/thumb", target=(120, 180))
+    assert size == (120, 180)
+    # not proxied art: fetched as is, sized locally
+    url, size = _attach(monkeypatch, (1000, 1500), "https://example.com/poster.jpg", target=(120, 180))
+    assert url == "https://example.com/poster.jpg"
+    assert size == (120, 180)
+
+
+def test_preview_urls_carry_the_box():
+    from email.mime.multipart import MIMEMultipart
+    from app.emails import images
+
+    root = MIMEMultipart('related')
+    root.preview_mode = True
+    assert images.fetch_and_attach_image("/library/metadata/1/thumb", root, "p", target=(60, 90)) == "/proxy-art/library/metadata/1/thumb?w=60&h=90"
+    assert images.fetch_and_attach_small_thumbnail("/library/metadata/1/thumb", root, "t", height=38) == "/proxy-art/library/metadata/1/thumb?h=38"
+    assert images.fetch_and_attach_image("https://example.com/a.png", root, "x", target=(60, 90)) == "https://example.com/a.png"
+
+
+def test_identical_images_share_one_part_per_box(monkeypatch):
+    from email.mime.multipart import MIMEMultipart
+    from app.emails import images
+
+    monkeypatch.setattr(images, "safe_get", lambda url, **k: _Image((300, 450)))
+    root = MIMEMultipart('related')
+    first = images.fetch_and_attach_image("/library/metadata/1/thumb", root, "ra-1", "http://nl", target=(120, 180))
+    again = images.fetch_and_attach_image("/library/metadata/1/thumb", root, "mw-1", "http://nl", target=(120, 180))
+    other_box = images.fetch_and_attach_image("/library/metadata/1/thumb", root, "hero", "http://nl", target=(150, 225))
+    thumb = images.fetch_and_attach_small_thumbnail("/library/metadata/1/thumb", root, "stat", "http://nl", height=38)
+
+    assert again == first
+    assert len({first, other_box, thumb}) == 3
+    assert len(root.get_payload()) == 3
+    stats = images.image_dedup_stats(root)
+    assert stats["parts"] == 1
+    assert stats["bytes"] == len(root.get_payload()[0].get_payload(decode=True))
+    assert images.image_dedup_stats(MIMEMultipart('related')) == {"parts": 0, "bytes": 0}
@@ -754,7 +754,7 @@ def test_manual_random_pick_email_golden(manual_send_env, monkeypatch):
     from app.emails import assemble as assemble_mod
     from app.emails.builders import random_pick as random_pick_mod
 
-    monkeypatch.setattr(assemble_mod, "fetch_random_library_item", lambda *a, **k: dict(RANDOM_PICK_FIXTURE))
+    monkeypatch.setattr(assemble_mod, "pick_random_library_item", lambda *a, **k: dict(RANDOM_PICK_FIXTURE))
     monkeypatch.setattr(random_pick_mod, "fetch_and_attach_image", lambda *a, **k: None)
 
     client = manual_send_env
@@ -1256,7 +1256,7 @@ def test_manual_layout_email_golden(manual_send_env, monkeypatch, layout, email_
     from app.emails import assemble as assemble_mod
     from app.emails.builders import most_watched as most_watched_mod
     from app.emails.builders import random_pick as random_pick_mod
-    monkeypatch.setattr(assemble_mod, "fetch_random_library_item", lambda *a, **k: dict(RANDOM_PICK_FIXTURE))
+    monkeypatch.setattr(assemble_mod, "pick_random_library_item", lambda *a, **k: dict(RANDOM_PICK_FIXTURE))
     monkeypatch.setattr(most_watched_mod, "fetch_and_attach_image", lambda *a, **k: None)
     monkeypatch.setattr(random_pick_mod, "fetch_and_attach_image", lambda *a, **k: None)
     # the editorial/digest mastheads stamp datetime.now() (month, and day for
@@ -1319,17 +1319,17 @@ def test_manual_layout_email_golden(manual_send_env, monkeypatch, layout, email_
             # classic's own header padding: the brand line that used to mark it
             # only renders when email_show_server_name is on, which is off by
             # default
-            ("classic", ""): "padding: 18px 24px",
-            ("classic", "compact"): "padding: 11px 16px",
+            ("classic", ""): "padding:18px 24px",
+            ("classic", "compact"): "padding:11px 16px",
             ("editorial", ""): "3px double",
             ("editorial", "expanded"): "3px double",
-            ("digest", ""): "border-bottom: 2px solid",
-            ("digest", "expanded"): "border-bottom: 2px solid",
+            ("digest", ""): "border-bottom:2px solid",
+            ("digest", "expanded"): "border-bottom:2px solid",
             # spotlight has no header band at all and is the one layout on the
             # narrow canvas
-            ("spotlight", ""): "max-width: 640px",
-            ("spotlight", "compact"): "max-width: 640px",
-            ("legacy", "compact"): "padding: 8px 14px",
+            ("spotlight", ""): "max-width:640px",
+            ("spotlight", "compact"): "max-width:640px",
+            ("legacy", "compact"): "padding:8px 14px",
         }
         assert chrome_markers[(layout, email_density)] in normalized["html"]
         # the compact densities carry no artwork in any section: no posters,
@@ -1567,6 +1567,31 @@ def test_hosted_image_write_failure_falls_back_to_cid(hosted_images_send_env, mo
     assert len(image_parts) >= 1
 
 
+def test_a_repeated_image_is_attached_once(manual_send_env, monkeypatch):
+    from app.emails import images as images_mod
+    # distinct bytes per URL, so only the two copies of test.png match
+    monkeypatch.setattr(images_mod, "safe_get", lambda url, **k: _FakeImageResponse(_FakeImageResponse().content + url.encode()))
+
+    client = manual_send_env
+    resp = _post_send(client, {
+        "to_emails": "a@b.c", "subject": "Manual News", "email_header_title": "The Header",
+        "selected_items": [
+            {"type": "image", "id": "one", "src": "https://example.com/test.png", "width": 400, "align": "center"},
+            {"type": "image", "id": "two", "src": "https://example.com/test.png", "width": 400, "align": "center"},
+        ],
+        "custom_html": "", "user_dict": {}, "expanded_collections": {},
+    })
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["dedup_image_parts"] == 1
+    assert body["dedup_image_bytes"] == len(_FakeImageResponse().content + b"https://example.com/test.png")
+
+    sends = [s for inst in RecorderSMTP.instances for s in inst.sent]
+    normalized = _normalize(sends[0][2])
+    image_parts = [p for p in normalized["parts"] if p["content_type"].startswith("image/")]
+    assert sorted(normalized["html"].count(f"cid:{p['content_id']}") for p in image_parts) == [1, 2]
+
+
 def test_manual_top_viewer_email_golden(manual_send_env, monkeypatch):
     """Top Viewer reads the cached Most Active Users stat; no
     provider call is involved, so the fixture stats are the whole input."""
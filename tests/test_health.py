@@ -0,0 +1,67 @@
+"""/healthz and /readyz are answered ahead of Flask: no login, no hooks."""
+
+import time
+
+from app import config, state
+
+
+def test_healthz_needs_no_login_and_skips_the_hooks(app, seeded_settings):
+    resp = app.test_client().get("/healthz")
+    assert resp.status_code == 200
+    assert resp.get_data(as_text=True) == "ok"
+    # set_security_headers never ran
+    assert "Content-Security-Policy" not in resp.headers
+
+
+def test_readyz_reports_each_check(app, seeded_settings, monkeypatch):
+    # test clients leave bodies unclosed, so earlier tests inflate the count
+    monkeypatch.setattr(state, "requests_in_flight", 0)
+    resp = app.test_client().get("/readyz")
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert body["status"] == "ready"
+    assert set(body["checks"]) == {"scheduler", "database", "workers"}
+    assert all(check["ok"] for check in body["checks"].values())
+
+
+def test_readyz_fails_on_a_stalled_scheduler(app, seeded_settings, monkeypatch):
+    monkeypatch.setattr(state, "_WORKERS_STARTED", True)
+    monkeypatch.setattr(state, "scheduler_heartbeat", time.time() - 3600)
+    resp = app.test_client().get("/readyz")
+    assert resp.status_code == 503
+    assert resp.get_json()["checks"]["scheduler"]["ok"] is False
+
+
+def test_readyz_fails_when_the_database_is_not_writable(app, seeded_settings, monkeypatch, tmp_path, caplog):
+    monkeypatch.setattr(config, "DB_PATH", str(tmp_path))  # a directory, not a database
+    resp = app.test_client().get("/readyz")
+    assert resp.status_code == 503
+    assert resp.get_json()["checks"]["database"] == {"ok": False, "detail": "not writable"}
+    # the sqlite error is logged, never answered to an unauthenticated probe
+    assert "not writable:" in caplog.text
+
+
+def test_the_database_check_uses_the_app_connection_with_a_short_timeout(app, seeded_settings, monkeypatch):
+    from app import health
+
+    timeouts = []
+    connect = health.db_connect
+    monkeypatch.setattr(health, "db_connect", lambda timeout: timeouts.append(timeout) or connect(timeout=timeout))
+    assert health._check_database() == (True, "writable")
+    assert timeouts == [2]
+
+
+def test_readyz_fails_when_the_worker_pool_is_saturated(app, seeded_settings, monkeypatch):
+    monkeypatch.setattr(config, "WORKER_THREADS", 8)
+    monkeypatch.setattr(state, "requests_in_flight", 7)
+    resp = app.test_client().get("/readyz")
+    assert resp.status_code == 503
+    assert resp.get_json()["checks"]["workers"]["detail"] == "7/8 worker threads busy"
+
+
+def test_in_flight_count_settles_after_each_request(client):
+    before = state.requests_in_flight
+    # a WSGI server closes the body when it is done with it
+    client.get("/cache_status").close()
+    client.get("/definitely-not-a-route").close()
+    assert state.requests_in_flight == before
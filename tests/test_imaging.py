@@ -0,0 +1,72 @@
+"""Reduced-size decodes in app/emails/imaging.py: the output sizes are the
+ones the email asks for, and a JPEG is never decoded at full size."""
+
+import io
+
+import pytest
+from PIL import Image, ImageFile
+
+from app.emails import imaging
+
+
+def _encoded(size, fmt="JPEG", mode="RGB"):
+    img = Image.new(mode, size)
+    img.putdata([((x * 7) % 256, (y * 3) % 256, 90) if mode != "P" else x % 256
+                 for y in range(size[1]) for x in range(size[0])])
+    out = io.BytesIO()
+    img.save(out, format=fmt)
+    return out.getvalue()
+
+
+def _open(raw):
+    return Image.open(io.BytesIO(raw))
+
+
+@pytest.fixture()
+def decoded_sizes(monkeypatch):
+    """Size of every file as Pillow actually decoded it."""
+    sizes = []
+    load = ImageFile.ImageFile.load
+
+    def _load(img):
+        sizes.append(img.size)
+        return load(img)
+    monkeypatch.setattr(ImageFile.ImageFile, "load", _load)
+    return sizes
+
+
+def test_a_poster_is_decoded_at_reduced_size_and_cropped_to_the_box(decoded_sizes):
+    out = imaging.cover_bytes(_encoded((1000, 1500)), (120, 180))
+    assert _open(out).size == (120, 180)
+    # 1/4 scale: the largest that stays DRAFT_HEADROOM x the box
+    assert decoded_sizes[0] == (250, 375)
+
+
+def test_cover_crops_a_wide_image_to_a_portrait_box():
+    out = imaging.cover_bytes(_encoded((1920, 1080)), (60, 90))
+    assert _open(out).size == (60, 90)
+
+
+def test_an_image_already_at_the_box_is_left_alone():
+    assert imaging.cover_bytes(_encoded((120, 180)), (120, 180)) is None
+    assert imaging.fit_height_bytes(_encoded((100, 150)), 200) is None
+
+
+def test_a_palette_png_is_converted_once_and_keeps_its_format():
+    out = imaging.cover_bytes(_encoded((400, 600), fmt="PNG", mode="P"), (40, 60), fmt="PNG")
+    img = _open(out)
+    assert img.format == "PNG" and img.mode == "RGB" and img.size == (40, 60)
+
+
+def test_fit_height_and_thumbnail_keep_the_aspect_ratio():
+    assert _open(imaging.fit_height_bytes(_encoded((1000, 1500)), 300)).size == (200, 300)
+    thumb = _open(imaging.thumbnail_bytes(_encoded((1000, 1500), fmt="PNG"), 38))
+    assert thumb.format == "JPEG" and thumb.size == (25, 38)
+
+
+def test_the_blur_runs_on_a_downscaled_intermediate(decoded_sizes):
+    out = _open(imaging.blur_image_bytes(_encoded((1920, 1080))))
+    assert out.size == (imaging.BLUR_WIDTH, 360)
+    assert decoded_sizes[0] == (960, 540)
+    # small sources keep their size
+    assert _open(imaging.blur_image_bytes(_encoded((300, 200), fmt="PNG", mode="RGBA"))).size == (300, 200)
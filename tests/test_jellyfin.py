@@ -169,11 +169,11 @@ def test_pull_stats_jellyfin_branch(csrf_client):
             {'user_id': 'u3', 'username': 'Cat', 'friendly_name': 'Cat',
              'email': 'cat@example.com', 'is_active': False},
         ]
-        with patch("app.blueprints.stats.fetch_jellyfin_library_counts", return_value=[{'section_name': 'Movies', 'count': 5}]), \
-             patch("app.blueprints.stats.fetch_recently_added_using_jellyfin", return_value=fake_recent), \
-             patch("app.blueprints.stats.fetch_jellywatch_home_stats", return_value=[]), \
-             patch("app.blueprints.stats.fetch_jellyfin_users", return_value=fake_users), \
-             patch("app.blueprints.stats.get_jellyfin_server_id", return_value="srv1"):
+        with patch("app.emails.fetchers.fetch_jellyfin_library_counts", return_value=[{'section_name': 'Movies', 'count': 5}]), \
+             patch("app.clients.mediaserver.fetch_recently_added_using_jellyfin", return_value=fake_recent), \
+             patch("app.emails.fetchers.fetch_jellywatch_home_stats", return_value=[]), \
+             patch("app.emails.fetchers.fetch_jellyfin_users", return_value=fake_users), \
+             patch("app.emails.fetchers.get_jellyfin_server_id", return_value="srv1"):
             resp = client.post("/pull_stats", json={"time_range": 30, "count": 10},
                                headers={"X-CSRF-Token": token})
         assert resp.status_code == 200
@@ -15,6 +15,7 @@ functions out of static/js/app/01-preview.js under node:
 """
 import json
 import os
+import re
 import shutil
 import subprocess
 from pathlib import Path
@@ -39,7 +40,19 @@ const script = JSON.parse(process.env.SCRIPT);
 const frame = { srcdoc: '', onload: null };
 const APP = { csrfToken: 'test-token' };
 let _previewSeq = 0;
+const PREVIEW_CLIENT = 'page-1';
 let _previewAbort = null;
+let _previewFragments = null;
+let _previewHtml = '';
+let popoutWindow = null;
+const patched = [];
+// the frame's DOM is not modelled: a patch lands when the scripted step
+// says the document holds what it builds on
+function patchPreviewDocument(doc, update) {
+    patched.push(update);
+    return !(script[calls.length - 1] || {}).stale;
+}
+function resizePreviewFrame() {}
 
 const document = {
     getElementById(id) { return id === 'preview' ? frame : null; },
@@ -50,7 +63,7 @@ async function buildPreviewPayload() { return { subject: 'x' }; }
 // Each scripted entry is one fetch attempt: {ok, html, error, delay}.
 function fetch(url, opts) {
     const step = script[calls.length] || script[script.length - 1];
-    calls.push({ url: url, aborted: false, step: step });
+    calls.push({ url: url, aborted: false, step: step, body: JSON.parse(opts.body) });
     const entry = calls[calls.length - 1];
     return new Promise((resolve, reject) => {
         // Real fetch rejects straight away when handed a signal that is
@@ -71,7 +84,7 @@ function fetch(url, opts) {
                 return;
             }
             resolve({ ok: step.ok !== false, statusText: 'Bad Request',
-                      json: async () => ({ html: step.html, error: step.errorBody }) });
+                      json: async () => step.update || ({ html: step.html, error: step.errorBody }) });
         };
         if (opts && opts.signal) opts.signal.addEventListener('abort', abortNow);
         setTimeout(finish, step.delay || 0);
@@ -85,6 +98,10 @@ def _run(script_steps, driver):
     source = PREVIEW_JS.read_text(encoding="utf-8")
     program = "\n".join([
         STUB_DOM,
+        re.search(r"^const FRAGMENT_RE = .*$", source, re.M).group(0),
+        _extract_js_function(source, "splicePreviewHtml"),
+        _extract_js_function(source, "writePopout"),
+        _extract_js_function(source, "applyPreviewFragments"),
         "async " + _extract_js_function(source, "postPreview"),
         "async " + _extract_js_function(source, "updatePreview"),
         driver,
@@ -166,3 +183,83 @@ def test_cancelled_render_never_writes_an_error_into_the_frame():
         """,
     )
     assert out["srcdoc"] == "<p>fresh</p>"
+
+
+# --- incremental updates
+
+DOC = ("<html><body><div><!--fragment textblock:a--><p>A</p><!--/fragment-->"
+       "<!--fragment textblock:b--><p>B</p><!--/fragment--></div></body></html>")
+FULL = {"html": DOC, "shell": "s1", "order": ["textblock:a", "textblock:b"], "versions": {"textblock:a": "1", "textblock:b": "2"}}
+
+
+def test_each_render_reports_the_sections_the_frame_shows():
+    out = _run(
+        [{"update": FULL}, {"update": {**FULL, "html": DOC}}],
+        """
+        (async () => {
+            await updatePreview();
+            await updatePreview();
+            console.log(JSON.stringify({ known: calls.map(c => c.body.known_fragments) }));
+        })();
+        """,
+    )
+    assert out["known"] == [{}, {"shell": "s1", "versions": {"textblock:a": "1", "textblock:b": "2"}}]
+
+
+def test_changed_sections_are_patched_in_without_reloading_the_frame():
+    patch = {"shell": "s1", "order": ["textblock:b", "textblock:a"], "versions": {"textblock:a": "1", "textblock:b": "3"},
+             "fragments": {"textblock:b": "<p>B2</p>"}}
+    out = _run(
+        [{"update": FULL}, {"update": patch}],
+        """
+        (async () => {
+            await updatePreview();
+            frame.srcdoc = 'loaded';
+            await updatePreview();
+            console.log(JSON.stringify({ srcdoc: frame.srcdoc, patched: patched.length,
+                                         html: currentHtml(), known: _previewFragments }));
+        })();
+        function currentHtml() { return _previewHtml; }
+        """,
+    )
+    assert out["srcdoc"] == "loaded" and out["patched"] == 1
+    # the kept copy of the document follows the patch, for exports and the pop-out
+    assert out["html"] == ("<html><body><div><!--fragment textblock:b--><p>B2</p><!--/fragment-->"
+                           "<!--fragment textblock:a--><p>A</p><!--/fragment--></div></body></html>")
+    assert out["known"]["versions"]["textblock:b"] == "3"
+
+
+def test_a_patch_the_frame_cannot_take_asks_for_the_whole_document():
+    patch = {"shell": "s1", "order": ["textblock:a", "textblock:b"], "versions": {"textblock:a": "1", "textblock:b": "3"},
+             "fragments": {"textblock:b": "<p>B2</p>"}}
+    out = _run(
+        [{"update": FULL}, {"update": patch, "stale": True}, {"update": {**FULL, "html": "<p>reloaded</p>"}}],
+        """
+        (async () => {
+            await updatePreview();
+            await updatePreview();
+            console.log(JSON.stringify({ attempts: calls.length, srcdoc: frame.srcdoc,
+                                         known: calls[2].body.known_fragments }));
+        })();
+        """,
+    )
+    assert out["attempts"] == 3
+    assert out["known"] == {}
+    assert out["srcdoc"] == "<p>reloaded</p>"
+
+
+def test_a_superseded_answer_is_dropped_quietly():
+    """The server drops a waiting render once a newer one from the same page
+    arrives; its 409 is not an error to show."""
+    out = _run(
+        [{"ok": False, "update": {"error": "Superseded by a newer preview", "superseded": True}}],
+        """
+        (async () => {
+            frame.srcdoc = 'current';
+            await updatePreview();
+            console.log(JSON.stringify({ srcdoc: frame.srcdoc, client: calls[0].body.preview_client }));
+        })();
+        """,
+    )
+    assert out["srcdoc"] == "current"
+    assert out["client"] == "page-1"
@@ -0,0 +1,65 @@
+"""The builder index leaves the snap-in datasets out of the page; each card
+fetches its data from /datasets/<name>, revalidated by ETag."""
+
+import sqlite3
+
+import pytest
+
+from app import config
+from app.cache import clear_cache, set_cached_data
+
+REQUESTS = [{"title": "Heat-Lazy-Marker", "type": "movie"}]
+
+
+@pytest.fixture()
+def configured(client):
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.execute("UPDATE settings SET from_email = 'nl@example.com', server_name = 'TestPlex' WHERE id = 1")
+    conn.commit()
+    conn.close()
+    yield client
+    clear_cache()
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.execute("UPDATE settings SET from_email = NULL, server_name = NULL WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+
+def test_index_ships_the_card_but_not_its_data(configured):
+    set_cached_data("ombi_requests_json", REQUESTS)
+    html = configured.get("/").get_data(as_text=True)
+    assert 'id="ombi-requests-list"' in html
+    assert 'data-dataset-url="/datasets/ombi_requests"' in html
+    assert "Heat-Lazy-Marker" not in html
+    # nothing cached: no card, no fetch, the empty value inline as before
+    assert 'data-dataset-url="/datasets/seerr_requests"' not in html
+    assert 'id="seerr-requests-list"' not in html
+
+
+def test_dataset_revalidates_by_etag(configured):
+    set_cached_data("ombi_requests_json", REQUESTS)
+    resp = configured.get("/datasets/ombi_requests")
+    assert resp.status_code == 200
+    assert resp.get_json() == {"name": "ombi_requests", "data": REQUESTS}
+    assert resp.headers["Cache-Control"] == "private, no-cache"
+    etag = resp.headers["ETag"]
+
+    again = configured.get("/datasets/ombi_requests", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+
+    # a pull replaces the entry, so the old tag no longer matches
+    set_cached_data("ombi_requests_json", REQUESTS + [{"title": "Ronin", "type": "movie"}])
+    changed = configured.get("/datasets/ombi_requests", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.get_json()["data"]) == 2
+
+
+def test_empty_and_unknown_datasets(configured):
+    assert configured.get("/datasets/seerr_requests").get_json() == {"name": "seerr_requests", "data": None}
+    assert configured.get("/datasets/stats").status_code == 404
+
+
+def test_datasets_need_login(anon_client, seeded_settings):
+    assert anon_client.get("/datasets/ombi_requests").status_code in (302, 401)
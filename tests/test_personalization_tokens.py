@@ -93,6 +93,35 @@ def test_a_name_cannot_inject_another_token():
     assert out == "Hi {{email}},"
 
 
+# --- compiled templates
+
+PLACEHOLDER = "__UNSUB_TOKEN_0123__"
+
+
+def test_a_template_renders_what_replace_then_resolve_did():
+    body = f'<p>Hi {{{{ first_name }}}}</p><a href="/u/{PLACEHOLDER}">{{{{email}}}}</a> /u/{PLACEHOLDER}'
+    template = personalization.Template(body, PLACEHOLDER)
+    for email, name in (("ada@example.com", "Ada <Lovelace>"), ("b@x.co", None)):
+        token = f"tok-{email}"
+        expected = personalization.resolve(body.replace(PLACEHOLDER, token), email, name, escape=True)
+        assert template.render(personalization.recipient_values(email, name), token) == expected
+
+
+def test_a_template_uses_the_token_positions_it_is_given():
+    body = "Hi {{name}}, {{email}}"
+    template = personalization.Template(body, token_slots=[(3, 11, "name")], escape=False)
+    # only the given slot is spliced
+    assert template.render(personalization.recipient_values("a@b.co", "Ada")) == "Hi Ada, {{email}}"
+
+
+def test_without_values_a_template_gives_the_body_back():
+    body = f"Hi {{{{name}}}} /u/{PLACEHOLDER}"
+    assert personalization.Template(body, PLACEHOLDER).render({}) == body
+    # no token slots: only the unsubscribe token is spliced
+    assert personalization.Template(body, PLACEHOLDER, token_slots=()).render(
+        personalization.recipient_values("a@b.co", "Ada"), "tok") == "Hi {{name}} /u/tok"
+
+
 # --- the fan-out decision
 
 def test_a_token_forces_per_recipient_sending():
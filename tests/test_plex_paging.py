@@ -0,0 +1,92 @@
+"""Recently added paging: Plex is asked for what the newsletter shows, not a
+multiple of it, and pages further only when rows get filtered out."""
+
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.clients import plex
+
+
+class _Response:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture()
+def plex_rows(monkeypatch):
+    """A movie library of `rows` served through a fake safe_get that honours
+    X-Plex-Container-Start/Size. Returns (rows, requests)."""
+    rows = []
+    requests = []
+
+    def _get(url, **kw):
+        qs = parse_qs(urlparse(url).query)
+        start = int(qs["X-Plex-Container-Start"][0])
+        size = int(qs["X-Plex-Container-Size"][0])
+        requests.append((start, size))
+        return _Response({"MediaContainer": {
+            "librarySectionTitle": "Movies",
+            "Metadata": rows[start:start + size],
+        }})
+
+    monkeypatch.setattr(plex, "safe_get", _get)
+    monkeypatch.setattr(plex, "get_plex_headers", lambda: {})
+    monkeypatch.setattr(plex, "_plex_credentials", lambda: ("http://plex", "token", ""))
+    return rows, requests
+
+
+def _movie(n, duration=1000):
+    return {"ratingKey": str(n), "title": f"Movie {n}", "duration": duration}
+
+
+def test_items_mode_requests_exactly_items_count(plex_rows):
+    rows, requests = plex_rows
+    rows.extend(_movie(n) for n in range(50))
+    movies = plex.fetch_movies_from_plex_sdk("1", limit=10)
+    assert [m["rating_key"] for m in movies] == [str(n) for n in range(10)]
+    assert requests == [(0, 10)]
+
+
+def test_items_mode_pages_past_rows_without_duration(plex_rows):
+    rows, requests = plex_rows
+    rows.extend(_movie(n, duration=0 if n < 3 else 1000) for n in range(50))
+    movies = plex.fetch_movies_from_plex_sdk("1", limit=10)
+    assert [m["rating_key"] for m in movies] == [str(n) for n in range(3, 13)]
+    assert requests == [(0, 10), (10, 3)]
+
+
+def test_days_mode_reads_every_page_of_the_window(plex_rows, monkeypatch):
+    monkeypatch.setattr(plex, "PLEX_PAGE_SIZE", 4)
+    rows, requests = plex_rows
+    rows.extend(_movie(n) for n in range(10))
+    movies = plex.fetch_movies_from_plex_sdk("1", days=7)
+    assert len(movies) == 10
+    assert requests == [(0, 4), (4, 4), (8, 4)]
+
+
+def test_rating_sort_widens_the_candidate_pool(monkeypatch):
+    seen = []
+    monkeypatch.setattr(plex, "get_settings", lambda **kw: {"id": 1, "plex_web_url": ""})
+    monkeypatch.setattr(plex, "get_plex_machine_id", lambda: "machine-id")
+    monkeypatch.setattr(plex, "fetch_library_sections_with_genres", lambda **kw: [])
+    monkeypatch.setattr(plex, "run_tautulli_command", lambda *a, **k: (
+        [{"section_id": "1", "section_type": "movie", "section_name": "Movies"}], None))
+
+    def _movies(section_id, limit, *a, **k):
+        seen.append(limit)
+        return [{"rating": str(n % 7)} for n in range(limit)]
+
+    monkeypatch.setattr(plex, "fetch_movies_from_plex_sdk", _movies)
+
+    by_date = plex.fetch_recently_added_using_plex_sdk("http://tautulli", "key", 4)
+    by_rating = plex.fetch_recently_added_using_plex_sdk("http://tautulli", "key", 4, recently_added_sort="rating")
+    assert seen == [4, 4 * plex.RATING_SORT_POOL]
+    assert len(by_date[0]["recently_added"]) == 4
+    assert [m["rating"] for m in by_rating[0]["recently_added"]] == ["6", "6", "5", "5"]
@@ -0,0 +1,112 @@
+"""The single-pass post-processor (app/emails/postprocess.py) gives the same
+HTML and plain text as minify_email_html, compact_email_html and
+convert_html_to_plain_text run one after the other, and processes a given
+document once."""
+
+import json
+
+from pathlib import Path
+
+import pytest
+
+from app.emails import compact, postprocess
+
+GOLDENS = sorted(p for p in (Path(__file__).parent / "goldens").glob("*.json")
+                 if "<!DOCTYPE" in json.loads(p.read_text()).get("html", ""))
+
+DOC = """<!DOCTYPE html>
+    <html>
+        <head>
+            <title>Hi {{ first_name }} &amp; co</title>
+            <!--[if mso]>
+            <xml>  <o:PixelsPerInch>96</o:PixelsPerInch>  </xml>
+            <![endif]-->
+            <style>
+                .card { color: red!important; }
+            </style>
+        </head>
+        <body style="margin: 0;  padding: 0;">
+            <h2 style="color: #fff; color: #fff;">Recently   Added</h2>
+            <table><tr>
+                <td style="padding: 8px;">A  &gt;
+                </td>
+                <td class="" style="">B</td>
+            </tr></table>
+            <p>Hello {{name}},<br/>see <a href="https://x.test/?a=1&amp;b=2">this</a> and
+               <img src="cid:p" alt="Poster &quot;1&quot;" /> 5 &lt; 6</p>
+            <ul><li>One</li><li>Two</li></ul>
+            <p>Unsubscribe: {{ email }}</p>
+        </body>
+    </html>
+"""
+
+
+def _reference(document):
+    html = compact.compact_email_html(postprocess.minify_email_html(document))
+    return html, postprocess.convert_html_to_plain_text(html)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_memo():
+    postprocess._memo.clear()
+
+
+def test_one_pass_matches_the_separate_passes():
+    result = postprocess.process_email_html(DOC)
+    assert (result.html, result.plain_text) == _reference(DOC)
+
+
+@pytest.mark.parametrize("golden", GOLDENS, ids=lambda p: p.stem)
+def test_one_pass_matches_the_separate_passes_on_every_layout(golden):
+    html = json.loads(golden.read_text())["html"]
+    # put back the source indentation the builders' f-strings carry
+    document = html.replace("><", ">\n            <")
+    result = postprocess.process_email_html(document)
+    assert (result.html, result.plain_text) == _reference(document)
+
+
+def test_over_the_clip_limit_styles_are_interned(monkeypatch):
+    monkeypatch.setattr(compact, "GMAIL_CLIP_BYTES", 200)
+    document = DOC.replace("<ul>", '<div style="color: red; font-weight: bold;">x</div>' * 10 + "<ul>")
+    result = postprocess.process_email_html(document)
+    assert "<style>.s0{color:red;font-weight:bold}</style>" in result.html
+    assert result.html == compact.compact_email_html(postprocess.minify_email_html(document), limit=200)
+    # slots were taken again from the interned HTML
+    assert [result.html[a:b] for a, b, _ in result.token_slots] == ["{{ first_name }}", "{{name}}", "{{ email }}"]
+
+
+def test_token_slots_and_sizes():
+    result = postprocess.process_email_html(DOC)
+    assert [name for _, _, name in result.token_slots] == ["first_name", "name", "email"]
+    assert [result.html[a:b] for a, b, _ in result.token_slots] == ["{{ first_name }}", "{{name}}", "{{ email }}"]
+    assert [result.plain_text[a:b] for a, b, _ in result.plain_token_slots] == ["{{ first_name }}", "{{name}}", "{{ email }}"]
+    assert result.html_bytes == len(result.html.encode("utf-8"))
+    assert result.plain_bytes == len(result.plain_text.encode("utf-8"))
+
+
+def test_a_document_is_processed_once(monkeypatch):
+    calls = []
+    process = postprocess._process
+    monkeypatch.setattr(postprocess, "_process", lambda doc: calls.append(doc) or process(doc))
+    first = postprocess.process_email_html(DOC)
+    # the send path hands assembly's output back in
+    assert postprocess.processed_email(first.html) is first
+    assert postprocess.process_email_html(DOC) is first
+    assert len(calls) == 1
+
+
+def test_html_that_was_not_assembled_is_sent_as_written():
+    custom = "<html><body><table><tr><td>Big Hit</td>\n    <td>2020</td></tr></table>\n<p>Hi {{ name }}</p></body></html>"
+    result = postprocess.processed_email(custom)
+    assert result.html == custom
+    assert result.plain_text == postprocess.convert_html_to_plain_text(custom)
+    assert [custom[a:b] for a, b, _ in result.token_slots] == ["{{ name }}"]
+    # asking the pipeline for the same text still processes it
+    assert postprocess.process_email_html(custom).html != custom
+
+
+def test_the_memo_keeps_the_most_recent_documents(monkeypatch):
+    monkeypatch.setattr(postprocess, "MEMO_SIZE", 4)
+    for i in range(10):
+        postprocess.process_email_html(f"<p>{i}</p>")
+    assert len(postprocess._memo) <= 4
@@ -0,0 +1,130 @@
+"""Builder previews are latest-wins per page and capped per session
+(app/emails/preview.render_latest): a preview superseded while it waits for
+a render slot never renders."""
+import threading
+import time
+
+import pytest
+
+from app.emails import preview
+
+
+@pytest.fixture(autouse=True)
+def _idle_sessions():
+    yield
+    assert preview._sessions == {}
+
+
+def _start(session_key, client, render, results):
+    def _run():
+        results.append(preview.render_latest(session_key, client, render))
+    thread = threading.Thread(target=_run)
+    thread.start()
+    return thread
+
+
+def _busy_render(started, release, value="rendered"):
+    def _render():
+        started.set()
+        release.wait(5)
+        return value
+    return _render
+
+
+def _wait_for_waiters(session_key, count):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with preview._lock:
+            entry = preview._sessions.get(session_key)
+            if entry and entry['waiting'] >= count:
+                return
+        time.sleep(0.005)
+    raise AssertionError("previews never queued")
+
+
+def test_a_waiting_preview_is_dropped_when_a_newer_one_arrives():
+    started, release = threading.Event(), threading.Event()
+    first, waiting, latest = [], [], []
+    t1 = _start("s", "page", _busy_render(started, release, "first"), first)
+    started.wait(5)
+    renders = []
+    t2 = _start("s", "page", lambda: renders.append("stale") or "stale", waiting)
+    _wait_for_waiters("s", 1)
+    t3 = _start("s", "page", lambda: renders.append("latest") or "latest", latest)
+    t2.join(5)
+    # superseded before a slot came free, so it never rendered
+    assert waiting == [(None, preview.SUPERSEDED)]
+    release.set()
+    t1.join(5)
+    t3.join(5)
+    assert first == [("first", None)] and latest == [("latest", None)]
+    assert renders == ["latest"]
+
+
+def test_a_session_renders_one_preview_at_a_time():
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def _render():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return "ok"
+
+    results = []
+    # different pages of one session are capped together, but not superseded
+    threads = [_start("s", f"page-{i}", _render, results) for i in range(4)]
+    for thread in threads:
+        thread.join(5)
+    assert peak[0] == preview.PREVIEW_RENDERS_PER_SESSION
+    assert results == [("ok", None)] * 4
+
+
+def test_sessions_do_not_wait_on_each_other():
+    started, release = threading.Event(), threading.Event()
+    held = []
+    t1 = _start("one", "page", _busy_render(started, release), held)
+    started.wait(5)
+    try:
+        assert preview.render_latest("two", "page", lambda: "other") == ("other", None)
+    finally:
+        release.set()
+        t1.join(5)
+
+
+def test_previews_without_a_client_id_are_never_superseded():
+    started, release = threading.Event(), threading.Event()
+    held, results = [], []
+    t1 = _start("s", "", _busy_render(started, release), held)
+    started.wait(5)
+    t2 = _start("s", "", lambda: "a", results)
+    _wait_for_waiters("s", 1)
+    t3 = _start("s", "", lambda: "b", results)
+    release.set()
+    for thread in (t1, t2, t3):
+        thread.join(5)
+    assert sorted(results) == [("a", None), ("b", None)]
+
+
+def test_a_preview_gives_up_when_no_slot_comes_free(monkeypatch):
+    monkeypatch.setattr(preview, "PREVIEW_SLOT_WAIT", 0.05)
+    started, release = threading.Event(), threading.Event()
+    held = []
+    t1 = _start("s", "page-a", _busy_render(started, release), held)
+    started.wait(5)
+    try:
+        assert preview.render_latest("s", "page-b", lambda: "late") == (None, preview.BUSY)
+    finally:
+        release.set()
+        t1.join(5)
+
+
+def test_a_failed_render_frees_its_slot():
+    def _boom():
+        raise RuntimeError("render failed")
+
+    with pytest.raises(RuntimeError):
+        preview.render_latest("s", "page", _boom)
+    assert preview.render_latest("s", "page", lambda: "next") == ("next", None)
@@ -0,0 +1,165 @@
+"""The live preview keeps each section's rendered HTML (app/emails/fragments.py),
+so an edit re-renders the section that changed and nothing else."""
+import pytest
+
+from app.emails import fragments
+
+
+@pytest.fixture(autouse=True)
+def _fresh_fragments():
+    fragments.clear_fragments()
+    yield
+    fragments.clear_fragments()
+
+
+def _payload(texts):
+    return {"subject": "s", "custom_html": "", "email_header_title": "", "expanded_collections": {},
+            "items_count": None,
+            "selected_items": [{"id": f"text-{i}", "type": "textblock", "content": text} for i, text in enumerate(texts)]}
+
+
+@pytest.fixture()
+def rendered_blocks(app, seeded_settings, monkeypatch):
+    """Renders a payload through the preview and lists the text blocks that
+    were actually rendered."""
+    from app.emails import assemble
+    from app.emails.preview import render_preview_email
+
+    calls = []
+    build = assemble.build_text_block_html
+
+    def _counting(content, *args, **kwargs):
+        calls.append(content)
+        return build(content, *args, **kwargs)
+
+    monkeypatch.setattr(assemble, "build_text_block_html", _counting)
+
+    def _render(payload):
+        calls.clear()
+        with app.app_context():
+            html = render_preview_email(payload)
+        return html, list(calls)
+
+    return _render
+
+
+def test_editing_one_section_re_renders_only_that_section(rendered_blocks):
+    texts = [f"Section {i}" for i in range(20)]
+    _, first = rendered_blocks(_payload(texts))
+    assert first == texts
+
+    texts[7] = "Section 7, edited"
+    html, second = rendered_blocks(_payload(texts))
+    assert second == ["Section 7, edited"]
+    assert "Section 7, edited" in html and "Section 19" in html
+
+
+def test_reordering_sections_re_renders_nothing(rendered_blocks):
+    payload = _payload(["One", "Two", "Three"])
+    rendered_blocks(payload)
+    payload["selected_items"].reverse()
+    html, calls = rendered_blocks(payload)
+    assert calls == []
+    assert html.index("Three") < html.index("One")
+
+
+def test_a_document_from_kept_sections_matches_a_fresh_render(rendered_blocks):
+    payload = _payload(["Alpha & Omega", "Beta"])
+    fresh, _ = rendered_blocks(payload)
+    kept, calls = rendered_blocks(payload)
+    assert calls == [] and kept == fresh
+
+
+def test_a_refilled_data_segment_re_renders_every_section(rendered_blocks):
+    from app.cache import set_cached_data
+
+    rendered_blocks(_payload(["One", "Two"]))
+    set_cached_data("stats", [], {"timestamp": 0})
+    _, calls = rendered_blocks(_payload(["One", "Two"]))
+    assert calls == ["One", "Two"]
+
+
+def test_a_random_pick_is_drawn_on_every_render():
+    draws = []
+    item = {"type": "random_pick", "sectionId": "1"}
+    for _ in range(2):
+        fragments.cached_render(lambda it, i: draws.append(it) or "<p>pick</p>", item, 0, "ctx")
+    assert len(draws) == 2
+
+
+def test_the_cache_keeps_the_most_recent_sections(monkeypatch):
+    monkeypatch.setattr(fragments, "CACHE_SIZE", 4)
+    for i in range(10):
+        fragments.cached_render(lambda it, _i: "<p/>", {"type": "textblock", "content": str(i)}, 0, "ctx")
+    assert len(fragments._fragments) == 4
+
+
+# --- the incremental protocol
+
+def _post(csrf_client, payload):
+    import json
+    client, token = csrf_client
+    resp = client.post("/preview_email", data=json.dumps(payload), content_type="application/json",
+                       headers={"X-CSRF-Token": token})
+    assert resp.status_code == 200, resp.get_json()
+    return resp.get_json()
+
+
+def _known(update):
+    return {"shell": update["shell"], "versions": update["versions"]}
+
+
+def test_a_payload_without_known_fragments_gets_the_plain_document(csrf_client):
+    out = _post(csrf_client, _payload(["One"]))
+    assert set(out) == {"html"}
+    assert "<!--fragment" not in out["html"]
+
+
+def test_the_first_update_is_the_whole_marked_document(csrf_client):
+    out = _post(csrf_client, {**_payload(["One", "Two"]), "known_fragments": {}})
+    assert out["order"] == ["textblock:text-0", "textblock:text-1"]
+    assert set(out["versions"]) == set(out["order"])
+    assert "<!--fragment textblock:text-1-->" in out["html"] and "fragments" not in out
+
+
+def test_an_edit_sends_only_the_section_that_changed(csrf_client):
+    first = _post(csrf_client, {**_payload(["One", "Two", "Three"]), "known_fragments": {}})
+    edited = {**_payload(["One", "Two, edited", "Three"]), "known_fragments": _known(first)}
+    update = _post(csrf_client, edited)
+    assert "html" not in update and update["shell"] == first["shell"]
+    assert list(update["fragments"]) == ["textblock:text-1"]
+    assert "Two, edited" in update["fragments"]["textblock:text-1"]
+
+    # patched in, the sections make the document a full render would have
+    full = _post(csrf_client, {**edited, "known_fragments": {}})["html"]
+    shell, sections = fragments.split_marked(first["html"])
+    patched = dict(sections, **update["fragments"])
+    assert [patched[i] for i in update["order"]] == [s for _, s in fragments.split_marked(full)[1]]
+    assert shell == fragments.split_marked(full)[0]
+
+
+def test_a_new_layout_reloads_the_whole_document(app, csrf_client):
+    import sqlite3
+    from app import config
+
+    first = _post(csrf_client, {**_payload(["One"]), "known_fragments": {}})
+
+    def _layout(value):
+        conn = sqlite3.connect(config.DB_PATH)
+        conn.execute("UPDATE settings SET email_layout = ? WHERE id = 1", (value,))
+        conn.commit()
+        conn.close()
+
+    _layout("spotlight")
+    try:
+        update = _post(csrf_client, {**_payload(["One"]), "known_fragments": _known(first)})
+    finally:
+        _layout("classic")
+    assert update["shell"] != first["shell"] and "html" in update
+
+
+def test_fragment_ids_are_unique_and_safe_inside_a_comment():
+    items = [{"type": "graph", "id": "Plays by Date"}, {"type": "graph", "id": "Plays by Date"},
+             {"type": "separator"}, {"type": "stat", "id": "x-->y"}]
+    assert fragments.fragment_ids(items) == [
+        "graph:Plays_by_Date", "graph:Plays_by_Date~2", "separator:2", "stat:x--_y"]
@@ -8,9 +8,11 @@ def _clear_cache():
     from app import state
     with state._CACHE_LOCK:
         state.cache_storage.clear()
+        state.cache_bytes['total'] = 0
     yield
     with state._CACHE_LOCK:
         state.cache_storage.clear()
+        state.cache_bytes['total'] = 0
 
 
 THEME = {
@@ -143,12 +145,13 @@ def test_featured_pick_with_nothing_to_resolve_does_no_work(monkeypatch):
     assert assemble_mod._featured_pick_cached("", "") is None
 
 
-def test_random_pick_is_deliberately_not_cached():
-    """It draws a fresh item per render on purpose - the builder says so - and
-    that is a live call each time. Documented here so the next person reading
-    the preview timings knows it is a choice, not an oversight."""
+def test_random_pick_draws_fresh_from_the_reservoir():
+    """It draws a fresh item per render on purpose - the builder says so - but
+    from the in-memory reservoir, not a live Plex call. The pick itself must
+    never be memoized per render key."""
     from pathlib import Path
     source = (Path(__file__).resolve().parent.parent / "app/emails/assemble.py").read_text(encoding="utf-8")
     block = source.split("item_type == 'random_pick'")[1].split("elif item_type ==")[0]
-    assert "fetch_random_library_item(" in block
-    assert "_cached" not in block
+    assert "pick_random_library_item(" in block
+    assert "fetch_random_library_item(" not in block
+    assert "get_cached_data" not in block
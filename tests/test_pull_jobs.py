@@ -0,0 +1,152 @@
+"""Pulls as background jobs: POST /pull_jobs runs the pull function off the
+request pool, /pull_jobs/<id> answers its events after ?after=, /result
+returns what the pull's own route would."""
+
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from app import config, state
+from app import pulls
+from app.crypto import encrypt
+from app.settings_store import get_settings
+
+
+@pytest.fixture()
+def ombi(csrf_client, monkeypatch):
+    """Ombi configured, with movie requests held until `release` is set."""
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.execute("UPDATE settings SET ombi_url = 'http://ombi', ombi_api_key = ? WHERE id = 1", (encrypt("k"),))
+    conn.commit()
+    conn.close()
+
+    release = threading.Event()
+    calls = []
+
+    def _movies(url, key):
+        calls.append(url)
+        release.wait(5)
+        return [{"title": "Heat", "requestedDate": "2026-01-01T00:00:00"}], None
+
+    monkeypatch.setattr(pulls, "fetch_ombi_movie_requests", _movies)
+    monkeypatch.setattr(pulls, "fetch_ombi_tv_requests", lambda url, key: ([], None))
+    yield csrf_client, release, calls
+    release.set()
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.execute("UPDATE settings SET ombi_url = NULL, ombi_api_key = NULL WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+
+def _payload(libs=()):
+    # what the page posts: its current data plus APP.settings
+    return json.dumps({"stats": [], "graph_data": [], "graph_commands": [], "recent_data": [],
+                       "libs": list(libs), "user_dict": {},
+                       "settings": get_settings(decrypt_secrets=False)}).encode()
+
+
+def _start(client, token, body=None):
+    body = _payload() if body is None else body
+    return client.post("/pull_jobs?op=pull_ombi_requests", data=body,
+                       headers={"X-CSRF-Token": token, "Content-Type": "application/json", "Accept": "text/html"})
+
+
+def _poll(client, job, after=0):
+    resp = client.get(f"{job['poll_url']}?after={after}")
+    assert resp.status_code == 200
+    return resp.get_json()
+
+
+def _wait(client, job, timeout=5):
+    """Polls like the page does until the done event arrives."""
+    import time
+    events, deadline = [], time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        body = _poll(client, job, events[-1]["id"] if events else 0)
+        events += body["events"]
+        if body["done"]:
+            return events
+        time.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+def test_job_reports_progress_partials_and_the_pulls_response(ombi):
+    (client, token), release, calls = ombi
+    resp = _start(client, token)
+    assert resp.status_code == 202
+    job = resp.get_json()
+    assert job["deduplicated"] is False
+
+    # the pull is waiting on Ombi; its result is not there yet, and a poll
+    # answers at once rather than waiting for it
+    assert client.get(job["result_url"]).status_code == 202
+    assert _poll(client, job)["done"] is False
+    release.set()
+
+    events = _wait(client, job)
+    kinds = [event["event"] for event in events]
+    assert kinds[0] == "progress"
+    assert "partial" in kinds
+    assert kinds[-1] == "done"
+    assert {"segment": "ombi_requests_json"} in [event["data"] for event in events]
+
+    result = client.get(job["result_url"])
+    assert result.status_code == 200
+    page = result.get_data(as_text=True)
+    assert "Heat" in page
+    # rendered in the result request, so the page gets its own session's token
+    assert token in page
+    assert len(calls) == 1
+
+
+def test_identical_submits_join_the_running_job(ombi):
+    (client, token), release, calls = ombi
+    first = _start(client, token).get_json()
+    second = _start(client, token).get_json()
+    other = _start(client, token, body=_payload(libs=["1"])).get_json()
+    assert second["job_id"] == first["job_id"] and second["deduplicated"] is True
+    assert other["job_id"] != first["job_id"]
+    release.set()
+    _wait(client, first)
+    _wait(client, other)
+    assert len(calls) == 2
+
+
+def test_polling_resumes_after_the_last_event_id(ombi):
+    (client, token), release, calls = ombi
+    release.set()
+    job = _start(client, token).get_json()
+    everything = _wait(client, job)
+    assert _poll(client, job, after=2)["events"] == everything[2:]
+
+
+def test_the_job_calls_the_pull_without_replaying_the_request(ombi, app):
+    """No request hooks run for the job: the pull's route is never
+    dispatched, only the job's own requests are."""
+    from flask import request
+    (client, token), release, calls = ombi
+    release.set()
+    seen = []
+    app.before_request_funcs.setdefault(None, []).append(lambda: seen.append(request.path))
+    try:
+        job = _start(client, token).get_json()
+        _wait(client, job)
+    finally:
+        app.before_request_funcs[None].pop()
+    assert "/pull_ombi_requests" not in seen
+    assert len(calls) == 1
+
+
+def test_unknown_pulls_and_jobs_are_rejected(csrf_client):
+    client, token = csrf_client
+    resp = client.post("/pull_jobs?op=clear_cache", headers={"X-CSRF-Token": token})
+    assert resp.status_code == 400
+    assert client.get("/pull_jobs/nope").status_code == 404
+    assert client.get("/pull_jobs/nope/result").status_code == 404
+
+
+def test_submitting_a_job_needs_the_csrf_token(client):
+    assert client.post("/pull_jobs?op=pull_ombi_requests", json={}).status_code == 400
+    assert not any(job["op"] == "pull_ombi_requests" and not job["finished"] for job in state.pull_jobs.values())
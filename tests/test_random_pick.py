@@ -89,3 +89,113 @@ def test_fetch_random_library_item_empty_section_returns_none(monkeypatch):
 def test_fetch_random_library_item_unconfigured_returns_none(monkeypatch):
     monkeypatch.setattr(plex, "get_settings", lambda **k: {"id": 1, "plex_url": "", "plex_token": ""})
     assert plex.fetch_random_library_item("5") is None
+
+# Reservoir: renders sample an in-memory copy of the section instead of
+# probing Plex; refreshes run on a background thread (called inline here).
+
+def _row(n, updated=100):
+    return {"ratingKey": str(n), "title": f"Item {n}", "type": "movie", "updatedAt": updated}
+
+@pytest.fixture()
+def reservoir(monkeypatch):
+    """A section served by a fake Plex that honours paging, totalSize, and
+    updatedAt>>= filters. Returns (rows, urls, scheduled)."""
+    rows = []
+    urls = []
+    scheduled = []
+
+    def _fake_safe_get(url, **kwargs):
+        from urllib.parse import parse_qs, urlparse
+        urls.append(url)
+        qs = parse_qs(urlparse(url).query)
+        matching = rows
+        if "updatedAt>>" in qs:
+            since = int(qs["updatedAt>>"][0].lstrip("="))
+            matching = [r for r in rows if r["updatedAt"] >= since]
+        start = int(qs["X-Plex-Container-Start"][0])
+        size = int(qs["X-Plex-Container-Size"][0])
+        return _FakeResponse({"MediaContainer": {
+            "librarySectionTitle": "Movies",
+            "totalSize": len(matching),
+            "Metadata": matching[start:start + size],
+        }})
+
+    monkeypatch.setattr(plex, "get_settings", lambda **k: {"id": 1, "plex_url": "http://plex.local", "plex_token": "enc-token", "plex_web_url": None})
+    monkeypatch.setattr(plex, "decrypt", lambda v: "tok")
+    monkeypatch.setattr(plex, "get_plex_machine_id", lambda: "machine1")
+    monkeypatch.setattr(plex, "safe_get", _fake_safe_get)
+    monkeypatch.setattr(plex, "_schedule_reservoir_refresh", lambda keys: scheduled.append(list(keys)))
+    monkeypatch.setattr(plex, "_reservoirs", {})
+    return rows, urls, scheduled
+
+def test_cold_reservoir_falls_back_to_a_live_draw(reservoir, monkeypatch):
+    rows, urls, scheduled = reservoir
+    monkeypatch.setattr(plex, "fetch_random_library_item", lambda section_id, genre=None: {"title": "live"})
+    assert plex.pick_random_library_item("5")["title"] == "live"
+    assert scheduled == [[("5", ""), ("5", "")]]
+
+def test_warm_reservoir_samples_without_plex_calls(reservoir, monkeypatch):
+    rows, urls, _ = reservoir
+    rows.extend(_row(n) for n in range(10))
+    plex.refresh_random_pick_reservoir(("5", ""))
+    urls.clear()
+    monkeypatch.setattr(plex.random, "randrange", lambda n: 3)
+    pick = plex.pick_random_library_item("5")
+    assert pick["rating_key"] == "3"
+    assert pick["library_name"] == "Movies"
+    assert urls == []
+
+def test_genre_reservoir_samples_its_own_keys(reservoir, monkeypatch):
+    rows, urls, _ = reservoir
+    rows.extend(_row(n) for n in range(10))
+    plex.refresh_random_pick_reservoir(("5", ""))
+    plex._reservoirs[("5", "88")] = {"keys": ["7", "8"], "refreshed_at": 0}
+    monkeypatch.setattr(plex.random, "randrange", lambda n: 1)
+    assert plex.pick_random_library_item("5", genre="88")["rating_key"] == "8"
+
+def test_incremental_refresh_merges_updated_rows(reservoir):
+    rows, urls, _ = reservoir
+    rows.extend(_row(n) for n in range(5))
+    plex.refresh_random_pick_reservoir(("5", ""))
+    rows[2] = dict(_row(2, updated=200), title="Renamed")
+    rows.append(_row(5, updated=200))
+    urls.clear()
+    plex.refresh_random_pick_reservoir(("5", ""))
+    entry = plex._reservoirs[("5", "")]
+    assert entry["items"]["2"]["title"] == "Renamed"
+    assert sorted(entry["keys"]) == ["0", "1", "2", "3", "4", "5"]
+    assert not any("sort=addedAt" in url for url in urls)
+
+def test_deletions_trigger_a_full_rebuild(reservoir):
+    rows, urls, _ = reservoir
+    rows.extend(_row(n) for n in range(5))
+    plex.refresh_random_pick_reservoir(("5", ""))
+    del rows[1]
+    plex.refresh_random_pick_reservoir(("5", ""))
+    assert sorted(plex._reservoirs[("5", "")]["keys"]) == ["0", "2", "3", "4"]
+
+def test_failed_refresh_keeps_the_previous_reservoir(reservoir, monkeypatch):
+    rows, _, _ = reservoir
+    rows.extend(_row(n) for n in range(3))
+    plex.refresh_random_pick_reservoir(("5", ""))
+
+    def _down(url, **kwargs):
+        raise ConnectionError("plex down")
+
+    monkeypatch.setattr(plex, "safe_get", _down)
+    plex._reservoirs[("5", "")]["built_at"] = 0
+    plex.refresh_random_pick_reservoir(("5", ""))
+    assert len(plex._reservoirs[("5", "")]["keys"]) == 3
+
+def test_section_table_is_reused(monkeypatch):
+    calls = []
+
+    def _sections(**kw):
+        calls.append(kw)
+        return [{"section_id": "5", "title": "Movies", "type": "movie", "genres": []}]
+
+    monkeypatch.setattr(plex, "fetch_library_sections_with_genres", _sections)
+    monkeypatch.setattr(plex, "_section_table", {"sections": None, "timestamp": 0})
+    plex.get_library_sections_cached()
+    assert plex.get_library_sections_cached()[0]["section_id"] == "5"
+    assert len(calls) == 1
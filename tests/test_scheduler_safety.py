@@ -35,3 +35,45 @@ def test_advance_moves_next_send_future_without_touching_last_sent(app):
     assert datetime.fromisoformat(after[0]) > datetime.now()
     # last_sent untouched (only a successful send records that)
     assert after[1] == before[1]
+
+def test_the_daily_refresh_fetches_what_the_manual_pull_does(csrf_client, monkeypatch):
+    from app.cache import clear_cache, get_cache_info
+    from app.crypto import encrypt
+    from app.emails import fetchers
+    from app.scheduler import refresh_daily_cache
+
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.execute("UPDATE settings SET server_name = 'Srv', tautulli_url = 'http://tt.local/', tautulli_api = ? WHERE id = 1",
+                 (encrypt("tt-key"),))
+    conn.commit()
+    conn.close()
+
+    calls = []
+
+    def _tautulli(url, key, command, name, error, *args, **kwargs):
+        calls.append((url, key, command, args, kwargs))
+        return ([{"email": "a@b.c", "is_active": True, "user_id": 1}] if command == 'get_users' else [{"command": command}]), error
+
+    monkeypatch.setattr(fetchers, "run_tautulli_command", _tautulli)
+    monkeypatch.setattr(fetchers, "fetch_recently_added", lambda *a, **k: calls.append(("recent", a[2])) or [{"recent": True}])
+    monkeypatch.setattr(fetchers, "fetch_most_watched_data", lambda *a, **k: calls.append(("most_watched", k)) or [{"most": True}])
+    try:
+        client, token = csrf_client
+        resp = client.post("/pull_stats", json={"time_range": 7, "count": 5}, headers={"X-CSRF-Token": token})
+        assert resp.status_code == 200 and resp.get_json()["success"] is True
+        pulled = list(calls)
+
+        calls.clear()
+        refresh_daily_cache()
+        # same fetches, same window and the decrypted key, and the refresh
+        # is recorded as such
+        assert calls == pulled
+        assert ("http://tt.local", "tt-key") == pulled[0][:2]
+        info = get_cache_info('stats')
+        assert info['params']['time_range'] == '7' and info['params']['refresh_type'] == 'daily_auto'
+    finally:
+        clear_cache()
+        conn = sqlite3.connect(config.DB_PATH)
+        conn.execute("UPDATE settings SET tautulli_url = '', tautulli_api = '' WHERE id = 1")
+        conn.commit()
+        conn.close()
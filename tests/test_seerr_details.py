@@ -0,0 +1,95 @@
+"""Seerr request enrichment: concurrent detail lookups behind a persistent
+TMDB-id cache with negative entries for failures."""
+import requests
+
+from app.clients import seerr
+from app.db import db_connect
+
+
+class _Resp:
+    def __init__(self, payload=None, status=200):
+        self._payload = payload
+        self.status_code = status
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}")
+
+    def json(self):
+        return self._payload
+
+
+def _request(tmdb_id, media_type="movie", status=1):
+    return {"status": status, "createdAt": "2026-01-01", "requestedBy": {"displayName": "ann"},
+            "media": {"mediaType": media_type, "tmdbId": tmdb_id, "status": 2}}
+
+
+def _fake_seerr(monkeypatch, results, failing=()):
+    calls = []
+
+    def fake_get(url, params=None, headers=None, **kwargs):
+        calls.append(url)
+        if url.endswith("/api/v1/request"):
+            return _Resp({"results": results})
+        tmdb_id = int(url.rsplit("/", 1)[1])
+        if tmdb_id in failing:
+            return _Resp(status=500)
+        return _Resp({"title": f"Movie {tmdb_id}", "name": f"Show {tmdb_id}", "releaseDate": "2026-05-01", "posterPath": f"/p{tmdb_id}.jpg"})
+
+    monkeypatch.setattr(seerr, "safe_get", fake_get)
+    return calls
+
+
+def _clear_details():
+    conn = db_connect()
+    conn.execute("DELETE FROM seerr_details")
+    conn.commit()
+    conn.close()
+
+
+def test_second_pull_is_served_from_the_detail_cache(app, monkeypatch):
+    _clear_details()
+    results = [_request(i) for i in range(1, 13)] + [_request(1), _request(99, "tv")]
+    calls = _fake_seerr(monkeypatch, results)
+
+    entries, error = seerr.fetch_seerr_requests("http://seerr", "key")
+    assert error is None
+    assert [e["title"] for e in entries][:2] == ["Movie 1", "Movie 2"]
+    assert entries[-1]["title"] == "Show 99"
+    # one list call plus one lookup per distinct id, duplicates collapsed
+    assert len(calls) == 1 + 13
+
+    calls.clear()
+    again, _ = seerr.fetch_seerr_requests("http://seerr", "key")
+    assert again == entries
+    assert calls == ["http://seerr/api/v1/request"]
+
+
+def test_failed_lookups_are_negatively_cached(app, monkeypatch):
+    _clear_details()
+    calls = _fake_seerr(monkeypatch, [_request(7)], failing={7})
+
+    entries, _ = seerr.fetch_seerr_requests("http://seerr", "key")
+    assert entries[0]["title"] == "Unknown"
+
+    calls.clear()
+    seerr.fetch_seerr_requests("http://seerr", "key")
+    assert calls == ["http://seerr/api/v1/request"]
+
+    # once the failure TTL lapses the id is retried
+    monkeypatch.setattr(seerr, "DETAIL_FAILURE_TTL", 0)
+    calls.clear()
+    seerr.fetch_seerr_requests("http://seerr", "key")
+    assert len(calls) == 2
+
+
+def test_progress_reports_only_network_lookups(app, monkeypatch):
+    _clear_details()
+    _fake_seerr(monkeypatch, [_request(1), _request(2)])
+    seen = []
+    seerr.fetch_seerr_requests("http://seerr", "key", progress_cb=lambda done, total: seen.append((done, total)))
+    assert seen[0] == (0, 2) and seen[-1] == (2, 2)
+
+    seen.clear()
+    seerr.fetch_seerr_requests("http://seerr", "key", progress_cb=lambda done, total: seen.append((done, total)))
+    assert seen == []
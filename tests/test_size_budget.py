@@ -0,0 +1,89 @@
+"""The size budget pass (app/emails/optimize.py): an assembled message over
+budget has its inline images re-encoded, mildest step first, until it fits."""
+
+import io
+
+from email.mime.image import MIMEImage
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from PIL import Image
+
+from app.emails import optimize
+
+HTML = "<p>hello</p>"
+PLAIN = "hello"
+SIZES = (len(HTML), len(PLAIN))
+
+
+def _png(size, mode="RGB"):
+    """Noise, so PNG cannot compress it away."""
+    img = Image.merge(mode, [Image.effect_noise(size, 60 + 10 * i) for i in range(len(mode))])
+    out = io.BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+def _message(*images):
+    root = MIMEMultipart("related")
+    alt = MIMEMultipart("alternative")
+    alt.attach(MIMEText(PLAIN, "plain", "utf-8"))
+    alt.attach(MIMEText(HTML, "html", "utf-8"))
+    root.attach(alt)
+    for i, data in enumerate(images):
+        part = MIMEImage(data, _subtype="png")
+        part.add_header("Content-ID", f"<img{i}@x>")
+        part.add_header("Content-Disposition", "inline", filename=f"img{i}.png")
+        root.attach(part)
+    return root
+
+
+def _size(root):
+    return optimize.fit_to_budget(root, 0, SIZES)["before"]
+
+
+def test_a_message_within_budget_is_left_alone():
+    root = _message(_png((200, 300)))
+    report = optimize.fit_to_budget(root, 10 * 1024 * 1024, SIZES)
+    assert report["fits"] and report["changes"] == []
+    assert report["before"] == report["after"]
+    assert root.get_payload()[1].get_content_type() == "image/png"
+
+
+def test_the_measure_matches_the_encoded_message():
+    root = _message(_png((200, 300)), _png((120, 80)))
+    assert abs(_size(root) - len(root.as_string())) < 2048
+
+
+def test_an_opaque_png_becomes_a_jpeg_under_the_same_cid():
+    root = _message(_png((400, 600)), _png((100, 100)))
+    before = _size(root)
+    report = optimize.fit_to_budget(root, before - 100 * 1024, SIZES)
+    assert report["fits"] and report["after"] < report["budget"]
+    # the larger image alone was enough, at the mildest step
+    [change] = report["changes"]
+    assert change["filename"] == "img0.png" and change["to"] == "image/jpeg"
+    assert (change["quality"], change["max_side"]) == optimize.STEPS[0]
+    part = root.get_payload()[1]
+    assert part["Content-ID"] == "<img0@x>"
+    assert part.get_content_type() == "image/jpeg" and part.get_filename() == "img0.jpeg"
+    assert root.get_payload()[2].get_content_type() == "image/png"
+
+
+def test_transparency_is_kept_and_only_clamped():
+    root = _message(_png((1400, 1400), mode="RGBA"))
+    report = optimize.fit_to_budget(root, 3 * 1024 * 1024, SIZES)
+    [change] = report["changes"]
+    assert change["to"] == "image/png" and change["max_side"] is not None
+    img = Image.open(io.BytesIO(root.get_payload()[1].get_payload(decode=True)))
+    assert img.mode == "RGBA" and max(img.size) == change["max_side"]
+
+
+def test_an_unreachable_budget_applies_every_step_and_says_so():
+    root = _message(_png((800, 1200)))
+    report = optimize.fit_to_budget(root, 1024, SIZES)
+    assert not report["fits"]
+    [change] = report["changes"]
+    assert (change["quality"], change["max_side"]) == optimize.STEPS[-1]
+    img = Image.open(io.BytesIO(root.get_payload()[1].get_payload(decode=True)))
+    assert max(img.size) == optimize.STEPS[-1][1]
@@ -50,7 +50,8 @@ def wired(monkeypatch):
 
 def test_stale_libraries_are_never_fetched(wired):
     plex.fetch_recently_added_using_plex_sdk("http://tautulli", "key", 10)
-    assert wired == [("movie", "1"), ("show", "2")]
+    # libraries are fetched concurrently, so only the set of calls is stable
+    assert sorted(wired) == [("movie", "1"), ("show", "2")]
 
 def test_stale_libraries_are_reported_with_their_names(wired):
     plex.fetch_recently_added_using_plex_sdk("http://tautulli", "key", 10)
@@ -72,7 +73,7 @@ def test_unknown_section_list_falls_back_to_attempting_everything(wired, monkeyp
     # nothing is filtered and the per-section error handling runs as before.
     monkeypatch.setattr(plex, "fetch_library_sections_with_genres", lambda **kw: [])
     plex.fetch_recently_added_using_plex_sdk("http://tautulli", "key", 10)
-    assert wired == [("movie", "1"), ("show", "2"), ("movie", "20"), ("artist", "5")]
+    assert sorted(wired) == sorted([("movie", "1"), ("show", "2"), ("movie", "20"), ("artist", "5")])
 
 def test_non_plex_library_types_are_not_filtered(monkeypatch):
     # Photo libraries and the like never reach Plex here, they go through the
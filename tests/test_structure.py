@@ -24,9 +24,11 @@ EXPECTED_RULES = [
     "/api/test/radarr",
     "/api/test/sonarr",
     "/api/test/tautulli",
+    "/cache_stats",
     "/cache_status",
     "/clear_cache",
     "/csp-report",
+    "/datasets/<name>",
     "/delete-logo",
     "/email_history",
     "/email_history/clear",
@@ -62,6 +64,9 @@ EXPECTED_RULES = [
     "/proxy-sonarr-art/<path:art_path>",
     "/pull_coming_soon",
     "/pull_droppedneedle_stats",
+    "/pull_jobs",
+    "/pull_jobs/<job_id>",
+    "/pull_jobs/<job_id>/result",
     "/pull_ombi_requests",
     "/pull_seerr_requests",
     "/pull_progress",
@@ -0,0 +1,131 @@
+"""Identical upstream GETs share one request (security.safe_get with
+coalesce=<service>), and a successful response is briefly reused."""
+
+import threading
+import time
+
+import pytest
+import requests
+
+from app import config, security
+
+
+class _Response:
+    def __init__(self, payload, status=200):
+        self._payload = payload
+        self.status_code = status
+        self.ok = status < 400
+        self.content = b"{}"
+
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture()
+def upstream(monkeypatch):
+    """A slow fake requests.get. Returns (calls, release): calls records every
+    URL that reached the network, release lets the pending calls finish."""
+    calls = []
+    release = threading.Event()
+
+    def _get(url, timeout=None, **kw):
+        calls.append((url, kw.get("params")))
+        release.wait(5)
+        if "fail" in url:
+            raise requests.ConnectionError("down")
+        return _Response({"n": len(calls)})
+
+    monkeypatch.setattr(security.requests, "get", _get)
+    monkeypatch.setattr(config, "UPSTREAM_SHARE_SECONDS", 5)
+    security._shared.clear()
+    yield calls, release
+    release.set()
+    security._shared.clear()
+
+
+def _settle(calls):
+    # let the first caller reach the network and the rest queue behind it
+    while not calls:
+        time.sleep(0.01)
+    time.sleep(0.2)
+
+
+def _concurrently(fn, n=5):
+    results = [None] * n
+    errors = [None] * n
+
+    def run(i):
+        try:
+            results[i] = fn()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def test_concurrent_identical_calls_share_one_request(upstream):
+    calls, release = upstream
+    threads, results, errors = _concurrently(
+        lambda: security.safe_get("http://tautulli/api/v2?cmd=get_users&apikey=k", coalesce="tautulli"))
+    _settle(calls)
+    release.set()
+    for t in threads:
+        t.join()
+    assert errors == [None] * 5
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_query_order_and_params_are_normalized(upstream):
+    calls, release = upstream
+    release.set()
+    security.safe_get("http://tautulli/api/v2?cmd=get_users&apikey=k", coalesce="tautulli")
+    security.safe_get("http://tautulli/api/v2?apikey=k&cmd=get_users", coalesce="tautulli")
+    security.safe_get("http://jw/stats", params={"a": 1, "b": 2}, coalesce="jellywatch")
+    security.safe_get("http://jw/stats", params={"b": "2", "a": "1"}, coalesce="jellywatch")
+    assert len(calls) == 2
+
+
+def test_different_params_or_services_are_separate_requests(upstream):
+    calls, release = upstream
+    release.set()
+    security.safe_get("http://jw/stats", params={"days": 7}, coalesce="jellywatch")
+    security.safe_get("http://jw/stats", params={"days": 30}, coalesce="jellywatch")
+    security.safe_get("http://jw/stats", params={"days": 7}, coalesce="playback_reporting")
+    security.safe_get("http://jw/stats", params={"days": 7})
+    assert len(calls) == 4
+
+
+def test_share_window_expires(upstream, monkeypatch):
+    calls, release = upstream
+    release.set()
+    monkeypatch.setattr(config, "UPSTREAM_SHARE_SECONDS", 0)
+    security.safe_get("http://sonarr/api/v3/calendar", coalesce="sonarr")
+    security.safe_get("http://sonarr/api/v3/calendar", coalesce="sonarr")
+    assert len(calls) == 2
+
+
+def test_failures_reach_every_waiter_and_are_not_reused(upstream):
+    calls, release = upstream
+    threads, results, errors = _concurrently(
+        lambda: security.safe_get("http://plex/fail", retries=0, coalesce="plex"), n=3)
+    _settle(calls)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(isinstance(e, requests.ConnectionError) for e in errors)
+    with pytest.raises(requests.ConnectionError):
+        security.safe_get("http://plex/fail", retries=0, coalesce="plex")
+    assert len(calls) == 2
+
+
+def test_streamed_requests_are_never_shared(upstream):
+    calls, release = upstream
+    release.set()
+    security.safe_get("http://plex/photo", stream=True, coalesce="plex")
+    security.safe_get("http://plex/photo", stream=True, coalesce="plex")
+    assert len(calls) == 2